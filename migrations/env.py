@@ -25,6 +25,12 @@ if config.config_file_name is not None:
 from weathersched.domain.weather.current import models
 from weathersched.domain.weather.forecast import models
 from weathersched.domain.weather.weather_alerts import models
+from weathersched.domain.weather.rollups import models
+from weathersched.domain.weather.forecast_scores import models
+from weathersched.domain.weather.observation_changes import models
+from weathersched.domain.watermark import models
+from weathersched.domain.collector_lease import models
+from weathersched.domain.backfill_checkpoint import models
 from weathersched.domain.location import models
 from weathersched.core.db import Base
 
@@ -0,0 +1,82 @@
+"""compress forecast json
+
+Revision ID: 7c1e4b2d9f30
+Revises: 46a9b9ba9cca
+Create Date: 2026-10-19 09:12:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from weathersched.core.db.types import CompressedJSON, decompress_json
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1e4b2d9f30'
+down_revision: Union[str, None] = '46a9b9ba9cca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE: str = "weatherapi_forecast_json"
+## Rows converted per round trip, keeps memory flat on large tables
+BATCH_SIZE: int = 1000
+
+
+def _convert(source: sa.Column, target: sa.Column, convert) -> None:
+    """Copy `source` into `target` in batches, applying `convert` to each value."""
+    conn = op.get_bind()
+    table = sa.table(TABLE, sa.column("id", sa.Integer), source, target)
+
+    last_id: int = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, source)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        values: list[dict] = [
+            {"_id": row_id, target.name: convert(value)}
+            for row_id, value in rows
+            if value is not None
+        ]
+        if values:
+            conn.execute(table.update().where(table.c.id == sa.bindparam("_id")), values)
+
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.add_column(sa.Column("forecast_json_compressed", sa.LargeBinary(), nullable=True))
+
+    _convert(
+        sa.column("forecast_json", sa.JSON()),
+        sa.column("forecast_json_compressed", sa.LargeBinary()),
+        ## Compress with the codec & level configured in the database settings
+        lambda value: CompressedJSON().process_bind_param(value, dialect=None),
+    )
+
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.drop_column("forecast_json")
+        batch_op.alter_column("forecast_json_compressed", new_column_name="forecast_json")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.add_column(sa.Column("forecast_json_uncompressed", sa.JSON(), nullable=True))
+
+    _convert(
+        sa.column("forecast_json", sa.LargeBinary()),
+        sa.column("forecast_json_uncompressed", sa.JSON()),
+        decompress_json,
+    )
+
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.drop_column("forecast_json")
+        batch_op.alter_column("forecast_json_uncompressed", new_column_name="forecast_json")
@@ -0,0 +1,53 @@
+"""current weather unique per location
+
+Revision ID: a61f0c9d4e28
+Revises: e3a9c5f17b02
+Create Date: 2026-10-19 15:06:51.203448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a61f0c9d4e28'
+down_revision: Union[str, None] = 'e3a9c5f17b02'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE: str = "weatherapi_current_weather"
+OLD_COLUMNS: list[str] = ["last_updated_epoch"]
+NEW_COLUMNS: list[str] = ["location_id", "last_updated_epoch"]
+NEW_NAME: str = "uq_current_weather_location_epoch"
+
+## The old constraint was created without a name. On SQLite, batch mode names reflected constraints with
+#  this convention so they can be dropped.
+NAMING_CONVENTION: dict[str, str] = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def _unique_constraint_name(columns: list[str]) -> str:
+    for constraint in sa.inspect(op.get_bind()).get_unique_constraints(TABLE):
+        if constraint["column_names"] == columns and constraint["name"]:
+            return constraint["name"]
+
+    return NAMING_CONVENTION["uq"] % {"table_name": TABLE, "column_0_name": columns[0]}
+
+
+def upgrade() -> None:
+    old_name: str = _unique_constraint_name(OLD_COLUMNS)
+
+    with op.batch_alter_table(TABLE, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(old_name, type_="unique")
+        batch_op.create_unique_constraint(NEW_NAME, NEW_COLUMNS)
+
+
+def downgrade() -> None:
+    ## Fails if two locations have an observation with the same last_updated_epoch
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.drop_constraint(NEW_NAME, type_="unique")
+        batch_op.create_unique_constraint(
+            NAMING_CONVENTION["uq"] % {"table_name": TABLE, "column_0_name": OLD_COLUMNS[0]},
+            OLD_COLUMNS,
+        )
@@ -0,0 +1,87 @@
+"""measurement storage
+
+Revision ID: b4d82a6e1c57
+Revises: 7c1e4b2d9f30
+Create Date: 2026-10-19 10:03:27.540311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d82a6e1c57'
+down_revision: Union[str, None] = '7c1e4b2d9f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+## Measurement columns, by table. These were created as NUMERIC(12, 2).
+MEASUREMENT_COLUMNS: dict[str, list[str]] = {
+    "weatherapi_current_weather": [
+        "temp_c",
+        "temp_f",
+        "wind_mph",
+        "wind_kph",
+        "pressure_mb",
+        "pressure_in",
+        "precip_mm",
+        "precip_in",
+        "feelslike_c",
+        "feelslike_f",
+        "windchill_c",
+        "windchill_f",
+        "heatindex_c",
+        "heatindex_f",
+        "dewpoint_c",
+        "dewpoint_f",
+        "vis_km",
+        "uv",
+        "gust_mph",
+        "gust_kph",
+    ],
+    "weatherapi_air_quality": ["co", "no2", "o3", "so2", "pm2_5", "pm10"],
+}
+
+
+def _convert_to_numeric() -> None:
+    """Convert measurement columns that are not NUMERIC back to NUMERIC(12, 2).
+
+    Storage other than NUMERIC is applied outside of migrations, with
+    weathersched.core.db.measurement_storage.alter_measurement_storage(), so this
+    revision does not depend on DB_MEASUREMENT_STORAGE.
+    """
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    numeric_type = sa.NUMERIC(precision=12, scale=2)
+
+    for table, columns in MEASUREMENT_COLUMNS.items():
+        existing: dict = {c["name"]: c["type"] for c in inspector.get_columns(table)}
+        pending: list[str] = [
+            column
+            for column in columns
+            if isinstance(existing[column], sa.Float)
+            or not isinstance(existing[column], sa.Numeric)
+        ]
+        if not pending:
+            continue
+
+        with op.batch_alter_table(table) as batch_op:
+            for column in pending:
+                batch_op.alter_column(
+                    column,
+                    existing_type=existing[column],
+                    type_=numeric_type,
+                    postgresql_using=f"{column}::NUMERIC(12, 2)",
+                )
+
+
+def upgrade() -> None:
+    ## Measurements stay NUMERIC(12, 2), only the Python type (Decimal -> float) changed.
+    #  Databases upgraded with an earlier version of this revision may have float columns.
+    _convert_to_numeric()
+
+
+def downgrade() -> None:
+    _convert_to_numeric()
@@ -0,0 +1,34 @@
+"""forecast json hash
+
+Revision ID: d85f2b7a4c13
+Revises: a61f0c9d4e28
+Create Date: 2026-10-19 16:42:08.517392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd85f2b7a4c13'
+down_revision: Union[str, None] = 'a61f0c9d4e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE: str = "weatherapi_forecast_json"
+INDEX: str = "ix_weatherapi_forecast_json_forecast_hash"
+
+
+def upgrade() -> None:
+    ## Existing rows keep a NULL hash, only newly saved forecasts are deduplicated
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.add_column(sa.Column("forecast_hash", sa.VARCHAR(length=64), nullable=True))
+        batch_op.create_index(INDEX, ["forecast_hash"], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.drop_index(INDEX)
+        batch_op.drop_column("forecast_hash")
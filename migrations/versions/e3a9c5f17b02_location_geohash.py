@@ -0,0 +1,63 @@
+"""location geohash
+
+Revision ID: e3a9c5f17b02
+Revises: b4d82a6e1c57
+Create Date: 2026-10-19 11:42:08.114630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from weathersched.domain.location.geo import geohash_encode
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a9c5f17b02'
+down_revision: Union[str, None] = 'b4d82a6e1c57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GEOHASH_PRECISION: int = 9
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("weatherapi_location") as batch_op:
+        batch_op.add_column(sa.Column("geohash", sa.VARCHAR(GEOHASH_PRECISION), nullable=True))
+        batch_op.create_index("ix_weatherapi_location_geohash", ["geohash"], unique=False)
+
+    ## Backfill existing locations
+    location = sa.table(
+        "weatherapi_location",
+        sa.column("id", sa.Integer()),
+        sa.column("lat", sa.Float()),
+        sa.column("lon", sa.Float()),
+        sa.column("geohash", sa.VARCHAR(GEOHASH_PRECISION)),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(location.c.id, location.c.lat, location.c.lon).where(
+            location.c.lat.is_not(None), location.c.lon.is_not(None)
+        )
+    ).all()
+
+    if rows:
+        conn.execute(
+            location.update()
+            .where(location.c.id == sa.bindparam("_id"))
+            .values(geohash=sa.bindparam("_geohash")),
+            [
+                {
+                    "_id": row.id,
+                    "_geohash": geohash_encode(float(row.lat), float(row.lon), precision=GEOHASH_PRECISION),
+                }
+                for row in rows
+            ],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("weatherapi_location") as batch_op:
+        batch_op.drop_index("ix_weatherapi_location_geohash")
+        batch_op.drop_column("geohash")
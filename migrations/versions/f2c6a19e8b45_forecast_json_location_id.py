@@ -0,0 +1,93 @@
+"""forecast json location id
+
+Revision ID: f2c6a19e8b45
+Revises: d85f2b7a4c13
+Create Date: 2026-10-19 18:21:37.904116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from weathersched.core.db.types import CompressedJSON
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c6a19e8b45'
+down_revision: Union[str, None] = 'd85f2b7a4c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE: str = "weatherapi_forecast_json"
+LOCATION_TABLE: str = "weatherapi_location"
+INDEX: str = "ix_weatherapi_forecast_json_location_id_id"
+FOREIGN_KEY: str = "fk_weatherapi_forecast_json_location_id"
+## Rows read per round trip, keeps memory flat on large tables
+BATCH_SIZE: int = 1000
+
+
+def _backfill_location_ids() -> None:
+    """Set `location_id` on stored forecasts from the location in each response, in batches."""
+    conn = op.get_bind()
+    table = sa.table(
+        TABLE,
+        sa.column("id", sa.Integer),
+        sa.column("forecast_json", sa.LargeBinary),
+        sa.column("location_id", sa.Integer),
+    )
+    locations = sa.table(
+        LOCATION_TABLE,
+        sa.column("id", sa.Integer),
+        sa.column("name", sa.String),
+        sa.column("country", sa.String),
+    )
+    location_ids: dict[tuple[str, str], int] = {
+        (name, country): location_id
+        for location_id, name, country in conn.execute(
+            sa.select(locations.c.id, locations.c.name, locations.c.country)
+        )
+    }
+    compressed = CompressedJSON()
+
+    last_id: int = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, table.c.forecast_json)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        values: list[dict] = []
+        for row_id, value in rows:
+            forecast_json: dict = compressed.process_result_value(value, dialect=None) or {}
+            location: dict = forecast_json.get("location") or {}
+            location_id: int | None = location_ids.get(
+                (location.get("name"), location.get("country"))
+            )
+            if location_id is not None:
+                values.append({"_id": row_id, "location_id": location_id})
+
+        if values:
+            conn.execute(table.update().where(table.c.id == sa.bindparam("_id")), values)
+
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.add_column(sa.Column("location_id", sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(FOREIGN_KEY, LOCATION_TABLE, ["location_id"], ["id"])
+        batch_op.create_index(INDEX, ["location_id", "id"], unique=False)
+
+    _backfill_location_ids()
+
+
+def downgrade() -> None:
+    with op.batch_alter_table(TABLE) as batch_op:
+        batch_op.drop_index(INDEX)
+        batch_op.drop_constraint(FOREIGN_KEY, type_="foreignkey")
+        batch_op.drop_column("location_id")
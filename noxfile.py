@@ -269,6 +269,61 @@ def initialize_database(session: nox.Session):
         session.run("python", script_path)
 
 
+#########
+# Tests #
+#########
+
+
+@nox.session(python=PY_VERSIONS, name="tests", tags=["test"])
+def run_tests(session: nox.Session):
+    install_uv_project(session)
+    session.install("pytest", "pytest-benchmark")
+
+    log.info("Running tests (benchmarks run once each, without timing)")
+    session.run("pytest", "tests", "--benchmark-disable")
+
+
+@nox.session(python=[DEFAULT_PYTHON], name="benchmarks", tags=["test", "benchmark"])
+def run_benchmarks(session: nox.Session):
+    install_uv_project(session)
+    session.install("pytest", "pytest-benchmark")
+
+    log.info("Running benchmarks against the local WeatherAPI stand-in")
+    session.run(
+        "pytest",
+        "tests/benchmarks",
+        "--benchmark-only",
+        "--benchmark-autosave",
+        "--benchmark-columns=min,mean,median,max,rounds",
+    )
+
+
+@nox.session(name="db-retention", tags=["db"])
+def apply_db_retention(session: nox.Session):
+    install_uv_project(session)
+
+    script_path = Path("./scripts/db_retention.py")
+
+    if not script_path.exists():
+        log.error(f"Could not find path: {script_path}")
+    else:
+        log.info("Running db_retention.py script")
+        session.run("python", script_path)
+
+
+@nox.session(name="db-measurement-storage", tags=["db"])
+def convert_db_measurement_storage(session: nox.Session):
+    install_uv_project(session)
+
+    script_path = Path("./scripts/db_measurement_storage.py")
+
+    if not script_path.exists():
+        log.error(f"Could not find path: {script_path}")
+    else:
+        log.info("Running db_measurement_storage.py script")
+        session.run("python", script_path)
+
+
 ###############
 # Code checks #
 ###############
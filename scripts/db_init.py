@@ -13,9 +13,15 @@ from weathersched.core.depends.db_depends import (
     get_db_uri,
     get_session_pool,
 )
+from weathersched.domain.backfill_checkpoint import models
+from weathersched.domain.collector_lease import models
 from weathersched.domain.location import models
+from weathersched.domain.watermark import models
 from weathersched.domain.weather.current import models
 from weathersched.domain.weather.forecast import models
+from weathersched.domain.weather.forecast_scores import models
+from weathersched.domain.weather.observation_changes import models
+from weathersched.domain.weather.rollups import models
 from weathersched.domain.weather.weather_alerts import models
 
 import sqlalchemy as sa
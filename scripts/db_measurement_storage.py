@@ -0,0 +1,35 @@
+"""Convert existing measurement columns to the storage set in DB_MEASUREMENT_STORAGE."""
+
+from __future__ import annotations
+
+import logging
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import setup
+from weathersched.core.db import alter_measurement_storage
+from weathersched.core.db.settings import DB_SETTINGS
+from weathersched.core.depends.db_depends import get_db_engine
+from weathersched.domain.weather.current import models
+
+import sqlalchemy as sa
+
+def main(engine: sa.Engine):
+    storage: str = DB_SETTINGS.get("DB_MEASUREMENT_STORAGE", default="numeric")
+    log.info(f"Converting measurement columns to '{storage}' storage")
+
+    altered: dict[str, list[str]] = alter_measurement_storage(
+        engine=engine, storage=storage
+    )
+
+    if not altered:
+        log.info("Measurement columns already use the configured storage.")
+
+    for table, columns in altered.items():
+        log.info(f"[{table}] converted: {', '.join(columns)}")
+
+
+if __name__ == "__main__":
+    setup.setup_logging()
+
+    main(engine=get_db_engine())
@@ -0,0 +1,34 @@
+"""Apply the retention policies configured in DB_SETTINGS to the weather database."""
+
+from __future__ import annotations
+
+import logging
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import setup
+from weathersched.core.db import apply_retention, load_retention_policies
+from weathersched.core.depends.db_depends import get_db_engine
+from weathersched.domain.location import models
+from weathersched.domain.watermark import models
+from weathersched.domain.weather.current import models
+from weathersched.domain.weather.forecast import models
+from weathersched.domain.weather.rollups import models
+from weathersched.domain.weather.weather_alerts import models
+
+import sqlalchemy as sa
+
+def main(engine: sa.Engine):
+    policies = load_retention_policies()
+    log.info(f"Applying [{len(policies)}] retention policy(ies)")
+
+    results: dict[str, int] = apply_retention(engine=engine, policies=policies)
+
+    for table, removed in results.items():
+        log.info(f"[{table}] removed: {removed}")
+
+
+if __name__ == "__main__":
+    setup.setup_logging()
+
+    main(engine=get_db_engine())
@@ -1,4 +1,6 @@
 from __future__ import annotations
 
 def main() -> None:
-    print("Hello from weathersched!")
+    from weathersched import cli
+
+    raise SystemExit(cli.main())
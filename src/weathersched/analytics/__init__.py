@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+from . import compare, frames, ops, scoring
+from .compare import (
+    ForecastComparison,
+    align_nearest,
+    compare_forecast_to_observations,
+    error_by_lead,
+)
+from .frames import (
+    DEFAULT_FIELDS,
+    ForecastFrame,
+    ObservationFrame,
+    load_forecast_hours,
+    load_observations,
+)
+from .ops import anomaly_zscores, dewpoint_c, heat_index_c, moving_average
+from .scoring import SCORE_FIELDS, score_forecasts
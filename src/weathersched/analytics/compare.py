@@ -0,0 +1,204 @@
+"""Compare forecasts to the observations they predicted."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from .frames import ForecastFrame, ObservationFrame
+
+import numpy as np
+
+## Epochs fit in 32 bits until 2106, so (group, epoch) pairs pack into one sortable int64 key
+_EPOCH_BITS: int = 32
+
+
+def _composite_keys(groups: np.ndarray, epochs: np.ndarray) -> np.ndarray:
+    return (np.asarray(groups, dtype=np.int64) << _EPOCH_BITS) | np.asarray(
+        epochs, dtype=np.int64
+    )
+
+
+def align_nearest(
+    target_groups: np.ndarray,
+    target_epochs: np.ndarray,
+    source_groups: np.ndarray,
+    source_epochs: np.ndarray,
+    tolerance: int = 1800,
+) -> np.ndarray:
+    """For each target row, find the source row of the same group with the nearest epoch.
+
+    Description:
+        A vectorized "merge as-of nearest": both sides are reduced to sorted `(group, epoch)` keys &
+        matched with a single `np.searchsorted`, so aligning years of data is a few passes over the arrays.
+
+    Params:
+        target_groups (np.ndarray): Group key of each target row, i.e. location IDs of forecast hours.
+        target_epochs (np.ndarray): Epoch of each target row.
+        source_groups (np.ndarray): Group key of each source row, i.e. location IDs of observations.
+        source_epochs (np.ndarray): Epoch of each source row. Source rows must be sorted by group, then epoch.
+        tolerance (int): (default: 1800) Maximum distance, in seconds, between matched rows.
+
+    Returns:
+        (np.ndarray): Index of the matched source row for each target row, or -1 where there is no match.
+
+    """
+    source_keys: np.ndarray = _composite_keys(source_groups, source_epochs)
+    target_keys: np.ndarray = _composite_keys(target_groups, target_epochs)
+
+    matches: np.ndarray = np.full(len(target_keys), -1, dtype=np.int64)
+    if len(source_keys) == 0 or len(target_keys) == 0:
+        return matches
+
+    right: np.ndarray = np.searchsorted(source_keys, target_keys, side="left")
+    left: np.ndarray = right - 1
+    right = np.minimum(right, len(source_keys) - 1)
+    left = np.maximum(left, 0)
+
+    target_groups = np.asarray(target_groups, dtype=np.int64)
+    target_epochs = np.asarray(target_epochs, dtype=np.int64)
+    source_groups = np.asarray(source_groups, dtype=np.int64)
+    source_epochs = np.asarray(source_epochs, dtype=np.int64)
+
+    ## Candidates in another group are never a match
+    big: np.int64 = np.iinfo(np.int64).max
+    left_distance: np.ndarray = np.where(
+        source_groups[left] == target_groups,
+        np.abs(source_epochs[left] - target_epochs),
+        big,
+    )
+    right_distance: np.ndarray = np.where(
+        source_groups[right] == target_groups,
+        np.abs(source_epochs[right] - target_epochs),
+        big,
+    )
+
+    nearest: np.ndarray = np.where(left_distance <= right_distance, left, right)
+    distance: np.ndarray = np.minimum(left_distance, right_distance)
+
+    return np.where(distance <= tolerance, nearest, matches)
+
+
+@dataclass
+class ForecastComparison:
+    """Forecast hours paired with the observation nearest to each hour.
+
+    Params:
+        location_ids (np.ndarray): Location ID of each pair.
+        epochs (np.ndarray): Epoch of the forecast hour.
+        lead_hours (np.ndarray): Hours between the forecast being issued & the forecast hour.
+        forecast (dict[str, np.ndarray]): Forecast value of each measurement.
+        observed (dict[str, np.ndarray]): Observed value of each measurement.
+    """
+
+    location_ids: np.ndarray
+    epochs: np.ndarray
+    lead_hours: np.ndarray
+    forecast: dict[str, np.ndarray] = field(default_factory=dict)
+    observed: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def errors(self, name: str) -> np.ndarray:
+        """Forecast minus observed value of a measurement. Positive errors are over-forecasts."""
+        return self.forecast[name] - self.observed[name]
+
+
+def compare_forecast_to_observations(
+    forecast: ForecastFrame,
+    observations: ObservationFrame,
+    fields: t.Sequence[str] | None = None,
+    tolerance: int = 1800,
+) -> ForecastComparison:
+    """Pair each forecast hour with the nearest observation for the same location.
+
+    Params:
+        forecast (ForecastFrame): Forecast hours.
+        observations (ObservationFrame): Observations, sorted by location & epoch.
+        fields (Sequence[str] | None): Measurements to compare. Defaults to all measurements in both frames.
+        tolerance (int): (default: 1800) Maximum distance, in seconds, between a forecast hour & its observation.
+
+    Returns:
+        (ForecastComparison): The matched pairs. Forecast hours without an observation are dropped.
+
+    """
+    if fields is None:
+        fields = [name for name in forecast.values if name in observations.values]
+
+    matches: np.ndarray = align_nearest(
+        target_groups=forecast.location_ids,
+        target_epochs=forecast.epochs,
+        source_groups=observations.location_ids,
+        source_epochs=observations.epochs,
+        tolerance=tolerance,
+    )
+    matched: np.ndarray = matches >= 0
+    source_rows: np.ndarray = matches[matched]
+
+    return ForecastComparison(
+        location_ids=forecast.location_ids[matched],
+        epochs=forecast.epochs[matched],
+        lead_hours=forecast.lead_hours[matched],
+        forecast={name: forecast.values[name][matched] for name in fields},
+        observed={name: observations.values[name][source_rows] for name in fields},
+    )
+
+
+def error_by_lead(
+    errors: np.ndarray,
+    lead_hours: np.ndarray,
+    location_ids: np.ndarray | None = None,
+) -> dict[str, np.ndarray]:
+    """Aggregate forecast errors per lead time, optionally per location.
+
+    Params:
+        errors (np.ndarray): Forecast minus observed value of each pair. `NaN` errors are skipped.
+        lead_hours (np.ndarray): Lead time, in hours, of each pair.
+        location_ids (np.ndarray | None): Location ID of each pair. When provided, errors are aggregated
+            per (location, lead time) instead of per lead time.
+
+    Returns:
+        (dict[str, np.ndarray]): `lead_hours` (& `location_id`), `count`, `sum`, `sum_abs` & `sum_sq` for each
+            group with at least one error, plus the derived `mae`, `rmse` & `bias`.
+
+    """
+    errors = np.asarray(errors, dtype=np.float64)
+    present: np.ndarray = ~np.isnan(errors)
+    errors = errors[present]
+
+    lead_hours = np.asarray(lead_hours, dtype=np.int64)[present]
+    if location_ids is None:
+        keys, inverse = np.unique(lead_hours, return_inverse=True)
+        groups: dict[str, np.ndarray] = {"lead_hours": keys}
+    else:
+        stacked: np.ndarray = np.stack(
+            (np.asarray(location_ids, dtype=np.int64)[present], lead_hours), axis=1
+        )
+        keys, inverse = np.unique(stacked, axis=0, return_inverse=True)
+        groups: dict[str, np.ndarray] = {
+            "location_id": keys[:, 0],
+            "lead_hours": keys[:, 1],
+        }
+
+    inverse = inverse.ravel()
+    n: int = len(keys)
+
+    count: np.ndarray = np.bincount(inverse, minlength=n)
+    total: np.ndarray = np.bincount(inverse, weights=errors, minlength=n)
+    total_abs: np.ndarray = np.bincount(inverse, weights=np.abs(errors), minlength=n)
+    total_sq: np.ndarray = np.bincount(inverse, weights=errors * errors, minlength=n)
+
+    return {
+        **groups,
+        "count": count,
+        "sum": total,
+        "sum_abs": total_abs,
+        "sum_sq": total_sq,
+        "mae": total_abs / count,
+        "rmse": np.sqrt(total_sq / count),
+        "bias": total / count,
+    }
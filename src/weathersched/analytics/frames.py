@@ -0,0 +1,263 @@
+"""Load observation & forecast history into columnar NumPy arrays.
+
+Description:
+    Rows are fetched with a single `execute(...).fetchall()` & converted to arrays column by column,
+    skipping ORM object construction entirely. Frames are sorted by location & epoch, which the
+    vectorized operations in `weathersched.analytics.ops` rely on.
+
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import datetime as dt
+import importlib.util
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.domain.location.models import LocationModel
+from weathersched.domain.weather.current.models import CurrentWeatherModel
+from weathersched.domain.weather.forecast.models import ForecastJSONModel
+
+import numpy as np
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+## Measurements loaded when no fields are requested
+DEFAULT_FIELDS: tuple[str, ...] = (
+    "temp_c",
+    "humidity",
+    "wind_kph",
+    "precip_mm",
+    "pressure_mb",
+    "dewpoint_c",
+    "heatindex_c",
+)
+
+
+@dataclass
+class ObservationFrame:
+    """Columnar observation history, sorted by location & epoch.
+
+    Params:
+        location_ids (np.ndarray): `int64` location ID of each row.
+        epochs (np.ndarray): `int64` epoch of each row.
+        values (dict[str, np.ndarray]): `float64` array for each measurement. Missing values are `NaN`.
+    """
+
+    location_ids: np.ndarray
+    epochs: np.ndarray
+    values: dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.epochs)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.values[key]
+
+    def columns(self) -> dict[str, np.ndarray]:
+        return {"location_id": self.location_ids, "epoch": self.epochs, **self.values}
+
+    def take(self, mask: np.ndarray) -> t.Self:
+        """Return a new frame with the rows selected by a boolean mask or index array."""
+        return type(self)(
+            **{
+                name: (
+                    {k: v[mask] for k, v in value.items()}
+                    if isinstance(value, dict)
+                    else value[mask]
+                )
+                for name, value in vars(self).items()
+            }
+        )
+
+    def to_pandas(self):
+        """Return the frame as a `pandas.DataFrame`. Requires pandas."""
+        if not importlib.util.find_spec("pandas"):
+            raise ImportError("pandas is required for to_pandas(). Install it with: pip install pandas")
+
+        import pandas as pd
+
+        return pd.DataFrame(self.columns())
+
+    def to_polars(self):
+        """Return the frame as a `polars.DataFrame`. Requires polars."""
+        if not importlib.util.find_spec("polars"):
+            raise ImportError("polars is required for to_polars(). Install it with: pip install polars")
+
+        import polars as pl
+
+        return pl.DataFrame(self.columns())
+
+
+@dataclass
+class ForecastFrame(ObservationFrame):
+    """Columnar forecast hours, sorted by location & epoch.
+
+    Params:
+        forecast_ids (np.ndarray): `int64` ID of the `ForecastJSONModel` each hour came from.
+        issued_epochs (np.ndarray): `int64` epoch the forecast was issued at.
+    """
+
+    forecast_ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    issued_epochs: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+    @property
+    def lead_hours(self) -> np.ndarray:
+        """Whole hours between the forecast being issued & the forecast hour."""
+        return (self.epochs - self.issued_epochs) // 3600
+
+    def columns(self) -> dict[str, np.ndarray]:
+        return {
+            "forecast_id": self.forecast_ids,
+            "issued_epoch": self.issued_epochs,
+            "lead_hours": self.lead_hours,
+            **super().columns(),
+        }
+
+
+def _sort_order(location_ids: np.ndarray, epochs: np.ndarray) -> np.ndarray:
+    return np.lexsort((epochs, location_ids))
+
+
+def load_observations(
+    conn: sa.Connection | so.Session,
+    location_ids: t.Sequence[int] | None = None,
+    start_epoch: int | None = None,
+    end_epoch: int | None = None,
+    fields: t.Sequence[str] = DEFAULT_FIELDS,
+) -> ObservationFrame:
+    """Load current weather observations into an `ObservationFrame`.
+
+    Params:
+        conn (Connection | Session): Database connection or session.
+        location_ids (Sequence[int] | None): Only load these locations. Loads all locations when `None`.
+        start_epoch (int | None): Inclusive lower bound of `last_updated_epoch`.
+        end_epoch (int | None): Exclusive upper bound of `last_updated_epoch`.
+        fields (Sequence[str]): `CurrentWeatherModel` measurement columns to load.
+
+    Returns:
+        (ObservationFrame): The observations, sorted by location & epoch.
+
+    """
+    epoch = CurrentWeatherModel.last_updated_epoch
+    stmt = sa.select(
+        CurrentWeatherModel.location_id,
+        epoch,
+        *(getattr(CurrentWeatherModel, name) for name in fields),
+    ).order_by(CurrentWeatherModel.location_id, epoch)
+
+    if location_ids is not None:
+        stmt = stmt.where(CurrentWeatherModel.location_id.in_(list(location_ids)))
+    if start_epoch is not None:
+        stmt = stmt.where(epoch >= start_epoch)
+    if end_epoch is not None:
+        stmt = stmt.where(epoch < end_epoch)
+
+    rows: list = conn.execute(stmt).fetchall()
+    if not rows:
+        return ObservationFrame(
+            location_ids=np.empty(0, dtype=np.int64),
+            epochs=np.empty(0, dtype=np.int64),
+            values={name: np.empty(0, dtype=np.float64) for name in fields},
+        )
+
+    ## One conversion for the whole result, `None` becomes NaN
+    data: np.ndarray = np.array(rows, dtype=np.float64)
+
+    return ObservationFrame(
+        location_ids=data[:, 0].astype(np.int64),
+        epochs=data[:, 1].astype(np.int64),
+        values={name: data[:, i + 2] for i, name in enumerate(fields)},
+    )
+
+
+def location_keys(conn: sa.Connection | so.Session) -> dict[tuple[str, str], int]:
+    """Return a mapping of `(name, country)` to location ID, used to match forecasts to locations."""
+    rows = conn.execute(
+        sa.select(LocationModel.name, LocationModel.country, LocationModel.id)
+    ).fetchall()
+
+    return {(name, country): location_id for name, country, location_id in rows}
+
+
+def load_forecast_hours(
+    conn: sa.Connection | so.Session,
+    location_ids: t.Sequence[int] | None = None,
+    start: dt.datetime | None = None,
+    end: dt.datetime | None = None,
+    after_id: int | None = None,
+    up_to_id: int | None = None,
+    fields: t.Sequence[str] = DEFAULT_FIELDS,
+) -> ForecastFrame:
+    """Load the hourly forecasts from stored forecast responses into a `ForecastFrame`.
+
+    Description:
+        Forecasts are matched to locations by the response's location name & country. Hours for
+        locations that have not been saved are skipped. A forecast is considered issued at its
+        `current.last_updated_epoch`.
+
+    Params:
+        conn (Connection | Session): Database connection or session.
+        location_ids (Sequence[int] | None): Only load these locations. Loads all locations when `None`.
+        start (datetime | None): Inclusive lower bound of `ForecastJSONModel.created_at`.
+        end (datetime | None): Exclusive upper bound of `ForecastJSONModel.created_at`.
+        after_id (int | None): Exclusive lower bound of `ForecastJSONModel.id`.
+        up_to_id (int | None): Inclusive upper bound of `ForecastJSONModel.id`.
+        fields (Sequence[str]): Hourly forecast measurements to load.
+
+    Returns:
+        (ForecastFrame): The forecast hours, sorted by location & epoch.
+
+    """
+    stmt = sa.select(ForecastJSONModel.id, ForecastJSONModel.forecast_json).order_by(
+        ForecastJSONModel.id
+    )
+    if start is not None:
+        stmt = stmt.where(ForecastJSONModel.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(ForecastJSONModel.created_at < end)
+    if after_id is not None:
+        stmt = stmt.where(ForecastJSONModel.id > after_id)
+    if up_to_id is not None:
+        stmt = stmt.where(ForecastJSONModel.id <= up_to_id)
+
+    keys: dict[tuple[str, str], int] = location_keys(conn)
+    wanted: set[int] | None = set(location_ids) if location_ids is not None else None
+
+    forecast_ids: list[int] = []
+    issued_epochs: list[int] = []
+    row_location_ids: list[int] = []
+    epochs: list[int] = []
+    values: dict[str, list] = {name: [] for name in fields}
+
+    for forecast_id, forecast in conn.execute(stmt):
+        location: dict = forecast.get("location", {})
+        location_id: int | None = keys.get((location.get("name"), location.get("country")))
+        if location_id is None or (wanted is not None and location_id not in wanted):
+            continue
+
+        issued_epoch: int = forecast.get("current", {}).get(
+            "last_updated_epoch", location.get("localtime_epoch", 0)
+        )
+
+        for day in forecast.get("forecast", {}).get("forecastday", []):
+            for hour in day.get("hour", []):
+                forecast_ids.append(forecast_id)
+                issued_epochs.append(issued_epoch)
+                row_location_ids.append(location_id)
+                epochs.append(hour["time_epoch"])
+                for name in fields:
+                    values[name].append(hour.get(name))
+
+    frame: ForecastFrame = ForecastFrame(
+        location_ids=np.array(row_location_ids, dtype=np.int64),
+        epochs=np.array(epochs, dtype=np.int64),
+        values={name: np.array(v, dtype=np.float64) for name, v in values.items()},
+        forecast_ids=np.array(forecast_ids, dtype=np.int64),
+        issued_epochs=np.array(issued_epochs, dtype=np.int64),
+    )
+
+    return frame.take(_sort_order(frame.location_ids, frame.epochs))
@@ -0,0 +1,203 @@
+"""Vectorized operations over observation & forecast arrays.
+
+Description:
+    Grouped operations take a `groups` array (usually a frame's `location_ids`) & assume rows are sorted
+    by group, then by epoch, which is how `weathersched.analytics.frames` loads them. Windows never cross
+    group boundaries. Missing values are `NaN` & are skipped by the windowed statistics.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+import numpy as np
+
+## Magnus formula coefficients (Alduchov & Eskridge, 1996), valid from -45C to 60C
+MAGNUS_B: float = 17.625
+MAGNUS_C: float = 243.04
+
+
+def group_starts(groups: np.ndarray) -> np.ndarray:
+    """Return, for every row, the index of the first row of its group.
+
+    Params:
+        groups (np.ndarray): Group key of each row. Rows of a group must be contiguous.
+
+    """
+    n: int = len(groups)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    is_start: np.ndarray = np.empty(n, dtype=bool)
+    is_start[0] = True
+    np.not_equal(groups[1:], groups[:-1], out=is_start[1:])
+
+    return np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+
+
+def _window_sums(
+    values: np.ndarray, window: int, groups: np.ndarray | None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return the trailing window sum, sum of squares & count of non-NaN values for each row."""
+    if window < 1:
+        raise ValueError(f"Window must be at least 1, got: {window}")
+
+    values = np.asarray(values, dtype=np.float64)
+    n: int = len(values)
+    present: np.ndarray = ~np.isnan(values)
+    filled: np.ndarray = np.where(present, values, 0.0)
+
+    ## Prefix sums with a leading 0, so the sum of rows [a, b) is cs[b] - cs[a]
+    cs: np.ndarray = np.concatenate(([0.0], np.cumsum(filled)))
+    cs_sq: np.ndarray = np.concatenate(([0.0], np.cumsum(filled * filled)))
+    cn: np.ndarray = np.concatenate(([0], np.cumsum(present)))
+
+    end: np.ndarray = np.arange(1, n + 1)
+    start: np.ndarray = np.maximum(end - window, 0)
+    if groups is not None:
+        start = np.maximum(start, group_starts(np.asarray(groups)))
+
+    return cs[end] - cs[start], cs_sq[end] - cs_sq[start], cn[end] - cn[start]
+
+
+def moving_average(
+    values: np.ndarray,
+    window: int,
+    groups: np.ndarray | None = None,
+    min_periods: int = 1,
+) -> np.ndarray:
+    """Trailing moving average over the last `window` rows of each group.
+
+    Usage:
+        frame = load_observations(conn)
+        temp_ma = moving_average(frame["temp_c"], window=24, groups=frame.location_ids)
+
+    Params:
+        values (np.ndarray): Values to average.
+        window (int): Number of rows in the window, including the current row.
+        groups (np.ndarray | None): Group key of each row, i.e. location IDs.
+        min_periods (int): (default: 1) Minimum non-NaN values in a window, otherwise the result is `NaN`.
+
+    Returns:
+        (np.ndarray): The moving average of each row.
+
+    """
+    sums, _, counts = _window_sums(values, window=window, groups=groups)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts >= max(min_periods, 1), sums / counts, np.nan)
+
+
+def anomaly_zscores(
+    values: np.ndarray,
+    groups: np.ndarray | None = None,
+    window: int | None = None,
+    min_periods: int = 2,
+) -> np.ndarray:
+    """Z-score of each value relative to its group, i.e. how unusual an observation is for its location.
+
+    Params:
+        values (np.ndarray): Values to score.
+        groups (np.ndarray | None): Group key of each row, i.e. location IDs.
+        window (int | None): Score against the trailing `window` rows of the group instead of the whole group.
+        min_periods (int): (default: 2) Minimum non-NaN values to compute a score, otherwise the result is `NaN`.
+
+    Returns:
+        (np.ndarray): The z-score of each row. `NaN` where the standard deviation is 0.
+
+    """
+    values = np.asarray(values, dtype=np.float64)
+
+    if window is not None:
+        sums, sums_sq, counts = _window_sums(values, window=window, groups=groups)
+    else:
+        present: np.ndarray = ~np.isnan(values)
+        filled: np.ndarray = np.where(present, values, 0.0)
+
+        if groups is None:
+            inverse: np.ndarray = np.zeros(len(values), dtype=np.int64)
+        else:
+            _, inverse = np.unique(np.asarray(groups), return_inverse=True)
+
+        sums = np.bincount(inverse, weights=filled)[inverse]
+        sums_sq = np.bincount(inverse, weights=filled * filled)[inverse]
+        counts = np.bincount(inverse, weights=present)[inverse]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean: np.ndarray = sums / counts
+        ## Population variance, clipped to absorb floating point error
+        std: np.ndarray = np.sqrt(np.clip(sums_sq / counts - mean * mean, 0.0, None))
+        scores: np.ndarray = (values - mean) / std
+
+    scores[(counts < min_periods) | (std == 0)] = np.nan
+
+    return scores
+
+
+def dewpoint_c(temp_c: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Dew point in Celsius from air temperature & relative humidity, using the Magnus formula.
+
+    Params:
+        temp_c (np.ndarray): Air temperature, in Celsius.
+        humidity (np.ndarray): Relative humidity, 0-100.
+
+    """
+    temp_c = np.asarray(temp_c, dtype=np.float64)
+    humidity = np.asarray(humidity, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gamma: np.ndarray = np.log(humidity / 100.0) + (MAGNUS_B * temp_c) / (
+            MAGNUS_C + temp_c
+        )
+
+        return (MAGNUS_C * gamma) / (MAGNUS_B - gamma)
+
+
+def heat_index_c(temp_c: np.ndarray, humidity: np.ndarray) -> np.ndarray:
+    """Heat index in Celsius, using the NOAA Rothfusz regression & its adjustments.
+
+    Description:
+        Below ~27C (80F) the regression is not valid, & the simple Steadman formula is used instead.
+
+    Params:
+        temp_c (np.ndarray): Air temperature, in Celsius.
+        humidity (np.ndarray): Relative humidity, 0-100.
+
+    """
+    t_f: np.ndarray = np.asarray(temp_c, dtype=np.float64) * 9 / 5 + 32
+    rh: np.ndarray = np.asarray(humidity, dtype=np.float64)
+
+    simple: np.ndarray = 0.5 * (t_f + 61.0 + (t_f - 68.0) * 1.2 + rh * 0.094)
+
+    hi: np.ndarray = (
+        -42.379
+        + 2.04901523 * t_f
+        + 10.14333127 * rh
+        - 0.22475541 * t_f * rh
+        - 0.00683783 * t_f * t_f
+        - 0.05481717 * rh * rh
+        + 0.00122874 * t_f * t_f * rh
+        + 0.00085282 * t_f * rh * rh
+        - 0.00000199 * t_f * t_f * rh * rh
+    )
+
+    ## Low humidity adjustment
+    low_rh: np.ndarray = (rh < 13) & (t_f >= 80) & (t_f <= 112)
+    with np.errstate(invalid="ignore"):
+        hi = np.where(
+            low_rh,
+            hi - ((13 - rh) / 4) * np.sqrt((17 - np.abs(t_f - 95.0)) / 17),
+            hi,
+        )
+
+    ## High humidity adjustment
+    high_rh: np.ndarray = (rh > 85) & (t_f >= 80) & (t_f <= 87)
+    hi = np.where(high_rh, hi + ((rh - 85) / 10) * ((87 - t_f) / 5), hi)
+
+    result_f: np.ndarray = np.where((simple + t_f) / 2 < 80, simple, hi)
+
+    return (result_f - 32) * 5 / 9
@@ -0,0 +1,188 @@
+"""Incremental forecast accuracy scoring.
+
+Description:
+    Each stored forecast's hours are aligned with the nearest observation for the same location, & the
+    errors are folded into `ForecastScoreModel` sums per location, variable & lead time.
+
+    Progress is tracked with a watermark on `ForecastJSONModel.id`. A forecast is only scored once it is
+    closed, meaning observations exist up to its last forecast hour, so every forecast is scored exactly once
+    with all of its hours.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.domain.watermark import WatermarkRepository
+from weathersched.domain.weather.current.models import CurrentWeatherModel
+from weathersched.domain.weather.forecast.models import ForecastJSONModel
+from weathersched.domain.weather.forecast_scores import ForecastScoreRepository
+
+from .compare import compare_forecast_to_observations, error_by_lead
+from .frames import (
+    ForecastFrame,
+    ObservationFrame,
+    load_forecast_hours,
+    load_observations,
+)
+
+import numpy as np
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+## Name of the watermark holding the last ForecastJSONModel.id that has been scored
+SCORE_WATERMARK_NAME: str = "forecast_score"
+## Measurements scored by default
+SCORE_FIELDS: tuple[str, ...] = (
+    "temp_c",
+    "humidity",
+    "wind_kph",
+    "precip_mm",
+    "pressure_mb",
+)
+
+
+def score_rows(
+    forecast: ForecastFrame,
+    observations: ObservationFrame,
+    fields: t.Sequence[str],
+    tolerance: int,
+) -> tuple[list[dict], int]:
+    """Compute error sums per location, variable & lead time for a batch of forecast hours.
+
+    Returns:
+        (tuple[list[dict], int]): Rows for `ForecastScoreRepository.merge_scores()`, & the number of forecast
+            hours that were matched to an observation.
+
+    """
+    comparison = compare_forecast_to_observations(
+        forecast, observations, fields=fields, tolerance=tolerance
+    )
+
+    rows: list[dict] = []
+    for name in fields:
+        summary: dict[str, np.ndarray] = error_by_lead(
+            comparison.errors(name),
+            lead_hours=comparison.lead_hours,
+            location_ids=comparison.location_ids,
+        )
+
+        for i in range(len(summary["count"])):
+            rows.append(
+                {
+                    "location_id": int(summary["location_id"][i]),
+                    "variable": name,
+                    "lead_hours": int(summary["lead_hours"][i]),
+                    "sample_count": int(summary["count"][i]),
+                    "error_sum": float(summary["sum"][i]),
+                    "abs_error_sum": float(summary["sum_abs"][i]),
+                    "sq_error_sum": float(summary["sum_sq"][i]),
+                }
+            )
+
+    return rows, len(comparison)
+
+
+def score_forecasts(
+    session: so.Session,
+    batch_size: int = 500,
+    tolerance: int = 1800,
+    fields: t.Sequence[str] = SCORE_FIELDS,
+) -> int:
+    """Score closed forecasts saved since the last run.
+
+    Params:
+        session (Session): Database session.
+        batch_size (int): (default: 500) Maximum number of forecast IDs to process per transaction.
+        tolerance (int): (default: 1800) Maximum distance, in seconds, between a forecast hour & the observation
+            it is scored against.
+        fields (Sequence[str]): Measurements to score.
+
+    Returns:
+        (int): Number of forecast hours scored.
+
+    """
+    watermarks: WatermarkRepository = WatermarkRepository(session)
+    scores: ForecastScoreRepository = ForecastScoreRepository(session)
+
+    after_id: int = watermarks.get_value(SCORE_WATERMARK_NAME)
+    max_id: int | None = session.scalar(
+        sa.select(sa.func.max(ForecastJSONModel.id)).where(
+            ForecastJSONModel.id > after_id
+        )
+    )
+    latest_epoch: int | None = session.scalar(
+        sa.select(sa.func.max(CurrentWeatherModel.last_updated_epoch))
+    )
+    if max_id is None or latest_epoch is None:
+        log.debug("No new forecasts to score.")
+        return 0
+
+    scored: int = 0
+    with metrics.time_stage("forecast_score"):
+        while after_id < max_id:
+            up_to_id: int = min(after_id + batch_size, max_id)
+
+            hours: ForecastFrame = load_forecast_hours(
+                session, after_id=after_id, up_to_id=up_to_id, fields=fields
+            )
+
+            ## Stop before the first forecast with hours that have not been observed yet
+            open_ids: np.ndarray = hours.forecast_ids[
+                hours.epochs + tolerance > latest_epoch
+            ]
+            if len(open_ids):
+                up_to_id = int(open_ids.min()) - 1
+                hours = hours.take(hours.forecast_ids <= up_to_id)
+
+            if up_to_id <= after_id:
+                break
+
+            ## Hours before the forecast was issued are history, not forecasts
+            hours = hours.take(hours.lead_hours >= 0)
+
+            rows: list[dict] = []
+            if len(hours):
+                observations: ObservationFrame = load_observations(
+                    session,
+                    location_ids=np.unique(hours.location_ids).tolist(),
+                    start_epoch=int(hours.epochs.min()) - tolerance,
+                    end_epoch=int(hours.epochs.max()) + tolerance + 1,
+                    fields=fields,
+                )
+                rows, matched = score_rows(
+                    hours, observations, fields=fields, tolerance=tolerance
+                )
+                scored += matched
+
+            try:
+                scores.merge_scores(rows)
+
+                watermarks.set_value(SCORE_WATERMARK_NAME, up_to_id, commit=False)
+                session.commit()
+            except Exception as exc:
+                msg = f"({type(exc)}) Error scoring forecasts ({after_id}, {up_to_id}]. Details: {exc}"
+                log.error(msg)
+
+                session.rollback()
+
+                raise exc
+
+            after_id = up_to_id
+
+            if len(open_ids):
+                break
+
+    metrics.inc_counter(
+        "weathersched_forecast_hours_scored_total",
+        amount=scored,
+        description="Forecast hours scored against observations",
+    )
+    log.info(f"Scored [{scored}] forecast hour(s), watermark at ID [{after_id}].")
+
+    return scored
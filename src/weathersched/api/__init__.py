@@ -0,0 +1,7 @@
+from __future__ import annotations
+
+from . import app, cache, db, queries, routes, settings
+from .app import create_app
+from .cache import CachedResponse, TTLCache
+from .db import get_async_db_uri, get_async_engine, get_async_session_pool
+from .settings import API_SETTINGS
@@ -0,0 +1,55 @@
+"""FastAPI application serving stored weather data read-only.
+
+Usage:
+    uvicorn --factory weathersched.api:create_app
+    ## or
+    weathersched serve
+
+"""
+
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from .cache import TTLCache
+from .db import get_async_session_pool
+from .routes import router
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+def create_app(
+    session_pool: async_sessionmaker[AsyncSession] | None = None,
+    cache: TTLCache | None = None,
+) -> FastAPI:
+    """Build the query API.
+
+    Params:
+        session_pool (async_sessionmaker | None): Async session factory. Defaults to the configured database,
+            through its async driver.
+        cache (TTLCache | None): Response cache. Defaults to a `TTLCache` configured from the API settings.
+
+    """
+    session_pool = session_pool or get_async_session_pool()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI) -> t.AsyncGenerator[None, None]:
+        yield
+
+        await session_pool.kw["bind"].dispose()
+
+    app: FastAPI = FastAPI(
+        title="weathersched",
+        description="Read-only access to stored locations, observations, forecasts & alerts.",
+        lifespan=lifespan,
+    )
+    app.state.session_pool = session_pool
+    app.state.cache = cache if cache is not None else TTLCache()
+
+    app.include_router(router)
+
+    return app
@@ -0,0 +1,127 @@
+"""In-process TTL cache for rendered API responses."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import logging
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+
+from .settings import API_SETTINGS
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """A rendered JSON body & its ETag."""
+
+    body: bytes
+    etag: str
+    created: float
+
+    @classmethod
+    def from_body(cls, body: bytes, created: float) -> "CachedResponse":
+        return cls(
+            body=body,
+            etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            created=created,
+        )
+
+
+class TTLCache:
+    """LRU cache of rendered responses, each kept for `ttl` seconds.
+
+    Description:
+        Concurrent misses on the same key are coalesced, so a popular query that expires is read from the
+        database once, not once per waiting request.
+
+    Usage:
+        cache = TTLCache(ttl=30)
+        response = await cache.get_or_render(key, render)  # render() returns the JSON body as bytes
+
+    Params:
+        ttl (float): Seconds an entry is served for. `0` disables caching.
+        max_entries (int): Entries kept before the least recently used are evicted.
+        clock (Callable[[], float]): Monotonic clock, `time.monotonic` by default.
+    """
+
+    def __init__(
+        self,
+        ttl: float = API_SETTINGS.get("API_CACHE_TTL", default=30),
+        max_entries: int = API_SETTINGS.get("API_CACHE_MAX_ENTRIES", default=2048),
+        clock: t.Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl: float = float(ttl)
+        self.max_entries: int = max(int(max_entries), 1)
+        self.clock: t.Callable[[], float] = clock
+
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry: CachedResponse | None = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if self.clock() - entry.created >= self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+
+        return entry
+
+    def set(self, key: str, body: bytes) -> CachedResponse:
+        entry: CachedResponse = CachedResponse.from_body(body, created=self.clock())
+        if not self.ttl:
+            return entry
+
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get_or_render(
+        self, key: str, render: t.Callable[[], t.Awaitable[bytes]]
+    ) -> CachedResponse:
+        """Return the cached response for `key`, rendering (& caching) it on a miss."""
+        entry: CachedResponse | None = self.get(key)
+        if entry is not None:
+            metrics.inc_counter(
+                "weathersched_api_cache_total",
+                description="API responses served from the cache, or rendered on a miss",
+                result="hit",
+            )
+            return entry
+
+        lock: asyncio.Lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                ## Another request may have rendered it while this one waited
+                entry = self.get(key)
+                if entry is None:
+                    metrics.inc_counter(
+                        "weathersched_api_cache_total",
+                        description="API responses served from the cache, or rendered on a miss",
+                        result="miss",
+                    )
+                    entry = self.set(key, await render())
+        finally:
+            ## Also when render() raises (i.e. a 404), or a lock is kept for every key ever requested
+            if not lock.locked():
+                self._locks.pop(key, None)
+
+        return entry
@@ -0,0 +1,81 @@
+"""Async database engine & sessions for the query API.
+
+Description:
+    The API reads the database configured in the database settings, through the async driver for its
+    backend (aiosqlite for SQLite, asyncpg for Postgres).
+
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.depends.db_depends import get_db_uri
+
+from .settings import API_SETTINGS
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+## Async driver per database backend
+ASYNC_DRIVERS: dict[str, str] = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def get_async_db_uri(
+    db_uri: sa.URL | None = None,
+    drivername: str = API_SETTINGS.get("API_DB_ASYNC_DRIVERNAME", default=""),
+) -> sa.URL:
+    """Return the database URL with its driver swapped for an async driver.
+
+    Params:
+        db_uri (URL | None): The (sync) database URL. Defaults to the database settings' URL.
+        drivername (str): Async drivername to use, i.e. `postgresql+psycopg`. Defaults to the backend's entry
+            in `ASYNC_DRIVERS`.
+
+    """
+    db_uri = db_uri if db_uri is not None else get_db_uri()
+    backend: str = db_uri.get_backend_name()
+
+    if not drivername:
+        if backend not in ASYNC_DRIVERS:
+            raise ValueError(
+                f"No async driver known for database backend '{backend}'. Set API_DB_ASYNC_DRIVERNAME."
+            )
+        drivername = ASYNC_DRIVERS[backend]
+
+    return db_uri.set(drivername=drivername)
+
+
+def get_async_engine(
+    db_uri: sa.URL | None = None,
+    pool_size: int = API_SETTINGS.get("API_DB_POOL_SIZE", default=10),
+    echo: bool = False,
+) -> AsyncEngine:
+    db_uri = get_async_db_uri(db_uri)
+    options: dict[str, t.Any] = {"echo": echo}
+    if db_uri.get_backend_name() != "sqlite":
+        options.update(pool_size=pool_size, pool_pre_ping=True)
+
+    log.debug(f"Creating async database engine for driver '{db_uri.drivername}'")
+
+    return create_async_engine(db_uri, **options)
+
+
+def get_async_session_pool(
+    engine: AsyncEngine | None = None,
+) -> async_sessionmaker[AsyncSession]:
+    ## Objects are serialized after the session closes, so keep their loaded state
+    return async_sessionmaker(
+        bind=engine or get_async_engine(), expire_on_commit=False, autoflush=False
+    )
@@ -0,0 +1,247 @@
+"""Queries behind the API routes, & the JSON encoding of their rows.
+
+Description:
+    Observations are read as flat rows (weather, condition & air quality columns joined in one statement)
+    & nested into dicts, instead of loading ORM objects & their relationships one row at a time. Location &
+    alert lookups reuse the domain repositories through `AsyncSession.run_sync()`.
+
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+from decimal import Decimal
+import json
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.domain.location import LocationModel, LocationOut, LocationRepository
+from weathersched.domain.weather.current import (
+    CurrentWeatherAirQualityModel,
+    CurrentWeatherConditionModel,
+    CurrentWeatherModel,
+)
+from weathersched.domain.weather.forecast import ForecastJSONModel
+from weathersched.domain.weather.observation_changes import (
+    ObservationChangeOut,
+    ObservationChangeRepository,
+)
+from weathersched.domain.weather.weather_alerts import (
+    WeatherAlertModel,
+    WeatherAlertRepository,
+)
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import AsyncSession
+import sqlalchemy.orm as so
+
+## Columns of each observation part, in response order
+WEATHER_COLUMNS: list[sa.Column] = [
+    column
+    for column in CurrentWeatherModel.__table__.columns
+    if column.name != "location_id"
+]
+CONDITION_COLUMNS: list[sa.Column] = [
+    CurrentWeatherConditionModel.__table__.c[name] for name in ("text", "icon", "code")
+]
+AIR_QUALITY_COLUMNS: list[sa.Column] = [
+    column
+    for column in CurrentWeatherAirQualityModel.__table__.columns
+    if column.name not in ("id", "weather_id")
+]
+ALERT_COLUMNS: list[str] = [
+    column.name
+    for column in WeatherAlertModel.__table__.columns
+    if column.name not in ("location_id", "alert_hash")
+]
+
+
+def _json_default(value: t.Any) -> t.Any:
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, (dt.datetime, dt.date)):
+        return value.isoformat()
+
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(obj: t.Any) -> bytes:
+    """Encode a response body compactly, converting `Decimal`s & datetimes."""
+    return json.dumps(obj, default=_json_default, separators=(",", ":")).encode("utf-8")
+
+
+def observations_select(
+    location_id: int,
+    start_epoch: int | None = None,
+    end_epoch: int | None = None,
+    newest_first: bool = False,
+    limit: int | None = None,
+) -> sa.Select:
+    """Select a location's observations with their condition & air quality, as flat rows.
+
+    Description:
+        Filtered & ordered on (location_id, last_updated_epoch), the columns of the table's unique
+        constraint, so ranges are index scans.
+    """
+    stmt: sa.Select = (
+        sa.select(
+            *WEATHER_COLUMNS,
+            *(column.label(f"condition_{column.name}") for column in CONDITION_COLUMNS),
+            CurrentWeatherAirQualityModel.id.label("air_quality_id"),
+            *(
+                column.label(f"air_quality_{column.name}")
+                for column in AIR_QUALITY_COLUMNS
+            ),
+        )
+        .outerjoin(
+            CurrentWeatherConditionModel,
+            CurrentWeatherConditionModel.weather_id == CurrentWeatherModel.id,
+        )
+        .outerjoin(
+            CurrentWeatherAirQualityModel,
+            CurrentWeatherAirQualityModel.weather_id == CurrentWeatherModel.id,
+        )
+        .where(CurrentWeatherModel.location_id == location_id)
+    )
+
+    if start_epoch is not None:
+        stmt = stmt.where(CurrentWeatherModel.last_updated_epoch >= start_epoch)
+    if end_epoch is not None:
+        stmt = stmt.where(CurrentWeatherModel.last_updated_epoch <= end_epoch)
+
+    order: sa.ColumnElement = CurrentWeatherModel.last_updated_epoch
+    stmt = stmt.order_by(order.desc() if newest_first else order.asc())
+
+    if limit is not None:
+        stmt = stmt.limit(limit)
+
+    return stmt
+
+
+def observation_row(row: sa.Row) -> dict:
+    """Nest a flat `observations_select()` row into an observation dict."""
+    values: t.Mapping[str, t.Any] = row._mapping
+
+    observation: dict = {column.name: values[column.name] for column in WEATHER_COLUMNS}
+    observation["condition"] = {
+        column.name: values[f"condition_{column.name}"] for column in CONDITION_COLUMNS
+    }
+    observation["air_quality"] = (
+        None
+        if values["air_quality_id"] is None
+        else {
+            column.name: values[f"air_quality_{column.name}"]
+            for column in AIR_QUALITY_COLUMNS
+        }
+    )
+
+    return observation
+
+
+def _location_out(location: LocationModel | None) -> dict | None:
+    if location is None:
+        return None
+
+    return LocationOut.model_validate(location, from_attributes=True).model_dump()
+
+
+async def get_location(session: AsyncSession, location_id: int) -> dict | None:
+    return await session.run_sync(
+        lambda sync_session: _location_out(
+            LocationRepository(sync_session).get_by_id(location_id)
+        )
+    )
+
+
+async def list_locations(session: AsyncSession) -> list[dict]:
+    locations: t.Sequence[LocationModel] = (
+        await session.scalars(sa.select(LocationModel).order_by(LocationModel.id))
+    ).all()
+
+    return [_location_out(location) for location in locations]
+
+
+async def latest_observation(session: AsyncSession, location_id: int) -> dict | None:
+    row: sa.Row | None = (
+        await session.execute(
+            observations_select(location_id, newest_first=True, limit=1)
+        )
+    ).first()
+
+    return None if row is None else observation_row(row)
+
+
+async def observation_range(
+    session: AsyncSession,
+    location_id: int,
+    start_epoch: int,
+    end_epoch: int,
+    limit: int | None = None,
+) -> list[dict]:
+    rows: t.Sequence[sa.Row] = (
+        await session.execute(
+            observations_select(location_id, start_epoch, end_epoch, limit=limit)
+        )
+    ).all()
+
+    return [observation_row(row) for row in rows]
+
+
+async def latest_forecast(session: AsyncSession, location_id: int) -> dict | None:
+    """Return the newest stored forecast for a location, or `None`."""
+    row: sa.Row | None = (
+        await session.execute(
+            sa.select(
+                ForecastJSONModel.id,
+                ForecastJSONModel.created_at,
+                ForecastJSONModel.forecast_json,
+            )
+            .where(ForecastJSONModel.location_id == location_id)
+            .order_by(ForecastJSONModel.id.desc())
+            .limit(1)
+        )
+    ).first()
+    if row is None:
+        return None
+
+    forecast_id, created_at, forecast_json = row
+
+    return {
+        "id": forecast_id,
+        "created_at": created_at,
+        "forecast": forecast_json.get("forecast"),
+        "alerts": forecast_json.get("alerts"),
+    }
+
+
+async def active_alerts(session: AsyncSession, location_id: int) -> list[dict]:
+    def _active(sync_session: so.Session) -> list[dict]:
+        return [
+            {name: getattr(alert, name) for name in ALERT_COLUMNS}
+            for alert in WeatherAlertRepository(sync_session).get_active(location_id)
+        ]
+
+    return await session.run_sync(_active)
+
+
+async def observation_changes(
+    session: AsyncSession,
+    sequence_id: int,
+    limit: int,
+    location_ids: t.Sequence[int] | None = None,
+    settle_seconds: float = 0,
+) -> list[dict]:
+    def _since(sync_session: so.Session) -> list[dict]:
+        return [
+            ObservationChangeOut.model_validate(entry).model_dump()
+            for entry in ObservationChangeRepository(sync_session).since(
+                sequence_id,
+                limit=limit,
+                location_ids=location_ids,
+                settle_seconds=settle_seconds,
+            )
+        ]
+
+    return await session.run_sync(_since)
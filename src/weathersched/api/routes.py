@@ -0,0 +1,238 @@
+"""Read-only routes over stored locations, observations, forecasts & alerts."""
+
+from __future__ import annotations
+
+import logging
+import time
+import typing as t
+from urllib.parse import urlencode
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+
+from . import queries
+from .cache import CachedResponse, TTLCache
+from .settings import API_SETTINGS
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+router: APIRouter = APIRouter()
+
+## Default history range, when no start is given
+DEFAULT_HISTORY_HOURS: int = 24
+
+
+def cache_key(request: Request) -> str:
+    """Key a request on its path & sorted query parameters, so parameter order does not matter."""
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+def _cache_headers(request: Request, etag: str | None = None) -> dict[str, str]:
+    cache: TTLCache = request.app.state.cache
+    headers: dict[str, str] = {"Cache-Control": f"public, max-age={int(cache.ttl)}"}
+    if etag:
+        headers["ETag"] = etag
+
+    return headers
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match: str | None = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+
+    tags: list[str] = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+    return "*" in tags or etag in tags
+
+
+async def cached_json(
+    request: Request, render: t.Callable[[AsyncSession], t.Awaitable[t.Any]]
+) -> Response:
+    """Serve `render()`'s result from the TTL cache, answering matching `If-None-Match` requests with a 304."""
+    session_pool: async_sessionmaker[AsyncSession] = request.app.state.session_pool
+
+    async def _render() -> bytes:
+        with metrics.time_stage("query", endpoint=request.scope["route"].name):
+            async with session_pool() as session:
+                return queries.encode_json(await render(session))
+
+    entry: CachedResponse = await request.app.state.cache.get_or_render(
+        cache_key(request), _render
+    )
+    headers: dict[str, str] = _cache_headers(request, etag=entry.etag)
+
+    if _etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def _require_location(session: AsyncSession, location_id: int) -> dict:
+    location: dict | None = await queries.get_location(session, location_id)
+    if location is None:
+        raise HTTPException(status_code=404, detail=f"Location {location_id} not found")
+
+    return location
+
+
+@router.get("/health")
+async def health() -> dict:
+    return {"status": "ok"}
+
+
+@router.get("/locations")
+async def locations(request: Request) -> Response:
+    return await cached_json(request, queries.list_locations)
+
+
+@router.get("/locations/{location_id}")
+async def location(request: Request, location_id: int) -> Response:
+    return await cached_json(
+        request, lambda session: _require_location(session, location_id)
+    )
+
+
+@router.get("/locations/{location_id}/current")
+async def current_weather(request: Request, location_id: int) -> Response:
+    async def render(session: AsyncSession) -> dict:
+        await _require_location(session, location_id)
+
+        observation: dict | None = await queries.latest_observation(session, location_id)
+        if observation is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"No observations for location {location_id}",
+            )
+
+        return observation
+
+    return await cached_json(request, render)
+
+
+async def _stream_observations(
+    session_pool: async_sessionmaker[AsyncSession],
+    location_id: int,
+    start: int,
+    end: int,
+    limit: int | None,
+    partition_size: int = 1000,
+) -> t.AsyncGenerator[bytes, None]:
+    """Yield a JSON array of observations as rows are read, holding one partition in memory at a time."""
+    async with session_pool() as session:
+        result = await session.stream(
+            queries.observations_select(location_id, start, end, limit=limit).execution_options(
+                yield_per=partition_size
+            )
+        )
+
+        yield b"["
+        first: bool = True
+        async for rows in result.partitions(partition_size):
+            chunk: bytes = b",".join(
+                queries.encode_json(queries.observation_row(row)) for row in rows
+            )
+            yield chunk if first else b"," + chunk
+            first = False
+        yield b"]"
+
+
+@router.get("/locations/{location_id}/history")
+async def weather_history(
+    request: Request,
+    location_id: int,
+    start: int | None = Query(default=None, description="First epoch, defaults to 24 hours before `end`"),
+    end: int | None = Query(default=None, description="Last epoch, defaults to now"),
+    limit: int | None = Query(default=None, ge=1),
+) -> Response:
+    """Return a location's observations between two epochs, oldest first.
+
+    Ranges longer than `API_STREAM_AFTER_HOURS` are streamed from the database as they are read, & are
+    not cached.
+    """
+    end = end if end is not None else int(time.time())
+    start = start if start is not None else end - DEFAULT_HISTORY_HOURS * 3600
+    if start > end:
+        raise HTTPException(status_code=422, detail="start must not be after end")
+
+    stream_after: int = API_SETTINGS.get("API_STREAM_AFTER_HOURS", default=168) * 3600
+    if end - start <= stream_after:
+        async def render(session: AsyncSession) -> list[dict]:
+            await _require_location(session, location_id)
+
+            return await queries.observation_range(
+                session, location_id, start, end, limit=limit
+            )
+
+        return await cached_json(request, render)
+
+    session_pool: async_sessionmaker[AsyncSession] = request.app.state.session_pool
+    async with session_pool() as session:
+        await _require_location(session, location_id)
+
+    metrics.inc_counter(
+        "weathersched_api_streamed_total",
+        description="API responses streamed instead of rendered & cached",
+        endpoint="history",
+    )
+
+    return StreamingResponse(
+        _stream_observations(session_pool, location_id, start, end, limit),
+        media_type="application/json",
+        headers=_cache_headers(request),
+    )
+
+
+@router.get("/locations/{location_id}/forecast")
+async def weather_forecast(request: Request, location_id: int) -> Response:
+    async def render(session: AsyncSession) -> dict:
+        await _require_location(session, location_id)
+
+        forecast: dict | None = await queries.latest_forecast(session, location_id)
+        if forecast is None:
+            raise HTTPException(
+                status_code=404, detail=f"No forecast for location {location_id}"
+            )
+
+        return forecast
+
+    return await cached_json(request, render)
+
+
+@router.get("/locations/{location_id}/alerts")
+async def weather_alerts(request: Request, location_id: int) -> Response:
+    async def render(session: AsyncSession) -> list[dict]:
+        await _require_location(session, location_id)
+
+        return await queries.active_alerts(session, location_id)
+
+    return await cached_json(request, render)
+
+
+@router.get("/changes")
+async def observation_changes(
+    request: Request,
+    since: int = Query(default=0, ge=0, description="ID of the last entry already read"),
+    limit: int = Query(default=1000, ge=1, le=10000),
+    location_id: list[int] | None = Query(default=None),
+) -> Response:
+    """Return observation change feed entries after `since`, oldest first.
+
+    Description:
+        Clients poll with the `id` of the last entry they read. Pages are read from the database on each
+        request, not from the response cache, so new entries are seen on the next poll.
+    """
+    session_pool: async_sessionmaker[AsyncSession] = request.app.state.session_pool
+    async with session_pool() as session:
+        entries: list[dict] = await queries.observation_changes(
+            session,
+            since,
+            limit=limit,
+            location_ids=location_id,
+            settle_seconds=API_SETTINGS.get("API_CHANGES_SETTLE_SECONDS", default=0),
+        )
+
+    return Response(content=queries.encode_json(entries), media_type="application/json")
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from dynaconf import Dynaconf
+
+## Query API settings loaded with dynaconf
+API_SETTINGS: Dynaconf = Dynaconf(
+    environments=True,
+    env="api",
+    envvar_prefix="API",
+    settings_files=["api/settings.toml", "api/.secrets.toml"],
+)
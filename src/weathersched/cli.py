@@ -0,0 +1,219 @@
+"""Command line interface, installed as the `weathersched` command.
+
+Usage:
+    weathersched backfill --location London --location "48.85,2.35" --start 2024-01-01 --end 2024-12-31
+    weathersched serve --port 8000
+    weathersched drain
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import logging
+from pathlib import Path
+import signal
+import threading
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.collector import COLLECTOR_SETTINGS, backfill
+from weathersched.core import setup
+from weathersched.core.depends import db_depends
+from weathersched.core.setup import LOGGING_SETTINGS
+from weathersched.ingest import SpoolDrainer
+
+def _date(value: str) -> dt.date:
+    try:
+        return dt.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date: '{value}'. Use yyyy-MM-dd.")
+
+
+def read_locations(
+    locations: t.Iterable[str] = (), locations_file: str | Path | None = None
+) -> list[str]:
+    """Combine `--location` values & a file of location queries (one per line, `#` comments), in order."""
+    combined: list[str] = list(locations)
+
+    if locations_file:
+        with open(locations_file, "r") as f:
+            combined.extend(
+                line.strip()
+                for line in f
+                if line.strip() and not line.lstrip().startswith("#")
+            )
+
+    return list(dict.fromkeys(combined))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="weathersched", description="Collect & store weather from WeatherAPI."
+    )
+    parser.add_argument(
+        "--log-level",
+        default=LOGGING_SETTINGS.get("LOG_LEVEL", default="INFO"),
+        help="Logging level (default: %(default)s)",
+    )
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill_parser: argparse.ArgumentParser = subparsers.add_parser(
+        "backfill",
+        help="Backfill weather history for a set of locations & dates.",
+        description="Fetch & save weather for every location on every date in a range. Completed dates are checkpointed, so an interrupted backfill resumes where it stopped.",
+    )
+    backfill_parser.add_argument(
+        "-l",
+        "--location",
+        action="append",
+        default=[],
+        help="Location query, i.e. 'London' or '48.85,2.35'. Repeat for more locations.",
+    )
+    backfill_parser.add_argument(
+        "-f", "--locations-file", help="File of location queries, one per line."
+    )
+    backfill_parser.add_argument(
+        "--start", type=_date, required=True, help="First date, yyyy-MM-dd."
+    )
+    backfill_parser.add_argument(
+        "--end",
+        type=_date,
+        default=None,
+        help="Last date, yyyy-MM-dd (default: --start).",
+    )
+    backfill_parser.add_argument(
+        "--future",
+        action="store_true",
+        help="Request future.json (dates 14-300 days ahead) instead of history.json.",
+    )
+    backfill_parser.add_argument(
+        "--no-aqi", action="store_true", help="Do not request air quality data."
+    )
+    backfill_parser.add_argument(
+        "--workers",
+        type=int,
+        default=COLLECTOR_SETTINGS.get("COLLECTOR_BACKFILL_WORKERS", default=8),
+        help="Concurrent requests (default: %(default)s).",
+    )
+    backfill_parser.add_argument(
+        "--rate",
+        type=float,
+        default=COLLECTOR_SETTINGS.get("COLLECTOR_BACKFILL_RATE", default=10.0),
+        help="Requests per second across all workers, 0 for no limit (default: %(default)s).",
+    )
+    backfill_parser.add_argument(
+        "--persist-every",
+        type=int,
+        default=COLLECTOR_SETTINGS.get("COLLECTOR_BACKFILL_PERSIST_EVERY", default=100),
+        help="Responses saved & checkpointed per transaction (default: %(default)s).",
+    )
+
+    serve_parser: argparse.ArgumentParser = subparsers.add_parser(
+        "serve",
+        help="Run the read-only query API (requires the `api` extra).",
+    )
+    serve_parser.add_argument("--host", help="Address to listen on (default: API_HOST).")
+    serve_parser.add_argument(
+        "--port", type=int, help="Port to listen on (default: API_PORT)."
+    )
+    serve_parser.add_argument(
+        "--workers", type=int, help="Worker processes (default: API_WORKERS)."
+    )
+
+    drain_parser: argparse.ArgumentParser = subparsers.add_parser(
+        "drain",
+        help="Save spooled responses to the database.",
+        description="Save responses spooled while INGEST_SPOOL_ENABLED is set, or while the database was unreachable. Runs until interrupted, unless --once is passed.",
+    )
+    drain_parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Save what is in the spool now, then exit.",
+    )
+
+    return parser
+
+
+def run_backfill_command(args: argparse.Namespace) -> int:
+    locations: list[str] = read_locations(args.location, args.locations_file)
+    if not locations:
+        log.error("No locations to backfill. Pass --location or --locations-file.")
+
+        return 2
+
+    result: backfill.BackfillResult = backfill.run_backfill(
+        locations,
+        start=args.start,
+        end=args.end or args.start,
+        session_pool=db_depends.get_session_pool(),
+        endpoint=backfill.FUTURE if args.future else backfill.HISTORY,
+        include_aqi=not args.no_aqi,
+        workers=args.workers,
+        rate=args.rate,
+        persist_every=args.persist_every,
+    )
+
+    log.info(f"Backfill finished: {result}")
+
+    ## Non-zero so schedulers notice, failed dates are retried by running the backfill again
+    return 1 if result.failed else 0
+
+
+def run_serve_command(args: argparse.Namespace) -> int:
+    ## Imported here, the API's dependencies are an optional extra
+    from weathersched.api import API_SETTINGS
+
+    import uvicorn
+
+    uvicorn.run(
+        "weathersched.api:create_app",
+        factory=True,
+        host=args.host or API_SETTINGS.get("API_HOST", default="127.0.0.1"),
+        port=args.port or API_SETTINGS.get("API_PORT", default=8000),
+        workers=args.workers or API_SETTINGS.get("API_WORKERS", default=1),
+        log_level=args.log_level.lower(),
+    )
+
+    return 0
+
+
+def run_drain_command(args: argparse.Namespace) -> int:
+    drainer: SpoolDrainer = SpoolDrainer(session_pool=db_depends.get_session_pool())
+
+    if args.once:
+        saved: int = drainer.drain()
+        log.info(f"Saved [{saved}] spooled payload(s), [{drainer.spool.depth()}] left.")
+
+        ## Non-zero when the database was unreachable, payloads stay spooled for the next run
+        return 1 if drainer.backoff else 0
+
+    stop: threading.Event = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    log.info("Draining the ingest spool, stop with Ctrl+C")
+    drainer.run(stop)
+    log.info(f"Spool drainer stopped after saving [{drainer.saved}] payload(s).")
+
+    return 0
+
+
+def main(argv: t.Sequence[str] | None = None) -> int:
+    args: argparse.Namespace = build_parser().parse_args(argv)
+
+    setup.setup_logging(level=args.log_level)
+    setup.setup_database()
+
+    match args.command:
+        case "backfill":
+            return run_backfill_command(args)
+        case "serve":
+            return run_serve_command(args)
+        case "drain":
+            return run_drain_command(args)
+
+    return 0
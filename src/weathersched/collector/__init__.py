@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from . import backfill, dedup, dispatcher, partition, polling, settings, sweep
+from .backfill import BackfillResult, backfill_dates, run_backfill
+from .dedup import collapse_locations, dedup_locations
+from .dispatcher import (
+    DEFAULT_PRIORITY,
+    HIGH_PRIORITY,
+    Dispatcher,
+    Job,
+    current_weather_job,
+    forecast_job,
+)
+from .partition import HashRing, PartitionCoordinator
+from .polling import AdaptivePollingPolicy, PollState, poll_due
+from .settings import COLLECTOR_SETTINGS
+from .sweep import sweep_current_weather, sweep_weather_forecast
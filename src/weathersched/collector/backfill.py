@@ -0,0 +1,317 @@
+"""Backfill weather for a set of locations & a range of dates.
+
+Description:
+    Past dates are requested from WeatherAPI's `history.json`, & their hours are bulk-loaded into the
+    current weather table as observations. Dates 14-300 days ahead are requested from `future.json` &
+    saved like forecasts.
+
+    Requests run on a thread pool, sharing one connection pool & one `RateLimiter`, so the whole backfill
+    stays under the plan's request rate. Each saved (location, date) is checkpointed in the
+    `backfill_checkpoint` table, & a restarted backfill skips checkpointed dates instead of fetching them
+    again. Rows are saved before their checkpoints, & the bulk loader skips observations that are already
+    stored, so dates saved just before a crash are safe to fetch a second time.
+
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from dataclasses import dataclass
+import datetime as dt
+import logging
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import http_lib, metrics
+from weathersched.domain.backfill_checkpoint import BackfillCheckpointRepository
+from weathersched.domain.location import LocationIn
+from weathersched.domain.weather.current import CurrentWeatherIn
+from weathersched.ingest import (
+    bulk_load_current_weather,
+    current_weather_row,
+    persist_forecasts,
+    resolve_location_ids,
+)
+from weathersched.remote_apis.weatherapi_client import client
+from weathersched.remote_apis.weatherapi_client.settings import weatherapi_settings
+
+from .settings import COLLECTOR_SETTINGS
+
+import httpx
+import sqlalchemy.orm as so
+
+## Backfill endpoints
+HISTORY: str = "history"
+FUTURE: str = "future"
+
+
+@dataclass
+class BackfillResult:
+    """Counts of (location, date) pairs a backfill handled."""
+
+    requested: int = 0
+    skipped: int = 0
+    fetched: int = 0
+    failed: int = 0
+    observations: int = 0
+
+
+def backfill_dates(start: dt.date, end: dt.date) -> list[dt.date]:
+    """Return every date from `start` to `end`, inclusive."""
+    if end < start:
+        raise ValueError(f"Backfill end date {end} is before start date {start}")
+
+    return [start + dt.timedelta(days=day) for day in range((end - start).days + 1)]
+
+
+def history_rows(payload: dict, location_id: int) -> list[dict]:
+    """Convert a `history.json` response's hours to `bulk_load_current_weather()` rows."""
+    rows: list[dict] = []
+    for forecast_day in payload["forecast"]["forecastday"]:
+        for hour in forecast_day["hour"]:
+            weather: CurrentWeatherIn = CurrentWeatherIn.model_validate(
+                {
+                    **hour,
+                    "last_updated_epoch": hour["time_epoch"],
+                    "last_updated": hour["time"],
+                }
+            )
+            rows.append(current_weather_row(weather, location_id=location_id))
+
+    return rows
+
+
+def _hours(payload: dict) -> int:
+    return sum(len(day["hour"]) for day in payload["forecast"]["forecastday"])
+
+
+def _fetch(
+    endpoint: str,
+    location: str,
+    date: dt.date,
+    api_key: str,
+    include_aqi: bool,
+    transport: httpx.BaseTransport,
+) -> dict | None:
+    try:
+        if endpoint == HISTORY:
+            return client.get_weather_history(
+                location=location,
+                date=date.isoformat(),
+                api_key=api_key,
+                include_aqi=include_aqi,
+                transport=transport,
+            )
+
+        return client.get_weather_future(
+            location=location,
+            date=date.isoformat(),
+            api_key=api_key,
+            transport=transport,
+        )
+    except Exception as exc:
+        msg = f"({type(exc)}) Error requesting {endpoint} weather for location '{location}' on {date}. Details: {exc}"
+        log.error(msg)
+
+        return None
+
+
+def _persist(
+    session: so.Session, endpoint: str, fetched: list[tuple[str, dt.date, dict]]
+) -> list[tuple[str, dt.date, int]]:
+    """Save a batch of responses. Returns the checkpoint entries for the batch."""
+    if endpoint == HISTORY:
+        locations: list[LocationIn] = [
+            LocationIn.model_validate(payload["location"]) for _, _, payload in fetched
+        ]
+        location_ids: dict[tuple[str, str], int] = resolve_location_ids(
+            session, locations
+        )
+
+        rows: list[dict] = []
+        for location, (_, _, payload) in zip(locations, fetched):
+            rows.extend(
+                history_rows(
+                    payload, location_id=location_ids[(location.name, location.country)]
+                )
+            )
+        bulk_load_current_weather(session, rows)
+    else:
+        persist_forecasts(
+            session,
+            [
+                {
+                    "location": payload["location"],
+                    "forecast_json": payload,
+                    "alerts": None,
+                }
+                for _, _, payload in fetched
+            ],
+        )
+
+    return [(location, date, _hours(payload)) for location, date, payload in fetched]
+
+
+def run_backfill(
+    locations: t.Iterable[str],
+    start: dt.date,
+    end: dt.date,
+    session_pool: so.sessionmaker[so.Session],
+    endpoint: str = HISTORY,
+    api_key: str = weatherapi_settings.api_key,
+    include_aqi: bool = True,
+    workers: int = COLLECTOR_SETTINGS.get("COLLECTOR_BACKFILL_WORKERS", default=8),
+    rate: float = COLLECTOR_SETTINGS.get("COLLECTOR_BACKFILL_RATE", default=10.0),
+    persist_every: int = COLLECTOR_SETTINGS.get(
+        "COLLECTOR_BACKFILL_PERSIST_EVERY", default=100
+    ),
+    transport: httpx.BaseTransport | None = None,
+) -> BackfillResult:
+    """Fetch & save weather for every location on every date from `start` to `end`.
+
+    Usage:
+        result = run_backfill(
+            ["London", "48.85,2.35"],
+            start=dt.date(2024, 1, 1),
+            end=dt.date(2024, 12, 31),
+            session_pool=get_session_pool(),
+        )
+
+    Params:
+        locations (Iterable[str]): WeatherAPI location queries.
+        start (date): First date to backfill.
+        end (date): Last date to backfill, inclusive.
+        session_pool (sessionmaker): Database session factory.
+        endpoint (str): (default: "history") "history" for past dates, "future" for dates 14-300 days ahead.
+        api_key (str): WeatherAPI API key.
+        include_aqi (bool): (default: True) Request air quality data for history dates.
+        workers (int): Threads making requests.
+        rate (float): Requests per second, across all workers. `0` disables the limit.
+        persist_every (int): Responses saved (& checkpointed) per transaction.
+        transport (httpx.BaseTransport | None): Optional base transport for the HTTP client. When `None`, one
+            tuned transport is built & shared by the workers.
+
+    Returns:
+        (BackfillResult): Number of (location, date) pairs requested, skipped (already checkpointed),
+            fetched & failed, & observations saved. Failed pairs are not checkpointed, so running the
+            backfill again retries them.
+
+    """
+    if endpoint not in (HISTORY, FUTURE):
+        raise ValueError(f"Invalid endpoint: {endpoint}. Must be one of {[HISTORY, FUTURE]}")
+
+    locations = list(dict.fromkeys(locations))
+    dates: list[dt.date] = backfill_dates(start, end)
+    result: BackfillResult = BackfillResult(requested=len(locations) * len(dates))
+
+    with session_pool() as session:
+        completed: set[tuple[str, dt.date]] = BackfillCheckpointRepository(
+            session
+        ).get_completed(endpoint, locations, start, end)
+
+    todo: list[tuple[str, dt.date]] = [
+        (location, date)
+        for location in locations
+        for date in dates
+        if (location, date) not in completed
+    ]
+    result.skipped = result.requested - len(todo)
+
+    log.info(
+        f"Backfilling {endpoint} weather for [{len(todo)}] location date(s) ({result.skipped} already done) on [{workers}] worker(s) at {rate or 'unlimited'} request(s)/s"
+    )
+    if not todo:
+        return result
+
+    limiter: http_lib.RateLimiter = http_lib.RateLimiter(rate=rate)
+    pool = (
+        nullcontext(transport)
+        if transport is not None
+        else http_lib.shared_transport()
+    )
+
+    started: float = time.perf_counter()
+    fetched: list[tuple[str, dt.date, dict]] = []
+
+    def flush() -> None:
+        if not fetched:
+            return
+
+        with session_pool() as session, metrics.time_stage(
+            "persist", endpoint=f"backfill_{endpoint}"
+        ):
+            try:
+                entries: list[tuple[str, dt.date, int]] = _persist(
+                    session, endpoint, fetched
+                )
+                BackfillCheckpointRepository(session).mark_completed(endpoint, entries)
+            except Exception as exc:
+                msg = f"({type(exc)}) Error saving [{len(fetched)}] backfilled {endpoint} response(s). Details: {exc}"
+                log.error(msg)
+
+                session.rollback()
+
+                raise exc
+
+        result.fetched += len(entries)
+        result.observations += sum(observations for _, _, observations in entries)
+        fetched.clear()
+
+        log.info(
+            f"Backfill progress: [{result.fetched + result.failed}/{len(todo)}] location date(s), {result.observations} observation(s) saved"
+        )
+
+    with pool as base_transport, ThreadPoolExecutor(
+        max_workers=max(int(workers), 1), thread_name_prefix="backfill"
+    ) as executor:
+        limited: http_lib.SharedTransport = http_lib.SharedTransport(
+            http_lib.RateLimitedTransport(base_transport, limiter)
+        )
+
+        ## Bound the requests in flight, instead of queueing every (location, date) at once
+        pending: dict[Future, tuple[str, dt.date]] = {}
+        remaining: t.Iterator[tuple[str, dt.date]] = iter(todo)
+        max_pending: int = max(int(workers), 1) * 4
+
+        while True:
+            for location, date in remaining:
+                future: Future = executor.submit(
+                    _fetch, endpoint, location, date, api_key, include_aqi, limited
+                )
+                pending[future] = (location, date)
+                if len(pending) >= max_pending:
+                    break
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                location, date = pending.pop(future)
+                payload: dict | None = future.result()
+
+                if payload is None:
+                    result.failed += 1
+                    metrics.inc_counter(
+                        "weathersched_backfill_failures_total",
+                        description="Backfill requests that failed & will be retried on the next run",
+                        endpoint=endpoint,
+                    )
+                    continue
+
+                fetched.append((location, date, payload))
+
+            if len(fetched) >= persist_every:
+                flush()
+
+        flush()
+
+    elapsed: float = time.perf_counter() - started
+    log.info(
+        f"Backfilled [{result.fetched}] {endpoint} location date(s) ({result.observations} observation(s), {result.failed} failed) in {elapsed:.1f}s. Rate limited for {limiter.waited:.1f}s"
+    )
+
+    return result
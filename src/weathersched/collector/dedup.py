@@ -0,0 +1,115 @@
+"""Collapse near-identical location queries so a sweep polls each place once."""
+
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.domain.location.geo import LocationIndex
+
+from .settings import COLLECTOR_SETTINGS
+
+def default_radius_km() -> float:
+    """Return the `COLLECTOR_DEDUP_RADIUS_KM` setting."""
+    return float(COLLECTOR_SETTINGS.get("COLLECTOR_DEDUP_RADIUS_KM", default=0.0))
+
+
+def parse_coordinates(location: str) -> tuple[float, float] | None:
+    """Parse a `"lat,lon"` WeatherAPI query. Returns `None` for any other query, i.e. a city name or postcode."""
+    parts: list[str] = location.split(",")
+    if len(parts) != 2:
+        return None
+
+    try:
+        lat, lon = float(parts[0]), float(parts[1])
+    except ValueError:
+        return None
+
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+
+    return lat, lon
+
+
+def collapse_locations(
+    locations: t.Iterable[str],
+    radius_km: float | None = None,
+) -> dict[str, list[str]]:
+    """Group location queries that are within `radius_km` of each other.
+
+    Description:
+        Coordinate queries are grouped greedily in input order: the first query not yet in a group becomes the
+        representative for every other query within `radius_km` of it. Other queries are matched exactly, so
+        repeats of the same name collapse into one.
+
+    Usage:
+        collapse_locations(["51.52,-0.11", "51.521,-0.112", "Paris"], radius_km=1)
+        # {"51.52,-0.11": ["51.52,-0.11", "51.521,-0.112"], "Paris": ["Paris"]}
+
+    Params:
+        locations (Iterable[str]): WeatherAPI location queries.
+        radius_km (float | None): Grouping radius, in kilometers. Defaults to the `COLLECTOR_DEDUP_RADIUS_KM`
+            setting. `0` only collapses exact repeats.
+
+    Returns:
+        (dict[str, list[str]]): Member queries (including the representative) keyed by representative query,
+            in input order.
+
+    """
+    if radius_km is None:
+        radius_km = default_radius_km()
+
+    unique: list[str] = list(dict.fromkeys(locations))
+    groups: dict[str, list[str]] = {}
+    coordinates: list[tuple[int, str, float, float]] = []
+
+    for location in unique:
+        parsed: tuple[float, float] | None = (
+            parse_coordinates(location) if radius_km > 0 else None
+        )
+        if parsed is None:
+            groups[location] = [location]
+        else:
+            coordinates.append((len(coordinates), location, *parsed))
+
+    if coordinates:
+        index: LocationIndex = LocationIndex(
+            ids=[row[0] for row in coordinates],
+            lats=[row[2] for row in coordinates],
+            lons=[row[3] for row in coordinates],
+        )
+        assigned: set[int] = set()
+
+        for i, location, lat, lon in coordinates:
+            if i in assigned:
+                continue
+
+            members: list[int] = sorted(
+                j for j, _ in index.within(lat, lon, radius_km) if j not in assigned
+            )
+            assigned.update(members)
+            groups[location] = [coordinates[j][1] for j in members]
+
+    order: dict[str, int] = {location: i for i, location in enumerate(unique)}
+
+    return dict(sorted(groups.items(), key=lambda item: order[item[0]]))
+
+
+def dedup_locations(
+    locations: t.Iterable[str], radius_km: float | None = None
+) -> list[str]:
+    """Return one representative query per group of near-identical queries, see `collapse_locations()`."""
+    if radius_km is None:
+        radius_km = default_radius_km()
+
+    locations = list(locations)
+    representatives: list[str] = list(collapse_locations(locations, radius_km))
+
+    if len(representatives) < len(locations):
+        log.info(
+            f"Collapsed [{len(locations)}] location(s) into [{len(representatives)}] within [{radius_km}] km."
+        )
+
+    return representatives
@@ -0,0 +1,404 @@
+"""Priority & deadline job dispatcher for the collector.
+
+Description:
+    Jobs wait in a heap keyed by due time. Once due, they move to a second heap keyed by priority, so when
+    workers are saturated an urgent location (a VIP site, or one with active alerts) is dispatched ahead of
+    every lower priority job that is also due, instead of waiting its turn in a fixed loop.
+
+    Each job may have a deadline: the maximum seconds it may start after it was due. A job that misses its
+    deadline is not run. Recurring jobs are rescheduled for their next run, one-off jobs are dropped.
+
+    Queue depth, dispatch lag & missed deadlines are reported through `weathersched.core.metrics`.
+
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+import heapq
+import itertools
+import logging
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.domain.schemas import APIResponseCurrentWeather
+from weathersched.remote_apis.weatherapi_client import client
+
+from .polling import AdaptivePollingPolicy, _response_values
+from .settings import COLLECTOR_SETTINGS
+
+## Priority of jobs for locations listed in COLLECTOR_PRIORITY_LOCATIONS. Lower runs first.
+HIGH_PRIORITY: int = 0
+## Priority of every other job
+DEFAULT_PRIORITY: int = 10
+
+## Dispatch lag histogram buckets, in seconds
+LAG_BUCKETS: tuple[float, ...] = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800)
+
+
+@dataclass
+class Job:
+    """A unit of collector work, i.e. requesting one location's current weather.
+
+    Params:
+        name (str): Job name, used in logs & to cancel the job.
+        func (Callable): Called with `**kwargs` when the job runs.
+        kwargs (dict): Keyword arguments for `func`.
+        priority (int): Lower numbers are dispatched first among due jobs.
+        due (float): Epoch the job should run at.
+        deadline (float | None): Seconds after `due` the job may still start. `None` never expires.
+        interval (float | None): Run the job again this many seconds after it was due. `None` runs it once.
+        reschedule (Callable | None): Called with the job's result & the current time after it runs, returning
+            the epoch of the next run, or `None` to stop. Overrides `interval`.
+    """
+
+    name: str
+    func: t.Callable[..., t.Any]
+    kwargs: dict = field(default_factory=dict)
+    priority: int = DEFAULT_PRIORITY
+    due: float = 0.0
+    deadline: float | None = None
+    interval: float | None = None
+    reschedule: t.Callable[[t.Any, float], float | None] | None = None
+
+    @property
+    def expires(self) -> float | None:
+        return None if self.deadline is None else self.due + self.deadline
+
+    def next_due(self, result: t.Any, now: float) -> float | None:
+        """Return when the job should run next, or `None` if it should not run again."""
+        if self.reschedule is not None:
+            return self.reschedule(result, now)
+        if self.interval is not None:
+            ## Keep the cadence, but skip runs that are already in the past
+            return max(self.due + self.interval, now)
+
+        return None
+
+
+class Dispatcher:
+    """Run collector jobs by due time & priority on a pool of worker threads.
+
+    Usage:
+        dispatcher = Dispatcher(workers=8)
+        dispatcher.submit(current_weather_job("London", priority=HIGH_PRIORITY, interval=900, deadline=120))
+
+        stop = threading.Event()
+        dispatcher.run(stop=stop)
+
+    Params:
+        workers (int): Maximum number of jobs running at once.
+        clock (Callable[[], float]): Returns the current epoch, `time.time` by default.
+        tick (float): Maximum seconds to sleep between checks for due jobs.
+    """
+
+    def __init__(
+        self,
+        workers: int = COLLECTOR_SETTINGS.get(
+            "COLLECTOR_DISPATCHER_WORKERS", default=4
+        ),
+        clock: t.Callable[[], float] = time.time,
+        tick: float = 1.0,
+    ) -> None:
+        self.workers: int = max(int(workers), 1)
+        self.clock: t.Callable[[], float] = clock
+        self.tick: float = tick
+
+        ## (due, sequence, job): waiting for their due time
+        self._pending: list[tuple[float, int, Job]] = []
+        ## (priority, due, sequence, job): due, waiting for a worker
+        self._ready: list[tuple[int, float, int, Job]] = []
+        self._cancelled: set[str] = set()
+        self._sequence: t.Iterator[int] = itertools.count()
+        self._lock: threading.Lock = threading.Lock()
+
+        self.completed: int = 0
+        self.failed: int = 0
+        self.missed: int = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._ready)
+
+    def submit(self, job: Job) -> Job:
+        """Queue a job. Jobs without a due time are due immediately."""
+        if not job.due:
+            job.due = self.clock()
+
+        with self._lock:
+            self._cancelled.discard(job.name)
+            heapq.heappush(self._pending, (job.due, next(self._sequence), job))
+
+        return job
+
+    def cancel(self, name: str) -> None:
+        """Stop a queued job from running again. A running job finishes, but is not rescheduled."""
+        with self._lock:
+            self._cancelled.add(name)
+
+    def next_due(self) -> float | None:
+        """Return the due time of the next job, or `None` if the queue is empty."""
+        with self._lock:
+            if self._ready:
+                return self._ready[0][1]
+
+            return self._pending[0][0] if self._pending else None
+
+    def _promote(self, now: float) -> None:
+        """Move due jobs from the pending heap to the ready heap. Caller holds the lock."""
+        while self._pending and self._pending[0][0] <= now:
+            due, sequence, job = heapq.heappop(self._pending)
+            heapq.heappush(self._ready, (job.priority, due, sequence, job))
+
+    def _report_depth(self) -> None:
+        gauge = metrics.get_registry().gauge(
+            "weathersched_dispatcher_queue_depth",
+            description="Jobs queued in the collector dispatcher",
+        )
+        gauge.set(len(self._pending), state="pending")
+        gauge.set(len(self._ready), state="ready")
+
+    def _missed(self, job: Job, now: float) -> None:
+        """Drop or reschedule a job that missed its deadline."""
+        self.missed += 1
+        next_due: float | None = None
+
+        if job.interval:
+            ## Skip to the first run that can still meet its deadline, keeping the cadence
+            next_due = job.due + job.interval
+            while next_due + job.deadline < now:
+                next_due += job.interval
+        elif job.reschedule is not None:
+            ## Adaptive jobs have no cadence to keep, run as soon as possible
+            next_due = now
+
+        action: str = "dropped" if next_due is None else "rescheduled"
+        log.warning(
+            f"Job '{job.name}' missed its deadline by [{now - job.expires:.1f}]s, {action}."
+        )
+        metrics.inc_counter(
+            "weathersched_dispatcher_deadline_missed_total",
+            description="Jobs that missed their deadline",
+            action=action,
+        )
+
+        if next_due is not None:
+            job.due = next_due
+            heapq.heappush(self._pending, (job.due, next(self._sequence), job))
+
+    def pop_ready(self, now: float | None = None) -> Job | None:
+        """Return the most urgent due job, skipping cancelled jobs & jobs past their deadline."""
+        now = self.clock() if now is None else now
+
+        with self._lock:
+            self._promote(now)
+
+            job: Job | None = None
+            while self._ready:
+                _, _, _, candidate = heapq.heappop(self._ready)
+
+                if candidate.name in self._cancelled:
+                    continue
+                if candidate.expires is not None and now > candidate.expires:
+                    self._missed(candidate, now)
+                    self._promote(now)
+                    continue
+
+                job = candidate
+                break
+
+            self._report_depth()
+
+        if job is not None:
+            metrics.get_registry().histogram(
+                "weathersched_dispatcher_lag_seconds",
+                description="Seconds between a job being due & starting",
+                buckets=LAG_BUCKETS,
+            ).observe(max(now - job.due, 0.0), priority=str(job.priority))
+
+        return job
+
+    def run_job(self, job: Job) -> t.Any:
+        """Run a job & reschedule it if it recurs. Exceptions are logged & counted, not raised."""
+        result: t.Any = None
+        status: str = "success"
+
+        try:
+            result = job.func(**job.kwargs)
+        except Exception as exc:
+            msg = f"({type(exc)}) Error running job '{job.name}'. Details: {exc}"
+            log.error(msg)
+
+            status = "error"
+
+        ## Jobs finish on several worker threads at once
+        with self._lock:
+            if status == "success":
+                self.completed += 1
+            else:
+                self.failed += 1
+
+        metrics.inc_counter(
+            "weathersched_dispatcher_jobs_total",
+            description="Jobs run by the collector dispatcher",
+            status=status,
+        )
+
+        now: float = self.clock()
+        try:
+            next_due: float | None = job.next_due(result, now)
+        except Exception as exc:
+            msg = f"({type(exc)}) Error rescheduling job '{job.name}'. Details: {exc}"
+            log.error(msg)
+
+            next_due = None
+
+        with self._lock:
+            if next_due is not None and job.name not in self._cancelled:
+                job.due = next_due
+                heapq.heappush(self._pending, (job.due, next(self._sequence), job))
+
+        return result
+
+    def run_pending(self, now: float | None = None) -> int:
+        """Run every job that is due, most urgent first, on the calling thread. Returns the number of jobs run."""
+        now = self.clock() if now is None else now
+        ran: int = 0
+
+        while (job := self.pop_ready(now)) is not None:
+            self.run_job(job)
+            ran += 1
+
+        return ran
+
+    def run(
+        self,
+        stop: threading.Event | None = None,
+        until_empty: bool = False,
+    ) -> None:
+        """Dispatch jobs to worker threads until `stop` is set.
+
+        Params:
+            stop (threading.Event | None): Set to stop dispatching. Running jobs are allowed to finish.
+            until_empty (bool): (default: False) Also stop once no jobs are queued or running.
+        """
+        stop = stop or threading.Event()
+        running: set[Future] = set()
+
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="collector"
+        ) as pool:
+            while not stop.is_set():
+                while len(running) < self.workers:
+                    job: Job | None = self.pop_ready()
+                    if job is None:
+                        break
+
+                    running.add(pool.submit(self.run_job, job))
+
+                if until_empty and not running and len(self) == 0:
+                    break
+
+                timeout: float = self.tick
+                ## With every worker busy, a due job cannot start until one finishes. Waiting on
+                #  the next due time would return immediately & spin.
+                if len(running) < self.workers:
+                    next_due: float | None = self.next_due()
+                    if next_due is not None:
+                        timeout = min(max(next_due - self.clock(), 0.0), self.tick)
+
+                if running:
+                    running = wait(
+                        running, timeout=timeout, return_when=FIRST_COMPLETED
+                    ).not_done
+                else:
+                    stop.wait(timeout)
+
+            wait(running)
+
+
+def location_priority(location: str) -> int:
+    """Return `HIGH_PRIORITY` for locations listed in the `COLLECTOR_PRIORITY_LOCATIONS` setting."""
+    priority_locations: list[str] = COLLECTOR_SETTINGS.get(
+        "COLLECTOR_PRIORITY_LOCATIONS", default=[]
+    )
+
+    return HIGH_PRIORITY if location in priority_locations else DEFAULT_PRIORITY
+
+
+def current_weather_job(
+    location: str,
+    priority: int | None = None,
+    deadline: float | None = None,
+    interval: float | None = None,
+    policy: AdaptivePollingPolicy | None = None,
+    **client_kwargs,
+) -> Job:
+    """Build a job that requests (and saves) a location's current weather.
+
+    Params:
+        location (str): WeatherAPI location query.
+        priority (int | None): Job priority. Defaults to `location_priority(location)`.
+        deadline (float | None): Seconds after the job is due that it may still start.
+        interval (float | None): Repeat the job at a fixed interval.
+        policy (AdaptivePollingPolicy | None): Schedule the job with an adaptive polling policy instead of a
+            fixed interval. Each response is fed back to the policy, which decides the next run.
+        **client_kwargs: Passed to `client.get_current_weather()`, i.e. `api_key`, `transport`.
+
+    Returns:
+        (Job): The job, ready for `Dispatcher.submit()`.
+
+    """
+    reschedule: t.Callable[[t.Any, float], float | None] | None = None
+
+    if policy is not None:
+        state = policy.track(location)
+
+        def reschedule(
+            response: APIResponseCurrentWeather | None, now: float
+        ) -> float | None:
+            if location not in policy:
+                return None
+            if response is None:
+                return policy.mark_failed(location, now=int(now))
+
+            return policy.observe(
+                location,
+                last_updated_epoch=response.weather.last_updated_epoch,
+                values=_response_values(response),
+                now=int(now),
+            )
+
+    return Job(
+        name=f"current:{location}",
+        func=client.get_current_weather,
+        kwargs={"location": location, **client_kwargs},
+        priority=location_priority(location) if priority is None else priority,
+        due=state.next_poll_epoch if policy is not None else 0.0,
+        deadline=deadline,
+        interval=interval,
+        reschedule=reschedule,
+    )
+
+
+def forecast_job(
+    location: str,
+    priority: int | None = None,
+    deadline: float | None = None,
+    interval: float | None = None,
+    **client_kwargs,
+) -> Job:
+    """Build a job that requests (and saves) a location's forecast. See `current_weather_job()` for params."""
+    return Job(
+        name=f"forecast:{location}",
+        func=client.get_weather_forecast,
+        kwargs={"location": location, **client_kwargs},
+        priority=location_priority(location) if priority is None else priority,
+        deadline=deadline,
+        interval=interval,
+    )
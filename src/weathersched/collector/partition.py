@@ -0,0 +1,305 @@
+"""Split the location set across collector nodes with a consistent hash ring.
+
+Description:
+    Every node hashes the same live membership (from the `collector_lease` table) onto the same ring, so
+    all nodes agree on which node owns each location without any other coordination. When a node joins or
+    leaves, only the locations on its ring segments move (~1/N of them), & the others stay where they are.
+
+    To avoid two nodes polling a location while their views of the membership differ:
+
+    - Other nodes add a joining node to their ring once it has been live for one heartbeat interval, & it
+      only claims its locations itself after two. Every node heartbeats at least once an interval, so by
+      then every other node has handed those locations over. Locations may go unpolled for up to an
+      interval during a handover, but are never polled by two nodes.
+    - Leases are renewed from a background thread while the coordinator is open, so a sweep that takes
+      longer than the lease ttl does not let the lease expire under it.
+    - A node leaving cleanly releases its lease & stops polling at once. A crashed node's locations are taken
+      over once its lease expires.
+    - Lease epochs come from the database's clock, so clock skew between hosts does not make a node's
+      lease look expired (or live) to the others.
+
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.domain.collector_lease import (
+    CollectorLeaseModel,
+    CollectorLeaseRepository,
+)
+
+from .settings import COLLECTOR_SETTINGS
+
+import sqlalchemy.orm as so
+
+def _hash(key: str) -> int:
+    ## Stable across processes & hosts, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hash ring of nodes, each placed on the ring at `vnodes` points.
+
+    Usage:
+        ring = HashRing(["node-a", "node-b"])
+        ring.node_for("London")  # "node-b"
+
+    Params:
+        nodes (Iterable[str]): Node IDs.
+        vnodes (int): (default: 64) Ring points per node. More points spread locations more evenly.
+    """
+
+    def __init__(self, nodes: t.Iterable[str] = (), vnodes: int = 64) -> None:
+        self.vnodes: int = max(int(vnodes), 1)
+        self.nodes: frozenset[str] = frozenset(nodes)
+
+        points: list[tuple[int, str]] = sorted(
+            (_hash(f"{node}#{i}"), node)
+            for node in self.nodes
+            for i in range(self.vnodes)
+        )
+        self._keys: list[int] = [key for key, _ in points]
+        self._owners: list[str] = [node for _, node in points]
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def node_for(self, key: str) -> str | None:
+        """Return the node that owns `key`, or `None` when the ring is empty."""
+        if not self._keys:
+            return None
+
+        idx: int = bisect.bisect(self._keys, _hash(key)) % len(self._keys)
+
+        return self._owners[idx]
+
+    def partition(self, keys: t.Iterable[str]) -> dict[str, list[str]]:
+        """Group keys by owning node. Every node is present, possibly with no keys."""
+        assignments: dict[str, list[str]] = {node: [] for node in sorted(self.nodes)}
+        for key in keys:
+            node: str | None = self.node_for(key)
+            if node is not None:
+                assignments[node].append(key)
+
+        return assignments
+
+
+def default_node_id() -> str:
+    """Return the `COLLECTOR_NODE_ID` setting, or `<hostname>-<pid>`."""
+    return COLLECTOR_SETTINGS.get("COLLECTOR_NODE_ID", default="") or (
+        f"{socket.gethostname()}-{os.getpid()}"
+    )
+
+
+class PartitionCoordinator:
+    """Keep this node's lease alive & decide which locations it owns.
+
+    Usage:
+        ## Heartbeats on a background thread until the block exits
+        with PartitionCoordinator(session_pool=get_session_pool()) as coordinator:
+            while running:
+                sweep_current_weather(coordinator.assigned(locations))
+
+    Params:
+        session_pool (sessionmaker): Database session factory.
+        node_id (str | None): Unique ID of this node. Defaults to `default_node_id()`.
+        ttl (int): Seconds a lease stays live without a heartbeat.
+        heartbeat_interval (int): Seconds between heartbeats. Must be shorter than `ttl`.
+        vnodes (int): Ring points per node, see `HashRing`.
+        clock (Callable[[], float]): Local clock used to schedule heartbeats, `time.monotonic` by default.
+        lease_clock (Callable[[], float] | None): Returns the epoch written to leases. Defaults to the
+            database's clock, read in the heartbeat transaction.
+    """
+
+    def __init__(
+        self,
+        session_pool: so.sessionmaker[so.Session],
+        node_id: str | None = None,
+        ttl: int = COLLECTOR_SETTINGS.get("COLLECTOR_LEASE_TTL", default=30),
+        heartbeat_interval: int = COLLECTOR_SETTINGS.get(
+            "COLLECTOR_HEARTBEAT_INTERVAL", default=10
+        ),
+        vnodes: int = COLLECTOR_SETTINGS.get("COLLECTOR_HASH_VNODES", default=64),
+        clock: t.Callable[[], float] = time.monotonic,
+        lease_clock: t.Callable[[], float] | None = None,
+    ) -> None:
+        if heartbeat_interval >= ttl:
+            raise ValueError(
+                f"heartbeat_interval ({heartbeat_interval}) must be shorter than the lease ttl ({ttl})"
+            )
+
+        self.session_pool: so.sessionmaker[so.Session] = session_pool
+        self.node_id: str = node_id or default_node_id()
+        self.ttl: int = int(ttl)
+        self.heartbeat_interval: int = int(heartbeat_interval)
+        self.vnodes: int = int(vnodes)
+        self.clock: t.Callable[[], float] = clock
+        self.lease_clock: t.Callable[[], float] | None = lease_clock
+
+        self.ring: HashRing = HashRing(vnodes=self.vnodes)
+        ## Local clock time of the last successful heartbeat
+        self.last_heartbeat: float | None = None
+
+        self._lock: threading.Lock = threading.Lock()
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self) -> t.Self:
+        self.heartbeat()
+        self.start()
+
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+        self.release()
+
+    @property
+    def members(self) -> frozenset[str]:
+        return self.ring.nodes
+
+    def heartbeat(self) -> frozenset[str]:
+        """Renew this node's lease & refresh the membership, rebuilding the ring if it changed.
+
+        Returns:
+            (frozenset[str]): IDs of the member nodes, including this node once it has settled.
+
+        """
+        with self._lock:
+            return self._heartbeat()
+
+    def _heartbeat(self) -> frozenset[str]:
+        started: float = self.clock()
+
+        with self.session_pool() as session:
+            repo: CollectorLeaseRepository = CollectorLeaseRepository(session)
+
+            try:
+                now: int = (
+                    repo.database_now()
+                    if self.lease_clock is None
+                    else int(self.lease_clock())
+                )
+                repo.heartbeat(
+                    self.node_id, now=now, ttl=self.ttl, hostname=socket.gethostname()
+                )
+                ## Crashed nodes' leases are kept for a while, for troubleshooting
+                repo.delete_expired(now=now - self.ttl)
+                leases: list[CollectorLeaseModel] = repo.get_live(now=now)
+            except Exception as exc:
+                msg = f"({type(exc)}) Error renewing collector lease for node '{self.node_id}'. Details: {exc}"
+                log.error(msg)
+
+                raise exc
+
+            ## Other nodes count as members after one interval. This node waits for a second, so every
+            #  other node has had a heartbeat to add it (& hand over its locations) before it claims them.
+            members: frozenset[str] = frozenset(
+                lease.node_id
+                for lease in leases
+                if lease.joined_epoch
+                + self.heartbeat_interval * (2 if lease.node_id == self.node_id else 1)
+                <= now
+            )
+
+        self.last_heartbeat = started
+
+        if members != self.ring.nodes:
+            joined: set[str] = members - self.ring.nodes
+            left: set[str] = self.ring.nodes - members
+            log.info(
+                f"Collector membership changed, rebalancing across [{len(members)}] node(s). Joined: {sorted(joined)}, left: {sorted(left)}"
+            )
+            metrics.inc_counter(
+                "weathersched_collector_rebalances_total",
+                description="Collector ring rebuilds after a membership change",
+            )
+
+            self.ring = HashRing(members, vnodes=self.vnodes)
+
+        metrics.get_registry().gauge(
+            "weathersched_collector_nodes",
+            description="Live collector nodes in this node's ring",
+        ).set(len(members))
+
+        return members
+
+    def heartbeat_due(self) -> bool:
+        return (
+            self.last_heartbeat is None
+            or self.clock() - self.last_heartbeat >= self.heartbeat_interval
+        )
+
+    def owns(self, location: str) -> bool:
+        """Return `True` if this node should poll `location`."""
+        if (
+            self.last_heartbeat is None
+            or self.clock() - self.last_heartbeat >= self.ttl
+        ):
+            ## This node's lease may have expired, so another node may own its locations
+            return False
+
+        return self.ring.node_for(location) == self.node_id
+
+    def assigned(self, locations: t.Iterable[str]) -> list[str]:
+        """Return the locations owned by this node, in input order. Heartbeats first when one is due."""
+        if self.heartbeat_due():
+            self.heartbeat()
+
+        return [location for location in locations if self.owns(location)]
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Heartbeat every `heartbeat_interval` seconds until `stop` is set."""
+        stop = stop or self._stop
+
+        while not stop.wait(self.heartbeat_interval):
+            try:
+                self.heartbeat()
+            except Exception:
+                ## Already logged. If heartbeats keep failing, owns() stops claiming locations before the
+                #  lease expires.
+                continue
+
+    def start(self) -> threading.Thread:
+        """Heartbeat on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name=f"collector-heartbeat-{self.node_id}", daemon=True
+        )
+        self._thread.start()
+
+        return self._thread
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the heartbeat thread."""
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def release(self) -> None:
+        """Delete this node's lease & stop claiming locations."""
+        with self.session_pool() as session:
+            try:
+                CollectorLeaseRepository(session).release(self.node_id)
+            except Exception as exc:
+                msg = f"({type(exc)}) Error releasing collector lease for node '{self.node_id}'. Details: {exc}"
+                log.error(msg)
+
+        self.ring = HashRing(vnodes=self.vnodes)
+        self.last_heartbeat = None
@@ -0,0 +1,402 @@
+"""Adaptive polling: poll each location just after WeatherAPI is expected to refresh it.
+
+Description:
+    WeatherAPI only refreshes a location's current weather periodically (its `last_updated_epoch`), so polling
+    on a fixed cadence either misses refreshes or mostly re-fetches unchanged data. `AdaptivePollingPolicy`
+    tracks, per location:
+
+    - The refresh interval, from the gaps between successive `last_updated_epoch` values.
+    - How much the weather changes per refresh, relative to `CHANGE_SCALES`.
+
+    The next poll is scheduled just after the predicted refresh. Locations whose weather stays stable back off
+    exponentially, up to a maximum interval, & snap back to the refresh interval as soon as the weather changes.
+
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import math
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.analytics.frames import ObservationFrame, load_observations
+from weathersched.core import metrics
+from weathersched.domain.location.models import LocationModel
+from weathersched.domain.schemas import APIResponseCurrentWeather
+
+from .settings import COLLECTOR_SETTINGS
+from .sweep import sweep_current_weather
+
+import numpy as np
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+## Change in each variable that counts as "the weather changed" between two refreshes
+CHANGE_SCALES: dict[str, float] = {
+    "temp_c": 1.0,
+    "humidity": 5.0,
+    "wind_kph": 5.0,
+    "precip_mm": 0.5,
+    "pressure_mb": 1.0,
+}
+
+
+@dataclass
+class PollState:
+    """Polling state of one location.
+
+    Params:
+        query (str): WeatherAPI location query.
+        location_id (int | None): ID of the location in the database, if known.
+        last_updated_epoch (int | None): Latest `last_updated_epoch` seen for the location.
+        last_values (dict[str, float]): Variables of the latest refresh, see `CHANGE_SCALES`.
+        update_interval (float): Estimated seconds between WeatherAPI refreshes.
+        change_rate (float): Smoothed change per refresh, in units of `CHANGE_SCALES`. Values below the policy's
+            `stable_threshold` mean the weather is stable.
+        stable_streak (int): Number of consecutive refreshes without a significant change.
+        next_poll_epoch (int): When the location should be polled next.
+    """
+
+    query: str
+    location_id: int | None = None
+    last_updated_epoch: int | None = None
+    last_values: dict[str, float] = field(default_factory=dict)
+    update_interval: float = 900.0
+    change_rate: float = 0.0
+    stable_streak: int = 0
+    next_poll_epoch: int = 0
+
+
+class AdaptivePollingPolicy:
+    """Decide when each location is due for a poll.
+
+    Usage:
+        policy = AdaptivePollingPolicy()
+        policy.load_history(session)
+
+        while True:
+            poll_due(policy)
+            time.sleep(policy.seconds_until_due())
+
+    Params:
+        min_interval (int): Never poll a location more often than this, in seconds.
+        max_interval (int): Never back off further than this, in seconds.
+        default_interval (int): Refresh interval assumed for locations without history, in seconds.
+        grace (int): Seconds after a predicted refresh to poll, giving WeatherAPI time to publish it.
+        retry_delay (int): Seconds to wait before polling again when a poll failed or returned no refresh.
+        backoff (float): Poll interval multiplier per consecutive stable refresh.
+        stable_threshold (float): Change (in units of `CHANGE_SCALES`) below which a refresh is stable.
+        smoothing (float): Weight of the newest sample in the interval & change rate moving averages.
+    """
+
+    def __init__(
+        self,
+        min_interval: int = COLLECTOR_SETTINGS.get(
+            "COLLECTOR_POLL_MIN_INTERVAL", default=300
+        ),
+        max_interval: int = COLLECTOR_SETTINGS.get(
+            "COLLECTOR_POLL_MAX_INTERVAL", default=3600
+        ),
+        default_interval: int = COLLECTOR_SETTINGS.get(
+            "COLLECTOR_POLL_DEFAULT_INTERVAL", default=900
+        ),
+        grace: int = COLLECTOR_SETTINGS.get("COLLECTOR_POLL_GRACE", default=60),
+        retry_delay: int = COLLECTOR_SETTINGS.get(
+            "COLLECTOR_POLL_RETRY_DELAY", default=120
+        ),
+        backoff: float = COLLECTOR_SETTINGS.get("COLLECTOR_POLL_BACKOFF", default=2.0),
+        stable_threshold: float = COLLECTOR_SETTINGS.get(
+            "COLLECTOR_POLL_STABLE_THRESHOLD", default=1.0
+        ),
+        smoothing: float = 0.3,
+    ) -> None:
+        if min_interval > max_interval:
+            raise ValueError(
+                f"min_interval ({min_interval}) must not be greater than max_interval ({max_interval})"
+            )
+
+        self.min_interval: int = int(min_interval)
+        self.max_interval: int = int(max_interval)
+        self.default_interval: int = int(default_interval)
+        self.grace: int = int(grace)
+        self.retry_delay: int = int(retry_delay)
+        self.backoff: float = float(backoff)
+        self.stable_threshold: float = float(stable_threshold)
+        self.smoothing: float = float(smoothing)
+
+        self.states: dict[str, PollState] = {}
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def __contains__(self, query: str) -> bool:
+        return query in self.states
+
+    def track(
+        self, query: str, location_id: int | None = None, now: int | None = None
+    ) -> PollState:
+        """Start tracking a location. New locations are due immediately."""
+        if query in self.states:
+            state: PollState = self.states[query]
+            if location_id is not None:
+                state.location_id = location_id
+
+            return state
+
+        state = PollState(
+            query=query,
+            location_id=location_id,
+            update_interval=float(self.default_interval),
+            next_poll_epoch=int(time.time()) if now is None else now,
+        )
+        self.states[query] = state
+
+        return state
+
+    def untrack(self, query: str) -> None:
+        self.states.pop(query, None)
+
+    def poll_interval(self, state: PollState) -> float:
+        """Seconds between polls for a location: the refresh interval, backed off while the weather is stable."""
+        interval: float = state.update_interval * self.backoff ** min(
+            state.stable_streak, 32
+        )
+
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _change(self, state: PollState, values: dict[str, float]) -> float | None:
+        changes: list[float] = [
+            abs(values[name] - state.last_values[name]) / scale
+            for name, scale in CHANGE_SCALES.items()
+            if name in values
+            and name in state.last_values
+            and not math.isnan(values[name])
+            and not math.isnan(state.last_values[name])
+        ]
+
+        return max(changes) if changes else None
+
+    def _apply(self, state: PollState, epoch: int, values: dict[str, float]) -> bool:
+        """Fold a refresh into a location's state. Returns `False` if the refresh is not newer than the last one."""
+        if state.last_updated_epoch is not None:
+            gap: int = epoch - state.last_updated_epoch
+            if gap <= 0:
+                return False
+
+            ## While backed off, gaps measure the poll interval, not WeatherAPI's refresh interval
+            if state.stable_streak == 0:
+                sample: float = min(max(gap, self.min_interval), self.max_interval)
+                state.update_interval += self.smoothing * (sample - state.update_interval)
+
+            change: float | None = self._change(state, values)
+            if change is not None:
+                state.change_rate += self.smoothing * (change - state.change_rate)
+
+                if change < self.stable_threshold:
+                    state.stable_streak += 1
+                else:
+                    state.stable_streak = 0
+
+        state.last_updated_epoch = epoch
+        state.last_values = dict(values)
+
+        return True
+
+    def _schedule(self, state: PollState, now: int) -> int:
+        if state.last_updated_epoch is None:
+            state.next_poll_epoch = now
+        else:
+            predicted: float = state.last_updated_epoch + self.poll_interval(state)
+            ## A refresh that was due before this poll is late, check again shortly
+            state.next_poll_epoch = int(max(predicted + self.grace, now + self.grace))
+
+        return state.next_poll_epoch
+
+    def observe(
+        self,
+        query: str,
+        last_updated_epoch: int,
+        values: dict[str, float],
+        now: int | None = None,
+    ) -> int:
+        """Record a poll's result & schedule the location's next poll.
+
+        Params:
+            query (str): WeatherAPI location query.
+            last_updated_epoch (int): The response's `last_updated_epoch`.
+            values (dict[str, float]): The response's current weather, see `CHANGE_SCALES`.
+            now (int | None): Current epoch. Defaults to the system time.
+
+        Returns:
+            (int): Epoch of the location's next poll.
+
+        """
+        now = int(time.time()) if now is None else now
+        state: PollState = self.track(query, now=now)
+
+        if not self._apply(state, int(last_updated_epoch), values):
+            ## WeatherAPI has not refreshed yet
+            metrics.inc_counter(
+                "weathersched_poll_unchanged_total",
+                description="Polls that returned an observation that was already seen",
+            )
+            state.next_poll_epoch = now + self.retry_delay
+
+            return state.next_poll_epoch
+
+        return self._schedule(state, now=now)
+
+    def mark_failed(self, query: str, now: int | None = None) -> int:
+        """Reschedule a location whose poll failed. Returns the epoch of its next poll."""
+        now = int(time.time()) if now is None else now
+        state: PollState = self.track(query, now=now)
+        state.next_poll_epoch = now + self.retry_delay
+
+        return state.next_poll_epoch
+
+    def due(self, now: int | None = None) -> list[str]:
+        """Return the queries due for a poll, most overdue first."""
+        now = int(time.time()) if now is None else now
+
+        return [
+            state.query
+            for state in sorted(self.states.values(), key=lambda s: s.next_poll_epoch)
+            if state.next_poll_epoch <= now
+        ]
+
+    def next_due_epoch(self) -> int | None:
+        """Return the epoch of the next scheduled poll, or `None` when no locations are tracked."""
+        return min(
+            (state.next_poll_epoch for state in self.states.values()), default=None
+        )
+
+    def seconds_until_due(self, now: float | None = None) -> float:
+        next_epoch: int | None = self.next_due_epoch()
+        if next_epoch is None:
+            return float(self.max_interval)
+
+        return max(next_epoch - (time.time() if now is None else now), 0.0)
+
+    def load_history(
+        self,
+        session: so.Session,
+        queries: t.Mapping[str, int] | None = None,
+        lookback: int = 2 * 24 * 3600,
+        now: int | None = None,
+    ) -> int:
+        """Seed locations' refresh intervals & change rates from stored observations.
+
+        Params:
+            session (Session): Database session.
+            queries (Mapping[str, int] | None): WeatherAPI query for each location ID to track, i.e.
+                `{"London": 1}`. Defaults to every saved location, queried by name.
+            lookback (int): (default: 2 days) Seconds of history to replay.
+            now (int | None): Current epoch. Defaults to the system time.
+
+        Returns:
+            (int): Number of tracked locations with history.
+
+        """
+        now = int(time.time()) if now is None else now
+
+        if queries is None:
+            queries = {
+                name: location_id
+                for location_id, name in session.execute(
+                    sa.select(LocationModel.id, LocationModel.name)
+                ).all()
+            }
+        query_by_id: dict[int, str] = {
+            location_id: query for query, location_id in queries.items()
+        }
+
+        frame: ObservationFrame = load_observations(
+            session,
+            location_ids=list(query_by_id),
+            start_epoch=now - lookback,
+            fields=list(CHANGE_SCALES),
+        )
+
+        for location_id, query in query_by_id.items():
+            self.track(query, location_id=location_id, now=now)
+
+        ## Frames are sorted by location, so each location's rows are one contiguous slice
+        location_ids, starts = np.unique(frame.location_ids, return_index=True)
+        ends: np.ndarray = np.append(starts[1:], len(frame))
+
+        for location_id, start, end in zip(
+            location_ids.tolist(), starts.tolist(), ends.tolist()
+        ):
+            state: PollState = self.states[query_by_id[location_id]]
+
+            for row in range(start, end):
+                self._apply(
+                    state,
+                    int(frame.epochs[row]),
+                    {name: float(frame.values[name][row]) for name in CHANGE_SCALES},
+                )
+
+            self._schedule(state, now=now)
+
+        log.info(
+            f"Loaded polling history for [{len(location_ids)}] of [{len(query_by_id)}] location(s)."
+        )
+
+        return len(location_ids)
+
+
+def _response_values(response: APIResponseCurrentWeather) -> dict[str, float]:
+    return {name: float(getattr(response.weather, name)) for name in CHANGE_SCALES}
+
+
+def poll_due(
+    policy: AdaptivePollingPolicy,
+    now: int | None = None,
+    **sweep_kwargs,
+) -> dict[str, APIResponseCurrentWeather | None]:
+    """Poll the current weather of every location the policy says is due, & feed the results back to it.
+
+    Params:
+        policy (AdaptivePollingPolicy): The polling policy.
+        now (int | None): Current epoch. Defaults to the system time.
+        **sweep_kwargs: Passed to `sweep_current_weather()`.
+
+    Returns:
+        (dict[str, APIResponseCurrentWeather | None]): Responses keyed by location query, see
+            `sweep_current_weather()`.
+
+    """
+    now = int(time.time()) if now is None else now
+
+    queries: list[str] = policy.due(now=now)
+    if not queries:
+        return {}
+
+    results: dict[str, APIResponseCurrentWeather | None] = sweep_current_weather(
+        queries, **sweep_kwargs
+    )
+
+    for query in queries:
+        response: APIResponseCurrentWeather | None = results.get(query)
+
+        if response is None:
+            policy.mark_failed(query, now=now)
+        else:
+            policy.observe(
+                query,
+                last_updated_epoch=response.weather.last_updated_epoch,
+                values=_response_values(response),
+                now=now,
+            )
+
+    metrics.inc_counter(
+        "weathersched_polls_total",
+        amount=len(queries),
+        description="Locations polled by the adaptive polling policy",
+    )
+
+    return results
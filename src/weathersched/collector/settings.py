@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from dynaconf import Dynaconf
+
+## Collector settings loaded with dynaconf
+COLLECTOR_SETTINGS: Dynaconf = Dynaconf(
+    environments=True,
+    env="collector",
+    envvar_prefix="COLLECTOR",
+    settings_files=["collector/settings.toml", "collector/.secrets.toml"],
+)
@@ -0,0 +1,160 @@
+"""Collect weather for a set of locations in a single pass (a "sweep")."""
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import http_lib, metrics, profiling
+from weathersched.domain.schemas import APIResponseCurrentWeather
+from weathersched.remote_apis.weatherapi_client import client
+from weathersched.remote_apis.weatherapi_client.settings import weatherapi_settings
+
+from .dedup import collapse_locations
+
+import httpx
+
+def sweep_current_weather(
+    locations: t.Iterable[str],
+    api_key: str = weatherapi_settings.api_key,
+    include_aqi: bool = True,
+    use_cache: bool = False,
+    save_to_db: bool = True,
+    transport: httpx.BaseTransport | None = None,
+    dedup_radius_km: float | None = None,
+) -> dict[str, APIResponseCurrentWeather | None]:
+    """Request (and optionally save) the current weather for each location.
+
+    Params:
+        locations (Iterable[str]): WeatherAPI location queries, i.e. `["London", "48.85,2.35"]`.
+        api_key (str): WeatherAPI API key.
+        include_aqi (bool): (default: True) Include air quality data in the response.
+        use_cache (bool): (default: False) Use the HTTP cache for requests.
+        save_to_db (bool): (default: True) Save each response to the database.
+        transport (httpx.BaseTransport | None): Optional base transport for the HTTP client. When `None`, the
+            sweep's requests share one tuned transport, see `http_lib.shared_transport()`.
+        dedup_radius_km (float | None): Poll coordinate queries within this many kilometers of each other once,
+            see `collapse_locations()`. Defaults to the `COLLECTOR_DEDUP_RADIUS_KM` setting, `0` disables.
+
+    Returns:
+        (dict[str, APIResponseCurrentWeather | None]): Responses keyed by location query.
+            A location's value is `None` if its request failed. Collapsed queries share their representative's
+            response.
+
+    """
+    results: dict[str, APIResponseCurrentWeather | None] = {}
+    groups: dict[str, list[str]] = collapse_locations(locations, dedup_radius_km)
+
+    ## Reuse one connection pool for every request in the sweep
+    pool = (
+        nullcontext(transport)
+        if transport is not None
+        else http_lib.shared_transport()
+    )
+
+    with pool as transport, profiling.profile_block(
+        name="sweep_current"
+    ), metrics.time_stage("sweep", endpoint="current"):
+        for location in groups:
+            try:
+                results[location] = client.get_current_weather(
+                    location=location,
+                    api_key=api_key,
+                    include_aqi=include_aqi,
+                    use_cache=use_cache,
+                    save_to_db=save_to_db,
+                    transport=transport,
+                )
+            except Exception as exc:
+                msg = f"({type(exc)}) Error requesting current weather for location '{location}'. Details: {exc}"
+                log.error(msg)
+
+                results[location] = None
+
+    for location, members in groups.items():
+        for member in members:
+            results[member] = results[location]
+
+    failed: int = sum(1 for res in results.values() if res is None)
+    log.info(
+        f"Swept current weather for [{len(results)}] location(s) with [{len(groups)}] request(s), [{failed}] failed."
+    )
+
+    return results
+
+
+def sweep_weather_forecast(
+    locations: t.Iterable[str],
+    days: int = 1,
+    api_key: str = weatherapi_settings.api_key,
+    include_aqi: bool = True,
+    include_alerts: bool = True,
+    use_cache: bool = False,
+    save_to_db: bool = True,
+    transport: httpx.BaseTransport | None = None,
+    dedup_radius_km: float | None = None,
+) -> dict[str, t.Any]:
+    """Request (and optionally save) the weather forecast for each location.
+
+    Params:
+        locations (Iterable[str]): WeatherAPI location queries, i.e. `["London", "48.85,2.35"]`.
+        days (int): (default: 1) Number of forecast days to request.
+        api_key (str): WeatherAPI API key.
+        include_aqi (bool): (default: True) Include air quality data in the response.
+        include_alerts (bool): (default: True) Include weather alerts in the response.
+        use_cache (bool): (default: False) Use the HTTP cache for requests.
+        save_to_db (bool): (default: True) Save each response to the database.
+        transport (httpx.BaseTransport | None): Optional base transport for the HTTP client. When `None`, the
+            sweep's requests share one tuned transport, see `http_lib.shared_transport()`.
+        dedup_radius_km (float | None): Poll coordinate queries within this many kilometers of each other once,
+            see `collapse_locations()`. Defaults to the `COLLECTOR_DEDUP_RADIUS_KM` setting, `0` disables.
+
+    Returns:
+        (dict[str, Any]): Forecast responses keyed by location query. A location's value is `None`
+            if its request failed. Collapsed queries share their representative's response.
+
+    """
+    results: dict[str, t.Any] = {}
+    groups: dict[str, list[str]] = collapse_locations(locations, dedup_radius_km)
+
+    ## Reuse one connection pool for every request in the sweep
+    pool = (
+        nullcontext(transport)
+        if transport is not None
+        else http_lib.shared_transport()
+    )
+
+    with pool as transport, profiling.profile_block(
+        name="sweep_forecast"
+    ), metrics.time_stage("sweep", endpoint="forecast"):
+        for location in groups:
+            try:
+                results[location] = client.get_weather_forecast(
+                    location=location,
+                    days=days,
+                    api_key=api_key,
+                    include_aqi=include_aqi,
+                    include_alerts=include_alerts,
+                    use_cache=use_cache,
+                    save_to_db=save_to_db,
+                    transport=transport,
+                )
+            except Exception as exc:
+                msg = f"({type(exc)}) Error requesting weather forecast for location '{location}'. Details: {exc}"
+                log.error(msg)
+
+                results[location] = None
+
+    for location, members in groups.items():
+        for member in members:
+            results[member] = results[location]
+
+    failed: int = sum(1 for res in results.values() if res is None)
+    log.info(
+        f"Swept weather forecast for [{len(results)}] location(s) with [{len(groups)}] request(s), [{failed}] failed."
+    )
+
+    return results
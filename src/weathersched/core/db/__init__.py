@@ -1,6 +1,9 @@
 from __future__ import annotations
 
-from . import annotated
+from . import annotated, measurement_storage, retention, types
 from .__methods import create_base_metadata, get_db_uri, get_engine, get_session_pool
 from .base import Base
+from .measurement_storage import alter_measurement_storage
+from .retention import RetentionPolicy, apply_retention, load_retention_policies
+from .types import CompressedJSON, Measurement, compress_json, decompress_json
 from .utils import backup_sqlite_db, dump_sqlite_db_schema
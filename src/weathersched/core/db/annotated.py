@@ -4,11 +4,14 @@ Examples:
     * `INT_PK`: An auto-incrementing, primary key integer value.
     * `STR_10`: A `VARCHAR(10)` column.
     * `STR_255`: A `VARCHAR(255)` column.
+    * `MEASUREMENT`: A float measurement column, see `types.Measurement`.
 
 """
 
 from __future__ import annotations
 
+from .types import Measurement
+
 import sqlalchemy as sa
 import sqlalchemy.orm as so
 from typing_extensions import Annotated
@@ -22,3 +25,6 @@ INT_PK = Annotated[
 STR_10 = Annotated[str, so.mapped_column(sa.VARCHAR(10))]
 ## SQLAlchemy VARCHAR(255)
 STR_255 = Annotated[str, so.mapped_column(sa.VARCHAR(255))]
+
+## Float measurement, stored as configured by DB_MEASUREMENT_STORAGE
+MEASUREMENT = Annotated[float, so.mapped_column(Measurement())]
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 import typing as t
 
+from weathersched.core import metrics
+
 import sqlalchemy as sa
 import sqlalchemy.exc as sa_exc
 import sqlalchemy.orm as so
@@ -19,40 +22,254 @@ class BaseRepository(t.Generic[T]):
 
     Usage:
         When creating a new repository class, inherit from this BaseRepository.
-        The new class will have sessions for create(), get(), update(), delete(), and list().
+        The new class will have sessions for create(), get(), update(), delete(), list(), iter_batches(),
+        count() and approx_count().
     """
 
     def __init__(self, session: so.Session, model: t.Type[T]):
         self.session = session
         self.model = model
 
+    @contextmanager
+    def _timed(self, operation: str) -> t.Generator[None, None, None]:
+        """Observe the duration of a repository operation & count it."""
+        registry: metrics.MetricsRegistry = metrics.get_registry()
+        labels: dict = {"operation": operation, "model": self.model.__name__}
+
+        registry.counter(
+            "weathersched_db_operations_total",
+            description="Repository operations executed.",
+        ).inc(**labels)
+
+        with registry.histogram(
+            "weathersched_db_operation_duration_seconds",
+            description="Duration of repository operations, including commits, in seconds.",
+        ).time(**labels):
+            yield
+
     def create(self, obj: T) -> T:
-        self.session.add(obj)
+        with self._timed("create"):
+            self.session.add(obj)
 
-        self.session.commit()
-        self.session.refresh(obj)
+            self.session.commit()
+            self.session.refresh(obj)
 
         return obj
 
     def get(self, id: int) -> t.Optional[T]:
-        return self.session.get(self.model, id)
+        with self._timed("get"):
+            return self.session.get(self.model, id)
 
     def update(self, obj: T, data: dict) -> T:
-        for key, value in data.items():
-            setattr(obj, key, value)
+        with self._timed("update"):
+            for key, value in data.items():
+                setattr(obj, key, value)
 
-        self.session.commit()
+            self.session.commit()
 
         return obj
 
     def delete(self, obj: T) -> None:
-        self.session.delete(obj)
+        with self._timed("delete"):
+            self.session.delete(obj)
+
+            self.session.commit()
+
+    def list(self, limit: int | None = None) -> list[T]:
+        """Return every entity in the table, or the first `limit`.
+
+        Description:
+            Loads the whole result into memory. Use `iter_batches()` to read large tables.
+        """
+        stmt: sa.Select = sa.select(self.model)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        with self._timed("list"):
+            return self.session.execute(stmt).scalars().all()
+
+    def _primary_key(self) -> sa.Column:
+        primary_key: tuple[sa.Column, ...] = tuple(
+            sa.inspect(self.model).primary_key
+        )
+        if len(primary_key) != 1:
+            raise TypeError(
+                f"{self.model.__name__} has a composite primary key, keyset pagination needs a single column key"
+            )
+
+        return primary_key[0]
+
+    def iter_batches(
+        self,
+        batch_size: int = 1000,
+        order_by: sa.ColumnElement | so.InstrumentedAttribute | None = None,
+        after: t.Any = None,
+        where: sa.ColumnElement[bool] | None = None,
+    ) -> t.Generator[list[T], None, None]:
+        """Yield the table's entities in batches, with keyset pagination.
+
+        Description:
+            Each batch is one `... WHERE key > <last key> ORDER BY key LIMIT batch_size` query, so reading a
+            page costs the same at the end of the table as at the start (unlike `OFFSET`), & memory use
+            scales with `batch_size` instead of the table size. Pages are separate queries, so the session
+            can commit between batches & no cursor is held open while the caller works.
+
+            When `order_by` is not unique, the primary key breaks ties so no row is skipped or repeated.
+            `order_by` cannot be nullable: NULLs never compare greater than the last key, so they could not
+            be paged past. Filter them out with `where` & page on an expression instead, i.e.
+            `sa.func.coalesce(Model.column, 0)`.
+
+        Usage:
+            for batch in repo.iter_batches(batch_size=5000, order_by=CurrentWeatherModel.last_updated_epoch):
+                ...
+
+        Params:
+            batch_size (int): (default: 1000) Entities per batch.
+            order_by (ColumnElement | None): Column to page on, ideally indexed. Defaults to the primary key.
+            after (Any): Resume after this key, i.e. the last key of a previous run. A primary key value, or
+                when paging on `order_by`, an `(order_by value, primary key)` tuple, or just an `order_by` value
+                to start after every row with that value.
+            where (ColumnElement[bool] | None): Optional filter, i.e. `Model.location_id == 1`.
+
+        Raises:
+            ValueError: When `order_by` is a nullable column, or a page ends on a NULL `order_by` value.
+
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+
+        if getattr(getattr(order_by, "expression", order_by), "nullable", False):
+            raise ValueError(
+                f"order_by column '{order_by}' is nullable, keyset pagination cannot page past NULLs"
+            )
 
-        self.session.commit()
+        primary_key: sa.Column = getattr(self.model, self._primary_key().key)
+        column: sa.ColumnElement = order_by if order_by is not None else primary_key
+        tie_break: bool = column is not primary_key
 
-    def list(self) -> list[T]:
-        return self.session.execute(sa.select(self.model)).scalars().all()
+        ## The order_by value is selected with each entity, to resume the next page from
+        base: sa.Select = sa.select(self.model, column)
+        if where is not None:
+            base = base.where(where)
+        base = base.order_by(column, primary_key) if tie_break else base.order_by(column)
+
+        last_value: t.Any = after
+        last_pk: t.Any = None
+        if tie_break and isinstance(after, tuple):
+            last_value, last_pk = after
+
+        while True:
+            stmt: sa.Select = base
+            if last_value is not None:
+                if last_pk is None:
+                    stmt = stmt.where(column > last_value)
+                else:
+                    stmt = stmt.where(
+                        sa.or_(
+                            column > last_value,
+                            sa.and_(column == last_value, primary_key > last_pk),
+                        )
+                    )
+
+            with self._timed("iter_batches"):
+                rows: list[sa.Row] = self.session.execute(
+                    stmt.limit(batch_size)
+                ).all()
+
+            if not rows:
+                return
+
+            yield [row[0] for row in rows]
+
+            if len(rows) < batch_size:
+                return
+
+            last_value = rows[-1][1]
+            if last_value is None:
+                ## Without a key to resume from, the next page would start from the first row again
+                raise ValueError(
+                    f"order_by '{column}' is NULL at the end of a page, keyset pagination cannot page past NULLs"
+                )
+            if tie_break:
+                last_pk = getattr(rows[-1][0], primary_key.key)
+
+    def stream(
+        self,
+        batch_size: int = 1000,
+        where: sa.ColumnElement[bool] | None = None,
+    ) -> t.Generator[list[T], None, None]:
+        """Yield the table's entities in batches from a single query, ordered by primary key.
+
+        Description:
+            Rows are fetched `batch_size` at a time (`yield_per`), from a server-side cursor on Postgres, so
+            memory use scales with `batch_size`. Faster than `iter_batches()` for one full pass, but the
+            query's transaction stays open until the generator is exhausted or closed, so do not commit the
+            session between batches. Use `iter_batches()` for long-running or resumable reads.
+        """
+        stmt: sa.Select = (
+            sa.select(self.model)
+            .order_by(getattr(self.model, self._primary_key().key))
+            .execution_options(yield_per=batch_size)
+        )
+        if where is not None:
+            stmt = stmt.where(where)
+
+        with self._timed("stream"):
+            result: sa.ScalarResult[T] = self.session.scalars(stmt)
+
+        try:
+            for partition in result.partitions():
+                yield list(partition)
+        finally:
+            result.close()
 
     def count(self) -> int:
         """Return the count of entities in the table."""
-        return self.session.query(self.model).count()
+        with self._timed("count"):
+            return self.session.execute(
+                sa.select(sa.func.count()).select_from(self.model)
+            ).scalar_one()
+
+    def approx_count(self) -> int:
+        """Return the table's row count from the database's statistics, without scanning the table.
+
+        Description:
+            On Postgres this is `pg_class.reltuples`, as of the last `ANALYZE`/autovacuum. On SQLite it is the
+            row count in `sqlite_stat1`, as of the last `ANALYZE`. Falls back to `count()` when the table has no
+            statistics yet, or on other databases.
+        """
+        table_name: str = self.model.__table__.name
+        dialect: str = self.session.get_bind().dialect.name
+
+        with self._timed("approx_count"):
+            estimate: float | None = None
+
+            if dialect == "postgresql":
+                estimate = self.session.execute(
+                    sa.text(
+                        "SELECT reltuples FROM pg_class WHERE oid = to_regclass(:table_name)"
+                    ),
+                    {"table_name": table_name},
+                ).scalar()
+            elif dialect == "sqlite":
+                ## sqlite_stat1 is created by the first ANALYZE
+                if sa.inspect(self.session.connection()).has_table("sqlite_stat1"):
+                    ## The first integer of each stat is the number of rows in the table
+                    stats: list[str] = (
+                        self.session.execute(
+                            sa.text(
+                                "SELECT stat FROM sqlite_stat1 WHERE tbl = :table_name"
+                            ),
+                            {"table_name": table_name},
+                        )
+                        .scalars()
+                        .all()
+                    )
+                    if stats:
+                        estimate = max(int(stat.split()[0]) for stat in stats)
+
+        ## reltuples is -1 for tables that were never analyzed
+        if estimate is None or estimate < 0:
+            return self.count()
+
+        return int(estimate)
@@ -0,0 +1,116 @@
+"""Convert existing measurement columns to the storage configured in `DB_MEASUREMENT_STORAGE`.
+
+Description:
+    `Measurement` columns are created with the configured storage, but changing the setting does not
+    touch tables that already exist. Migrations always leave measurement columns as `NUMERIC(12, 2)`, so
+    the schema does not depend on the settings of whoever runs `alembic upgrade`.
+
+    `alter_measurement_storage()` compares each measurement column's type in the database to the configured
+    storage & ALTERs the columns that differ. Run it (i.e. with `scripts/db_measurement_storage.py`) after
+    changing `DB_MEASUREMENT_STORAGE`.
+
+"""
+
+from __future__ import annotations
+
+import logging
+
+log = logging.getLogger(__name__)
+
+from .base import Base
+from .settings import DB_SETTINGS
+from .types import Measurement, measurement_column_type
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+import sqlalchemy as sa
+
+def measurement_columns(metadata: sa.MetaData = Base.metadata) -> dict[str, list[str]]:
+    """Return the names of `Measurement` columns, by table."""
+    columns: dict[str, list[str]] = {}
+
+    for table in metadata.sorted_tables:
+        names: list[str] = [c.name for c in table.columns if isinstance(c.type, Measurement)]
+        if names:
+            columns[table.name] = names
+
+    return columns
+
+
+def reflected_storage(column_type: sa.types.TypeEngine) -> str | None:
+    """Return the storage option matching a reflected column type, or `None` if it is not a measurement type."""
+    if isinstance(column_type, sa.Double):
+        return "float64"
+
+    if isinstance(column_type, sa.REAL):
+        return "float32"
+
+    if isinstance(column_type, sa.Float):
+        return "float32" if (column_type.precision or 53) <= 24 else "float64"
+
+    if isinstance(column_type, sa.Numeric):
+        return "numeric"
+
+    return None
+
+
+def alter_measurement_storage(
+    engine: sa.Engine,
+    storage: str = DB_SETTINGS.get("DB_MEASUREMENT_STORAGE", default="numeric"),
+    metadata: sa.MetaData = Base.metadata,
+) -> dict[str, list[str]]:
+    """ALTER measurement columns that are not stored as `storage`.
+
+    Description:
+        Converting to "float32" or "float64" is lossless for the 2 decimal places WeatherAPI reports.
+        Converting back to "numeric" rounds values to 2 decimal places. On SQLite, each altered table is
+        copied to a new table, like an Alembic batch migration.
+
+    Params:
+        engine (sqlalchemy.Engine): Engine for the database to convert.
+        storage (str): The target storage, "numeric", "float32" or "float64".
+        metadata (sqlalchemy.MetaData): Metadata describing the tables.
+
+    Returns:
+        (dict[str, list[str]]): The altered columns, by table.
+
+    """
+    storage = storage.lower()
+    new_type: sa.types.TypeEngine = measurement_column_type(storage)
+
+    altered: dict[str, list[str]] = {}
+    with engine.begin() as conn:
+        inspector: sa.Inspector = sa.inspect(conn)
+        operations: Operations = Operations(MigrationContext.configure(conn))
+        compiled_type: str = new_type.compile(dialect=conn.dialect)
+
+        for table, columns in measurement_columns(metadata).items():
+            if not inspector.has_table(table):
+                continue
+
+            existing: dict[str, sa.types.TypeEngine] = {
+                c["name"]: c["type"] for c in inspector.get_columns(table)
+            }
+            pending: list[str] = [
+                c
+                for c in columns
+                if c in existing and reflected_storage(existing[c]) != storage
+            ]
+            if not pending:
+                continue
+
+            log.info(
+                f"Converting [{len(pending)}] measurement column(s) in '{table}' to {compiled_type}"
+            )
+            with operations.batch_alter_table(table) as batch_op:
+                for column in pending:
+                    batch_op.alter_column(
+                        column,
+                        existing_type=existing[column],
+                        type_=new_type,
+                        postgresql_using=f'"{column}"::{compiled_type}',
+                    )
+
+            altered[table] = pending
+
+    return altered
@@ -0,0 +1,693 @@
+"""Retention policies for tables that grow without bound, i.e. raw observations & forecasts.
+
+Description:
+    Policies are declared per table in `DB_SETTINGS` under `db_retention`:
+
+        [default.db_retention.weatherapi_current_weather]
+        days = 365
+        time_column = "last_updated_epoch"
+        archive = true
+        partition = false
+
+    `apply_retention()` removes rows older than each policy's window. On tables that are range partitioned
+    by month (Postgres only), expired partitions are dropped & upcoming partitions are created. Otherwise,
+    rows are deleted in batches, along with rows in other tables that reference them through a foreign key.
+
+    When `archive = true`, deleted rows are appended to gzipped JSON lines files in `db_retention_archive_dir`
+    once the transaction that removed them has committed, so a failed batch is not archived.
+
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import datetime as dt
+import gzip
+import json
+import logging
+from pathlib import Path
+import re
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from .base import Base
+from .settings import DB_SETTINGS
+
+import sqlalchemy as sa
+
+## Suffix of monthly partition tables, i.e. weatherapi_forecast_json_p202411
+PARTITION_SUFFIX_PATTERN: re.Pattern = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+@dataclass
+class RetentionPolicy:
+    """Retention window for one table.
+
+    Params:
+        table (str): Name of the table.
+        days (int): Rows older than this many days are removed.
+        time_column (str): Column holding each row's timestamp. May be a Unix epoch integer or a datetime.
+        archive (bool): (default: False) Write removed rows to compressed archive files.
+        partition (bool): (default: False) The table is (or should be) range partitioned by month on
+            `time_column`. Only used on Postgres.
+        batch_size (int): (default: 5000) Maximum number of rows deleted per transaction.
+    """
+
+    table: str
+    days: int
+    time_column: str
+    archive: bool = field(default=False)
+    partition: bool = field(default=False)
+    batch_size: int = field(default=5000)
+
+    def cutoff(self, now: dt.datetime | None = None) -> dt.datetime:
+        """Return the timestamp before which rows are expired."""
+        now = now or dt.datetime.now(tz=dt.timezone.utc)
+
+        return now - dt.timedelta(days=self.days)
+
+
+def load_retention_policies(
+    retention: t.Mapping[str, t.Mapping] | None = None,
+    batch_size: int = DB_SETTINGS.get("DB_RETENTION_BATCH_SIZE", default=5000),
+) -> list[RetentionPolicy]:
+    """Build retention policies from settings.
+
+    Params:
+        retention (Mapping | None): Mapping of table name to policy options. Defaults to `DB_RETENTION` in `DB_SETTINGS`.
+        batch_size (int): Default batch size for policies that do not set one.
+
+    Returns:
+        (list[RetentionPolicy]): The configured policies.
+
+    """
+    if retention is None:
+        retention = DB_SETTINGS.get("DB_RETENTION", default={}) or {}
+
+    policies: list[RetentionPolicy] = []
+    for table, options in retention.items():
+        options: dict = {str(k).lower(): v for k, v in dict(options).items()}
+
+        try:
+            policies.append(
+                RetentionPolicy(
+                    table=table,
+                    days=int(options["days"]),
+                    time_column=options["time_column"],
+                    archive=bool(options.get("archive", False)),
+                    partition=bool(options.get("partition", False)),
+                    batch_size=int(options.get("batch_size", batch_size)),
+                )
+            )
+        except KeyError as exc:
+            msg = f"Retention policy for table '{table}' is missing required option {exc}."
+            log.error(msg)
+
+            raise ValueError(msg)
+
+    return policies
+
+
+def _cutoff_value(column: sa.Column, cutoff: dt.datetime) -> int | dt.datetime:
+    """Convert a cutoff timestamp to the type stored in `column`."""
+    if isinstance(column.type, sa.Integer):
+        return int(cutoff.timestamp())
+
+    if isinstance(column.type, sa.DateTime) and not column.type.timezone:
+        return cutoff.replace(tzinfo=None)
+
+    return cutoff
+
+
+def _json_default(value: t.Any) -> t.Any:
+    if isinstance(value, (dt.datetime, dt.date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+
+    return str(value)
+
+
+def archive_rows(
+    table: str, rows: t.Sequence[t.Mapping], archive_dir: str | Path
+) -> Path | None:
+    """Append rows to a gzipped JSON lines archive file for the table & current day.
+
+    Params:
+        table (str): Name of the table the rows come from.
+        rows (Sequence[Mapping]): The rows to archive.
+        archive_dir (str | Path): Base directory for archive files.
+
+    Returns:
+        (Path | None): The archive file, or `None` if there were no rows.
+
+    """
+    if not rows:
+        return None
+
+    output_dir: Path = Path(str(archive_dir)) / table
+    if not output_dir.exists():
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    output_file: Path = (
+        output_dir / f"{table}_{dt.date.today().strftime('%Y-%m-%d')}.jsonl.gz"
+    )
+
+    ## Appending to a gzip file adds a new gzip member, which readers decompress transparently
+    with gzip.open(output_file, "at", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(row), default=_json_default) + "\n")
+
+    return output_file
+
+
+def _referencing_tables(
+    table: sa.Table, metadata: sa.MetaData
+) -> list[tuple[sa.Table, sa.Column, sa.Column]]:
+    """Return `(child_table, child_column, parent_column)` for foreign keys that point at `table`."""
+    references: list[tuple[sa.Table, sa.Column, sa.Column]] = []
+
+    for child in metadata.sorted_tables:
+        for fk in child.foreign_keys:
+            if fk.column.table is table:
+                references.append((child, fk.parent, fk.column))
+
+    return references
+
+
+def _write_archives(
+    archived: t.Sequence[tuple[str, list]], archive_dir: str | Path
+) -> None:
+    """Write rows collected by a committed transaction to each table's archive file."""
+    rows_by_table: dict[str, list] = {}
+    for table, rows in archived:
+        rows_by_table.setdefault(table, []).extend(rows)
+
+    for table, rows in rows_by_table.items():
+        archive_rows(table=table, rows=rows, archive_dir=archive_dir)
+
+
+def _delete_with_dependents(
+    conn: sa.Connection,
+    table: sa.Table,
+    column: sa.Column,
+    values: t.Sequence,
+    metadata: sa.MetaData,
+    archived: list[tuple[str, list]] | None = None,
+) -> int:
+    """Delete rows where `column IN values`, deleting referencing rows first.
+
+    Params:
+        archived (list | None): When given, `(table name, rows)` is appended for each deleted set of rows,
+            for the caller to archive once the transaction has committed.
+
+    """
+    if not values:
+        return 0
+
+    for child, child_column, parent_column in _referencing_tables(table, metadata):
+        parent_values: list = list(
+            conn.execute(sa.select(parent_column).where(column.in_(values))).scalars()
+        )
+        child_pk: sa.Column = list(child.primary_key.columns)[0]
+        child_values: list = list(
+            conn.execute(
+                sa.select(child_pk).where(child_column.in_(parent_values))
+            ).scalars()
+        )
+
+        _delete_with_dependents(
+            conn=conn,
+            table=child,
+            column=child_pk,
+            values=child_values,
+            metadata=metadata,
+            archived=archived,
+        )
+
+    if archived is not None:
+        rows: list = list(
+            conn.execute(sa.select(table).where(column.in_(values))).mappings()
+        )
+        archived.append((table.name, rows))
+
+    result: sa.CursorResult = conn.execute(sa.delete(table).where(column.in_(values)))
+
+    return result.rowcount
+
+
+def delete_expired_rows(
+    engine: sa.Engine,
+    policy: RetentionPolicy,
+    now: dt.datetime | None = None,
+    metadata: sa.MetaData = Base.metadata,
+    archive_dir: str | Path = DB_SETTINGS.get(
+        "DB_RETENTION_ARCHIVE_DIR", default=".archive/db"
+    ),
+) -> int:
+    """Delete a table's expired rows in batches of `policy.batch_size`, one transaction per batch.
+
+    Description:
+        When the policy archives rows, each batch is written to the archive after its transaction commits.
+        A batch that fails is rolled back without being archived, & is archived when a later run deletes it.
+
+    Returns:
+        (int): Number of rows deleted from the policy's table.
+
+    """
+    table: sa.Table = metadata.tables[policy.table]
+    time_column: sa.Column = table.c[policy.time_column]
+    pk: sa.Column = list(table.primary_key.columns)[0]
+    cutoff = _cutoff_value(time_column, policy.cutoff(now))
+
+    deleted: int = 0
+    while True:
+        archived: list[tuple[str, list]] | None = [] if policy.archive else None
+
+        with engine.begin() as conn:
+            ids: list = list(
+                conn.execute(
+                    sa.select(pk)
+                    .where(time_column < cutoff)
+                    .order_by(pk)
+                    .limit(policy.batch_size)
+                ).scalars()
+            )
+            if not ids:
+                break
+
+            deleted += _delete_with_dependents(
+                conn=conn,
+                table=table,
+                column=pk,
+                values=ids,
+                metadata=metadata,
+                archived=archived,
+            )
+
+        if archived:
+            _write_archives(archived, archive_dir=archive_dir)
+
+        log.debug(f"Deleted [{deleted}] expired row(s) from '{policy.table}' so far")
+
+        if len(ids) < policy.batch_size:
+            break
+
+    return deleted
+
+
+#########################
+# Postgres partitioning #
+#########################
+
+
+def _month_start(value: dt.datetime, months: int = 0) -> dt.datetime:
+    """Return the first instant of the month `months` after `value`'s month."""
+    index: int = value.year * 12 + (value.month - 1) + months
+
+    return dt.datetime(index // 12, index % 12 + 1, 1, tzinfo=dt.timezone.utc)
+
+
+def partition_name(table: str, month: dt.datetime) -> str:
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def is_partitioned(conn: sa.Connection, table: str) -> bool:
+    """Return `True` if `table` is a partitioned table on a Postgres database."""
+    if conn.dialect.name != "postgresql":
+        return False
+
+    return (
+        conn.execute(
+            sa.text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON p.partrelid = c.oid "
+                "WHERE c.relname = :table"
+            ),
+            {"table": table},
+        ).first()
+        is not None
+    )
+
+
+def list_partitions(conn: sa.Connection, table: str) -> list[str]:
+    """Return the names of a partitioned table's partitions."""
+    return list(
+        conn.execute(
+            sa.text(
+                "SELECT child.relname FROM pg_inherits i "
+                "JOIN pg_class parent ON i.inhparent = parent.oid "
+                "JOIN pg_class child ON i.inhrelid = child.oid "
+                "WHERE parent.relname = :table ORDER BY child.relname"
+            ),
+            {"table": table},
+        ).scalars()
+    )
+
+
+def _partition_bound(column: sa.Column, month: dt.datetime) -> str:
+    if isinstance(column.type, sa.Integer):
+        return str(int(month.timestamp()))
+
+    return f"'{month.isoformat()}'"
+
+
+def ensure_monthly_partitions(
+    conn: sa.Connection,
+    table: sa.Table,
+    column: sa.Column,
+    start: dt.datetime,
+    months_ahead: int = DB_SETTINGS.get(
+        "DB_RETENTION_PARTITION_MONTHS_AHEAD", default=2
+    ),
+) -> list[str]:
+    """Create monthly partitions from `start`'s month through `months_ahead` months past the current month.
+
+    Returns:
+        (list[str]): Names of partitions that were created.
+
+    """
+    existing: set[str] = set(list_partitions(conn, table.name))
+    now: dt.datetime = dt.datetime.now(tz=dt.timezone.utc)
+
+    created: list[str] = []
+    month: dt.datetime = _month_start(start)
+    last: dt.datetime = _month_start(now, months_ahead)
+    while month <= last:
+        name: str = partition_name(table.name, month)
+
+        if name not in existing:
+            conn.execute(
+                sa.text(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF "{table.name}" '
+                    f"FOR VALUES FROM ({_partition_bound(column, month)}) "
+                    f"TO ({_partition_bound(column, _month_start(month, 1))})"
+                )
+            )
+            created.append(name)
+
+        month = _month_start(month, 1)
+
+    return created
+
+
+def drop_expired_partitions(
+    conn: sa.Connection,
+    table: sa.Table,
+    cutoff: dt.datetime,
+    archived: list[tuple[str, list]] | None = None,
+) -> list[str]:
+    """Drop monthly partitions whose whole range is older than `cutoff`.
+
+    Params:
+        archived (list | None): When given, `(table name, rows)` is appended for each dropped partition,
+            for the caller to archive once the transaction has committed.
+
+    Returns:
+        (list[str]): Names of dropped partitions.
+
+    """
+    dropped: list[str] = []
+
+    for name in list_partitions(conn, table.name):
+        match: re.Match | None = PARTITION_SUFFIX_PATTERN.search(name)
+        if match is None:
+            continue
+
+        month: dt.datetime = dt.datetime(
+            int(match.group(1)), int(match.group(2)), 1, tzinfo=dt.timezone.utc
+        )
+        if _month_start(month, 1) > cutoff:
+            continue
+
+        if archived is not None:
+            rows: list = list(
+                conn.execute(sa.text(f'SELECT * FROM "{name}"')).mappings()
+            )
+            archived.append((table.name, rows))
+
+        conn.execute(sa.text(f'ALTER TABLE "{table.name}" DETACH PARTITION "{name}"'))
+        conn.execute(sa.text(f'DROP TABLE "{name}"'))
+        dropped.append(name)
+
+    return dropped
+
+
+def _table_indexes(conn: sa.Connection, table: str) -> list[dict]:
+    """Return a table's secondary indexes, with the constraint (if any) each one backs."""
+    return [
+        dict(row)
+        for row in conn.execute(
+            sa.text(
+                "SELECT i.relname AS name, pg_get_indexdef(ix.indexrelid) AS definition, "
+                "ix.indisunique AS is_unique, ix.indexprs IS NOT NULL AS is_expression, "
+                "ARRAY(SELECT a.attname FROM unnest(ix.indkey::int2[]) WITH ORDINALITY AS k(attnum, ord) "
+                "JOIN pg_attribute a ON a.attrelid = ix.indrelid AND a.attnum = k.attnum "
+                "ORDER BY k.ord) AS columns, "
+                "con.contype AS constraint_type, pg_get_constraintdef(con.oid) AS constraint_definition "
+                "FROM pg_index ix "
+                "JOIN pg_class i ON i.oid = ix.indexrelid "
+                "JOIN pg_class t ON t.oid = ix.indrelid "
+                "LEFT JOIN pg_constraint con ON con.conindid = ix.indexrelid AND con.conrelid = ix.indrelid "
+                "WHERE t.relname = :table AND NOT ix.indisprimary ORDER BY i.relname"
+            ),
+            {"table": table},
+        ).mappings()
+    ]
+
+
+def _table_foreign_keys(conn: sa.Connection, table: str) -> list[dict]:
+    """Return the foreign keys defined on a table."""
+    return [
+        dict(row)
+        for row in conn.execute(
+            sa.text(
+                "SELECT con.conname AS name, pg_get_constraintdef(con.oid) AS definition "
+                "FROM pg_constraint con JOIN pg_class t ON t.oid = con.conrelid "
+                "WHERE t.relname = :table AND con.contype = 'f' ORDER BY con.conname"
+            ),
+            {"table": table},
+        ).mappings()
+    ]
+
+
+def partitioned_index_statements(
+    table: str,
+    partition_column: str,
+    indexes: t.Sequence[t.Mapping],
+    foreign_keys: t.Sequence[t.Mapping] = (),
+) -> list[str]:
+    """Return the statements that recreate a table's indexes & constraints on its partitioned replacement.
+
+    Description:
+        `CREATE TABLE ... (LIKE ...)` does not copy indexes or foreign keys. Postgres can only enforce a
+        unique index on a partitioned table when it includes the partition key, so tables with a unique
+        index or constraint that does not include it are refused instead of losing the guarantee.
+
+    Params:
+        table (str): Name of the table.
+        partition_column (str): The partition key column.
+        indexes (Sequence[Mapping]): Secondary indexes, as returned by `_table_indexes()`.
+        foreign_keys (Sequence[Mapping]): Foreign keys, as returned by `_table_foreign_keys()`.
+
+    Raises:
+        ValueError: When an index or constraint cannot be recreated on a partitioned table.
+
+    """
+    statements: list[str] = []
+
+    for index in indexes:
+        if index["constraint_type"] == "x":
+            raise ValueError(
+                f"Table '{table}' has exclusion constraint '{index['name']}' & cannot be partitioned."
+            )
+
+        if index["is_unique"] and (
+            index["is_expression"] or partition_column not in index["columns"]
+        ):
+            raise ValueError(
+                f"Unique index '{index['name']}' on table '{table}' does not include the partition key "
+                f"'{partition_column}' & cannot be enforced on a partitioned table. Add the column to the "
+                "index or drop it before converting the table."
+            )
+
+        if index["constraint_type"] == "u":
+            statements.append(
+                f'ALTER TABLE "{table}" ADD CONSTRAINT "{index["name"]}" {index["constraint_definition"]}'
+            )
+        else:
+            statements.append(index["definition"])
+
+    for fk in foreign_keys:
+        statements.append(
+            f'ALTER TABLE "{table}" ADD CONSTRAINT "{fk["name"]}" {fk["definition"]}'
+        )
+
+    return statements
+
+
+def convert_to_partitioned(
+    engine: sa.Engine, policy: RetentionPolicy, metadata: sa.MetaData = Base.metadata
+) -> None:
+    """Rebuild a Postgres table as a range partitioned table, partitioned by month on `policy.time_column`.
+
+    Description:
+        This is a one-off maintenance operation that copies every row & takes an exclusive lock on the table.
+        Postgres requires unique constraints on a partitioned table to include the partition key, so the
+        primary key becomes `(id, time_column)`. Secondary indexes, unique constraints & foreign keys are
+        recreated on the new table. Tables referenced by foreign keys, or with a unique index that does not
+        include the partition key, cannot be converted.
+
+    """
+    if engine.dialect.name != "postgresql":
+        raise NotImplementedError("Table partitioning is only supported on Postgres.")
+
+    table: sa.Table = metadata.tables[policy.table]
+    column: sa.Column = table.c[policy.time_column]
+    pk: sa.Column = list(table.primary_key.columns)[0]
+
+    if _referencing_tables(table, metadata):
+        raise ValueError(
+            f"Table '{table.name}' is referenced by foreign keys & cannot be partitioned."
+        )
+
+    old_name: str = f"{table.name}_unpartitioned"
+    with engine.begin() as conn:
+        if is_partitioned(conn, table.name):
+            log.info(f"Table '{table.name}' is already partitioned.")
+            return
+
+        ## Definitions are read before the rename, so they name the new table
+        index_statements: list[str] = partitioned_index_statements(
+            table=table.name,
+            partition_column=column.name,
+            indexes=_table_indexes(conn, table.name),
+            foreign_keys=_table_foreign_keys(conn, table.name),
+        )
+
+        oldest = conn.execute(sa.select(sa.func.min(column))).scalar()
+
+        conn.execute(sa.text(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"'))
+        conn.execute(
+            sa.text(
+                f'CREATE TABLE "{table.name}" (LIKE "{old_name}" INCLUDING DEFAULTS INCLUDING IDENTITY '
+                f'INCLUDING CONSTRAINTS) PARTITION BY RANGE ("{column.name}")'
+            )
+        )
+        conn.execute(
+            sa.text(
+                f'ALTER TABLE "{table.name}" ADD PRIMARY KEY ("{pk.name}", "{column.name}")'
+            )
+        )
+
+        if oldest is None:
+            start: dt.datetime = dt.datetime.now(tz=dt.timezone.utc)
+        elif isinstance(oldest, int):
+            start = dt.datetime.fromtimestamp(oldest, tz=dt.timezone.utc)
+        else:
+            start = oldest if oldest.tzinfo else oldest.replace(tzinfo=dt.timezone.utc)
+
+        ensure_monthly_partitions(conn, table=table, column=column, start=start)
+
+        conn.execute(sa.text(f'INSERT INTO "{table.name}" SELECT * FROM "{old_name}"'))
+
+        ## Hand the id sequence over to the new table, so it is not dropped with the old one
+        sequence: str | None = conn.execute(
+            sa.text("SELECT pg_get_serial_sequence(:table, :column)"),
+            {"table": old_name, "column": pk.name},
+        ).scalar()
+        if sequence:
+            conn.execute(
+                sa.text(f'ALTER SEQUENCE {sequence} OWNED BY "{table.name}"."{pk.name}"')
+            )
+
+        conn.execute(sa.text(f'DROP TABLE "{old_name}"'))
+
+        ## Index & constraint names are only free once the old table is gone
+        for statement in index_statements:
+            conn.execute(sa.text(statement))
+
+    log.info(f"Converted table '{table.name}' to a monthly range partitioned table.")
+
+
+def apply_retention(
+    engine: sa.Engine,
+    policies: list[RetentionPolicy] | None = None,
+    now: dt.datetime | None = None,
+    metadata: sa.MetaData = Base.metadata,
+    archive_dir: str | Path = DB_SETTINGS.get(
+        "DB_RETENTION_ARCHIVE_DIR", default=".archive/db"
+    ),
+) -> dict[str, int]:
+    """Apply retention policies to the database.
+
+    Params:
+        engine (sqlalchemy.Engine): Engine for the database to clean up.
+        policies (list[RetentionPolicy] | None): Policies to apply. Defaults to the policies in `DB_SETTINGS`.
+        now (datetime | None): Reference time for retention windows. Defaults to the current UTC time.
+        metadata (sqlalchemy.MetaData): Metadata describing the tables.
+        archive_dir (str | Path): Base directory for archive files.
+
+    Returns:
+        (dict[str, int]): Number of rows deleted (or partitions dropped) per table.
+
+    """
+    if policies is None:
+        policies = load_retention_policies()
+
+    results: dict[str, int] = {}
+    for policy in policies:
+        if policy.table not in metadata.tables:
+            log.warning(f"Skipping retention for unknown table '{policy.table}'.")
+            continue
+
+        table: sa.Table = metadata.tables[policy.table]
+        cutoff: dt.datetime = policy.cutoff(now)
+        archived: list[tuple[str, list]] | None = [] if policy.archive else None
+
+        with engine.begin() as conn:
+            partitioned: bool = policy.partition and is_partitioned(conn, table.name)
+
+            if partitioned:
+                dropped: list[str] = drop_expired_partitions(
+                    conn,
+                    table=table,
+                    cutoff=cutoff,
+                    archived=archived,
+                )
+                created: list[str] = ensure_monthly_partitions(
+                    conn,
+                    table=table,
+                    column=table.c[policy.time_column],
+                    start=dt.datetime.now(tz=dt.timezone.utc),
+                )
+
+                log.info(
+                    f"Table '{table.name}': dropped [{len(dropped)}] expired partition(s), created [{len(created)}] partition(s)."
+                )
+                results[table.name] = len(dropped)
+
+        if partitioned:
+            if archived:
+                _write_archives(archived, archive_dir=archive_dir)
+            continue
+
+        if policy.partition and engine.dialect.name == "postgresql":
+            log.warning(
+                f"Table '{table.name}' is configured for partitioning but is not partitioned. Run convert_to_partitioned() to convert it. Falling back to batched deletes."
+            )
+
+        deleted: int = delete_expired_rows(
+            engine=engine,
+            policy=policy,
+            now=now,
+            metadata=metadata,
+            archive_dir=archive_dir,
+        )
+        log.info(
+            f"Table '{table.name}': deleted [{deleted}] row(s) older than {cutoff.isoformat()}."
+        )
+        results[table.name] = deleted
+
+    return results
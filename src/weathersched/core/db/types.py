@@ -0,0 +1,395 @@
+"""Custom SQLAlchemy column types.
+
+Examples:
+    * `CompressedJSON`: A JSON document stored as compressed bytes.
+    * `Measurement`: A float measurement, stored as NUMERIC, REAL or DOUBLE depending on the database settings.
+
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+import importlib.util
+import json
+import logging
+from pathlib import Path
+import struct
+import typing as t
+import zlib
+
+log = logging.getLogger(__name__)
+
+from .settings import DB_SETTINGS
+
+import sqlalchemy as sa
+
+## First byte of a compressed value, identifying the codec used to compress it
+CODEC_ZLIB: bytes = b"\x01"
+CODEC_ZSTD: bytes = b"\x02"
+## Followed by the 4 byte (big endian) ID of the zstd dictionary used to compress the value
+CODEC_ZSTD_DICT: bytes = b"\x03"
+
+SUPPORTED_CODECS: list[str] = ["zlib", "zstd"]
+SUPPORTED_MEASUREMENT_STORAGE: list[str] = ["numeric", "float32", "float64"]
+
+
+def zstd_available() -> bool:
+    """Return `True` if the optional `zstandard` package is installed."""
+    return importlib.util.find_spec("zstandard") is not None
+
+
+## A dictionary file, a directory of `*.dict` files, or a list of dictionary files
+ZstdDictPath = t.Union[str, Path, t.Sequence[t.Union[str, Path]]]
+
+
+@lru_cache(maxsize=8)
+def load_zstd_dictionary(path: str):
+    """Load a trained zstd dictionary from a file.
+
+    Returns:
+        (zstandard.ZstdCompressionDict): The loaded dictionary.
+
+    """
+    import zstandard
+
+    with open(path, "rb") as f:
+        return zstandard.ZstdCompressionDict(f.read())
+
+
+def _zstd_dictionary_files(zstd_dict_path: ZstdDictPath) -> list[str]:
+    """Resolve a dictionary setting to dictionary files, oldest first."""
+    if isinstance(zstd_dict_path, (str, Path)):
+        path: Path = Path(str(zstd_dict_path))
+        if path.is_dir():
+            return [str(p) for p in sorted(path.glob("*.dict"))]
+
+        return [str(path)]
+
+    return [str(p) for p in zstd_dict_path]
+
+
+@lru_cache(maxsize=8)
+def load_zstd_dictionaries(zstd_dict_path: str | tuple[str, ...]) -> dict:
+    """Load every configured zstd dictionary, keyed by dictionary ID.
+
+    Description:
+        `zstd_dict_path` is a dictionary file, a directory of `*.dict` files or a tuple of files. Dictionaries
+        are ordered oldest first, by file name for a directory (i.e. name files with the date they were
+        trained) or by position for a tuple. The last one is used to compress new values.
+
+    Returns:
+        (dict[int, zstandard.ZstdCompressionDict]): The loaded dictionaries.
+
+    """
+    dictionaries: dict = {}
+    for path in _zstd_dictionary_files(zstd_dict_path):
+        dictionary = load_zstd_dictionary(path)
+        ## Re-insert, so a file listed twice still sorts by its last position
+        dictionaries.pop(dictionary.dict_id(), None)
+        dictionaries[dictionary.dict_id()] = dictionary
+
+    return dictionaries
+
+
+def _hashable_dict_path(
+    zstd_dict_path: ZstdDictPath | None,
+) -> str | tuple[str, ...] | None:
+    if not zstd_dict_path:
+        return None
+
+    if isinstance(zstd_dict_path, (str, Path)):
+        return str(zstd_dict_path)
+
+    return tuple(str(p) for p in zstd_dict_path)
+
+
+def train_zstd_dictionary(
+    samples: t.Iterable[dict], output_file: str | Path, dict_size: int = 112_640
+) -> Path:
+    """Train a zstd dictionary on sample JSON documents & save it to a file.
+
+    Description:
+        Forecasts for the same location share most of their structure (keys, condition text & icons, astro data).
+        A dictionary trained on a few hundred stored forecasts lets zstd reference that shared content instead of
+        storing it in every row, which improves the compression ratio of small documents considerably.
+
+        Values are tagged with the dictionary's ID. To retrain, save the new dictionary next to the old ones
+        in the directory set in `DB_FORECAST_JSON_ZSTD_DICT`, with a name that sorts after them. New rows are
+        compressed with the newest dictionary, and rows written with older ones stay readable.
+
+    Params:
+        samples (Iterable[dict]): Sample documents, i.e. decoded forecast responses.
+        output_file (str | Path): Path where the dictionary will be saved.
+        dict_size (int): (default: 112640) Maximum size of the dictionary, in bytes.
+
+    Returns:
+        (Path): Path to the saved dictionary.
+
+    """
+    import zstandard
+
+    encoded: list[bytes] = [_dump(sample) for sample in samples]
+    dictionary = zstandard.train_dictionary(dict_size, encoded)
+
+    output_file: Path = Path(str(output_file))
+    if not output_file.parent.exists():
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(output_file, "wb") as f:
+        f.write(dictionary.as_bytes())
+
+    log.info(
+        f"Trained zstd dictionary [{dictionary.dict_id()}] on [{len(encoded)}] sample(s), saved to: {output_file}"
+    )
+
+    return output_file
+
+
+def _dump(value: t.Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def compress_json(
+    value: t.Any,
+    codec: str = "zlib",
+    level: int | None = None,
+    zstd_dict_path: ZstdDictPath | None = None,
+) -> bytes:
+    """Serialize a value to JSON & compress it.
+
+    Params:
+        value (Any): A JSON serializable value.
+        codec (str): (default: "zlib") The compression codec, "zlib" or "zstd". Falls back to zlib if
+            the `zstandard` package is not installed.
+        level (int | None): Compression level. Defaults to the codec's default level.
+        zstd_dict_path (str | Path | Sequence | None): A trained zstd dictionary file, a directory of
+            dictionaries or a list of dictionary files. The newest dictionary is used. Only used with the
+            "zstd" codec.
+
+    Returns:
+        (bytes): The codec marker followed by the compressed JSON.
+
+    """
+    data: bytes = _dump(value)
+
+    if codec == "zstd" and not zstd_available():
+        log.warning("zstandard is not installed, compressing with zlib instead.")
+        codec = "zlib"
+
+    match codec:
+        case "zlib":
+            return CODEC_ZLIB + zlib.compress(data, -1 if level is None else level)
+        case "zstd":
+            import zstandard
+
+            kwargs: dict = {"level": 3 if level is None else level}
+            dict_path: str | tuple[str, ...] | None = _hashable_dict_path(zstd_dict_path)
+            dictionaries: dict = load_zstd_dictionaries(dict_path) if dict_path else {}
+            if dictionaries:
+                dictionary = dictionaries[next(reversed(dictionaries))]
+                compressor = zstandard.ZstdCompressor(dict_data=dictionary, **kwargs)
+
+                return (
+                    CODEC_ZSTD_DICT
+                    + struct.pack(">I", dictionary.dict_id())
+                    + compressor.compress(data)
+                )
+
+            return CODEC_ZSTD + zstandard.ZstdCompressor(**kwargs).compress(data)
+        case _:
+            raise ValueError(
+                f"Unsupported compression codec: {codec}. Must be one of {SUPPORTED_CODECS}"
+            )
+
+
+def decompress_json(
+    value: bytes | str, zstd_dict_path: ZstdDictPath | None = None
+) -> t.Any:
+    """Decompress & deserialize a value created by `compress_json()`.
+
+    Description:
+        Uncompressed JSON (text, or bytes starting with a JSON document) is also accepted, so rows written
+        before a column was converted to compressed storage can still be read.
+
+    Params:
+        value (bytes | str): The stored value.
+        zstd_dict_path (str | Path | Sequence | None): The configured zstd dictionaries, see `compress_json()`.
+            Values are decompressed with the dictionary whose ID they are tagged with.
+
+    """
+    if isinstance(value, str):
+        return json.loads(value)
+
+    value = bytes(value)
+    marker: bytes = value[:1]
+
+    match marker:
+        case b"\x01":
+            return json.loads(zlib.decompress(value[1:]))
+        case b"\x02":
+            import zstandard
+
+            return json.loads(zstandard.ZstdDecompressor().decompress(value[1:]))
+        case b"\x03":
+            import zstandard
+
+            (dict_id,) = struct.unpack(">I", value[1:5])
+            dict_path: str | tuple[str, ...] | None = _hashable_dict_path(zstd_dict_path)
+            if not dict_path:
+                raise ValueError(
+                    f"Value was compressed with zstd dictionary [{dict_id}], but no dictionary is configured."
+                )
+
+            dictionary = load_zstd_dictionaries(dict_path).get(dict_id)
+            if dictionary is None:
+                ## Another process may have added a newer dictionary to the directory since it was loaded
+                load_zstd_dictionaries.cache_clear()
+                dictionary = load_zstd_dictionaries(dict_path).get(dict_id)
+            if dictionary is None:
+                raise ValueError(
+                    f"Value was compressed with zstd dictionary [{dict_id}], which is not one of the configured dictionaries."
+                )
+
+            return json.loads(
+                zstandard.ZstdDecompressor(dict_data=dictionary).decompress(value[5:])
+            )
+        case _:
+            ## Legacy, uncompressed JSON
+            return json.loads(value)
+
+
+class CompressedJSON(sa.types.TypeDecorator):
+    """A JSON document stored as compressed bytes.
+
+    Description:
+        Values are serialized & compressed on write, and decompressed & deserialized on read, so the column
+        behaves like a `JSON` column in the ORM.
+
+        The codec is stored in the first byte of each value, so changing the codec only affects new rows.
+
+    Params:
+        codec (str): The compression codec, "zlib" or "zstd".
+        level (int | None): Compression level. Defaults to the codec's default level.
+        zstd_dict_path (str | Sequence | None): A trained zstd dictionary file, a directory of dictionaries or
+            a list of dictionary files. Only used with the "zstd" codec.
+    """
+
+    impl = sa.LargeBinary
+    cache_ok = True
+
+    def __init__(
+        self,
+        codec: str = DB_SETTINGS.get("DB_FORECAST_JSON_CODEC", default="zlib"),
+        level: int | None = DB_SETTINGS.get("DB_FORECAST_JSON_LEVEL", default=None),
+        zstd_dict_path: ZstdDictPath | None = DB_SETTINGS.get(
+            "DB_FORECAST_JSON_ZSTD_DICT", default=None
+        ),
+        *args,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.codec: str = codec.lower()
+        self.level: int | None = level
+        ## Hashable, so the type can be part of SQLAlchemy's statement cache key
+        self.zstd_dict_path: str | tuple[str, ...] | None = _hashable_dict_path(
+            zstd_dict_path
+        )
+
+    def process_bind_param(self, value: t.Any, dialect) -> bytes | None:
+        if value is None:
+            return None
+
+        return compress_json(
+            value,
+            codec=self.codec,
+            level=self.level,
+            zstd_dict_path=self.zstd_dict_path,
+        )
+
+    def process_result_value(self, value: bytes | str | None, dialect) -> t.Any:
+        if value is None:
+            return None
+
+        return decompress_json(value, zstd_dict_path=self.zstd_dict_path)
+
+
+def measurement_column_type(storage: str = "numeric") -> sa.types.TypeEngine:
+    """Return the column type used to store measurements for a storage option.
+
+    Params:
+        storage (str): (default: "numeric") One of "numeric" (`NUMERIC(12, 2)`), "float32" (`REAL`)
+            or "float64" (`DOUBLE PRECISION`).
+
+    Returns:
+        (sqlalchemy.types.TypeEngine): The column type. All options return Python floats.
+
+    """
+    match storage.lower():
+        case "numeric":
+            return sa.NUMERIC(precision=12, scale=2, asdecimal=False)
+        case "float32":
+            return sa.REAL(asdecimal=False)
+        case "float64":
+            return sa.Double(asdecimal=False)
+        case _:
+            raise ValueError(
+                f"Unsupported measurement storage: {storage}. Must be one of {SUPPORTED_MEASUREMENT_STORAGE}"
+            )
+
+
+class Measurement(sa.types.TypeDecorator):
+    """A float measurement, i.e. a temperature or wind speed.
+
+    Description:
+        Values are always Python floats, so ingest & bulk reads do not build a `Decimal` for every value.
+        The storage type is controlled by `DB_MEASUREMENT_STORAGE`:
+
+        - "numeric": `NUMERIC(12, 2)`, the original storage. Exact, but the slowest to read & write.
+        - "float32": `REAL`, 4 bytes per value on Postgres.
+        - "float64": `DOUBLE PRECISION`, 8 bytes per value.
+
+        Values are rounded to `DB_MEASUREMENT_PRECISION` decimal places on write, which matches the precision
+        WeatherAPI reports & keeps float storage from drifting from the source value.
+
+    Params:
+        storage (str): The storage option, "numeric", "float32" or "float64".
+        precision (int | None): Decimal places to round values to on write. `None` disables rounding.
+    """
+
+    impl = sa.Float
+    cache_ok = True
+
+    def __init__(
+        self,
+        storage: str = DB_SETTINGS.get("DB_MEASUREMENT_STORAGE", default="numeric"),
+        precision: int | None = DB_SETTINGS.get("DB_MEASUREMENT_PRECISION", default=2),
+        *args,
+        **kwargs,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+
+        self.storage: str = storage.lower()
+        self.precision: int | None = precision
+
+        ## Fail on import instead of on the first write
+        self._column_type: sa.types.TypeEngine = measurement_column_type(self.storage)
+
+    def load_dialect_impl(self, dialect) -> sa.types.TypeEngine:
+        return dialect.type_descriptor(self._column_type)
+
+    def process_bind_param(self, value: t.Any, dialect) -> float | None:
+        if value is None:
+            return None
+
+        value = float(value)
+        if self.precision is not None:
+            value = round(value, self.precision)
+
+        return value
+
+    def process_result_value(self, value: t.Any, dialect) -> float | None:
+        if value is None:
+            return None
+
+        return float(value)
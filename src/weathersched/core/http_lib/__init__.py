@@ -1,5 +1,14 @@
 from __future__ import annotations
 
-from . import cache, client, constants, controllers
-from .client import build_request, decode_response, encode_data, save_json
+from . import cache, client, constants, controllers, ratelimit, settings, transports
+from .client import (
+    build_request,
+    decode_response,
+    encode_data,
+    save_json,
+    stream_json_items,
+)
 from .controllers import HttpxController, get_http_controller
+from .ratelimit import RateLimitedTransport, RateLimiter
+from .settings import HTTP_SETTINGS
+from .transports import SharedTransport, build_http_transport, shared_transport
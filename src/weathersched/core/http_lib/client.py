@@ -6,6 +6,7 @@ Users can call the client to build a request, decode a response, encode data for
 
 from __future__ import annotations
 
+import importlib.util
 import json
 import logging
 from pathlib import Path
@@ -13,6 +14,8 @@ import typing as t
 
 log = logging.getLogger(__name__)
 
+from weathersched.core import metrics
+
 import httpx
 
 def build_request(
@@ -73,17 +76,131 @@ def decode_response(response: httpx.Response = None, encoding: str = "utf-8") ->
         (dict): A dict representation of the input response object.
 
     """
-    ## Extract response content
-    content: bytes = response.content
-
-    ## Decode content to str
-    decoded_str: str = content.decode(encoding=encoding)
-    ## Load decoded str to dict
-    data: dict = json.loads(decoded_str)
+    with metrics.time_stage("decode"):
+        ## Extract response content
+        content: bytes = response.content
+
+        if encoding.lower().replace("-", "") == "utf8":
+            ## json.loads() reads UTF-8 bytes directly, skipping a full str copy of the body
+            data: dict = json.loads(content)
+        else:
+            ## Decode content to str
+            decoded_str: str = content.decode(encoding=encoding)
+            ## Load decoded str to dict
+            data: dict = json.loads(decoded_str)
+
+    metrics.inc_counter(
+        "weathersched_http_response_bytes_total",
+        amount=len(content),
+        description="Bytes of HTTP response content decoded by http_lib.",
+    )
 
     return data
 
 
+def ijson_available() -> bool:
+    """Return `True` if the optional `ijson` incremental JSON parser is installed."""
+    return importlib.util.find_spec("ijson") is not None
+
+
+def _iter_prefix(data: t.Any, prefix: str) -> t.Generator[t.Any, None, None]:
+    """Yield the values at an ijson-style prefix, i.e. "forecast.forecastday.item", from a decoded document."""
+    if not prefix:
+        yield data
+        return
+
+    key, _, rest = prefix.partition(".")
+    if key == "item":
+        if isinstance(data, list):
+            for value in data:
+                yield from _iter_prefix(value, rest)
+    elif isinstance(data, dict) and key in data:
+        yield from _iter_prefix(data[key], rest)
+
+
+def stream_json_items(
+    client: httpx.Client,
+    request: httpx.Request,
+    prefix: str,
+    chunk_size: int = 65_536,
+    use_ijson: bool = True,
+) -> t.Generator[t.Any, None, None]:
+    """Send a request & yield the JSON items at `prefix` as the response body arrives.
+
+    Description:
+        The response is read in `chunk_size` chunks & fed to an incremental `ijson` parser, so each item
+        is yielded as soon as it has been downloaded & peak memory stays around one chunk plus one item,
+        instead of several copies of the whole body.
+
+        When ijson is not installed (or `use_ijson=False`), the body is read & decoded in one piece & the
+        same items are yielded, so callers do not need to care which path is used.
+
+    Usage:
+        with get_http_controller(use_cache=False) as http:
+            for day in stream_json_items(http.client, request, prefix="forecast.forecastday.item"):
+                ...
+
+    Params:
+        client (httpx.Client): The client to send the request with.
+        request (httpx.Request): The request to send.
+        prefix (str): ijson prefix of the items to yield. Dict keys are separated by ".", & "item" steps
+            into each element of an array, i.e. "forecast.forecastday.item.hour.item" yields every hour.
+        chunk_size (int): (default: 65536) Number of bytes read from the response at a time.
+        use_ijson (bool): (default: True) Parse incrementally with ijson when it is installed.
+
+    Raises:
+        httpx.HTTPStatusError: When the response status is a 4xx or 5xx error.
+
+    """
+    ## Equivalent to client.stream(), which only accepts a method & URL instead of a built request
+    response: httpx.Response = client.send(request, stream=True)
+    try:
+        if response.is_error:
+            response.read()
+            log.warning(
+                f"Error streaming response: [{response.status_code}: {response.reason_phrase}]: {response.text}"
+            )
+            response.raise_for_status()
+
+        received: int = 0
+
+        if use_ijson and ijson_available():
+            import ijson
+
+            ## Parsed items are appended here as each chunk is sent to the parser
+            items: list = ijson.sendable_list()
+            ## use_float=True returns floats instead of Decimal for non-integer numbers
+            parser = ijson.items_coro(items, prefix, use_float=True)
+
+            for chunk in response.iter_bytes(chunk_size=chunk_size):
+                received += len(chunk)
+
+                with metrics.time_stage("decode"):
+                    parser.send(chunk)
+
+                yield from items
+                del items[:]
+
+            parser.close()
+            yield from items
+        else:
+            content: bytes = response.read()
+            received = len(content)
+
+            with metrics.time_stage("decode"):
+                data: t.Any = json.loads(content)
+
+            yield from _iter_prefix(data, prefix)
+    finally:
+        response.close()
+
+    metrics.inc_counter(
+        "weathersched_http_response_bytes_total",
+        amount=received,
+        description="Bytes of HTTP response content decoded by http_lib.",
+    )
+
+
 def encode_data(data: t.Union[dict, str], encoding: str = "utf-8") -> bytes:
     """Intelligently encode input data.
 
@@ -3,25 +3,20 @@ from __future__ import annotations
 from contextlib import AbstractContextManager, contextmanager
 import logging
 from pathlib import Path
+import time
 import typing as t
 
 log = logging.getLogger(__name__)
 
+from weathersched.core import metrics
+
 from . import cache
+from .settings import HTTP_SETTINGS
+from .transports import build_http_transport
 
-from dynaconf import Dynaconf
 import hishel
 import httpx
 
-## Load HTTP settings from environment
-HTTP_SETTINGS = Dynaconf(
-    environments=True,
-    env="http",
-    envvar_prefix="HTTP_CACHE",
-    settings_files=[".settings.toml", ".secrets.toml"],
-)
-
-
 def ensure_dir_exists(path: str) -> None:
     """Create directory if it does not exist.
 
@@ -61,6 +56,20 @@ def get_http_controller(
     cacheable_status_codes: list[int] | None = None,
     cache_allow_heuristics: bool = True,
     cache_allow_stale: bool = False,
+    transport: httpx.BaseTransport | None = None,
+    http2: bool = HTTP_SETTINGS.get("HTTP_HTTP2", default=False),
+    retries: int = HTTP_SETTINGS.get("HTTP_RETRIES", default=0),
+    local_address: str | None = HTTP_SETTINGS.get("HTTP_LOCAL_ADDRESS", default=None),
+    socket_options: list | None = HTTP_SETTINGS.get("HTTP_SOCKET_OPTIONS", default=None),
+    max_connections: int | None = HTTP_SETTINGS.get(
+        "HTTP_MAX_CONNECTIONS", default=100
+    ),
+    max_keepalive_connections: int | None = HTTP_SETTINGS.get(
+        "HTTP_MAX_KEEPALIVE_CONNECTIONS", default=20
+    ),
+    keepalive_expiry: float | None = HTTP_SETTINGS.get(
+        "HTTP_KEEPALIVE_EXPIRY", default=5.0
+    ),
 ) -> HttpxController:
     """Return an initialized HttpxController class object.
 
@@ -91,6 +100,16 @@ def get_http_controller(
         cache_allow_heuristics (bool): (default: True) Use heuristics to match objects in cache, improves performance &
             reliability of caching new objects.
         cache_allow_stale (bool): (default: False) When `True`, allow stale/expired responses from cache.
+        transport (httpx.BaseTransport | None): Optional base transport for the client, i.e. an `httpx.MockTransport`
+            serving local responses. When the cache is enabled, the cache transport wraps this transport.
+        http2 (bool): Enable HTTP/2 when h2 is installed. Ignored when `transport` is provided, as are the
+            other transport tuning options below.
+        retries (int): Number of times to retry establishing a connection.
+        local_address (str | None): Local IP address to bind outgoing connections to.
+        socket_options (list | None): `[level, option, value]` socket options, i.e. `[["SOL_SOCKET", "SO_KEEPALIVE", 1]]`.
+        max_connections (int | None): Maximum number of open connections.
+        max_keepalive_connections (int | None): Maximum number of idle keep-alive connections.
+        keepalive_expiry (float | None): Seconds an idle keep-alive connection is kept open.
 
     Returns:
         (HttpxController): Initialized HttpxController object to use for requests.
@@ -111,6 +130,14 @@ def get_http_controller(
             cacheable_status_codes=cacheable_status_codes,
             cache_allow_heuristics=cache_allow_heuristics,
             cache_allow_stale=cache_allow_stale,
+            transport=transport,
+            http2=http2,
+            retries=retries,
+            local_address=local_address,
+            socket_options=socket_options,
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
         )
 
         return http_ctl
@@ -151,6 +178,16 @@ class HttpxController(AbstractContextManager):
         cache_allow_heuristics (bool): (default: True) Use heuristics to match objects in cache, improves performance &
             reliability of caching new objects.
         cache_allow_stale (bool): (default: False) When `True`, allow stale/expired responses from cache.
+        transport (httpx.BaseTransport | None): Optional base transport for the client, i.e. an `httpx.MockTransport`
+            serving local responses. When the cache is enabled, the cache transport wraps this transport.
+        http2 (bool): Enable HTTP/2 when h2 is installed. Ignored when `transport` is provided, as are the
+            other transport tuning options below.
+        retries (int): Number of times to retry establishing a connection.
+        local_address (str | None): Local IP address to bind outgoing connections to.
+        socket_options (list | None): `[level, option, value]` socket options, i.e. `[["SOL_SOCKET", "SO_KEEPALIVE", 1]]`.
+        max_connections (int | None): Maximum number of open connections.
+        max_keepalive_connections (int | None): Maximum number of idle keep-alive connections.
+        keepalive_expiry (float | None): Seconds an idle keep-alive connection is kept open.
     """
 
     def __init__(
@@ -176,6 +213,14 @@ class HttpxController(AbstractContextManager):
         cacheable_status_codes: list[int] | None = [200, 201, 202, 301, 308],
         cache_allow_heuristics: bool = True,
         cache_allow_stale: bool = False,
+        transport: httpx.BaseTransport | None = None,
+        http2: bool = False,
+        retries: int = 0,
+        local_address: str | None = None,
+        socket_options: list | None = None,
+        max_connections: int | None = 100,
+        max_keepalive_connections: int | None = 20,
+        keepalive_expiry: float | None = 5.0,
     ) -> None:
         self.use_cache: bool = use_cache
         self.force_cache: bool = force_cache
@@ -189,6 +234,14 @@ class HttpxController(AbstractContextManager):
         self.cacheable_status_codes: list[int] | None = cacheable_status_codes
         self.cache_allow_heuristics: bool = cache_allow_heuristics
         self.cache_allow_stale: bool = cache_allow_stale
+        self.transport: httpx.BaseTransport | None = transport
+        self.http2: bool = http2
+        self.retries: int = retries
+        self.local_address: str | None = local_address
+        self.socket_options: list | None = socket_options
+        self.max_connections: int | None = max_connections
+        self.max_keepalive_connections: int | None = max_keepalive_connections
+        self.keepalive_expiry: float | None = keepalive_expiry
 
         ## Placeholder for initialized httpx.Client
         self.client: httpx.Client | None = None
@@ -203,6 +256,10 @@ class HttpxController(AbstractContextManager):
         self.logger: logging.Logger = log.getChild("HttpxController")
 
     def __enter__(self) -> t.Self:
+        if self.transport is None:
+            ## Build a tuned transport instead of relying on httpx & hishel's default transports
+            self.transport = self._get_http_transport()
+
         if self.use_cache:
             ## If cache is enabled, build cache from class params
             cache: hishel.SQLiteStorage | hishel.FileStorage | None = self._get_cache()
@@ -287,19 +344,68 @@ class HttpxController(AbstractContextManager):
             cache_controller: hishel.Controller = self._get_cache_controller()
             self.cache_controller = cache_controller
 
+        if self.transport is None:
+            self.transport = self._get_http_transport()
+
         _transport: hishel.CacheTransport = cache.get_cache_transport(
-            cache_storage=self.cache, cache_controller=self.cache_controller
+            transport_base=self.transport,
+            cache_storage=self.cache,
+            cache_controller=self.cache_controller,
         )
 
         self.cache_transport = _transport
 
         return _transport
 
+    def _get_http_transport(self) -> httpx.HTTPTransport:
+        """Build the base HTTP transport from the class' transport tuning params."""
+        return build_http_transport(
+            http2=self.http2,
+            retries=self.retries,
+            local_address=self.local_address,
+            socket_options=self.socket_options,
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
     def _get_client(self) -> httpx.Client:
         """Return an httpx.Client object initialized from class parameters."""
-        transport: hishel.CacheTransport | None = self.cache_transport
+        transport: hishel.CacheTransport | httpx.BaseTransport | None = (
+            self.cache_transport or self.transport
+        )
         client = httpx.Client(
-            transport=transport, follow_redirects=self.follow_redirects
+            transport=transport,
+            follow_redirects=self.follow_redirects,
+            event_hooks={
+                "request": [self._on_request],
+                "response": [self._on_response],
+            },
         )
 
         return client
+
+    def _on_request(self, request: httpx.Request) -> None:
+        """Request hook for httpx. Stamp the request with a start time for `_on_response`."""
+        request.extensions["weathersched_start"] = time.perf_counter()
+
+    def _on_response(self, response: httpx.Response) -> None:
+        """Response hook for httpx. Record request count & time-to-headers metrics."""
+        registry: metrics.MetricsRegistry = metrics.get_registry()
+        labels: dict = {
+            "method": response.request.method,
+            "host": response.request.url.host,
+            "status": response.status_code,
+        }
+
+        registry.counter(
+            "weathersched_http_requests_total",
+            description="HTTP requests sent by HttpxController.",
+        ).inc(**labels)
+
+        start: float | None = response.request.extensions.get("weathersched_start")
+        if start is not None:
+            registry.histogram(
+                "weathersched_http_request_duration_seconds",
+                description="Time from sending an HTTP request to receiving response headers, in seconds.",
+            ).observe(time.perf_counter() - start, **labels)
@@ -0,0 +1,103 @@
+"""Limit the rate of outgoing requests across threads.
+
+Description:
+    `RateLimiter` is a token bucket: it allows bursts of up to `burst` requests, & refills at `rate`
+    requests per second. `RateLimitedTransport` takes a token before every request it sends, so any number
+    of clients & threads sharing the transport stay under one limit, i.e. a WeatherAPI plan's quota.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+import httpx
+
+class RateLimiter:
+    """Thread-safe token bucket.
+
+    Usage:
+        limiter = RateLimiter(rate=10)
+        limiter.acquire()  # blocks until a request may be sent
+
+    Params:
+        rate (float): Requests per second. `0` disables the limit.
+        burst (int | None): Requests that may be sent at once after an idle period. Defaults to `rate`
+            (at least 1).
+        clock (Callable[[], float]): Monotonic clock, `time.monotonic` by default.
+        sleep (Callable[[float], None]): Sleep function, `time.sleep` by default.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int | None = None,
+        clock: t.Callable[[], float] = time.monotonic,
+        sleep: t.Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate < 0:
+            raise ValueError(f"rate must be >= 0, got {rate}")
+
+        self.rate: float = float(rate)
+        self.burst: int = max(int(burst if burst is not None else rate), 1)
+        self.clock: t.Callable[[], float] = clock
+        self.sleep: t.Callable[[float], None] = sleep
+
+        self._tokens: float = float(self.burst)
+        self._updated: float = clock()
+        self._lock: threading.Lock = threading.Lock()
+
+        self.waited: float = 0.0
+
+    def _reserve(self) -> float:
+        """Take a token, returning the seconds to wait before it can be used."""
+        with self._lock:
+            now: float = self.clock()
+            self._tokens = min(
+                self._tokens + (now - self._updated) * self.rate, float(self.burst)
+            )
+            self._updated = now
+
+            ## Tokens may go negative, which queues callers in the order they arrived
+            self._tokens -= 1
+            wait: float = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            self.waited += wait
+
+            return wait
+
+    def acquire(self) -> float:
+        """Block until a request may be sent. Returns the seconds waited."""
+        if not self.rate:
+            return 0.0
+
+        wait: float = self._reserve()
+        if wait > 0:
+            self.sleep(wait)
+
+        return wait
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Wrap a transport so every request first takes a token from `limiter`.
+
+    Params:
+        transport (httpx.BaseTransport): The transport to wrap.
+        limiter (RateLimiter): Limiter shared by everything that should count against the same limit.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: RateLimiter) -> None:
+        self.transport: httpx.BaseTransport = transport
+        self.limiter: RateLimiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.limiter.acquire()
+
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        self.transport.close()
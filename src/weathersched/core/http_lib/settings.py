@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from dynaconf import Dynaconf
+
+## Load HTTP settings from environment
+HTTP_SETTINGS = Dynaconf(
+    environments=True,
+    env="http",
+    envvar_prefix="HTTP_CACHE",
+    settings_files=[
+        ".settings.toml",
+        ".secrets.toml",
+        "http/settings.toml",
+        "http/.secrets.toml",
+    ],
+)
@@ -0,0 +1,165 @@
+"""Build tuned httpx transports & share a connection pool between clients.
+
+Description:
+    `HttpxController` opens & closes an `httpx.Client` for every request function call, which would also
+    throw away its connection pool. `shared_transport()` wraps one tuned transport so many short-lived
+    clients reuse the same keep-alive (or HTTP/2 multiplexed) connections, i.e. for a collector sweep.
+
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import importlib.util
+import logging
+import socket
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from .settings import HTTP_SETTINGS
+
+import httpx
+
+def h2_available() -> bool:
+    """Return `True` if the optional `h2` package, required for HTTP/2, is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def parse_socket_options(
+    socket_options: t.Iterable[t.Sequence[t.Any]] | None,
+) -> list[tuple[int, int, int]] | None:
+    """Convert socket options from settings to the tuples httpx expects.
+
+    Params:
+        socket_options (Iterable[Sequence] | None): `[level, option, value]` entries. Levels & options can be
+            ints or names of `socket` module constants, i.e. `["SOL_SOCKET", "SO_KEEPALIVE", 1]`.
+
+    Returns:
+        (list[tuple[int, int, int]] | None): Socket options, or `None` when there are none.
+
+    """
+    if not socket_options:
+        return None
+
+    parsed: list[tuple[int, int, int]] = []
+    for level, option, value in socket_options:
+        try:
+            parsed.append(
+                (
+                    getattr(socket, level) if isinstance(level, str) else int(level),
+                    getattr(socket, option) if isinstance(option, str) else int(option),
+                    int(value),
+                )
+            )
+        except AttributeError as exc:
+            ## Options like TCP_KEEPIDLE do not exist on every platform
+            log.warning(
+                f"({type(exc)}) Skipping unsupported socket option [{level}, {option}, {value}]. Details: {exc}"
+            )
+
+    return parsed or None
+
+
+def build_http_transport(
+    http2: bool = HTTP_SETTINGS.get("HTTP_HTTP2", default=False),
+    retries: int = HTTP_SETTINGS.get("HTTP_RETRIES", default=0),
+    local_address: str | None = HTTP_SETTINGS.get("HTTP_LOCAL_ADDRESS", default=None),
+    socket_options: t.Iterable[t.Sequence[t.Any]] | None = HTTP_SETTINGS.get(
+        "HTTP_SOCKET_OPTIONS", default=None
+    ),
+    max_connections: int | None = HTTP_SETTINGS.get(
+        "HTTP_MAX_CONNECTIONS", default=100
+    ),
+    max_keepalive_connections: int | None = HTTP_SETTINGS.get(
+        "HTTP_MAX_KEEPALIVE_CONNECTIONS", default=20
+    ),
+    keepalive_expiry: float | None = HTTP_SETTINGS.get(
+        "HTTP_KEEPALIVE_EXPIRY", default=5.0
+    ),
+) -> httpx.HTTPTransport:
+    """Build an `httpx.HTTPTransport` from the transport tuning settings.
+
+    Params:
+        http2 (bool): Enable HTTP/2. Ignored, with a warning, when h2 is not installed.
+        retries (int): Number of times to retry establishing a connection.
+        local_address (str | None): Local IP address to bind outgoing connections to.
+        socket_options (Iterable[Sequence] | None): `[level, option, value]` socket options.
+        max_connections (int | None): Maximum number of open connections.
+        max_keepalive_connections (int | None): Maximum number of idle keep-alive connections.
+        keepalive_expiry (float | None): Seconds an idle keep-alive connection is kept open.
+
+    Returns:
+        (httpx.HTTPTransport): The configured transport.
+
+    """
+    if http2 and not h2_available():
+        log.warning(
+            "HTTP/2 is enabled, but h2 is not installed. Falling back to HTTP/1.1. Install with: pip install weathersched[http2]"
+        )
+        http2 = False
+
+    transport: httpx.HTTPTransport = httpx.HTTPTransport(
+        http2=http2,
+        retries=retries or 0,
+        local_address=local_address or None,
+        socket_options=parse_socket_options(socket_options),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+    )
+
+    return transport
+
+
+class SharedTransport(httpx.BaseTransport):
+    """Wrap a transport so closing a client does not close its connection pool.
+
+    Description:
+        Call `shutdown()` (or use `shared_transport()`) to close the wrapped transport when every client
+        using it is done.
+
+    Params:
+        transport (httpx.BaseTransport): The transport to share.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport) -> None:
+        self.transport: httpx.BaseTransport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        ## Clients close their transport on exit, keep the pool open for the next client
+        return
+
+    def shutdown(self) -> None:
+        self.transport.close()
+
+
+@contextmanager
+def shared_transport(
+    transport: httpx.BaseTransport | None = None, **transport_options
+) -> t.Generator[SharedTransport, None, None]:
+    """Share one transport's connection pool between clients for the duration of a block.
+
+    Usage:
+        with shared_transport() as transport:
+            for location in locations:
+                get_current_weather(location=location, transport=transport)
+
+    Params:
+        transport (httpx.BaseTransport | None): The transport to share. When `None`, one is built with
+            `build_http_transport(**transport_options)`.
+
+    """
+    shared: SharedTransport = SharedTransport(
+        transport or build_http_transport(**transport_options)
+    )
+
+    try:
+        yield shared
+    finally:
+        shared.shutdown()
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+from . import exporters, instruments, registry
+from .exporters import render_json, render_prometheus_text, write_metrics_file
+from .instruments import Counter, Gauge, Histogram
+from .registry import (
+    STAGE_HISTOGRAM_NAME,
+    MetricsRegistry,
+    NoopRegistry,
+    get_registry,
+    inc_counter,
+    set_registry,
+    time_stage,
+)
+from .settings import METRICS_SETTINGS
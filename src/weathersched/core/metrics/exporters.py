@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from .instruments import Instrument, LabelKey
+from .registry import MetricsRegistry, get_registry
+from .settings import METRICS_SETTINGS
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: LabelKey) -> str:
+    if not labels:
+        return ""
+
+    joined: str = ",".join(f'{k}="{_escape_label_value(v)}"' for k, v in labels)
+
+    return f"{{{joined}}}"
+
+
+def render_prometheus_text(registry: MetricsRegistry | None = None) -> str:
+    """Render a registry's metrics in the Prometheus text exposition format.
+
+    Docs: https://prometheus.io/docs/instrumenting/exposition_formats/
+
+    Params:
+        registry (MetricsRegistry | None): The registry to render. Defaults to the process-wide registry.
+
+    Returns:
+        (str): The rendered metrics.
+
+    """
+    registry = registry or get_registry()
+
+    lines: list[str] = []
+    for instrument in registry.instruments():
+        if instrument.description:
+            lines.append(f"# HELP {instrument.name} {instrument.description}")
+        lines.append(f"# TYPE {instrument.name} {instrument.kind}")
+
+        for sample_name, labels, value in instrument.samples():
+            lines.append(f"{sample_name}{_format_labels(labels)} {value}")
+
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def render_json(registry: MetricsRegistry | None = None) -> str:
+    """Render a registry's metrics as a JSON document, one entry per instrument."""
+    registry = registry or get_registry()
+
+    data: dict[str, dict] = {}
+    for instrument in registry.instruments():
+        data[instrument.name] = {
+            "type": instrument.kind,
+            "description": instrument.description,
+            "samples": [
+                {"name": sample_name, "labels": dict(labels), "value": value}
+                for sample_name, labels, value in instrument.samples()
+            ],
+        }
+
+    return json.dumps(data, indent=2)
+
+
+def write_metrics_file(
+    output_file: t.Union[str, Path] = METRICS_SETTINGS.get(
+        "METRICS_EXPORT_FILE", default=".metrics/weathersched.prom"
+    ),
+    export_format: str = METRICS_SETTINGS.get(
+        "METRICS_EXPORT_FORMAT", default="prometheus"
+    ),
+    registry: MetricsRegistry | None = None,
+) -> Path:
+    """Write a registry's metrics to a local file.
+
+    Description:
+        The file is written to a temporary path & moved into place, so a scraper (i.e. the
+        node_exporter textfile collector) never reads a partially written file.
+
+    Params:
+        output_file (str | Path): Path to the file where metrics will be written.
+        export_format (str): (default: "prometheus") The output format, "prometheus" or "json".
+        registry (MetricsRegistry | None): The registry to export. Defaults to the process-wide registry.
+
+    Returns:
+        (Path): The path metrics were written to.
+
+    """
+    output_file: Path = Path(str(output_file))
+
+    match export_format.lower():
+        case "prometheus":
+            content: str = render_prometheus_text(registry=registry)
+        case "json":
+            content: str = render_json(registry=registry)
+        case _:
+            raise ValueError(f"Unsupported metrics export format: {export_format}")
+
+    if not output_file.parent.exists():
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_file: Path = output_file.with_name(f".{output_file.name}.tmp")
+    try:
+        with open(tmp_file, "w") as f:
+            f.write(content)
+
+        os.replace(tmp_file, output_file)
+    except Exception as exc:
+        msg = f"({type(exc)}) Unhandled exception writing metrics to file '{output_file}'. Details: {exc}"
+        log.error(msg)
+
+        raise exc
+
+    return output_file
@@ -0,0 +1,219 @@
+"""Metric instruments tracked by a `MetricsRegistry`.
+
+Description:
+    Instruments store one value (or set of buckets) per unique combination of labels.
+    Labels are passed as keyword arguments, i.e. `counter.inc(stage="decode")`.
+
+    The `Noop*` variants accept the same calls and discard them. They are returned
+    by the `NoopRegistry`, which is the default when metrics are disabled.
+
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+import threading
+import time
+import typing as t
+
+## Default histogram buckets, in seconds. Covers sub-millisecond decodes up to slow HTTP requests.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+## A sorted tuple of (label, value) pairs, used as the key for a series
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def label_key(labels: dict[str, t.Any]) -> LabelKey:
+    """Return a hashable, sorted key for a dict of labels."""
+    return tuple(sorted((str(k), str(v)) for k, v in labels.items()))
+
+
+class Instrument:
+    """Base class for metric instruments.
+
+    Params:
+        name (str): The metric name, i.e. `weathersched_http_requests_total`.
+        description (str): Help text, rendered as `# HELP` in Prometheus output.
+    """
+
+    kind: str = "untyped"
+
+    def __init__(self, name: str, description: str = "") -> None:
+        self.name: str = name
+        self.description: str = description
+
+        self._lock: threading.Lock = threading.Lock()
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        """Return a list of `(sample_name, labels, value)` tuples for export."""
+        raise NotImplementedError
+
+
+class Counter(Instrument):
+    """A monotonically increasing value, i.e. number of requests sent."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str = "") -> None:
+        super().__init__(name=name, description=description)
+
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        if amount < 0:
+            raise ValueError(f"Counter '{self.name}' cannot be decremented.")
+
+        key: LabelKey = label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(label_key(labels), 0)
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Instrument):
+    """A value that can go up and down, i.e. queue depth."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str = "") -> None:
+        super().__init__(name=name, description=description)
+
+        self._values: dict[LabelKey, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key: LabelKey = label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(label_key(labels), 0)
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram(Instrument):
+    """Track the distribution of observed values, i.e. request durations.
+
+    Params:
+        name (str): The metric name, i.e. `weathersched_stage_duration_seconds`.
+        description (str): Help text for the metric.
+        buckets (tuple[float]): Upper bounds of the histogram buckets. A `+Inf` bucket is always added.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str = "",
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name=name, description=description)
+
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+
+        ## Per-series [bucket counts..., +Inf count], sum
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key: LabelKey = label_key(labels)
+        ## Index of the first bucket the value fits in. Values above the last bound land in +Inf.
+        idx: int = bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts: list[int] | None = self._counts.get(key)
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+                self._counts[key] = counts
+                self._sums[key] = 0.0
+
+            counts[idx] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels) -> t.Generator[None, None, None]:
+        """Context manager that observes the elapsed time of its block, in seconds."""
+        start: float = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        return sum(self._counts.get(label_key(labels), []))
+
+    def sum(self, **labels) -> float:
+        return self._sums.get(label_key(labels), 0.0)
+
+    def samples(self) -> list[tuple[str, LabelKey, float]]:
+        _samples: list[tuple[str, LabelKey, float]] = []
+
+        with self._lock:
+            for key, counts in self._counts.items():
+                ## Prometheus buckets are cumulative
+                cumulative: int = 0
+                for bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    _samples.append(
+                        (f"{self.name}_bucket", key + (("le", f"{bound}"),), cumulative)
+                    )
+
+                cumulative += counts[-1]
+                _samples.append((f"{self.name}_bucket", key + (("le", "+Inf"),), cumulative))
+                _samples.append((f"{self.name}_sum", key, self._sums[key]))
+                _samples.append((f"{self.name}_count", key, cumulative))
+
+        return _samples
+
+
+class NoopCounter(Counter):
+    def inc(self, amount: float = 1, **labels) -> None:
+        return
+
+
+class NoopGauge(Gauge):
+    def set(self, value: float, **labels) -> None:
+        return
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        return
+
+
+class NoopHistogram(Histogram):
+    def observe(self, value: float, **labels) -> None:
+        return
+
+    @contextmanager
+    def time(self, **labels) -> t.Generator[None, None, None]:
+        yield
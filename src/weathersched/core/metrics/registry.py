@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import logging
+import threading
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from .instruments import (
+    DEFAULT_BUCKETS,
+    Counter,
+    Gauge,
+    Histogram,
+    Instrument,
+    NoopCounter,
+    NoopGauge,
+    NoopHistogram,
+)
+from .settings import METRICS_SETTINGS
+
+## Histogram shared by the hot path stages (fetch, decode, validate, persist, ...)
+STAGE_HISTOGRAM_NAME: str = "weathersched_stage_duration_seconds"
+
+
+class MetricsRegistry:
+    """Hold named metric instruments.
+
+    Description:
+        Calling `counter()`, `gauge()` or `histogram()` with a name that is already registered returns
+        the existing instrument, so call sites do not need to keep a reference around.
+
+    Params:
+        enabled (bool): (default: True) When `False`, no-op instruments are returned & nothing is recorded.
+    """
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled: bool = enabled
+
+        self._instruments: dict[str, Instrument] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def _get_or_create(
+        self, name: str, cls: t.Type[Instrument], **kwargs
+    ) -> Instrument:
+        instrument: Instrument | None = self._instruments.get(name)
+        if instrument is None:
+            with self._lock:
+                instrument = self._instruments.get(name)
+                if instrument is None:
+                    instrument = cls(name=name, **kwargs)
+                    self._instruments[name] = instrument
+
+        if not isinstance(instrument, cls):
+            raise TypeError(
+                f"Metric '{name}' is already registered as a {instrument.kind}, not a {cls.kind}."
+            )
+
+        return instrument
+
+    def counter(self, name: str, description: str = "") -> Counter:
+        cls: t.Type[Counter] = Counter if self.enabled else NoopCounter
+        return self._get_or_create(name, cls, description=description)
+
+    def gauge(self, name: str, description: str = "") -> Gauge:
+        cls: t.Type[Gauge] = Gauge if self.enabled else NoopGauge
+        return self._get_or_create(name, cls, description=description)
+
+    def histogram(
+        self,
+        name: str,
+        description: str = "",
+        buckets: t.Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        cls: t.Type[Histogram] = Histogram if self.enabled else NoopHistogram
+        return self._get_or_create(
+            name, cls, description=description, buckets=buckets
+        )
+
+    def instruments(self) -> list[Instrument]:
+        """Return registered instruments, sorted by name."""
+        return [self._instruments[name] for name in sorted(self._instruments)]
+
+    def clear(self) -> None:
+        """Remove all registered instruments."""
+        with self._lock:
+            self._instruments.clear()
+
+
+class NoopRegistry(MetricsRegistry):
+    """A registry that records nothing. Used when metrics are disabled."""
+
+    def __init__(self) -> None:
+        super().__init__(enabled=False)
+
+
+## Process-wide registry, enabled with METRICS_ENABLED=true
+_REGISTRY: MetricsRegistry = (
+    MetricsRegistry()
+    if METRICS_SETTINGS.get("METRICS_ENABLED", default=False)
+    else NoopRegistry()
+)
+
+
+def get_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _REGISTRY
+
+
+def set_registry(registry: MetricsRegistry) -> MetricsRegistry:
+    """Replace the process-wide metrics registry.
+
+    Params:
+        registry (MetricsRegistry): The registry to record metrics to, i.e. `MetricsRegistry()` to enable
+            metrics at runtime or `NoopRegistry()` to disable them.
+
+    Returns:
+        (MetricsRegistry): The previous registry.
+
+    """
+    global _REGISTRY
+
+    if not isinstance(registry, MetricsRegistry):
+        raise TypeError(
+            f"registry must be of type MetricsRegistry. Got type: ({type(registry)})"
+        )
+
+    previous: MetricsRegistry = _REGISTRY
+    _REGISTRY = registry
+
+    return previous
+
+
+@contextmanager
+def time_stage(stage: str, **labels) -> t.Generator[None, None, None]:
+    """Observe the duration of a hot path stage in the stage histogram.
+
+    Usage:
+        with time_stage("decode", endpoint="current"):
+            decoded = http_lib.decode_response(response=res)
+
+    Params:
+        stage (str): Name of the stage, i.e. "fetch", "decode", "validate", "persist".
+        labels (str): Extra labels to attach to the observation.
+
+    """
+    histogram: Histogram = get_registry().histogram(
+        STAGE_HISTOGRAM_NAME, description="Duration of hot path stages, in seconds."
+    )
+
+    with histogram.time(stage=stage, **labels):
+        yield
+
+
+def inc_counter(name: str, amount: float = 1, description: str = "", **labels) -> None:
+    """Increment a counter on the process-wide registry."""
+    get_registry().counter(name, description=description).inc(amount, **labels)
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from dynaconf import Dynaconf
+
+## Metrics settings loaded with dynaconf
+METRICS_SETTINGS: Dynaconf = Dynaconf(
+    environments=True,
+    env="metrics",
+    envvar_prefix="METRICS",
+    settings_files=["metrics/settings.toml", "metrics/.secrets.toml"],
+)
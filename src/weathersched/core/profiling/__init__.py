@@ -0,0 +1,4 @@
+from __future__ import annotations
+
+from . import profilers
+from .profilers import profile_block, profiled, rotate_captures
@@ -0,0 +1,284 @@
+"""Opt-in CPU & memory profiling for a block of code, i.e. `main()` or a single collection sweep.
+
+Description:
+    Profiling is controlled by the `LOG_PROFILE_*` keys in `LOGGING_SETTINGS` & is disabled by default,
+    so it can be switched on for a live host with an environment variable instead of a redeploy.
+
+    Each capture writes a CPU profile (a `.prof` file for cProfile, `.html` for pyinstrument) & an optional
+    tracemalloc summary to `LOG_PROFILE_DIR`. Only the newest `LOG_PROFILE_BACKUP_COUNT` captures for each
+    name are kept. Top-N cumulative time & allocation summaries are also written to the logs.
+
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import cProfile
+import datetime as dt
+import functools
+import importlib.util
+import io
+import logging
+from pathlib import Path
+import pstats
+import re
+import threading
+import tracemalloc
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.setup import LOGGING_SETTINGS
+
+## Only one profiler can be attached to the interpreter at a time. Nested captures are skipped.
+_ACTIVE_LOCK: threading.Lock = threading.Lock()
+
+## Captures are named "<name>_<timestamp>", the timestamp matched by CAPTURE_TIMESTAMP_PATTERN
+CAPTURE_TIMESTAMP_FORMAT: str = "%Y-%m-%d_%H-%M-%S-%f"
+CAPTURE_TIMESTAMP_PATTERN: str = r"\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}-\d{6}"
+
+
+def rotate_captures(output_dir: Path, name: str, backup_count: int) -> None:
+    """Delete all but the newest `backup_count` captures for `name`.
+
+    Params:
+        output_dir (Path): Directory where captures are saved.
+        name (str): Capture name, the prefix of each capture's files.
+        backup_count (int): Number of captures to keep.
+
+    """
+    ## All files from one capture share the same "<name>_<timestamp>" stem. Matched exactly, so rotating
+    #  "sweep" leaves captures named i.e. "sweep_current" alone.
+    capture: re.Pattern = re.compile(
+        rf"({re.escape(name)}_{CAPTURE_TIMESTAMP_PATTERN})\."
+    )
+    stems: list[str] = sorted(
+        {
+            match.group(1)
+            for p in output_dir.iterdir()
+            if (match := capture.match(p.name))
+        },
+        reverse=True,
+    )
+
+    old_stems: set[str] = set(stems[max(backup_count, 0) :])
+    for p in output_dir.iterdir():
+        if (match := capture.match(p.name)) and match.group(1) in old_stems:
+            try:
+                p.unlink()
+            except Exception as exc:
+                log.warning(
+                    f"({type(exc)}) Unable to remove old profile capture '{p}'. Details: {exc}"
+                )
+
+
+def summarize_cprofile(profiler: cProfile.Profile, top_n: int = 25) -> str:
+    """Return the top N functions by cumulative time, as printed by `pstats`."""
+    buffer: io.StringIO = io.StringIO()
+
+    stats: pstats.Stats = pstats.Stats(profiler, stream=buffer)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top_n)
+
+    return buffer.getvalue()
+
+
+def summarize_tracemalloc(
+    snapshot: tracemalloc.Snapshot,
+    baseline: tracemalloc.Snapshot | None = None,
+    top_n: int = 25,
+) -> str:
+    """Return the top N allocation sites in a tracemalloc snapshot.
+
+    Params:
+        snapshot (tracemalloc.Snapshot): Snapshot taken at the end of the profiled block.
+        baseline (tracemalloc.Snapshot | None): Snapshot taken at the start of the block. When provided,
+            the summary shows allocation growth during the block instead of total allocations.
+        top_n (int): Number of allocation sites to include.
+
+    """
+    snapshot = snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+    )
+
+    lines: list[str] = []
+    if baseline is not None:
+        diff: list[tracemalloc.StatisticDiff] = snapshot.compare_to(baseline, "lineno")
+        lines.append(f"Top {top_n} allocation sites by growth:")
+        for stat in diff[:top_n]:
+            lines.append(f"  {stat}")
+    else:
+        lines.append(f"Top {top_n} allocation sites:")
+        for stat in snapshot.statistics("lineno")[:top_n]:
+            lines.append(f"  {stat}")
+
+    current, peak = tracemalloc.get_traced_memory()
+    lines.append(
+        f"Traced memory: current={current / 1024:.1f} KiB, peak={peak / 1024:.1f} KiB"
+    )
+
+    return "\n".join(lines)
+
+
+def _write_capture(
+    name: str,
+    output_path: Path,
+    stem: str,
+    profiler: t.Any,
+    snapshot: tracemalloc.Snapshot | None,
+    baseline: tracemalloc.Snapshot | None,
+    top_n: int,
+) -> None:
+    """Write a stopped profiler's output & memory summary to `output_path`, and log the summaries."""
+    if isinstance(profiler, cProfile.Profile):
+        profiler.dump_stats(output_path / f"{stem}.prof")
+        cpu_summary: str = summarize_cprofile(profiler, top_n=top_n)
+    else:
+        with open(output_path / f"{stem}.html", "w") as f:
+            f.write(profiler.output_html())
+        cpu_summary: str = profiler.output_text()
+
+    log.info(f"[Profile: {name}] CPU summary:\n{cpu_summary}")
+
+    if snapshot is not None:
+        memory_summary: str = summarize_tracemalloc(
+            snapshot=snapshot, baseline=baseline, top_n=top_n
+        )
+
+        with open(output_path / f"{stem}.tracemalloc.txt", "w") as f:
+            f.write(memory_summary)
+
+        log.info(f"[Profile: {name}] Memory summary:\n{memory_summary}")
+
+
+@contextmanager
+def profile_block(
+    name: str = "main",
+    enabled: bool = LOGGING_SETTINGS.get("LOG_PROFILE_ENABLED", default=False),
+    backend: str = LOGGING_SETTINGS.get("LOG_PROFILE_BACKEND", default="cprofile"),
+    output_dir: str = LOGGING_SETTINGS.get("LOG_PROFILE_DIR", default=".profiles"),
+    top_n: int = LOGGING_SETTINGS.get("LOG_PROFILE_TOP_N", default=25),
+    backup_count: int = LOGGING_SETTINGS.get("LOG_PROFILE_BACKUP_COUNT", default=10),
+    trace_memory: bool = LOGGING_SETTINGS.get("LOG_PROFILE_TRACEMALLOC", default=True),
+    trace_memory_frames: int = LOGGING_SETTINGS.get(
+        "LOG_PROFILE_TRACEMALLOC_FRAMES", default=1
+    ),
+) -> t.Generator[None, None, None]:
+    """Profile the CPU time & memory allocations of a block of code.
+
+    Usage:
+        with profile_block("sweep"):
+            sweep_current_weather(locations=locations)
+
+    Params:
+        name (str): (default: "main") Name of the capture, used as the prefix for output files.
+        enabled (bool): When `False`, the block runs without profiling.
+        backend (str): (default: "cprofile") The CPU profiler to use, "cprofile" or "pyinstrument".
+        output_dir (str): Directory where captures are saved.
+        top_n (int): Number of functions/allocation sites to include in the logged summaries.
+        backup_count (int): Number of captures to keep, per capture name.
+        trace_memory (bool): Capture tracemalloc snapshots at the start & end of the block.
+        trace_memory_frames (int): Number of stack frames tracemalloc stores per allocation.
+
+    """
+    if not enabled or not _ACTIVE_LOCK.acquire(blocking=False):
+        yield
+        return
+
+    started_tracemalloc: bool = False
+    try:
+        output_path: Path = Path(str(output_dir))
+        if not output_path.exists():
+            output_path.mkdir(parents=True, exist_ok=True)
+
+        stem: str = f"{name}_{dt.datetime.now().strftime(CAPTURE_TIMESTAMP_FORMAT)}"
+
+        match backend.lower():
+            case "pyinstrument" if importlib.util.find_spec("pyinstrument"):
+                import pyinstrument
+
+                profiler = pyinstrument.Profiler()
+            case "pyinstrument":
+                log.warning("pyinstrument is not installed, falling back to cProfile.")
+                profiler = cProfile.Profile()
+            case _:
+                profiler = cProfile.Profile()
+
+        baseline: tracemalloc.Snapshot | None = None
+        if trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(trace_memory_frames)
+                started_tracemalloc = True
+            baseline = tracemalloc.take_snapshot()
+
+        log.info(f"Profiling '{name}', capture will be saved to: {output_path}")
+        if isinstance(profiler, cProfile.Profile):
+            profiler.enable()
+        else:
+            profiler.start()
+    except Exception as exc:
+        ## Profiling is a diagnostic, it should never stop the profiled code from running
+        log.warning(
+            f"({type(exc)}) Unable to start profiling '{name}', running unprofiled. Details: {exc}"
+        )
+        if started_tracemalloc:
+            tracemalloc.stop()
+        _ACTIVE_LOCK.release()
+
+        yield
+        return
+
+    try:
+        yield
+    finally:
+        try:
+            if isinstance(profiler, cProfile.Profile):
+                profiler.disable()
+            else:
+                profiler.stop()
+
+            snapshot: tracemalloc.Snapshot | None = (
+                tracemalloc.take_snapshot() if trace_memory else None
+            )
+
+            _write_capture(
+                name=name,
+                output_path=output_path,
+                stem=stem,
+                profiler=profiler,
+                snapshot=snapshot,
+                baseline=baseline,
+                top_n=top_n,
+            )
+            rotate_captures(
+                output_dir=output_path, name=name, backup_count=backup_count
+            )
+        except Exception as exc:
+            log.warning(
+                f"({type(exc)}) Unable to save profile capture '{name}'. Details: {exc}"
+            )
+        finally:
+            if started_tracemalloc:
+                tracemalloc.stop()
+            _ACTIVE_LOCK.release()
+
+
+def profiled(name: str | None = None) -> t.Callable:
+    """Decorator that runs a function inside `profile_block()`.
+
+    Params:
+        name (str | None): Capture name. Defaults to the decorated function's name.
+
+    """
+
+    def decorator(func: t.Callable) -> t.Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with profile_block(name=name or func.__name__):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from . import location, weather
+from . import backfill_checkpoint, collector_lease, location, watermark, weather
+from .backfill_checkpoint import BackfillCheckpointModel, BackfillCheckpointRepository
+from .collector_lease import CollectorLeaseModel, CollectorLeaseRepository
 from .location import LocationIn, LocationModel, LocationOut, LocationRepository
 from .schemas import APIResponseCurrentWeather, APIResponseForecastWeather
+from .watermark import WatermarkModel, WatermarkRepository
 from .weather.current import (
     CurrentWeatherAirQualityIn,
     CurrentWeatherAirQualityModel,
@@ -23,3 +26,28 @@ from .weather.forecast import (
     ForecastJSONOut,
     ForecastJSONRepository,
 )
+from .weather.forecast_scores import (
+    ForecastScoreModel,
+    ForecastScoreOut,
+    ForecastScoreRepository,
+)
+from .weather.observation_changes import (
+    ObservationChangeModel,
+    ObservationChangeOut,
+    ObservationChangeRepository,
+)
+from .weather.rollups import (
+    CurrentWeatherDailyRollupModel,
+    CurrentWeatherDailyRollupRepository,
+    CurrentWeatherHourlyRollupModel,
+    CurrentWeatherHourlyRollupRepository,
+    CurrentWeatherRollupOut,
+)
+from .weather.weather_alerts import (
+    WeatherAlertIn,
+    WeatherAlertModel,
+    WeatherAlertOut,
+    WeatherAlertRepository,
+    WeatherAlertsIn,
+    WeatherAlertsOut,
+)
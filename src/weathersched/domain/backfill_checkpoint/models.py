@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db import Base, annotated
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class BackfillCheckpointModel(Base):
+    """A (location, date) a backfill has fetched & saved, so a restarted backfill can skip it."""
+
+    __tablename__ = "backfill_checkpoint"
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "endpoint", "location", "date", name="uq_backfill_checkpoint"
+        ),
+    )
+
+    id: so.Mapped[annotated.INT_PK]
+
+    ## "history" or "future"
+    endpoint: so.Mapped[str] = so.mapped_column(sa.VARCHAR(16))
+    location: so.Mapped[str] = so.mapped_column(sa.VARCHAR(255))
+    date: so.Mapped[dt.date] = so.mapped_column(sa.Date)
+    observations: so.Mapped[int] = so.mapped_column(sa.INTEGER, default=0)
+    completed_at: so.Mapped[dt.datetime] = so.mapped_column(
+        sa.DateTime(timezone=True), default=dt.datetime.now, nullable=False
+    )
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db.base import BaseRepository
+
+from .models import BackfillCheckpointModel
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class BackfillCheckpointRepository(BaseRepository[BackfillCheckpointModel]):
+    def __init__(self, session: so.Session):
+        super().__init__(session, BackfillCheckpointModel)
+
+    def get_completed(
+        self,
+        endpoint: str,
+        locations: t.Iterable[str],
+        start: dt.date,
+        end: dt.date,
+    ) -> set[tuple[str, dt.date]]:
+        """Return the (location, date) pairs already backfilled from `endpoint` between `start` & `end`."""
+        locations = list(locations)
+        if not locations:
+            return set()
+
+        rows = self.session.execute(
+            sa.select(BackfillCheckpointModel.location, BackfillCheckpointModel.date)
+            .where(BackfillCheckpointModel.endpoint == endpoint)
+            .where(BackfillCheckpointModel.location.in_(locations))
+            .where(BackfillCheckpointModel.date.between(start, end))
+        ).all()
+
+        return {(location, date) for location, date in rows}
+
+    def mark_completed(
+        self,
+        endpoint: str,
+        entries: t.Iterable[tuple[str, dt.date, int]],
+        commit: bool = True,
+    ) -> int:
+        """Checkpoint backfilled (location, date, observations) entries.
+
+        Params:
+            endpoint (str): The endpoint the entries were fetched from, "history" or "future".
+            entries (Iterable[tuple[str, date, int]]): Location, date & number of observations saved.
+            commit (bool): (default: True) When `False`, the checkpoints are added to the session but not
+                committed, so they can be committed in the same transaction as the backfilled rows.
+
+        """
+        checkpoints: list[BackfillCheckpointModel] = [
+            BackfillCheckpointModel(
+                endpoint=endpoint,
+                location=location,
+                date=date,
+                observations=observations,
+            )
+            for location, date, observations in entries
+        ]
+        self.session.add_all(checkpoints)
+
+        if commit:
+            self.session.commit()
+
+        return len(checkpoints)
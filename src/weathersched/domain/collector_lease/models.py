@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db import Base, annotated
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class CollectorLeaseModel(Base):
+    """Membership lease of a collector node. A node is live while its lease has not expired.
+
+    Description:
+        Each node renews its lease with a heartbeat. Epochs are stored as integers so expiry checks compare
+        the same way on every database backend.
+    """
+
+    __tablename__ = "collector_lease"
+
+    id: so.Mapped[annotated.INT_PK]
+
+    node_id: so.Mapped[str] = so.mapped_column(sa.VARCHAR(255), unique=True)
+    hostname: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    joined_epoch: so.Mapped[int] = so.mapped_column(sa.BIGINT)
+    heartbeat_epoch: so.Mapped[int] = so.mapped_column(sa.BIGINT)
+    expires_epoch: so.Mapped[int] = so.mapped_column(sa.BIGINT, index=True)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db.base import BaseRepository
+
+from .models import CollectorLeaseModel
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class CollectorLeaseRepository(BaseRepository[CollectorLeaseModel]):
+    def __init__(self, session: so.Session):
+        super().__init__(session, CollectorLeaseModel)
+
+    def get_by_node_id(self, node_id: str) -> CollectorLeaseModel | None:
+        return (
+            self.session.query(CollectorLeaseModel)
+            .filter(CollectorLeaseModel.node_id == node_id)
+            .one_or_none()
+        )
+
+    def database_now(self) -> int:
+        """Return the database server's current Unix epoch.
+
+        Description:
+            Lease epochs are compared across nodes, so they are taken from the database's clock instead of
+            each node's. On Postgres this is the start time of the current transaction.
+
+        """
+        match self.session.get_bind().dialect.name:
+            case "postgresql":
+                return int(
+                    self.session.scalar(
+                        sa.text("SELECT CAST(extract(epoch FROM now()) AS BIGINT)")
+                    )
+                )
+            case "sqlite":
+                return int(
+                    self.session.scalar(
+                        sa.text("SELECT CAST(strftime('%s', 'now') AS INTEGER)")
+                    )
+                )
+            case _:
+                return int(
+                    self.session.scalar(sa.select(sa.func.current_timestamp())).timestamp()
+                )
+
+    def heartbeat(
+        self,
+        node_id: str,
+        now: int,
+        ttl: int,
+        hostname: str | None = None,
+    ) -> CollectorLeaseModel:
+        """Create or renew a node's lease, so it stays live until `now + ttl`.
+
+        Description:
+            A node whose lease had already expired rejoins with a new `joined_epoch`, because other nodes
+            may have dropped it from their membership in the meantime.
+
+        """
+        with self._timed("heartbeat"):
+            lease: CollectorLeaseModel | None = self.get_by_node_id(node_id)
+
+            if lease is None:
+                lease = CollectorLeaseModel(node_id=node_id, joined_epoch=now)
+                self.session.add(lease)
+            elif lease.expires_epoch < now:
+                lease.joined_epoch = now
+
+            lease.hostname = hostname
+            lease.heartbeat_epoch = now
+            lease.expires_epoch = now + ttl
+
+            self.session.commit()
+
+        return lease
+
+    def get_live(self, now: int) -> list[CollectorLeaseModel]:
+        """Return leases that have not expired, ordered by node ID."""
+        return (
+            self.session.execute(
+                sa.select(CollectorLeaseModel)
+                .where(CollectorLeaseModel.expires_epoch >= now)
+                .order_by(CollectorLeaseModel.node_id)
+            )
+            .scalars()
+            .all()
+        )
+
+    def release(self, node_id: str) -> None:
+        """Delete a node's lease, i.e. on clean shutdown, so other nodes take over its work immediately."""
+        with self._timed("release"):
+            self.session.execute(
+                sa.delete(CollectorLeaseModel).where(
+                    CollectorLeaseModel.node_id == node_id
+                )
+            )
+            self.session.commit()
+
+    def delete_expired(self, now: int) -> int:
+        """Delete expired leases. Returns the number of leases deleted."""
+        with self._timed("delete_expired"):
+            result = self.session.execute(
+                sa.delete(CollectorLeaseModel).where(
+                    CollectorLeaseModel.expires_epoch < now
+                )
+            )
+            self.session.commit()
+
+        return result.rowcount
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from . import models, repository, schemas
+from . import geo, models, repository, schemas
+from .geo import LocationIndex, geohash_encode, haversine_km
 from .models import LocationModel
 from .repository import LocationRepository
 from .schemas import LocationIn, LocationOut
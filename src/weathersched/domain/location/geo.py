@@ -0,0 +1,242 @@
+"""Geospatial helpers for locations: geohashes, great-circle distances & a nearest-location index.
+
+Description:
+    `LocationIndex` is a KD-tree over locations projected onto the unit sphere. Straight-line (chord)
+    distance between two points on a sphere grows with the great-circle distance between them, so the
+    tree's Euclidean nearest neighbours are the true nearest locations, with no distortion near the poles
+    or the antimeridian.
+
+"""
+
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import typing as t
+
+log = logging.getLogger(__name__)
+
+import numpy as np
+
+## Mean Earth radius, in kilometers
+EARTH_RADIUS_KM: float = 6371.0088
+
+_GEOHASH_ALPHABET: str = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 9) -> str:
+    """Encode coordinates as a geohash.
+
+    Description:
+        Nearby points share a geohash prefix, so a prefix query (`LIKE 'gcpv%'`) on an indexed geohash column
+        finds locations in the same cell. Precision 5 cells are ~4.9km wide, precision 9 cells ~5m.
+
+    Params:
+        lat (float): Latitude, -90 to 90.
+        lon (float): Longitude, -180 to 180.
+        precision (int): (default: 9) Number of geohash characters.
+
+    Returns:
+        (str): The geohash.
+
+    """
+    lat_range: list[float] = [-90.0, 90.0]
+    lon_range: list[float] = [-180.0, 180.0]
+
+    chars: list[str] = []
+    bits: int = 0
+    bit_count: int = 0
+    even: bool = True
+
+    while len(chars) < precision:
+        ## Bits alternate between longitude & latitude, starting with longitude
+        value, value_range = (lon, lon_range) if even else (lat, lat_range)
+        mid: float = (value_range[0] + value_range[1]) / 2
+
+        if value >= mid:
+            bits = (bits << 1) | 1
+            value_range[0] = mid
+        else:
+            bits = bits << 1
+            value_range[1] = mid
+
+        even = not even
+        bit_count += 1
+
+        if bit_count == 5:
+            chars.append(_GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def haversine_km(
+    lat1: float | np.ndarray,
+    lon1: float | np.ndarray,
+    lat2: float | np.ndarray,
+    lon2: float | np.ndarray,
+) -> float | np.ndarray:
+    """Great-circle distance between points, in kilometers. Accepts scalars or NumPy arrays."""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def to_unit_vectors(lats: t.Sequence[float], lons: t.Sequence[float]) -> np.ndarray:
+    """Project coordinates onto the unit sphere, returning an `(n, 3)` array of x, y, z."""
+    lat: np.ndarray = np.radians(np.asarray(lats, dtype=np.float64))
+    lon: np.ndarray = np.radians(np.asarray(lons, dtype=np.float64))
+
+    return np.column_stack(
+        (np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat))
+    )
+
+
+def _km_to_chord(distance_km: float) -> float:
+    return 2 * math.sin(min(distance_km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def _chord_to_km(chord: float | np.ndarray) -> float | np.ndarray:
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(np.asarray(chord) / 2, 0.0, 1.0))
+
+
+class _Node(t.NamedTuple):
+    ## Leaf: row indices into the index's arrays. Branch: None.
+    rows: np.ndarray | None
+    axis: int = 0
+    split: float = 0.0
+    left: "_Node | None" = None
+    right: "_Node | None" = None
+
+
+class LocationIndex:
+    """In-memory KD-tree of locations, for nearest-neighbour & radius queries.
+
+    Usage:
+        index = LocationIndex(ids=[1, 2], lats=[51.52, 48.85], lons=[-0.11, 2.35])
+        index.nearest(lat=51.5, lon=-0.1, k=1)  # [(1, 1.9...)]
+
+    Params:
+        ids (Sequence[int]): ID of each location.
+        lats (Sequence[float]): Latitude of each location.
+        lons (Sequence[float]): Longitude of each location.
+        leaf_size (int): (default: 16) Maximum number of locations in a leaf, which are compared by brute force.
+    """
+
+    def __init__(
+        self,
+        ids: t.Sequence[int],
+        lats: t.Sequence[float],
+        lons: t.Sequence[float],
+        leaf_size: int = 16,
+    ) -> None:
+        self.ids: np.ndarray = np.asarray(ids, dtype=np.int64)
+        self.points: np.ndarray = to_unit_vectors(lats, lons).reshape(-1, 3)
+        self.leaf_size: int = max(leaf_size, 1)
+
+        self._root: _Node = self._build(np.arange(len(self.ids)))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _build(self, rows: np.ndarray) -> _Node:
+        if len(rows) <= self.leaf_size:
+            return _Node(rows=rows)
+
+        points: np.ndarray = self.points[rows]
+        ## Split on the widest axis, at the median
+        axis: int = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        order: np.ndarray = np.argsort(points[:, axis], kind="stable")
+        middle: int = len(rows) // 2
+
+        return _Node(
+            rows=None,
+            axis=axis,
+            split=float(points[order[middle], axis]),
+            left=self._build(rows[order[:middle]]),
+            right=self._build(rows[order[middle:]]),
+        )
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> list[tuple[int, float]]:
+        """Return the `k` locations nearest to a point.
+
+        Returns:
+            (list[tuple[int, float]]): `(location ID, distance in km)` pairs, nearest first.
+
+        """
+        if k < 1 or len(self) == 0:
+            return []
+
+        target: np.ndarray = to_unit_vectors([lat], [lon])[0]
+        ## Max-heap of (-distance, row) holding the best k candidates so far
+        best: list[tuple[float, int]] = []
+
+        def search(node: _Node) -> None:
+            if node.rows is not None:
+                distances: np.ndarray = np.linalg.norm(
+                    self.points[node.rows] - target, axis=1
+                )
+                for distance, row in zip(distances.tolist(), node.rows.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, row))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, row))
+                return
+
+            offset: float = target[node.axis] - node.split
+            near, far = (node.right, node.left) if offset >= 0 else (node.left, node.right)
+
+            search(near)
+            ## Only cross the split plane if it is closer than the current kth best
+            if len(best) < k or abs(offset) < -best[0][0]:
+                search(far)
+
+        search(self._root)
+
+        return [
+            (int(self.ids[row]), float(_chord_to_km(-neg_distance)))
+            for neg_distance, row in sorted(best, reverse=True)
+        ]
+
+    def within(self, lat: float, lon: float, radius_km: float) -> list[tuple[int, float]]:
+        """Return every location within `radius_km` of a point, nearest first.
+
+        Returns:
+            (list[tuple[int, float]]): `(location ID, distance in km)` pairs.
+
+        """
+        if len(self) == 0:
+            return []
+
+        target: np.ndarray = to_unit_vectors([lat], [lon])[0]
+        radius: float = _km_to_chord(radius_km)
+        found: list[tuple[float, int]] = []
+
+        def search(node: _Node) -> None:
+            if node.rows is not None:
+                distances: np.ndarray = np.linalg.norm(
+                    self.points[node.rows] - target, axis=1
+                )
+                mask: np.ndarray = distances <= radius
+                found.extend(zip(distances[mask].tolist(), node.rows[mask].tolist()))
+                return
+
+            offset: float = target[node.axis] - node.split
+            if offset >= -radius:
+                search(node.right)
+            if offset <= radius:
+                search(node.left)
+
+        search(self._root)
+
+        return [
+            (int(self.ids[row]), float(_chord_to_km(distance)))
+            for distance, row in sorted(found)
+        ]
@@ -8,10 +8,16 @@ log = logging.getLogger(__name__)
 
 from weathersched.core.db import Base, annotated
 
+from .geo import geohash_encode
+
 import sqlalchemy as sa
 import sqlalchemy.exc as sa_exc
 import sqlalchemy.orm as so
 
+## Characters stored in LocationModel.geohash, ~4.8m x 4.8m cells
+GEOHASH_PRECISION: int = 9
+
+
 class LocationModel(Base):
     __tablename__ = "weatherapi_location"
     __table_args__ = (sa.UniqueConstraint("name", "country", name="_name_country_uc"),)
@@ -26,6 +32,10 @@ class LocationModel(Base):
     tz_id: so.Mapped[str] = so.mapped_column(sa.TEXT)
     localtime_epoch: so.Mapped[int] = so.mapped_column(sa.NUMERIC)
     localtime: so.Mapped[str] = so.mapped_column(sa.TEXT)
+    ## Set from lat/lon on insert & update. Nearby locations share a prefix, see get_by_geohash_prefix().
+    geohash: so.Mapped[str | None] = so.mapped_column(
+        sa.VARCHAR(GEOHASH_PRECISION), index=True
+    )
 
     # Relationship to CurrentWeatherModel using a string reference
     current_weather_entries: so.Mapped[list["CurrentWeatherModel"]] = so.relationship(
@@ -36,3 +46,15 @@ class LocationModel(Base):
     # forecast_weather_entries: so.Mapped[list["ForecastDayModel"]] = so.relationship(
     #     "ForecastDayModel", back_populates="location", cascade="all, delete-orphan"
     # )
+
+
+@sa.event.listens_for(LocationModel, "before_insert")
+@sa.event.listens_for(LocationModel, "before_update")
+def _set_geohash(mapper, connection, target: LocationModel) -> None:
+    if target.lat is None or target.lon is None:
+        target.geohash = None
+        return
+
+    target.geohash = geohash_encode(
+        float(target.lat), float(target.lon), precision=GEOHASH_PRECISION
+    )
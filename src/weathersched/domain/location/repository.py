@@ -1,18 +1,30 @@
 from __future__ import annotations
 
 import logging
+import threading
 import typing as t
 
 log = logging.getLogger(__name__)
 
 from weathersched.core.db.base import BaseRepository
 
-from .models import LocationModel
+from .geo import LocationIndex, geohash_encode
+from .models import GEOHASH_PRECISION, LocationModel
+from .schemas import LocationIn
 
 import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
 import sqlalchemy.exc as sa_exc
 import sqlalchemy.orm as so
 
+## Nearest-location indexes, by database URL: {url: ((row count, max ID, coordinate sum), index)}
+_INDEX_CACHE: dict[str, tuple[tuple, LocationIndex]] = {}
+_INDEX_LOCK: threading.Lock = threading.Lock()
+
+## (name, country) pairs per lookup statement, 2 bound parameters each. Stays under SQLite's 32766 limit.
+LOOKUP_CHUNK_SIZE: int = 5000
+
+
 class LocationRepository(BaseRepository[LocationModel]):
     def __init__(self, session: so.Session):
         super().__init__(session, LocationModel)
@@ -36,6 +48,240 @@ class LocationRepository(BaseRepository[LocationModel]):
     ) -> LocationModel | None:
         return (
             self.session.query(LocationModel)
-            .filter(LocationModel.country == country and LocationModel.name == state)
+            .filter(
+                sa.and_(LocationModel.country == country, LocationModel.name == state)
+            )
             .one_or_none()
         )
+
+    def get_ids_by_name_and_country(
+        self, keys: t.Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], int]:
+        """Return the ID of each stored `(name, country)`. Keys that are not stored are left out."""
+        keys = list(keys)
+        ids: dict[tuple[str, str], int] = {}
+
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            rows = self.session.execute(
+                sa.select(
+                    LocationModel.id, LocationModel.name, LocationModel.country
+                ).where(
+                    sa.tuple_(LocationModel.name, LocationModel.country).in_(
+                        keys[start : start + LOOKUP_CHUNK_SIZE]
+                    )
+                )
+            ).all()
+            ids.update({(name, country): id for id, name, country in rows})
+
+        return ids
+
+    def bulk_get_or_create(
+        self, locations: t.Iterable[LocationIn], commit: bool = True
+    ) -> dict[tuple[str, str], int]:
+        """Return the ID of each location, inserting the ones that are not stored yet.
+
+        Description:
+            Set-based: one `SELECT ... WHERE (name, country) IN (...)` for the stored locations, then on
+            Postgres & SQLite one `INSERT ... ON CONFLICT DO NOTHING RETURNING` for the rest. Locations
+            another process inserts between the two statements are looked up again afterwards. Other databases
+            insert the missing locations through the ORM.
+
+        Usage:
+            ids = repo.bulk_get_or_create(locations)
+            ids[("London", "United Kingdom")]  # 1
+
+        Params:
+            locations (Iterable[LocationIn]): Locations to resolve. Duplicates are resolved once.
+            commit (bool): (default: True) When `False`, inserts are flushed but not committed, so they are
+                committed in the same transaction as the rows that reference them.
+
+        Returns:
+            (dict[tuple[str, str], int]): Location IDs, keyed by `(name, country)`.
+
+        """
+        wanted: dict[tuple[str, str], LocationIn] = {
+            (location.name, location.country): location for location in locations
+        }
+        if not wanted:
+            return {}
+
+        with self._timed("bulk_get_or_create"):
+            ids: dict[tuple[str, str], int] = self.get_ids_by_name_and_country(wanted)
+
+            rows: list[dict] = []
+            for key, location in wanted.items():
+                if key in ids:
+                    continue
+
+                row: dict = location.model_dump()
+                ## Core inserts skip the ORM's before_insert event that sets the geohash
+                row["geohash"] = geohash_encode(
+                    float(row["lat"]), float(row["lon"]), precision=GEOHASH_PRECISION
+                )
+                rows.append(row)
+
+            if rows:
+                try:
+                    match self.session.get_bind().dialect.name:
+                        case "postgresql" | "sqlite" as dialect:
+                            insert = (
+                                postgresql.insert
+                                if dialect == "postgresql"
+                                else sqlite.insert
+                            )
+                            stmt = (
+                                insert(LocationModel)
+                                .on_conflict_do_nothing(
+                                    index_elements=["name", "country"]
+                                )
+                                .returning(
+                                    LocationModel.id,
+                                    LocationModel.name,
+                                    LocationModel.country,
+                                )
+                            )
+                            ids.update(
+                                {
+                                    (name, country): id
+                                    for id, name, country in self.session.execute(
+                                        stmt, rows
+                                    )
+                                }
+                            )
+
+                            ## Inserted by another process since the lookup
+                            missing: list[tuple[str, str]] = [
+                                key for key in wanted if key not in ids
+                            ]
+                            if missing:
+                                ids.update(self.get_ids_by_name_and_country(missing))
+                        case _:
+                            models: list[LocationModel] = [
+                                LocationModel(**row) for row in rows
+                            ]
+                            self.session.add_all(models)
+                            self.session.flush()
+
+                            ids.update(
+                                {
+                                    (model.name, model.country): model.id
+                                    for model in models
+                                }
+                            )
+
+                    if commit:
+                        self.session.commit()
+                except Exception as exc:
+                    msg = f"({type(exc)}) Error creating [{len(rows)}] location(s). Details: {exc}"
+                    log.error(msg)
+
+                    if commit:
+                        self.session.rollback()
+
+                    raise exc
+
+                log.debug(f"Created [{len(rows)}] location(s).")
+
+        return ids
+
+    def get_by_geohash_prefix(self, prefix: str) -> list[LocationModel]:
+        """Return locations whose geohash starts with `prefix`, i.e. locations in the same geohash cell."""
+        return (
+            self.session.execute(
+                sa.select(LocationModel).where(LocationModel.geohash.startswith(prefix))
+            )
+            .scalars()
+            .all()
+        )
+
+    def get_index(self) -> LocationIndex:
+        """Return the in-memory nearest-location index, rebuilding it when locations change.
+
+        Description:
+            The index is cached per database & reused across sessions. A single aggregate query (row count,
+            highest ID & sum of coordinates) detects added, removed or moved locations before the cached index
+            is reused.
+
+        """
+        bind = self.session.get_bind()
+        key: str = str(bind.url)
+
+        signature: tuple = tuple(
+            self.session.execute(
+                sa.select(
+                    sa.func.count(LocationModel.id),
+                    sa.func.max(LocationModel.id),
+                    sa.func.sum(LocationModel.lat + LocationModel.lon),
+                )
+            ).one()
+        )
+
+        with _INDEX_LOCK:
+            cached = _INDEX_CACHE.get(key)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+
+            rows = self.session.execute(
+                sa.select(LocationModel.id, LocationModel.lat, LocationModel.lon)
+            ).all()
+            index: LocationIndex = LocationIndex(
+                ids=[row.id for row in rows],
+                lats=[float(row.lat) for row in rows],
+                lons=[float(row.lon) for row in rows],
+            )
+            log.debug(f"Built nearest-location index with [{len(index)}] location(s).")
+
+            _INDEX_CACHE[key] = (signature, index)
+
+        return index
+
+    def invalidate_index(self) -> None:
+        """Drop the cached nearest-location index for this database."""
+        with _INDEX_LOCK:
+            _INDEX_CACHE.pop(str(self.session.get_bind().url), None)
+
+    def nearest(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 1,
+        max_distance_km: float | None = None,
+    ) -> list[tuple[LocationModel, float]]:
+        """Return the `k` tracked locations nearest to a coordinate.
+
+        Usage:
+            repo.nearest(lat=51.5, lon=-0.12, k=3)  # [(<London>, 1.2), ...]
+
+        Params:
+            lat (float): Latitude of the point.
+            lon (float): Longitude of the point.
+            k (int): (default: 1) Maximum number of locations to return.
+            max_distance_km (float | None): Skip locations further than this many kilometers away.
+
+        Returns:
+            (list[tuple[LocationModel, float]]): `(location, distance in km)` pairs, nearest first.
+
+        """
+        with self._timed("nearest"):
+            matches: list[tuple[int, float]] = self.get_index().nearest(
+                float(lat), float(lon), k=k
+            )
+            if max_distance_km is not None:
+                matches = [
+                    (id, distance)
+                    for id, distance in matches
+                    if distance <= max_distance_km
+                ]
+            if not matches:
+                return []
+
+            models: dict[int, LocationModel] = {
+                model.id: model
+                for model in self.session.execute(
+                    sa.select(LocationModel).where(
+                        LocationModel.id.in_([id for id, _ in matches])
+                    )
+                ).scalars()
+            }
+
+        return [(models[id], distance) for id, distance in matches if id in models]
@@ -28,3 +28,4 @@ class LocationIn(BaseModel):
 
 class LocationOut(LocationIn):
     id: int
+    geohash: str | None = None
@@ -33,3 +33,4 @@ class APIResponseCurrentWeather(APIResponseWeatherBase):
 
 class APIResponseForecastWeather(APIResponseWeatherBase):
     forecast: t.Union[ForecastJSONIn, ForecastJSONOut]
+    alerts: WeatherAlertsIn | None = Field(default=None)
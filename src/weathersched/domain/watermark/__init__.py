@@ -0,0 +1,5 @@
+from __future__ import annotations
+
+from . import models, repository
+from .models import WatermarkModel
+from .repository import WatermarkRepository
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db import Base, annotated
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class WatermarkModel(Base):
+    """Progress marker for an incremental job, i.e. the last row ID a rollup job has processed."""
+
+    __tablename__ = "job_watermark"
+
+    id: so.Mapped[annotated.INT_PK]
+
+    name: so.Mapped[str] = so.mapped_column(sa.VARCHAR(255), unique=True)
+    value: so.Mapped[int] = so.mapped_column(sa.BIGINT, default=0)
+    updated_at: so.Mapped[dt.datetime] = so.mapped_column(
+        sa.DateTime(timezone=True),
+        default=lambda: dt.datetime.now(tz=dt.timezone.utc),
+        onupdate=lambda: dt.datetime.now(tz=dt.timezone.utc),
+        nullable=False,
+    )
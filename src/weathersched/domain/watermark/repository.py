@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db.base import BaseRepository
+
+from .models import WatermarkModel
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class WatermarkRepository(BaseRepository[WatermarkModel]):
+    def __init__(self, session: so.Session):
+        super().__init__(session, WatermarkModel)
+
+    def get_by_name(self, name: str) -> WatermarkModel | None:
+        return (
+            self.session.query(WatermarkModel)
+            .filter(WatermarkModel.name == name)
+            .one_or_none()
+        )
+
+    def get_value(self, name: str, default: int = 0) -> int:
+        """Return a watermark's value, or `default` if the watermark does not exist."""
+        watermark: WatermarkModel | None = self.get_by_name(name)
+
+        return default if watermark is None else watermark.value
+
+    def set_value(
+        self,
+        name: str,
+        value: int,
+        commit: bool = True,
+        updated_at: dt.datetime | None = None,
+    ) -> WatermarkModel:
+        """Create or move a watermark.
+
+        Params:
+            name (str): Name of the watermark, i.e. the job name.
+            value (int): The new watermark value.
+            commit (bool): (default: True) When `False`, the change is added to the session but not committed,
+                so it can be committed in the same transaction as the job's results.
+            updated_at (datetime | None): Timestamp to store with the value. Defaults to the current time.
+
+        """
+        watermark: WatermarkModel | None = self.get_by_name(name)
+
+        if watermark is None:
+            watermark = WatermarkModel(name=name, value=value)
+            self.session.add(watermark)
+        else:
+            watermark.value = value
+
+        if updated_at is not None:
+            watermark.updated_at = updated_at
+
+        if commit:
+            self.session.commit()
+
+        return watermark
@@ -1,3 +1,10 @@
 from __future__ import annotations
 
-from . import current, forecast, weather_alerts
+from . import (
+    current,
+    forecast,
+    forecast_scores,
+    observation_changes,
+    rollups,
+    weather_alerts,
+)
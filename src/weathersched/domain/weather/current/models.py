@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from decimal import Decimal
 import logging
 import typing as t
 
@@ -14,54 +13,44 @@ import sqlalchemy.orm as so
 
 class CurrentWeatherModel(Base):
     __tablename__ = "weatherapi_current_weather"
-    __table_args__ = (sa.UniqueConstraint("last_updated_epoch"),)
-    # __table_args__ = (sa.UniqueConstraint("last_updated_epoch", name="_last_updated_epoch_uc"),)
+    ## One observation per location per WeatherAPI update
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "location_id",
+            "last_updated_epoch",
+            name="uq_current_weather_location_epoch",
+        ),
+    )
 
     id: so.Mapped[annotated.INT_PK]
 
     last_updated_epoch: so.Mapped[int] = so.mapped_column(sa.INTEGER)
     last_updated: so.Mapped[str] = so.mapped_column(sa.TEXT)
-    temp_c: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    temp_f: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
+    temp_c: so.Mapped[annotated.MEASUREMENT]
+    temp_f: so.Mapped[annotated.MEASUREMENT]
     is_day: so.Mapped[int] = so.mapped_column(sa.NUMERIC)
-    wind_mph: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    wind_kph: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
+    wind_mph: so.Mapped[annotated.MEASUREMENT]
+    wind_kph: so.Mapped[annotated.MEASUREMENT]
     wind_degree: so.Mapped[int] = so.mapped_column(sa.NUMERIC)
     wind_dir: so.Mapped[str] = so.mapped_column(sa.TEXT)
-    pressure_mb: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    pressure_in: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    precip_mm: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    precip_in: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
+    pressure_mb: so.Mapped[annotated.MEASUREMENT]
+    pressure_in: so.Mapped[annotated.MEASUREMENT]
+    precip_mm: so.Mapped[annotated.MEASUREMENT]
+    precip_in: so.Mapped[annotated.MEASUREMENT]
     humidity: so.Mapped[int] = so.mapped_column(sa.NUMERIC)
     cloud: so.Mapped[int] = so.mapped_column(sa.NUMERIC)
-    feelslike_c: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    feelslike_f: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    windchill_c: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    windchill_f: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    heatindex_c: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    heatindex_f: so.Mapped[Decimal] = so.mapped_column(
-        sa.NUMERIC(precision=12, scale=2)
-    )
-    dewpoint_c: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    dewpoint_f: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    vis_km: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    uv: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    gust_mph: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    gust_kph: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
+    feelslike_c: so.Mapped[annotated.MEASUREMENT]
+    feelslike_f: so.Mapped[annotated.MEASUREMENT]
+    windchill_c: so.Mapped[annotated.MEASUREMENT]
+    windchill_f: so.Mapped[annotated.MEASUREMENT]
+    heatindex_c: so.Mapped[annotated.MEASUREMENT]
+    heatindex_f: so.Mapped[annotated.MEASUREMENT]
+    dewpoint_c: so.Mapped[annotated.MEASUREMENT]
+    dewpoint_f: so.Mapped[annotated.MEASUREMENT]
+    vis_km: so.Mapped[annotated.MEASUREMENT]
+    uv: so.Mapped[annotated.MEASUREMENT]
+    gust_mph: so.Mapped[annotated.MEASUREMENT]
+    gust_kph: so.Mapped[annotated.MEASUREMENT]
 
     condition: so.Mapped["CurrentWeatherConditionModel"] = so.relationship(
         back_populates="weather"
@@ -103,12 +92,12 @@ class CurrentWeatherAirQualityModel(Base):
 
     id: so.Mapped[annotated.INT_PK]
 
-    co: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    no2: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    o3: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    so2: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    pm2_5: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
-    pm10: so.Mapped[Decimal] = so.mapped_column(sa.NUMERIC(precision=12, scale=2))
+    co: so.Mapped[annotated.MEASUREMENT]
+    no2: so.Mapped[annotated.MEASUREMENT]
+    o3: so.Mapped[annotated.MEASUREMENT]
+    so2: so.Mapped[annotated.MEASUREMENT]
+    pm2_5: so.Mapped[annotated.MEASUREMENT]
+    pm10: so.Mapped[annotated.MEASUREMENT]
     us_epa_index: so.Mapped[int] = so.mapped_column(sa.NUMERIC)
     gb_defra_index: so.Mapped[int] = so.mapped_column(sa.NUMERIC)
 
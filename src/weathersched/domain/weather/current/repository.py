@@ -33,9 +33,10 @@ class CurrentWeatherRepository(BaseRepository[CurrentWeatherModel]):
         weather.air_quality = air_quality
 
         # Add and commit all models in one transaction
-        self.session.add(weather)
-        self.session.commit()
-        self.session.refresh(weather)
+        with self._timed("create_with_related"):
+            self.session.add(weather)
+            self.session.commit()
+            self.session.refresh(weather)
 
         return weather
 
@@ -66,10 +67,13 @@ class CurrentWeatherRepository(BaseRepository[CurrentWeatherModel]):
             .one_or_none()
         )
 
-    def get_by_last_updated_epoch(self, last_updated_epoch: int):
+    def get_by_last_updated_epoch(self, location_id: int, last_updated_epoch: int):
         return (
             self.session.query(CurrentWeatherModel)
-            .filter(CurrentWeatherModel.last_updated_epoch == last_updated_epoch)
+            .filter(
+                CurrentWeatherModel.location_id == location_id,
+                CurrentWeatherModel.last_updated_epoch == last_updated_epoch,
+            )
             .one_or_none()
         )
 
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from decimal import Decimal
 import logging
 import typing as t
 
@@ -26,12 +25,12 @@ class CurrentWeatherConditionOut(CurrentWeatherConditionIn):
 
 
 class CurrentWeatherAirQualityIn(BaseModel):
-    co: Decimal
-    no2: Decimal
-    o3: Decimal
-    so2: Decimal
-    pm2_5: Decimal
-    pm10: Decimal
+    co: float
+    no2: float
+    o3: float
+    so2: float
+    pm2_5: float
+    pm10: float
     us_epa_index: int = Field(alias="us-epa-index", default=None)
     gb_defra_index: int = Field(alias="gb-defra-index", default=None)
 
@@ -43,32 +42,32 @@ class CurrentWeatherAirQualityOut(CurrentWeatherAirQualityIn):
 class CurrentWeatherIn(BaseModel):
     last_updated_epoch: int
     last_updated: str
-    temp_c: Decimal
-    temp_f: Decimal
+    temp_c: float
+    temp_f: float
     is_day: int
     condition: CurrentWeatherConditionIn
-    wind_mph: Decimal
-    wind_kph: Decimal
+    wind_mph: float
+    wind_kph: float
     wind_degree: int
     wind_dir: str
-    pressure_mb: Decimal
-    pressure_in: Decimal
-    precip_mm: Decimal
-    precip_in: Decimal
+    pressure_mb: float
+    pressure_in: float
+    precip_mm: float
+    precip_in: float
     humidity: int
     cloud: int
-    feelslike_c: Decimal
-    feelslike_f: Decimal
-    windchill_c: Decimal
-    windchill_f: Decimal
-    heatindex_c: Decimal
-    heatindex_f: Decimal
-    dewpoint_c: Decimal
-    dewpoint_f: Decimal
-    vis_km: Decimal
-    uv: Decimal
-    gust_mph: Decimal
-    gust_kph: Decimal
+    feelslike_c: float
+    feelslike_f: float
+    windchill_c: float
+    windchill_f: float
+    heatindex_c: float
+    heatindex_f: float
+    dewpoint_c: float
+    dewpoint_f: float
+    vis_km: float
+    uv: float
+    gust_mph: float
+    gust_kph: float
     air_quality: CurrentWeatherAirQualityIn | None = Field(default=None)
 
 
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
 from . import models, repository, schemas
-from .models import ForecastJSONModel
+from .models import ForecastJSONModel, forecast_hash
 from .repository import ForecastJSONRepository
 from .schemas import ForecastJSONIn, ForecastJSONOut
@@ -1,20 +1,37 @@
 from __future__ import annotations
 
 import datetime as dt
+import hashlib
+import json
 import logging
 import typing as t
 
 log = logging.getLogger(__name__)
 
-from weathersched.core.db import Base, annotated
+from weathersched.core.db import Base, CompressedJSON, annotated
 
 import sqlalchemy as sa
 import sqlalchemy.exc as sa_exc
 import sqlalchemy.orm as so
-from sqlalchemy.types import JSON
+
+def forecast_hash(forecast_json: dict) -> str:
+    """Return the dedup key of a forecast, a SHA-256 hex digest of its canonical JSON.
+
+    Description:
+        Lets a forecast that is saved twice, i.e. a spooled batch replayed after a crash between commit
+        & acknowledge, be recognized without decompressing stored forecasts.
+    """
+    key: str = json.dumps(forecast_json, sort_keys=True, separators=(",", ":"))
+
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
 
 class ForecastJSONModel(Base):
     __tablename__ = "weatherapi_forecast_json"
+    ## Newest forecast per location, see weathersched.api.queries.latest_forecast()
+    __table_args__ = (
+        sa.Index("ix_weatherapi_forecast_json_location_id_id", "location_id", "id"),
+    )
 
     id: so.Mapped[annotated.INT_PK]
 
@@ -24,4 +41,22 @@ class ForecastJSONModel(Base):
         nullable=False,
     )
 
-    forecast_json: so.Mapped[dict] = so.mapped_column(JSON)
+    ## Stored compressed, see DB_FORECAST_JSON_* in the database settings
+    forecast_json: so.Mapped[dict] = so.mapped_column(CompressedJSON())
+
+    ## NULL for forecasts saved without a location, i.e. by callers of save_forecast() that don't pass one
+    location_id: so.Mapped[int | None] = so.mapped_column(
+        sa.ForeignKey("weatherapi_location.id"), nullable=True
+    )
+
+    ## Not unique, a unique index without created_at would stop the table being partitioned by time.
+    #  NULL for forecasts saved before the column was added.
+    forecast_hash: so.Mapped[str | None] = so.mapped_column(
+        sa.VARCHAR(64), index=True, nullable=True
+    )
+
+    @so.validates("forecast_json")
+    def _set_forecast_hash(self, key: str, value: dict) -> dict:
+        self.forecast_hash = forecast_hash(value) if value is not None else None
+
+        return value
@@ -11,6 +11,8 @@ from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_valida
 class ForecastJSONIn(BaseModel):
     forecast_json: dict
 
+    location_id: int | None = None
+
 
 class ForecastJSONOut(ForecastJSONIn):
     id: int
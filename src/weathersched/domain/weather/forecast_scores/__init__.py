@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from . import models, repository, schemas
+from .models import ForecastScoreModel
+from .repository import ForecastScoreRepository
+from .schemas import ForecastScoreOut
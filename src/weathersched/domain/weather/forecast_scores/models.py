@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import math
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db import Base, annotated
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class ForecastScoreModel(Base):
+    """Forecast accuracy for one location, variable & lead time.
+
+    Description:
+        Sums of the errors are stored instead of MAE/RMSE/bias, so scores can be updated incrementally as
+        new forecasts are scored. Errors are forecast minus observed value.
+    """
+
+    __tablename__ = "weatherapi_forecast_score"
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "location_id", "variable", "lead_hours", name="_forecast_score_key_uc"
+        ),
+    )
+
+    id: so.Mapped[annotated.INT_PK]
+
+    location_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey("weatherapi_location.id"), index=True
+    )
+    ## Name of the scored measurement, i.e. "temp_c"
+    variable: so.Mapped[str] = so.mapped_column(sa.VARCHAR(64))
+    ## Hours between the forecast being issued & the forecast hour
+    lead_hours: so.Mapped[int] = so.mapped_column(sa.INTEGER)
+
+    sample_count: so.Mapped[int] = so.mapped_column(sa.INTEGER, default=0)
+    error_sum: so.Mapped[float] = so.mapped_column(sa.Float, default=0.0)
+    abs_error_sum: so.Mapped[float] = so.mapped_column(sa.Float, default=0.0)
+    sq_error_sum: so.Mapped[float] = so.mapped_column(sa.Float, default=0.0)
+
+    updated_at: so.Mapped[dt.datetime] = so.mapped_column(
+        sa.DateTime(timezone=True),
+        default=dt.datetime.now,
+        onupdate=dt.datetime.now,
+        nullable=False,
+    )
+
+    @property
+    def mae(self) -> float | None:
+        if not self.sample_count:
+            return None
+
+        return self.abs_error_sum / self.sample_count
+
+    @property
+    def rmse(self) -> float | None:
+        if not self.sample_count:
+            return None
+
+        return math.sqrt(self.sq_error_sum / self.sample_count)
+
+    @property
+    def bias(self) -> float | None:
+        if not self.sample_count:
+            return None
+
+        return self.error_sum / self.sample_count
+
+    def merge(
+        self, sample_count: int, error_sum: float, abs_error_sum: float, sq_error_sum: float
+    ) -> None:
+        """Fold a new batch of errors into this score."""
+        self.sample_count = (self.sample_count or 0) + sample_count
+        self.error_sum = (self.error_sum or 0.0) + error_sum
+        self.abs_error_sum = (self.abs_error_sum or 0.0) + abs_error_sum
+        self.sq_error_sum = (self.sq_error_sum or 0.0) + sq_error_sum
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import logging
+import math
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db.base import BaseRepository
+
+from .models import ForecastScoreModel
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class ForecastScoreRepository(BaseRepository[ForecastScoreModel]):
+    def __init__(self, session: so.Session):
+        super().__init__(session, ForecastScoreModel)
+
+    def get_by_key(
+        self, location_id: int, variable: str, lead_hours: int
+    ) -> ForecastScoreModel | None:
+        return (
+            self.session.query(ForecastScoreModel)
+            .filter(
+                ForecastScoreModel.location_id == location_id,
+                ForecastScoreModel.variable == variable,
+                ForecastScoreModel.lead_hours == lead_hours,
+            )
+            .one_or_none()
+        )
+
+    def get_for_location(
+        self, location_id: int, variable: str | None = None
+    ) -> list[ForecastScoreModel]:
+        """Return a location's scores, ordered by variable, then lead time."""
+        stmt = sa.select(ForecastScoreModel).where(
+            ForecastScoreModel.location_id == location_id
+        )
+        if variable is not None:
+            stmt = stmt.where(ForecastScoreModel.variable == variable)
+
+        stmt = stmt.order_by(ForecastScoreModel.variable, ForecastScoreModel.lead_hours)
+
+        with self._timed("get_for_location"):
+            return list(self.session.execute(stmt).scalars().all())
+
+    def summary_by_lead(self, variable: str) -> list[dict]:
+        """Return MAE, RMSE & bias of a variable per lead time, across all locations.
+
+        Returns:
+            (list[dict]): One dict per lead time with `lead_hours`, `sample_count`, `mae`, `rmse` & `bias`.
+
+        """
+        stmt = (
+            sa.select(
+                ForecastScoreModel.lead_hours,
+                sa.func.sum(ForecastScoreModel.sample_count).label("sample_count"),
+                sa.func.sum(ForecastScoreModel.error_sum).label("error_sum"),
+                sa.func.sum(ForecastScoreModel.abs_error_sum).label("abs_error_sum"),
+                sa.func.sum(ForecastScoreModel.sq_error_sum).label("sq_error_sum"),
+            )
+            .where(ForecastScoreModel.variable == variable)
+            .group_by(ForecastScoreModel.lead_hours)
+            .order_by(ForecastScoreModel.lead_hours)
+        )
+
+        summary: list[dict] = []
+        with self._timed("summary_by_lead"):
+            for row in self.session.execute(stmt):
+                count: int = int(row.sample_count or 0)
+                if not count:
+                    continue
+
+                summary.append(
+                    {
+                        "lead_hours": row.lead_hours,
+                        "sample_count": count,
+                        "mae": row.abs_error_sum / count,
+                        "rmse": math.sqrt(row.sq_error_sum / count),
+                        "bias": row.error_sum / count,
+                    }
+                )
+
+        return summary
+
+    def merge_scores(self, rows: t.Sequence[t.Mapping[str, t.Any]]) -> int:
+        """Fold new error sums into existing scores, creating scores that do not exist yet.
+
+        Description:
+            Changes are added to the session but not committed, so the caller can commit them in the same
+            transaction as its watermark.
+
+        Params:
+            rows (Sequence[Mapping]): Rows with `location_id`, `variable`, `lead_hours`, `sample_count`,
+                `error_sum`, `abs_error_sum` & `sq_error_sum`.
+
+        Returns:
+            (int): Number of scores touched.
+
+        """
+        if not rows:
+            return 0
+
+        keys: set[tuple[int, str, int]] = {
+            (row["location_id"], row["variable"], row["lead_hours"]) for row in rows
+        }
+        location_ids: set[int] = {location_id for location_id, _, _ in keys}
+        variables: set[str] = {variable for _, variable, _ in keys}
+
+        ## Load every score the new rows touch with a single query
+        existing: dict[tuple[int, str, int], ForecastScoreModel] = {
+            (score.location_id, score.variable, score.lead_hours): score
+            for score in self.session.execute(
+                sa.select(ForecastScoreModel).where(
+                    ForecastScoreModel.location_id.in_(location_ids),
+                    ForecastScoreModel.variable.in_(variables),
+                )
+            ).scalars()
+        }
+
+        for row in rows:
+            key: tuple[int, str, int] = (
+                row["location_id"],
+                row["variable"],
+                row["lead_hours"],
+            )
+
+            score: ForecastScoreModel | None = existing.get(key)
+            if score is None:
+                score = ForecastScoreModel(
+                    location_id=key[0],
+                    variable=key[1],
+                    lead_hours=key[2],
+                    sample_count=0,
+                    error_sum=0.0,
+                    abs_error_sum=0.0,
+                    sq_error_sum=0.0,
+                )
+                self.session.add(score)
+                existing[key] = score
+
+            score.merge(
+                sample_count=row["sample_count"],
+                error_sum=row["error_sum"],
+                abs_error_sum=row["abs_error_sum"],
+                sq_error_sum=row["sq_error_sum"],
+            )
+
+        return len(keys)
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from pydantic import BaseModel, ConfigDict
+
+class ForecastScoreOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    location_id: int
+    variable: str
+    lead_hours: int
+    sample_count: int
+
+    mae: float | None = None
+    rmse: float | None = None
+    bias: float | None = None
@@ -0,0 +1,6 @@
+from __future__ import annotations
+
+from . import models, repository, schemas
+from .models import ObservationChangeModel
+from .repository import ObservationChangeRepository
+from .schemas import ObservationChangeOut
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db import Base, annotated
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class ObservationChangeModel(Base):
+    """An entry in the observation change feed: the tracked fields of an observation that changed.
+
+    Description:
+        `id` is the feed's sequence ID, consumers read entries after the last ID they processed.
+        `changes` holds `{field: {"from": old, "to": new}}` for each field that moved past its threshold, &
+        `snapshot` the location's tracked values after the change, which the next observation is compared to.
+    """
+
+    __tablename__ = "weatherapi_observation_change"
+    __table_args__ = (
+        ## Latest snapshot lookups & per-location feed reads
+        sa.Index("ix_observation_change_location_id", "location_id", "id"),
+    )
+
+    id: so.Mapped[annotated.INT_PK]
+
+    location_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey("weatherapi_location.id")
+    )
+    last_updated_epoch: so.Mapped[int] = so.mapped_column(sa.INTEGER)
+    changes: so.Mapped[dict] = so.mapped_column(sa.JSON)
+    snapshot: so.Mapped[dict] = so.mapped_column(sa.JSON)
+    created_at: so.Mapped[dt.datetime] = so.mapped_column(
+        sa.DateTime(timezone=True),
+        default=lambda: dt.datetime.now(tz=dt.timezone.utc),
+        nullable=False,
+    )
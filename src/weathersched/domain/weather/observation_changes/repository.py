@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db.base import BaseRepository
+
+from .models import ObservationChangeModel
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class ObservationChangeRepository(BaseRepository[ObservationChangeModel]):
+    def __init__(self, session: so.Session):
+        super().__init__(session, ObservationChangeModel)
+
+    def since(
+        self,
+        sequence_id: int = 0,
+        limit: int = 1000,
+        location_ids: t.Sequence[int] | None = None,
+        settle_seconds: float = 0,
+    ) -> list[ObservationChangeModel]:
+        """Return up to `limit` feed entries after `sequence_id`, oldest first.
+
+        Description:
+            Consumers pass the `id` of the last entry they processed to read the next page, so each poll is an
+            index range scan however long the feed is.
+
+            On Postgres, IDs are assigned when a row is inserted, not when it is committed, so with several
+            concurrent writers an entry can become visible after an entry with a higher ID. `settle_seconds`
+            leaves out entries created that recently, giving those transactions time to commit.
+
+        Params:
+            sequence_id (int): (default: 0) Return entries with a higher ID. `0` reads from the start.
+            limit (int): (default: 1000) Maximum number of entries.
+            location_ids (Sequence[int] | None): Only return entries for these locations.
+            settle_seconds (float): (default: 0) Leave out entries created in the last `settle_seconds`.
+
+        """
+        stmt = sa.select(ObservationChangeModel).where(
+            ObservationChangeModel.id > sequence_id
+        )
+        if location_ids is not None:
+            stmt = stmt.where(ObservationChangeModel.location_id.in_(location_ids))
+        if settle_seconds:
+            stmt = stmt.where(
+                ObservationChangeModel.created_at
+                <= dt.datetime.now(tz=dt.timezone.utc)
+                - dt.timedelta(seconds=settle_seconds)
+            )
+
+        stmt = stmt.order_by(ObservationChangeModel.id).limit(limit)
+
+        with self._timed("since"):
+            return list(self.session.execute(stmt).scalars().all())
+
+    def latest_by_location(
+        self, location_ids: t.Iterable[int]
+    ) -> dict[int, ObservationChangeModel]:
+        """Return each location's newest feed entry. Locations without entries are left out."""
+        location_ids = list(set(location_ids))
+        if not location_ids:
+            return {}
+
+        latest_ids = (
+            sa.select(sa.func.max(ObservationChangeModel.id))
+            .where(ObservationChangeModel.location_id.in_(location_ids))
+            .group_by(ObservationChangeModel.location_id)
+        )
+
+        with self._timed("latest_by_location"):
+            return {
+                entry.location_id: entry
+                for entry in self.session.execute(
+                    sa.select(ObservationChangeModel).where(
+                        ObservationChangeModel.id.in_(latest_ids)
+                    )
+                ).scalars()
+            }
+
+    def append(self, entries: t.Sequence[t.Mapping[str, t.Any]]) -> int:
+        """Insert feed entries in one statement. Not committed, so they commit with the observations."""
+        if not entries:
+            return 0
+
+        with self._timed("append"):
+            self.session.execute(
+                sa.insert(ObservationChangeModel),
+                [
+                    {"created_at": dt.datetime.now(tz=dt.timezone.utc), **entry}
+                    for entry in entries
+                ],
+            )
+
+        return len(entries)
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from pydantic import BaseModel, ConfigDict
+
+class ObservationChangeOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    location_id: int
+    last_updated_epoch: int
+    changes: dict[str, dict[str, float | int | None]]
+    snapshot: dict[str, float | int | None]
+    created_at: dt.datetime
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from . import methods, models, repository, schemas
+from .methods import refresh_current_weather_rollups
+from .models import (
+    ROLLUP_FIELDS,
+    CurrentWeatherDailyRollupModel,
+    CurrentWeatherHourlyRollupModel,
+)
+from .repository import (
+    CurrentWeatherDailyRollupRepository,
+    CurrentWeatherHourlyRollupRepository,
+)
+from .schemas import CurrentWeatherRollupOut
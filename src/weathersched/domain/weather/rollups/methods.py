@@ -0,0 +1,197 @@
+"""Incremental rollup job for current weather observations."""
+
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.core.db.settings import DB_SETTINGS
+from weathersched.domain.watermark import WatermarkRepository
+from weathersched.domain.weather.current.models import CurrentWeatherModel
+
+from .models import ROLLUP_FIELDS
+from .repository import (
+    CurrentWeatherDailyRollupRepository,
+    CurrentWeatherHourlyRollupRepository,
+    CurrentWeatherRollupRepository,
+)
+
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+## Name of the watermark holding the last CurrentWeatherModel.id folded into the rollups
+ROLLUP_WATERMARK_NAME: str = "current_weather_rollup"
+## Name of the watermark holding a sampled max CurrentWeatherModel.id, folded in once it has settled
+ROLLUP_HORIZON_WATERMARK_NAME: str = "current_weather_rollup_horizon"
+
+
+def aggregate_observations(
+    session: so.Session, bucket_seconds: int, after_id: int, up_to_id: int
+) -> list[dict]:
+    """Aggregate observations with IDs in `(after_id, up_to_id]` per location & time bucket, in SQL.
+
+    Params:
+        session (Session): Database session.
+        bucket_seconds (int): Bucket width, i.e. 3600 for hourly buckets.
+        after_id (int): Exclusive lower bound of `CurrentWeatherModel.id`.
+        up_to_id (int): Inclusive upper bound of `CurrentWeatherModel.id`.
+
+    Returns:
+        (list[dict]): One dict per (location, bucket) with `sample_count` & min/max/sum aggregates.
+
+    """
+    epoch = CurrentWeatherModel.last_updated_epoch
+    bucket = (epoch - epoch % bucket_seconds).label("bucket_start_epoch")
+
+    columns: list = [
+        CurrentWeatherModel.location_id,
+        bucket,
+        sa.func.count().label("sample_count"),
+    ]
+    for field in ROLLUP_FIELDS:
+        ## Aggregate as floats, so Postgres does not return Decimal sums of NUMERIC columns
+        value = sa.cast(getattr(CurrentWeatherModel, field), sa.Float)
+        columns.extend(
+            [
+                sa.func.min(value).label(f"{field}_min"),
+                sa.func.max(value).label(f"{field}_max"),
+                sa.func.sum(value).label(f"{field}_sum"),
+            ]
+        )
+
+    stmt = (
+        sa.select(*columns)
+        .where(CurrentWeatherModel.id > after_id, CurrentWeatherModel.id <= up_to_id)
+        .group_by(CurrentWeatherModel.location_id, bucket)
+    )
+
+    return [dict(row) for row in session.execute(stmt).mappings()]
+
+
+def _settled_max_id(
+    watermarks: WatermarkRepository,
+    after_id: int,
+    max_id: int | None,
+    settle_seconds: float,
+    now: dt.datetime,
+) -> int | None:
+    """Return the highest observation ID that is safe to fold in, or `None` if nothing has settled yet.
+
+    Description:
+        The current max ID is sampled into the horizon watermark. A sample is only folded in once it is at
+        least `settle_seconds` old, by which time transactions that had claimed a lower ID when the sample
+        was taken have committed. A pending sample is not moved, so it settles under a steady insert rate.
+
+    """
+    horizon = watermarks.get_by_name(ROLLUP_HORIZON_WATERMARK_NAME)
+
+    settled_id: int | None = None
+    if horizon is not None and horizon.value > after_id:
+        sampled_at: dt.datetime = horizon.updated_at
+        if sampled_at.tzinfo is None:
+            ## SQLite does not store the offset, samples are always written in UTC
+            sampled_at = sampled_at.replace(tzinfo=dt.timezone.utc)
+
+        if sampled_at > now - dt.timedelta(seconds=settle_seconds):
+            log.debug(f"Rollup horizon at ID [{horizon.value}] has not settled yet.")
+            return None
+
+        settled_id = horizon.value
+
+    if max_id is not None and max_id > (settled_id or after_id):
+        watermarks.set_value(ROLLUP_HORIZON_WATERMARK_NAME, max_id, updated_at=now)
+
+    return settled_id
+
+
+def refresh_current_weather_rollups(
+    session: so.Session,
+    batch_size: int = 50_000,
+    settle_seconds: float = DB_SETTINGS.get("DB_ROLLUP_SETTLE_SECONDS", default=0),
+    now: dt.datetime | None = None,
+) -> int:
+    """Fold observations saved since the last run into the hourly & daily rollup tables.
+
+    Description:
+        Progress is tracked with a watermark on `CurrentWeatherModel.id`, so each observation is folded in
+        exactly once, including observations that arrive late for an old bucket. Each batch's rollups &
+        watermark are committed together.
+
+        On Postgres, IDs are assigned when a row is inserted, not when it is committed, so with several
+        concurrent writers a row can become visible after a row with a higher ID has been folded in, and
+        the watermark would skip it. With `settle_seconds` set, only IDs sampled at least that long ago (on
+        a previous run) are folded in, so new observations are rolled up one run later.
+
+    Params:
+        session (Session): Database session.
+        batch_size (int): (default: 50000) Maximum number of observation IDs to process per transaction.
+        settle_seconds (float): (default: 0) Minimum age of the sampled max ID before it is folded in.
+            `0` folds in everything visible, which is safe with a single writer (i.e. SQLite).
+        now (datetime | None): Current time, for tests. Defaults to the current UTC time.
+
+    Returns:
+        (int): Number of observations processed.
+
+    """
+    watermarks: WatermarkRepository = WatermarkRepository(session)
+    repositories: list[CurrentWeatherRollupRepository] = [
+        CurrentWeatherHourlyRollupRepository(session),
+        CurrentWeatherDailyRollupRepository(session),
+    ]
+
+    after_id: int = watermarks.get_value(ROLLUP_WATERMARK_NAME)
+    max_id: int | None = session.scalar(
+        sa.select(sa.func.max(CurrentWeatherModel.id)).where(
+            CurrentWeatherModel.id > after_id
+        )
+    )
+    if settle_seconds > 0:
+        max_id = _settled_max_id(
+            watermarks=watermarks,
+            after_id=after_id,
+            max_id=max_id,
+            settle_seconds=settle_seconds,
+            now=now or dt.datetime.now(tz=dt.timezone.utc),
+        )
+
+    if max_id is None:
+        log.debug("No new observations to roll up.")
+        return 0
+
+    processed: int = 0
+    with metrics.time_stage("rollup"):
+        while after_id < max_id:
+            up_to_id: int = min(after_id + batch_size, max_id)
+
+            try:
+                for repo in repositories:
+                    rows: list[dict] = aggregate_observations(
+                        session=session,
+                        bucket_seconds=repo.model.BUCKET_SECONDS,
+                        after_id=after_id,
+                        up_to_id=up_to_id,
+                    )
+                    repo.merge_aggregates(rows)
+
+                ## Every granularity covers the same observations, count them once
+                processed += sum(row["sample_count"] for row in rows)
+
+                watermarks.set_value(ROLLUP_WATERMARK_NAME, up_to_id, commit=False)
+                session.commit()
+            except Exception as exc:
+                msg = f"({type(exc)}) Error rolling up observations ({after_id}, {up_to_id}]. Details: {exc}"
+                log.error(msg)
+
+                session.rollback()
+
+                raise exc
+
+            after_id = up_to_id
+
+    log.info(f"Rolled up [{processed}] observation(s), watermark at ID [{after_id}].")
+
+    return processed
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db import Base, annotated
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+## CurrentWeatherModel columns aggregated into rollups
+ROLLUP_FIELDS: tuple[str, ...] = ("temp_c", "humidity", "wind_kph", "precip_mm")
+
+
+class CurrentWeatherRollupMixin:
+    """Columns shared by the hourly & daily current weather rollup tables.
+
+    Description:
+        Each row aggregates every observation for one location in one time bucket. Sums & counts are
+        stored instead of averages so a bucket can be updated incrementally when new rows arrive.
+    """
+
+    id: so.Mapped[annotated.INT_PK]
+
+    location_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey("weatherapi_location.id"), index=True
+    )
+    ## Unix epoch of the start of the bucket
+    bucket_start_epoch: so.Mapped[int] = so.mapped_column(sa.INTEGER)
+    sample_count: so.Mapped[int] = so.mapped_column(sa.INTEGER, default=0)
+
+    temp_c_min: so.Mapped[float] = so.mapped_column(sa.Float)
+    temp_c_max: so.Mapped[float] = so.mapped_column(sa.Float)
+    temp_c_sum: so.Mapped[float] = so.mapped_column(sa.Float)
+    humidity_min: so.Mapped[float] = so.mapped_column(sa.Float)
+    humidity_max: so.Mapped[float] = so.mapped_column(sa.Float)
+    humidity_sum: so.Mapped[float] = so.mapped_column(sa.Float)
+    wind_kph_min: so.Mapped[float] = so.mapped_column(sa.Float)
+    wind_kph_max: so.Mapped[float] = so.mapped_column(sa.Float)
+    wind_kph_sum: so.Mapped[float] = so.mapped_column(sa.Float)
+    precip_mm_min: so.Mapped[float] = so.mapped_column(sa.Float)
+    precip_mm_max: so.Mapped[float] = so.mapped_column(sa.Float)
+    precip_mm_sum: so.Mapped[float] = so.mapped_column(sa.Float)
+
+    def _avg(self, field: str) -> float | None:
+        total: float | None = getattr(self, f"{field}_sum")
+        if not self.sample_count or total is None:
+            return None
+
+        return total / self.sample_count
+
+    @property
+    def temp_c_avg(self) -> float | None:
+        return self._avg("temp_c")
+
+    @property
+    def humidity_avg(self) -> float | None:
+        return self._avg("humidity")
+
+    @property
+    def wind_kph_avg(self) -> float | None:
+        return self._avg("wind_kph")
+
+    @property
+    def precip_mm_avg(self) -> float | None:
+        return self._avg("precip_mm")
+
+    def merge(self, sample_count: int, aggregates: dict[str, float | None]) -> None:
+        """Fold a new batch of aggregates into this bucket.
+
+        Params:
+            sample_count (int): Number of observations in the new batch.
+            aggregates (dict[str, float | None]): `{field}_min`, `{field}_max` & `{field}_sum` values for each
+                field in `ROLLUP_FIELDS`.
+
+        """
+        for field in ROLLUP_FIELDS:
+            for agg, combine in (("min", min), ("max", max)):
+                key: str = f"{field}_{agg}"
+                current: float | None = getattr(self, key)
+                new: float | None = aggregates.get(key)
+
+                if new is None:
+                    continue
+                setattr(self, key, new if current is None else combine(current, new))
+
+            key: str = f"{field}_sum"
+            if aggregates.get(key) is not None:
+                setattr(self, key, (getattr(self, key) or 0) + aggregates[key])
+
+        self.sample_count = (self.sample_count or 0) + sample_count
+
+
+class CurrentWeatherHourlyRollupModel(CurrentWeatherRollupMixin, Base):
+    __tablename__ = "weatherapi_current_weather_rollup_hourly"
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "location_id", "bucket_start_epoch", name="_hourly_rollup_location_bucket_uc"
+        ),
+    )
+
+    ## Bucket width, in seconds
+    BUCKET_SECONDS: t.ClassVar[int] = 3600
+
+
+class CurrentWeatherDailyRollupModel(CurrentWeatherRollupMixin, Base):
+    __tablename__ = "weatherapi_current_weather_rollup_daily"
+    __table_args__ = (
+        sa.UniqueConstraint(
+            "location_id", "bucket_start_epoch", name="_daily_rollup_location_bucket_uc"
+        ),
+    )
+
+    ## Bucket width, in seconds. Buckets are UTC days.
+    BUCKET_SECONDS: t.ClassVar[int] = 86400
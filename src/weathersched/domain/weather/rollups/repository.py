@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db.base import BaseRepository
+
+from .models import (
+    CurrentWeatherDailyRollupModel,
+    CurrentWeatherHourlyRollupModel,
+    CurrentWeatherRollupMixin,
+)
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+## A rollup model class, hourly or daily
+R = t.TypeVar("R", bound=CurrentWeatherRollupMixin)
+
+
+class CurrentWeatherRollupRepository(BaseRepository[R]):
+    """Query & update a current weather rollup table.
+
+    Usage:
+        Use `CurrentWeatherHourlyRollupRepository` or `CurrentWeatherDailyRollupRepository`.
+    """
+
+    def get_by_bucket(self, location_id: int, bucket_start_epoch: int) -> R | None:
+        return (
+            self.session.query(self.model)
+            .filter(
+                self.model.location_id == location_id,
+                self.model.bucket_start_epoch == bucket_start_epoch,
+            )
+            .one_or_none()
+        )
+
+    def get_range(
+        self,
+        location_id: int,
+        start_epoch: int | None = None,
+        end_epoch: int | None = None,
+    ) -> list[R]:
+        """Return a location's buckets that start in `[start_epoch, end_epoch)`, oldest first."""
+        return self.get_range_for_locations(
+            location_ids=[location_id], start_epoch=start_epoch, end_epoch=end_epoch
+        )
+
+    def get_range_for_locations(
+        self,
+        location_ids: t.Sequence[int],
+        start_epoch: int | None = None,
+        end_epoch: int | None = None,
+    ) -> list[R]:
+        """Return buckets for several locations that start in `[start_epoch, end_epoch)`.
+
+        Results are ordered by location, then bucket start.
+        """
+        stmt = sa.select(self.model).where(self.model.location_id.in_(location_ids))
+
+        if start_epoch is not None:
+            stmt = stmt.where(self.model.bucket_start_epoch >= start_epoch)
+        if end_epoch is not None:
+            stmt = stmt.where(self.model.bucket_start_epoch < end_epoch)
+
+        stmt = stmt.order_by(self.model.location_id, self.model.bucket_start_epoch)
+
+        with self._timed("get_range"):
+            return list(self.session.execute(stmt).scalars().all())
+
+    def get_latest(self, location_id: int) -> R | None:
+        return (
+            self.session.query(self.model)
+            .filter(self.model.location_id == location_id)
+            .order_by(self.model.bucket_start_epoch.desc())
+            .first()
+        )
+
+    def merge_aggregates(self, rows: t.Sequence[t.Mapping[str, t.Any]]) -> int:
+        """Fold aggregated observations into existing buckets, creating buckets that do not exist yet.
+
+        Description:
+            Changes are added to the session but not committed, so the caller can commit them in the same
+            transaction as its watermark.
+
+        Params:
+            rows (Sequence[Mapping]): Rows with `location_id`, `bucket_start_epoch`, `sample_count` & the
+                `{field}_min/_max/_sum` aggregates for each rollup field.
+
+        Returns:
+            (int): Number of buckets touched.
+
+        """
+        if not rows:
+            return 0
+
+        keys: set[tuple[int, int]] = {
+            (row["location_id"], row["bucket_start_epoch"]) for row in rows
+        }
+        location_ids: set[int] = {location_id for location_id, _ in keys}
+        bucket_starts: set[int] = {bucket for _, bucket in keys}
+
+        ## Load every existing bucket the new rows fall into with a single query
+        existing: dict[tuple[int, int], R] = {
+            (bucket.location_id, bucket.bucket_start_epoch): bucket
+            for bucket in self.session.execute(
+                sa.select(self.model).where(
+                    self.model.location_id.in_(location_ids),
+                    self.model.bucket_start_epoch.in_(bucket_starts),
+                )
+            ).scalars()
+        }
+
+        for row in rows:
+            key: tuple[int, int] = (row["location_id"], row["bucket_start_epoch"])
+
+            bucket: R | None = existing.get(key)
+            if bucket is None:
+                bucket = self.model(
+                    location_id=key[0], bucket_start_epoch=key[1], sample_count=0
+                )
+                self.session.add(bucket)
+                existing[key] = bucket
+
+            bucket.merge(sample_count=row["sample_count"], aggregates=row)
+
+        return len(keys)
+
+
+class CurrentWeatherHourlyRollupRepository(
+    CurrentWeatherRollupRepository[CurrentWeatherHourlyRollupModel]
+):
+    def __init__(self, session: so.Session):
+        super().__init__(session, CurrentWeatherHourlyRollupModel)
+
+
+class CurrentWeatherDailyRollupRepository(
+    CurrentWeatherRollupRepository[CurrentWeatherDailyRollupModel]
+):
+    def __init__(self, session: so.Session):
+        super().__init__(session, CurrentWeatherDailyRollupModel)
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from pydantic import BaseModel, ConfigDict
+
+class CurrentWeatherRollupOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    location_id: int
+    bucket_start_epoch: int
+    sample_count: int
+
+    temp_c_min: float | None = None
+    temp_c_max: float | None = None
+    temp_c_avg: float | None = None
+    temp_c_sum: float | None = None
+    humidity_min: float | None = None
+    humidity_max: float | None = None
+    humidity_avg: float | None = None
+    humidity_sum: float | None = None
+    wind_kph_min: float | None = None
+    wind_kph_max: float | None = None
+    wind_kph_avg: float | None = None
+    wind_kph_sum: float | None = None
+    precip_mm_min: float | None = None
+    precip_mm_max: float | None = None
+    precip_mm_avg: float | None = None
+    precip_mm_sum: float | None = None
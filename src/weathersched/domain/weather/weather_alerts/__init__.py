@@ -1,4 +1,6 @@
 from __future__ import annotations
 
-from . import schemas
+from . import models, repository, schemas
+from .models import WeatherAlertModel, alert_hash, parse_alert_time
+from .repository import WeatherAlertRepository
 from .schemas import WeatherAlertIn, WeatherAlertOut, WeatherAlertsIn, WeatherAlertsOut
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import datetime as dt
+import hashlib
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db import Base, annotated
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+def alert_hash(headline: str | None, effective: str | None, areas: str | None) -> str:
+    """Return the dedup key of an alert, a SHA-256 hex digest of its headline, effective time & areas.
+
+    Description:
+        WeatherAPI returns every active alert in every forecast response, so the same alert is seen many
+        times. The hash identifies an alert across responses without comparing every column.
+    """
+    key: str = "\x1f".join(part or "" for part in (headline, effective, areas))
+
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def parse_alert_time(value: str | None) -> dt.datetime | None:
+    """Parse a WeatherAPI alert timestamp, i.e. '2024-11-01T18:00:00+00:00', to a UTC datetime."""
+    if not value:
+        return None
+
+    try:
+        parsed: dt.datetime = dt.datetime.fromisoformat(value)
+    except ValueError:
+        log.warning(f"Unable to parse alert timestamp: {value}")
+        return None
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=dt.timezone.utc)
+
+    return parsed.astimezone(dt.timezone.utc)
+
+
+class WeatherAlertModel(Base):
+    __tablename__ = "weatherapi_weather_alert"
+    __table_args__ = (
+        ## The same alert can cover several saved locations, so it is stored once per location
+        sa.UniqueConstraint("location_id", "alert_hash", name="_weather_alert_location_hash_uc"),
+        ## Active alert queries filter on a location & expiry
+        sa.Index("ix_weather_alert_location_expires", "location_id", "expires"),
+    )
+
+    id: so.Mapped[annotated.INT_PK]
+
+    location_id: so.Mapped[int] = so.mapped_column(
+        sa.ForeignKey("weatherapi_location.id")
+    )
+    alert_hash: so.Mapped[str] = so.mapped_column(sa.VARCHAR(64), index=True)
+
+    headline: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    msgtype: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    severity: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    urgency: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    areas: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    category: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    certainty: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    event: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    note: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    effective: so.Mapped[dt.datetime | None] = so.mapped_column(
+        sa.DateTime(timezone=True)
+    )
+    expires: so.Mapped[dt.datetime | None] = so.mapped_column(
+        sa.DateTime(timezone=True)
+    )
+    description: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+    instruction: so.Mapped[str | None] = so.mapped_column(sa.TEXT)
+
+    created_at: so.Mapped[dt.datetime] = so.mapped_column(
+        sa.DateTime(timezone=True),
+        default=dt.datetime.now,
+        nullable=False,
+    )
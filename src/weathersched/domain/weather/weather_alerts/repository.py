@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import datetime as dt
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core.db.base import BaseRepository
+
+from .models import WeatherAlertModel
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql, sqlite
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+class WeatherAlertRepository(BaseRepository[WeatherAlertModel]):
+    def __init__(self, session: so.Session):
+        super().__init__(session, WeatherAlertModel)
+
+    def get_by_hash(self, location_id: int, alert_hash: str) -> WeatherAlertModel | None:
+        return (
+            self.session.query(WeatherAlertModel)
+            .filter(
+                WeatherAlertModel.location_id == location_id,
+                WeatherAlertModel.alert_hash == alert_hash,
+            )
+            .one_or_none()
+        )
+
+    def get_active(
+        self, location_id: int, now: dt.datetime | None = None
+    ) -> list[WeatherAlertModel]:
+        """Return a location's alerts that have not expired, soonest expiry first."""
+        return self.get_active_for_locations(location_ids=[location_id], now=now)
+
+    def get_active_for_locations(
+        self, location_ids: t.Sequence[int], now: dt.datetime | None = None
+    ) -> list[WeatherAlertModel]:
+        """Return unexpired alerts for several locations, ordered by location, then expiry.
+
+        Description:
+            Served by the (location_id, expires) index. Alerts without an expiry are treated as active.
+        """
+        now = now or dt.datetime.now(tz=dt.timezone.utc)
+
+        stmt = (
+            sa.select(WeatherAlertModel)
+            .where(
+                WeatherAlertModel.location_id.in_(location_ids),
+                sa.or_(
+                    WeatherAlertModel.expires > now,
+                    WeatherAlertModel.expires.is_(None),
+                ),
+            )
+            .order_by(WeatherAlertModel.location_id, WeatherAlertModel.expires)
+        )
+
+        with self._timed("get_active"):
+            return list(self.session.execute(stmt).scalars().all())
+
+    def bulk_upsert(
+        self, alerts: t.Sequence[t.Mapping[str, t.Any]], commit: bool = True
+    ) -> int:
+        """Insert alerts in one statement, skipping alerts that are already stored.
+
+        Description:
+            On Postgres & SQLite this is a single `INSERT ... ON CONFLICT DO NOTHING` on the
+            (location_id, alert_hash) unique constraint. Other databases look up existing hashes first.
+
+        Params:
+            alerts (Sequence[Mapping]): Rows with `location_id`, `alert_hash` & the alert columns.
+            commit (bool): (default: True) Commit the inserts. When False, they are only flushed & the
+                caller commits or rolls back, i.e. to save alerts in the same transaction as their forecast.
+
+        Returns:
+            (int): Number of alerts inserted.
+
+        """
+        if not alerts:
+            return 0
+
+        ## Drop duplicates within the batch, the conflict clause only covers rows already in the table
+        rows: list[dict] = list(
+            {(row["location_id"], row["alert_hash"]): dict(row) for row in alerts}.values()
+        )
+
+        with self._timed("bulk_upsert"):
+            try:
+                match self.session.get_bind().dialect.name:
+                    case "postgresql":
+                        stmt = (
+                            postgresql.insert(WeatherAlertModel)
+                            .on_conflict_do_nothing(
+                                index_elements=["location_id", "alert_hash"]
+                            )
+                            .returning(WeatherAlertModel.id)
+                        )
+                        inserted: int = len(self.session.execute(stmt, rows).all())
+                    case "sqlite":
+                        stmt = (
+                            sqlite.insert(WeatherAlertModel)
+                            .on_conflict_do_nothing(
+                                index_elements=["location_id", "alert_hash"]
+                            )
+                            .returning(WeatherAlertModel.id)
+                        )
+                        inserted: int = len(self.session.execute(stmt, rows).all())
+                    case _:
+                        existing: set[tuple[int, str]] = set(
+                            self.session.execute(
+                                sa.select(
+                                    WeatherAlertModel.location_id,
+                                    WeatherAlertModel.alert_hash,
+                                ).where(
+                                    WeatherAlertModel.alert_hash.in_(
+                                        [row["alert_hash"] for row in rows]
+                                    )
+                                )
+                            ).tuples()
+                        )
+                        rows = [
+                            row
+                            for row in rows
+                            if (row["location_id"], row["alert_hash"]) not in existing
+                        ]
+                        if rows:
+                            self.session.execute(sa.insert(WeatherAlertModel), rows)
+                        inserted: int = len(rows)
+
+                if commit:
+                    self.session.commit()
+            except Exception as exc:
+                msg = f"({type(exc)}) Error upserting weather alerts. Details: {exc}"
+                log.error(msg)
+
+                if commit:
+                    self.session.rollback()
+
+                raise exc
+
+        return inserted
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from pydantic import BaseModel
+from .models import alert_hash, parse_alert_time
+
+from pydantic import BaseModel, ConfigDict, Field
 
 class WeatherAlertIn(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     headline: str | None = None
     msgtype: str | None = None
     severity: str | None = None
@@ -14,9 +18,22 @@ class WeatherAlertIn(BaseModel):
     note: str | None = None
     effective: str | None = None
     expires: str | None = None
-    description: str | None = None
+    ## WeatherAPI returns the description as "desc"
+    description: str | None = Field(default=None, alias="desc")
     instruction: str | None = None
 
+    def to_row(self, location_id: int) -> dict:
+        """Return the alert as a `WeatherAlertModel` row for `WeatherAlertRepository.bulk_upsert()`."""
+        return {
+            **self.model_dump(),
+            "location_id": location_id,
+            "alert_hash": alert_hash(
+                headline=self.headline, effective=self.effective, areas=self.areas
+            ),
+            "effective": parse_alert_time(self.effective),
+            "expires": parse_alert_time(self.expires),
+        }
+
 
 class WeatherAlertOut(WeatherAlertIn):
     id: int
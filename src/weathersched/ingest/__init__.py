@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from . import bulk, changes, drainer, persist, recent, settings, spool
+from .bulk import bulk_load_current_weather, current_weather_row, supports_copy
+from .changes import record_changes
+from .drainer import SpoolDrainer
+from .persist import (
+    current_weather_payload,
+    forecast_payload,
+    persist_current_weather,
+    persist_forecasts,
+    resolve_location_ids,
+)
+from .recent import RecentObservations, get_recent_buffer, write_recent
+from .settings import INGEST_SETTINGS
+from .spool import CURRENT_WEATHER, FORECAST, Spool, SpooledPayload, get_spool
@@ -0,0 +1,415 @@
+"""Bulk-load current weather observations, i.e. for history backfills.
+
+Description:
+    Saving through the ORM costs one object, one INSERT & one commit per observation. The bulk loader
+    streams observations in chunks instead, & skips observations that are already stored (by location &
+    `last_updated_epoch`), so a backfill can be re-run safely.
+
+    - PostgreSQL (psycopg2): each chunk is written to a temporary staging table with `COPY FROM STDIN`, &
+      merged into `weatherapi_current_weather`, `weatherapi_current_condition` & `weatherapi_air_quality`
+      with a single `INSERT ... SELECT` statement.
+    - Other databases (i.e. SQLite): each chunk is inserted with `executemany` in one transaction.
+
+Usage:
+    rows = (current_weather_row(weather, location_id=location.id) for weather in history)
+
+    with session_pool() as session:
+        loaded: int = bulk_load_current_weather(session, rows)
+
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+import logging
+import operator
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.core.db import Measurement
+from weathersched.domain.weather.current import (
+    CurrentWeatherAirQualityModel,
+    CurrentWeatherConditionModel,
+    CurrentWeatherIn,
+    CurrentWeatherModel,
+)
+
+from .settings import INGEST_SETTINGS
+
+import numpy as np
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+WEATHER_TABLE: sa.Table = CurrentWeatherModel.__table__
+CONDITION_TABLE: sa.Table = CurrentWeatherConditionModel.__table__
+AIR_QUALITY_TABLE: sa.Table = CurrentWeatherAirQualityModel.__table__
+
+## Columns filled from the row, by table. Primary & foreign keys are assigned while loading.
+WEATHER_COLUMNS: list[str] = [
+    column.name for column in WEATHER_TABLE.columns if column.name != "id"
+]
+CONDITION_COLUMNS: list[str] = [
+    column.name
+    for column in CONDITION_TABLE.columns
+    if column.name not in ("id", "weather_id")
+]
+AIR_QUALITY_COLUMNS: list[str] = [
+    column.name
+    for column in AIR_QUALITY_TABLE.columns
+    if column.name not in ("id", "weather_id")
+]
+
+## Marks NULL in the COPY stream, so empty strings stay empty strings
+COPY_NULL: str = r"\N"
+
+ROW_KEY: tuple[str, str] = ("location_id", "last_updated_epoch")
+
+
+def current_weather_row(weather: CurrentWeatherIn, location_id: int) -> dict:
+    """Return an observation as a row for `bulk_load_current_weather()`."""
+    return {**weather.model_dump(), "location_id": location_id}
+
+
+def supports_copy(bind: sa.Engine | sa.Connection) -> bool:
+    """Return `True` if `bind` can load with `COPY FROM STDIN` (PostgreSQL with psycopg2)."""
+    return bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2"
+
+
+def _chunks(rows: t.Iterable[dict], chunk_size: int) -> t.Iterator[list[dict]]:
+    iterator: t.Iterator[dict] = iter(rows)
+    while chunk := list(itertools.islice(iterator, chunk_size)):
+        yield chunk
+
+
+def _dedupe(chunk: list[dict]) -> list[dict]:
+    ## First row wins, matching the ON CONFLICT DO NOTHING behaviour of the COPY path
+    seen: dict[tuple, dict] = {}
+    for row in chunk:
+        seen.setdefault(tuple(row[key] for key in ROW_KEY), row)
+
+    return list(seen.values())
+
+
+def bulk_load_current_weather(
+    session: so.Session,
+    rows: t.Iterable[dict],
+    chunk_size: int = INGEST_SETTINGS.get("INGEST_BULK_CHUNK_SIZE", default=50_000),
+    use_copy: bool | None = None,
+) -> int:
+    """Load observations in chunks, committing each chunk. Stored observations are skipped.
+
+    Params:
+        session (Session): Database session.
+        rows (Iterable[dict]): Observations, see `current_weather_row()`. Each row holds the
+            `weatherapi_current_weather` columns, a `condition` dict & an optional `air_quality` dict.
+            Consumed lazily, so generators of any length can be loaded.
+        chunk_size (int): Rows per chunk & per transaction.
+        use_copy (bool | None): Load with `COPY FROM STDIN`. Defaults to `supports_copy()`.
+
+    Returns:
+        (int): Number of observations loaded.
+
+    """
+    bind: sa.Connection = session.connection()
+    if use_copy is None:
+        use_copy = supports_copy(bind)
+    load_chunk: t.Callable[[so.Session, list[dict]], int] = (
+        _copy_chunk if use_copy else _executemany_chunk
+    )
+
+    loaded: int = 0
+    seen: int = 0
+    start: float = time.perf_counter()
+
+    for chunk in _chunks(rows, chunk_size=int(chunk_size)):
+        seen += len(chunk)
+        try:
+            with metrics.time_stage("bulk_load", endpoint="current"):
+                loaded += load_chunk(session, _dedupe(chunk))
+            session.commit()
+        except Exception as exc:
+            msg = f"({type(exc)}) Error bulk loading chunk of [{len(chunk)}] current weather row(s). Details: {exc}"
+            log.error(msg)
+
+            session.rollback()
+
+            raise exc
+
+        log.debug(f"Bulk loaded [{loaded}/{seen}] current weather row(s)")
+
+    elapsed: float = time.perf_counter() - start
+    log.info(
+        f"Bulk loaded [{loaded}] of [{seen}] current weather row(s) in {elapsed:.2f}s ({'COPY' if use_copy else 'executemany'})"
+    )
+    metrics.inc_counter(
+        "weathersched_bulk_loaded_total",
+        amount=loaded,
+        description="Observations saved by the bulk loader",
+        method="copy" if use_copy else "executemany",
+    )
+
+    return loaded
+
+
+def _stored_keys(session: so.Session, chunk: list[dict]) -> dict[tuple[int, int], int]:
+    ## Range query instead of a tuple IN, which would exceed SQLite's bound parameter limit
+    epochs: list[int] = [row["last_updated_epoch"] for row in chunk]
+
+    return {
+        (location_id, epoch): weather_id
+        for weather_id, location_id, epoch in session.execute(
+            sa.select(
+                WEATHER_TABLE.c.id,
+                WEATHER_TABLE.c.location_id,
+                WEATHER_TABLE.c.last_updated_epoch,
+            ).where(
+                WEATHER_TABLE.c.location_id.in_({row["location_id"] for row in chunk}),
+                WEATHER_TABLE.c.last_updated_epoch.between(min(epochs), max(epochs)),
+            )
+        ).tuples()
+    }
+
+
+def _measurement_values(measurement: Measurement, values: list) -> list:
+    ## Vectorized equivalent of Measurement.process_bind_param(), the bulk of the per-value work
+    array: np.ndarray = np.array(values, dtype=np.float64)
+    if measurement.precision is not None:
+        array = np.round(array, measurement.precision)
+
+    return [
+        None if value is None else rounded
+        for value, rounded in zip(values, array.tolist())
+    ]
+
+
+def _process_columns(
+    columns: list[sa.Column],
+    rows: list[t.Sequence],
+    dialect: sa.Dialect,
+    measurements: bool = True,
+) -> list[list]:
+    """Run value lists (in `columns` order) through the column types' bind processors.
+
+    Description:
+        Values are processed a column at a time, as SQLAlchemy would for an INSERT, but without building a
+        parameter dict per row, which dominates the cost of large inserts. Returns one list per column.
+        With `measurements=False`, `Measurement` columns are left for the database to round.
+
+    """
+    processed: list[list] = []
+    for i, column in enumerate(columns):
+        values: list = [row[i] for row in rows]
+        processor: t.Callable | None = column.type.bind_processor(dialect)
+
+        if isinstance(column.type, Measurement):
+            processed.append(
+                _measurement_values(column.type, values) if measurements else values
+            )
+        elif processor:
+            processed.append([processor(value) for value in values])
+        else:
+            processed.append(values)
+
+    return processed
+
+
+def _executemany(
+    connection: sa.Connection, table: sa.Table, columns: list[str], rows: list[list]
+) -> None:
+    """Insert value lists (in `columns` order) with the driver's `executemany`."""
+    if not rows:
+        return
+
+    compiled: sa.Compiled = sa.insert(table).compile(
+        dialect=connection.dialect, column_keys=columns
+    )
+    processed: list[list] = _process_columns(
+        [table.c[column] for column in columns], rows, dialect=connection.dialect
+    )
+
+    if not compiled.positional:
+        params: list = [dict(zip(columns, values)) for values in zip(*processed)]
+    elif list(compiled.positiontup) == columns:
+        params: list = list(zip(*processed))
+    else:
+        params: list = list(
+            zip(*(processed[columns.index(name)] for name in compiled.positiontup))
+        )
+
+    connection.exec_driver_sql(str(compiled), params)
+
+
+def _executemany_chunk(session: so.Session, chunk: list[dict]) -> int:
+    connection: sa.Connection = session.connection()
+
+    stored: dict[tuple[int, int], int] = _stored_keys(session, chunk)
+    chunk = [row for row in chunk if tuple(row[key] for key in ROW_KEY) not in stored]
+    if not chunk:
+        return 0
+
+    _executemany(
+        connection,
+        WEATHER_TABLE,
+        WEATHER_COLUMNS,
+        [[row.get(column) for column in WEATHER_COLUMNS] for row in chunk],
+    )
+    ## The new rows are the only ones in the chunk's range that weren't stored before
+    weather_ids: dict[tuple[int, int], int] = _stored_keys(session, chunk)
+
+    conditions: list[list] = []
+    air_qualities: list[list] = []
+    for row in chunk:
+        weather_id: int = weather_ids[tuple(row[key] for key in ROW_KEY)]
+        if condition := row.get("condition"):
+            conditions.append(
+                [condition.get(column) for column in CONDITION_COLUMNS] + [weather_id]
+            )
+        if air_quality := row.get("air_quality"):
+            air_qualities.append(
+                [air_quality.get(column) for column in AIR_QUALITY_COLUMNS] + [weather_id]
+            )
+
+    _executemany(
+        connection, CONDITION_TABLE, CONDITION_COLUMNS + ["weather_id"], conditions
+    )
+    _executemany(
+        connection, AIR_QUALITY_TABLE, AIR_QUALITY_COLUMNS + ["weather_id"], air_qualities
+    )
+
+    return len(chunk)
+
+
+## COPY path. One wide staging table holds each row's weather, condition & air quality columns, so a
+#  single statement can insert the observations & their related rows with the new weather IDs.
+
+
+def _staging_columns() -> list[tuple[str, sa.Column]]:
+    return (
+        [(column, WEATHER_TABLE.c[column]) for column in WEATHER_COLUMNS]
+        + [(f"condition_{column}", CONDITION_TABLE.c[column]) for column in CONDITION_COLUMNS]
+        + [
+            (f"air_quality_{column}", AIR_QUALITY_TABLE.c[column])
+            for column in AIR_QUALITY_COLUMNS
+        ]
+    )
+
+
+def staging_table_ddl(dialect: sa.Dialect, name: str = "stage_current_weather") -> str:
+    """Return the `CREATE TEMPORARY TABLE` statement for a chunk's staging table."""
+    columns: list[str] = ["seq BIGINT NOT NULL", "has_air_quality BOOLEAN NOT NULL"] + [
+        f"{name_} {column.type.compile(dialect=dialect)}"
+        for name_, column in _staging_columns()
+    ]
+
+    return f"CREATE TEMPORARY TABLE {name} ({', '.join(columns)}) ON COMMIT DROP"
+
+
+def render_copy_csv(chunk: list[dict], dialect: sa.Dialect) -> io.StringIO:
+    """Render a chunk as CSV for `COPY ... FROM STDIN`, in staging table column order.
+
+    Description:
+        Values are written as they are. `Measurement` columns are rounded by the merge statement, & any
+        other custom column type is processed here, so values are stored as an INSERT would store them.
+
+    """
+    get_weather = operator.itemgetter(*WEATHER_COLUMNS)
+    get_condition = operator.itemgetter(*CONDITION_COLUMNS)
+    get_air_quality = operator.itemgetter(*AIR_QUALITY_COLUMNS)
+    no_air_quality: tuple = (None,) * len(AIR_QUALITY_COLUMNS)
+
+    rows: list[tuple] = [
+        get_weather(row)
+        + get_condition(row["condition"])
+        + (get_air_quality(row["air_quality"]) if row.get("air_quality") else no_air_quality)
+        for row in chunk
+    ]
+    has_air_quality: list[str] = ["t" if row.get("air_quality") else "f" for row in chunk]
+
+    ## COPY parses the text itself, so driver conversions (i.e. NUMERIC to float) are not needed, only
+    #  custom types' processing. Measurement is the only one on these tables, so rows are written untouched.
+    columns: list[sa.Column] = [column for _, column in _staging_columns()]
+    if any(
+        isinstance(column.type, sa.types.TypeDecorator)
+        and not isinstance(column.type, Measurement)
+        for column in columns
+    ):
+        processed: list[list] = _process_columns(
+            columns, rows, dialect=dialect, measurements=False
+        )
+        rows = list(zip(*processed))
+
+    buffer: io.StringIO = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        (seq, has_aq, *(COPY_NULL if value is None else value for value in values))
+        for seq, (has_aq, values) in enumerate(zip(has_air_quality, rows))
+    )
+
+    buffer.seek(0)
+
+    return buffer
+
+
+def _staged(name: str, column: sa.Column) -> str:
+    ## Measurement.process_bind_param(), in SQL
+    if isinstance(column.type, Measurement) and column.type.precision is not None:
+        return f"round(CAST(s.{name} AS NUMERIC), {int(column.type.precision)})"
+
+    return f"s.{name}"
+
+
+def merge_statement(name: str = "stage_current_weather") -> str:
+    """Return the statement that merges a staging table into the current weather tables."""
+    join: str = " AND ".join(f"i.{key} = s.{key}" for key in ROW_KEY)
+
+    weather_values: str = ", ".join(
+        _staged(column, WEATHER_TABLE.c[column]) for column in WEATHER_COLUMNS
+    )
+    condition_values: str = ", ".join(
+        _staged(f"condition_{column}", CONDITION_TABLE.c[column])
+        for column in CONDITION_COLUMNS
+    )
+    air_quality_values: str = ", ".join(
+        _staged(f"air_quality_{column}", AIR_QUALITY_TABLE.c[column])
+        for column in AIR_QUALITY_COLUMNS
+    )
+
+    return f"""
+        WITH inserted AS (
+            INSERT INTO {WEATHER_TABLE.name} ({", ".join(WEATHER_COLUMNS)})
+            SELECT {weather_values} FROM {name} s ORDER BY s.seq
+            ON CONFLICT ({", ".join(ROW_KEY)}) DO NOTHING
+            RETURNING id, {", ".join(ROW_KEY)}
+        ),
+        conditions AS (
+            INSERT INTO {CONDITION_TABLE.name} ({", ".join(CONDITION_COLUMNS)}, weather_id)
+            SELECT {condition_values}, i.id
+            FROM inserted i JOIN {name} s ON {join}
+        ),
+        air_qualities AS (
+            INSERT INTO {AIR_QUALITY_TABLE.name} ({", ".join(AIR_QUALITY_COLUMNS)}, weather_id)
+            SELECT {air_quality_values}, i.id
+            FROM inserted i JOIN {name} s ON {join}
+            WHERE s.has_air_quality
+        )
+        SELECT COUNT(*) FROM inserted
+    """
+
+
+def _copy_chunk(session: so.Session, chunk: list[dict]) -> int:
+    connection: sa.Connection = session.connection()
+    name: str = "stage_current_weather"
+
+    connection.exec_driver_sql(staging_table_ddl(connection.dialect, name=name))
+
+    buffer: io.StringIO = render_copy_csv(chunk, dialect=connection.dialect)
+    with connection.connection.dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {name} FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')", buffer
+        )
+
+    return connection.exec_driver_sql(merge_statement(name=name)).scalar_one()
@@ -0,0 +1,183 @@
+"""Record what changed between a location's observations in the observation change feed.
+
+Description:
+    Each location's feed entries carry a snapshot of its tracked fields. A new observation is compared to
+    the latest snapshot, not to the previous observation, so slow drifts (i.e. 0.3C per update) are recorded
+    once they add up to the threshold instead of never.
+
+    The first observation of a location is recorded with every tracked field, changing from `None`, so
+    consumers start from a full snapshot.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.domain.weather.current import CurrentWeatherIn
+from weathersched.domain.weather.observation_changes import (
+    ObservationChangeModel,
+    ObservationChangeRepository,
+)
+
+from .settings import INGEST_SETTINGS
+
+import sqlalchemy.orm as so
+
+## Trackable fields, & how to read each from an observation
+FIELDS: dict[str, t.Callable[[CurrentWeatherIn], float | int | None]] = {
+    "temp_c": lambda weather: weather.temp_c,
+    "feelslike_c": lambda weather: weather.feelslike_c,
+    "wind_kph": lambda weather: weather.wind_kph,
+    "gust_kph": lambda weather: weather.gust_kph,
+    "pressure_mb": lambda weather: weather.pressure_mb,
+    "precip_mm": lambda weather: weather.precip_mm,
+    "humidity": lambda weather: weather.humidity,
+    "cloud": lambda weather: weather.cloud,
+    "vis_km": lambda weather: weather.vis_km,
+    "uv": lambda weather: weather.uv,
+    "is_day": lambda weather: weather.is_day,
+    "condition_code": lambda weather: weather.condition.code,
+    "us_epa_index": lambda weather: (
+        weather.air_quality.us_epa_index if weather.air_quality else None
+    ),
+    "pm2_5": lambda weather: (
+        weather.air_quality.pm2_5 if weather.air_quality else None
+    ),
+}
+
+
+def get_thresholds() -> dict[str, float]:
+    """Return the configured `{field: threshold}`, from the `INGEST_CHANGE_THRESHOLDS` setting."""
+    thresholds: dict[str, float] = {
+        str(field).lower(): float(threshold)
+        for field, threshold in (
+            INGEST_SETTINGS.get("INGEST_CHANGE_THRESHOLDS", default={}) or {}
+        ).items()
+    }
+
+    unknown: set[str] = set(thresholds) - set(FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Unknown change feed field(s): {sorted(unknown)}. Must be one of {list(FIELDS)}"
+        )
+
+    return thresholds
+
+
+def observation_snapshot(
+    weather: CurrentWeatherIn, fields: t.Iterable[str]
+) -> dict[str, float | int | None]:
+    return {field: FIELDS[field](weather) for field in fields}
+
+
+def diff_snapshots(
+    baseline: t.Mapping[str, t.Any] | None,
+    snapshot: t.Mapping[str, t.Any],
+    thresholds: t.Mapping[str, float],
+) -> dict[str, dict[str, t.Any]]:
+    """Return `{field: {"from": old, "to": new}}` for each field that moved by at least its threshold.
+
+    Description:
+        A field appearing or disappearing (i.e. air quality missing from a response) counts as a change.
+    """
+    baseline = baseline or {}
+    changes: dict[str, dict[str, t.Any]] = {}
+
+    for field, threshold in thresholds.items():
+        old: t.Any = baseline.get(field)
+        new: t.Any = snapshot.get(field)
+
+        if old is None or new is None:
+            changed: bool = old is not new
+        elif threshold:
+            changed = abs(new - old) >= threshold
+        else:
+            changed = new != old
+
+        if changed:
+            changes[field] = {"from": old, "to": new}
+
+    return changes
+
+
+def record_changes(
+    session: so.Session,
+    observations: t.Iterable[tuple[int, CurrentWeatherIn]],
+    thresholds: t.Mapping[str, float] | None = None,
+) -> int:
+    """Append feed entries for saved observations. Entries are added to the session, not committed.
+
+    Params:
+        session (Session): Database session, the one the observations were saved in.
+        observations (Iterable[tuple[int, CurrentWeatherIn]]): `(location_id, observation)` pairs. Observations
+            older than a location's latest entry (i.e. arriving out of order) are skipped.
+        thresholds (Mapping[str, float] | None): `{field: threshold}`. Defaults to `get_thresholds()`.
+
+    Returns:
+        (int): Number of entries appended.
+
+    """
+    thresholds = dict(thresholds) if thresholds is not None else get_thresholds()
+    observations = sorted(
+        observations, key=lambda item: (item[0], item[1].last_updated_epoch)
+    )
+    if not observations or not thresholds:
+        return 0
+
+    repo: ObservationChangeRepository = ObservationChangeRepository(session)
+    latest: dict[int, ObservationChangeModel] = repo.latest_by_location(
+        location_id for location_id, _ in observations
+    )
+
+    ## Per location: (last recorded epoch, snapshot)
+    baselines: dict[int, tuple[int, dict]] = {
+        location_id: (entry.last_updated_epoch, dict(entry.snapshot))
+        for location_id, entry in latest.items()
+    }
+
+    entries: list[dict] = []
+    for location_id, weather in observations:
+        last_epoch, baseline = baselines.get(location_id, (None, None))
+        if last_epoch is not None and weather.last_updated_epoch <= last_epoch:
+            continue
+
+        changes: dict = diff_snapshots(
+            baseline, observation_snapshot(weather, thresholds), thresholds
+        )
+        if not changes:
+            continue
+
+        ## Unchanged fields keep their baseline value, so drift keeps adding up
+        snapshot: dict = {
+            **(baseline or {}),
+            **{field: change["to"] for field, change in changes.items()},
+        }
+        baselines[location_id] = (weather.last_updated_epoch, snapshot)
+        entries.append(
+            {
+                "location_id": location_id,
+                "last_updated_epoch": weather.last_updated_epoch,
+                "changes": changes,
+                "snapshot": snapshot,
+            }
+        )
+
+    repo.append(entries)
+
+    if entries:
+        metrics.inc_counter(
+            "weathersched_observation_changes_total",
+            amount=len(entries),
+            description="Entries appended to the observation change feed",
+        )
+
+    return len(entries)
+
+
+def change_feed_enabled() -> bool:
+    return bool(INGEST_SETTINGS.get("INGEST_CHANGE_FEED_ENABLED", default=True))
@@ -0,0 +1,212 @@
+"""Save spooled payloads to the database in batches, retrying through outages.
+
+Description:
+    A `SpoolDrainer` claims the oldest payloads of each kind, saves them with one transaction per batch
+    (`weathersched.ingest.persist`), & acknowledges them once committed. Saving is idempotent (observations
+    & forecasts already stored are skipped), so a crash between commit & acknowledge only causes the batch to
+    be checked again.
+
+    - When the database is unreachable, the batch is put back & draining backs off exponentially, without
+      counting against the payloads' attempts.
+    - When a batch fails for another reason, its payloads are saved one at a time, so one bad payload
+      cannot hold up the rest. Payloads that keep failing become dead letters (see `Spool.retry()`).
+
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+
+from . import persist
+from .settings import INGEST_SETTINGS
+from .spool import CURRENT_WEATHER, FORECAST, Spool, SpooledPayload, get_spool
+
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+## Persist function for each payload kind
+PERSISTERS: dict[str, t.Callable[[so.Session, t.Iterable[dict | None]], int]] = {
+    CURRENT_WEATHER: persist.persist_current_weather,
+    FORECAST: persist.persist_forecasts,
+}
+
+## Errors that mean the database is unreachable, not that the payloads are bad
+OUTAGE_ERRORS: tuple[type[Exception], ...] = (
+    sa_exc.OperationalError,
+    sa_exc.InterfaceError,
+    sa_exc.TimeoutError,
+)
+
+
+class SpoolDrainer:
+    """Drain a `Spool` into the database, in the foreground or on a background thread.
+
+    Usage:
+        drainer = SpoolDrainer(session_pool=get_session_pool())
+        drainer.start()
+        ...
+        drainer.stop()  # drains what is left, then stops
+
+    Params:
+        session_pool (sessionmaker): Database session factory.
+        spool (Spool | None): Spool to drain. Defaults to `get_spool()`.
+        batch_size (int): Payloads saved per transaction.
+        interval (float): Seconds to wait when the spool is empty.
+        max_backoff (float): Longest wait, in seconds, between attempts while the database is unreachable.
+    """
+
+    def __init__(
+        self,
+        session_pool: so.sessionmaker[so.Session],
+        spool: Spool | None = None,
+        batch_size: int = INGEST_SETTINGS.get("INGEST_SPOOL_BATCH_SIZE", default=500),
+        interval: float = INGEST_SETTINGS.get("INGEST_SPOOL_INTERVAL", default=1.0),
+        max_backoff: float = INGEST_SETTINGS.get(
+            "INGEST_SPOOL_MAX_BACKOFF", default=60
+        ),
+    ) -> None:
+        self.session_pool: so.sessionmaker[so.Session] = session_pool
+        self.spool: Spool = spool or get_spool()
+        self.batch_size: int = int(batch_size)
+        self.interval: float = float(interval)
+        self.max_backoff: float = float(max_backoff)
+
+        self.saved: int = 0
+        self.backoff: float = 0
+
+        self._stop: threading.Event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _persist(self, kind: str, records: list[SpooledPayload]) -> None:
+        with self.session_pool() as session:
+            PERSISTERS[kind](session, [record.payload for record in records])
+
+    def _drain_one_by_one(self, kind: str, records: list[SpooledPayload]) -> int:
+        saved: list[int] = []
+        for record in records:
+            try:
+                self._persist(kind, [record])
+            except OUTAGE_ERRORS:
+                raise
+            except Exception as exc:
+                self.spool.retry(
+                    [record.id], delay=self.interval, error=f"{type(exc).__name__}: {exc}"
+                )
+                continue
+
+            saved.append(record.id)
+
+        return self.spool.ack(saved)
+
+    def drain_batch(self, kind: str) -> int:
+        """Save one batch of `kind` payloads. Returns the number of payloads saved.
+
+        Raises:
+            OUTAGE_ERRORS: When the database is unreachable. The batch is put back in the spool first.
+
+        """
+        records: list[SpooledPayload] = self.spool.claim(kind, limit=self.batch_size)
+        if not records:
+            return 0
+
+        ids: list[int] = [record.id for record in records]
+
+        try:
+            with metrics.time_stage("drain", endpoint=kind):
+                self._persist(kind, records)
+        except OUTAGE_ERRORS as exc:
+            self.spool.retry(
+                ids, error=f"{type(exc).__name__}: {exc}", count_attempt=False
+            )
+
+            raise exc
+        except Exception as exc:
+            log.warning(
+                f"({type(exc)}) Error saving batch of [{len(records)}] spooled '{kind}' payload(s), retrying one at a time. Details: {exc}"
+            )
+            saved: int = self._drain_one_by_one(kind, records)
+        else:
+            saved: int = self.spool.ack(ids)
+
+        self.saved += saved
+        metrics.inc_counter(
+            "weathersched_spool_drained_total",
+            amount=saved,
+            description="Spooled payloads saved to the database",
+            kind=kind,
+        )
+
+        return saved
+
+    def drain(self) -> int:
+        """Save everything that is ready in the spool. Returns the number of payloads saved.
+
+        Description:
+            Stops early, without raising, when the database is unreachable, & sets `backoff` to the seconds to
+            wait before trying again.
+
+        """
+        saved: int = 0
+        for kind in PERSISTERS:
+            while True:
+                try:
+                    batch: int = self.drain_batch(kind)
+                except OUTAGE_ERRORS as exc:
+                    self.backoff = min(
+                        max(self.backoff * 2, self.interval), self.max_backoff
+                    )
+                    log.warning(
+                        f"({type(exc)}) Database unreachable, [{self.spool.depth()}] payload(s) stay spooled. Retrying in {self.backoff:.0f}s. Details: {exc}"
+                    )
+
+                    return saved
+
+                self.backoff = 0
+                saved += batch
+                if batch < self.batch_size:
+                    break
+
+        metrics.get_registry().gauge(
+            "weathersched_spool_depth",
+            description="Payloads waiting in the ingest spool",
+        ).set(self.spool.depth())
+
+        return saved
+
+    def run(self, stop: threading.Event | None = None) -> None:
+        """Drain until `stop` is set, then drain once more so nothing ready is left behind."""
+        stop = stop or self._stop
+
+        while not stop.is_set():
+            self.drain()
+            stop.wait(self.backoff or self.interval)
+
+        self.drain()
+
+    def start(self) -> threading.Thread:
+        """Run the drainer on a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self.run, name="spool-drainer", daemon=True
+        )
+        self._thread.start()
+
+        return self._thread
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop the background thread, after a last drain."""
+        self._stop.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
@@ -0,0 +1,277 @@
+"""Batch-persist compact fetch payloads in one transaction per batch.
+
+Description:
+    Payloads are plain `{"location": ..., "weather": ...}` dicts, as returned by the Celery fetch tasks
+    (`weathersched.tasks.collect`) & stored in the ingest spool (`weathersched.ingest.spool`). A whole batch
+    is handed to these functions, which resolve locations with one query, skip observations that are
+    already stored, & insert the rest with a single commit instead of one transaction per response.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.domain.location import LocationIn, LocationRepository
+from weathersched.domain.weather.current import (
+    CurrentWeatherAirQualityModel,
+    CurrentWeatherConditionModel,
+    CurrentWeatherIn,
+    CurrentWeatherModel,
+)
+from weathersched.domain.weather.forecast import ForecastJSONModel, forecast_hash
+from weathersched.domain.weather.weather_alerts import (
+    WeatherAlertRepository,
+    WeatherAlertsIn,
+)
+
+from . import changes, recent
+
+import sqlalchemy as sa
+import sqlalchemy.exc as sa_exc
+import sqlalchemy.orm as so
+
+def current_weather_payload(location: LocationIn, weather: CurrentWeatherIn) -> dict:
+    """Return a compact, JSON-serializable payload for `persist_current_weather()`."""
+    return {
+        "location": location.model_dump(mode="json"),
+        "weather": weather.model_dump(mode="json", by_alias=True, exclude_none=True),
+    }
+
+
+def forecast_payload(
+    location: LocationIn, forecast_json: dict, alerts: WeatherAlertsIn | None = None
+) -> dict:
+    """Return a compact, JSON-serializable payload for `persist_forecasts()`."""
+    return {
+        "location": location.model_dump(mode="json"),
+        "forecast_json": forecast_json,
+        "alerts": alerts.model_dump(mode="json", by_alias=True) if alerts else None,
+    }
+
+
+def resolve_location_ids(
+    session: so.Session, locations: t.Iterable[LocationIn]
+) -> dict[tuple[str, str], int]:
+    """Return the ID of each `(name, country)`, creating missing locations. Changes are flushed, not committed."""
+    return LocationRepository(session).bulk_get_or_create(locations, commit=False)
+
+
+def _current_weather_model(weather: CurrentWeatherIn, location_id: int) -> CurrentWeatherModel:
+    model = CurrentWeatherModel(
+        **weather.model_dump(exclude=["air_quality", "condition"]),
+        location_id=location_id,
+    )
+    model.condition = CurrentWeatherConditionModel(**weather.condition.model_dump())
+    if weather.air_quality is not None:
+        model.air_quality = CurrentWeatherAirQualityModel(
+            **weather.air_quality.model_dump()
+        )
+
+    return model
+
+
+def persist_current_weather(session: so.Session, payloads: t.Iterable[dict | None]) -> int:
+    """Save current weather payloads, skipping observations that are already stored.
+
+    Params:
+        session (Session): Database session.
+        payloads (Iterable[dict | None]): `{"location": ..., "weather": ...}` payloads, as returned by the
+            `fetch_current` task. `None` (failed fetches) are skipped.
+
+    Returns:
+        (int): Number of observations saved.
+
+    """
+    parsed: list[tuple[LocationIn, CurrentWeatherIn]] = [
+        (
+            LocationIn.model_validate(payload["location"]),
+            CurrentWeatherIn.model_validate(payload["weather"]),
+        )
+        for payload in payloads
+        if payload
+    ]
+    if not parsed:
+        return 0
+
+    with metrics.time_stage("persist", endpoint="current_batch"):
+        try:
+            location_ids = resolve_location_ids(session, [loc for loc, _ in parsed])
+
+            ## One row per (location, last_updated_epoch), in the batch & in the database
+            rows: dict[tuple[int, int], CurrentWeatherIn] = {}
+            for location, weather in parsed:
+                location_id: int = location_ids[(location.name, location.country)]
+                rows.setdefault((location_id, weather.last_updated_epoch), weather)
+
+            existing: set[tuple[int, int]] = set(
+                session.execute(
+                    sa.select(
+                        CurrentWeatherModel.location_id,
+                        CurrentWeatherModel.last_updated_epoch,
+                    ).where(
+                        sa.tuple_(
+                            CurrentWeatherModel.location_id,
+                            CurrentWeatherModel.last_updated_epoch,
+                        ).in_(list(rows))
+                    )
+                ).tuples()
+            )
+            new_rows: dict[tuple[int, int], CurrentWeatherIn] = {
+                key: weather for key, weather in rows.items() if key not in existing
+            }
+
+            session.add_all(
+                _current_weather_model(weather, location_id=location_id)
+                for (location_id, _), weather in new_rows.items()
+            )
+            if changes.change_feed_enabled():
+                changes.record_changes(
+                    session,
+                    [
+                        (location_id, weather)
+                        for (location_id, _), weather in new_rows.items()
+                    ],
+                )
+            session.commit()
+        except sa_exc.IntegrityError as exc:
+            ## A concurrent batch saved some of these rows first, fall back to row by row
+            log.warning(
+                f"({type(exc)}) Conflict saving current weather batch, retrying row by row. Details: {exc}"
+            )
+            session.rollback()
+
+            return _persist_current_rows(session, parsed)
+        except Exception as exc:
+            msg = f"({type(exc)}) Error saving current weather batch. Details: {exc}"
+            log.error(msg)
+
+            session.rollback()
+
+            raise exc
+
+    recent.write_recent(
+        (location_id, weather) for (location_id, _), weather in new_rows.items()
+    )
+
+    log.info(
+        f"Saved [{len(new_rows)}] current weather observation(s) from [{len(parsed)}] payload(s)."
+    )
+
+    return len(new_rows)
+
+
+def _persist_current_rows(
+    session: so.Session, parsed: list[tuple[LocationIn, CurrentWeatherIn]]
+) -> int:
+    """Save observations one savepoint at a time, skipping rows that conflict."""
+    location_ids = resolve_location_ids(session, [loc for loc, _ in parsed])
+    session.commit()
+
+    saved: list[tuple[int, CurrentWeatherIn]] = []
+    for location, weather in parsed:
+        location_id: int = location_ids[(location.name, location.country)]
+        try:
+            with session.begin_nested():
+                session.add(_current_weather_model(weather, location_id=location_id))
+            saved.append((location_id, weather))
+        except sa_exc.IntegrityError:
+            log.debug(
+                f"Skipping stored observation for '{location.name}' at [{weather.last_updated_epoch}]."
+            )
+
+    if changes.change_feed_enabled():
+        changes.record_changes(session, saved)
+    session.commit()
+
+    recent.write_recent(saved)
+
+    return len(saved)
+
+
+def persist_forecasts(session: so.Session, payloads: t.Iterable[dict | None]) -> int:
+    """Save forecast payloads & their alerts in one transaction, skipping forecasts that are already stored.
+
+    Description:
+        Forecasts are matched on `forecast_hash`, so a batch that is saved again (i.e. a spooled batch replayed
+        after a crash between commit & acknowledge) does not duplicate rows.
+
+    Params:
+        session (Session): Database session.
+        payloads (Iterable[dict | None]): `{"location": ..., "forecast_json": ..., "alerts": ...}` payloads, as
+            returned by the `fetch_forecast` task. `None` (failed fetches) are skipped.
+
+    Returns:
+        (int): Number of forecasts saved.
+
+    """
+    payloads = [payload for payload in payloads if payload]
+    if not payloads:
+        return 0
+
+    with metrics.time_stage("persist", endpoint="forecast_batch"):
+        try:
+            locations: list[LocationIn] = [
+                LocationIn.model_validate(payload["location"]) for payload in payloads
+            ]
+            location_ids = resolve_location_ids(session, locations)
+
+            ## One row per forecast_hash, in the batch & in the database
+            forecasts: dict[str, tuple[dict, int]] = {}
+            for location, payload in zip(locations, payloads):
+                forecasts.setdefault(
+                    forecast_hash(payload["forecast_json"]),
+                    (
+                        payload["forecast_json"],
+                        location_ids[(location.name, location.country)],
+                    ),
+                )
+
+            existing: set[str] = set(
+                session.scalars(
+                    sa.select(ForecastJSONModel.forecast_hash).where(
+                        ForecastJSONModel.forecast_hash.in_(list(forecasts))
+                    )
+                )
+            )
+            new_forecasts: list[tuple[dict, int]] = [
+                forecast for key, forecast in forecasts.items() if key not in existing
+            ]
+
+            session.add_all(
+                ForecastJSONModel(forecast_json=forecast_json, location_id=location_id)
+                for forecast_json, location_id in new_forecasts
+            )
+
+            alert_rows: list[dict] = []
+            for location, payload in zip(locations, payloads):
+                if not payload.get("alerts"):
+                    continue
+
+                alerts: WeatherAlertsIn = WeatherAlertsIn.model_validate(payload["alerts"])
+                location_id: int = location_ids[(location.name, location.country)]
+                alert_rows.extend(
+                    alert.to_row(location_id=location_id) for alert in alerts.alert
+                )
+
+            if alert_rows:
+                WeatherAlertRepository(session).bulk_upsert(alert_rows, commit=False)
+
+            session.commit()
+        except Exception as exc:
+            msg = f"({type(exc)}) Error saving weather forecast batch. Details: {exc}"
+            log.error(msg)
+
+            session.rollback()
+
+            raise exc
+
+    log.info(
+        f"Saved [{len(new_forecasts)}] weather forecast(s) from [{len(payloads)}] payload(s)."
+    )
+
+    return len(new_forecasts)
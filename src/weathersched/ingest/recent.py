@@ -0,0 +1,368 @@
+"""Memory-mapped ring buffer of each location's recent observations, shared by processes on the host.
+
+Description:
+    The file is a small header followed by a `(max_locations, slots)` array of fixed-width records
+    (`RECORD_DTYPE`, a C struct layout), indexed by location ID. An observation's slot is its
+    `last_updated_epoch` bucketed by `resolution` seconds, modulo `slots`, so the buffer keeps the last
+    `slots * resolution` seconds per location without a head pointer to coordinate, & writing the same
+    observation twice is a no-op.
+
+    Readers map the same file read-only & see writes as they happen, without touching the database or
+    copying more than one location's row. Each record carries a sequence number, odd while it is being
+    written, so readers can detect & retry torn reads.
+
+    Writers in one process are serialized. Writers in separate processes only contend when they save the
+    same location's observation for the same bucket at the same moment, & the collector's partitioning
+    already gives each location to a single node.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+import tempfile
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import metrics
+from weathersched.domain.weather.current import CurrentWeatherIn
+
+from .settings import INGEST_SETTINGS
+
+import numpy as np
+
+MAGIC: bytes = b"WSRECENT"
+VERSION: int = 1
+
+## Integer fields store -1 when missing, float fields NaN
+RECORD_DTYPE: np.dtype = np.dtype(
+    [
+        ("seq", "<u4"),
+        ("last_updated_epoch", "<i8"),
+        ("temp_c", "<f4"),
+        ("feelslike_c", "<f4"),
+        ("wind_kph", "<f4"),
+        ("gust_kph", "<f4"),
+        ("pressure_mb", "<f4"),
+        ("precip_mm", "<f4"),
+        ("vis_km", "<f4"),
+        ("uv", "<f4"),
+        ("pm2_5", "<f4"),
+        ("wind_degree", "<i2"),
+        ("humidity", "<i2"),
+        ("cloud", "<i2"),
+        ("condition_code", "<i2"),
+        ("is_day", "i1"),
+        ("us_epa_index", "i1"),
+    ],
+    align=True,
+)
+
+## Fields read as-is from `CurrentWeatherIn`
+COPIED_FIELDS: list[str] = [
+    "temp_c",
+    "feelslike_c",
+    "wind_kph",
+    "gust_kph",
+    "pressure_mb",
+    "precip_mm",
+    "vis_km",
+    "uv",
+    "wind_degree",
+    "humidity",
+    "cloud",
+    "is_day",
+]
+
+HEADER_DTYPE: np.dtype = np.dtype(
+    [
+        ("magic", "S8"),
+        ("version", "<u4"),
+        ("record_size", "<u4"),
+        ("max_locations", "<u4"),
+        ("slots", "<u4"),
+        ("resolution", "<u4"),
+    ]
+)
+## Records start on a cache line
+HEADER_SIZE: int = 64
+
+## Torn reads are retried this many times before the affected records are left out
+READ_RETRIES: int = 3
+
+
+def observation_record(weather: CurrentWeatherIn) -> np.void:
+    """Return an observation as a `RECORD_DTYPE` record, with a `seq` of 0."""
+    air_quality = weather.air_quality
+    record: np.ndarray = np.zeros((), dtype=RECORD_DTYPE)
+
+    for field in COPIED_FIELDS:
+        record[field] = getattr(weather, field)
+
+    record["last_updated_epoch"] = weather.last_updated_epoch
+    record["condition_code"] = weather.condition.code
+    record["pm2_5"] = air_quality.pm2_5 if air_quality else np.nan
+    record["us_epa_index"] = (
+        air_quality.us_epa_index
+        if air_quality and air_quality.us_epa_index is not None
+        else -1
+    )
+
+    return record[()]
+
+
+class RecentObservations:
+    """Fixed-size, memory-mapped store of each location's observations over the last `hours`.
+
+    Usage:
+        ## Writer (ingest)
+        with RecentObservations(".spool/recent.bin") as recent:
+            recent.write(location_id, weather)
+
+        ## Reader, in any process on the host
+        with RecentObservations(".spool/recent.bin", readonly=True) as recent:
+            rows = recent.recent(location_id, hours=6)
+            rows["temp_c"], rows["last_updated_epoch"]
+
+    Params:
+        path (str | Path): Path to the buffer file. Created (sparse) by the first writer.
+        max_locations (int): Location IDs below this are stored. Ignored by readers, which use the file's layout.
+        hours (int): Hours of observations kept per location.
+        resolution (int): Seconds per slot. Observations in the same bucket keep the newest.
+        readonly (bool): Map an existing file read-only.
+        clock (Callable[[], float]): Returns the current epoch, `time.time` by default.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = INGEST_SETTINGS.get(
+            "INGEST_RECENT_PATH", default=".spool/recent.bin"
+        ),
+        max_locations: int = INGEST_SETTINGS.get(
+            "INGEST_RECENT_MAX_LOCATIONS", default=4096
+        ),
+        hours: int = INGEST_SETTINGS.get("INGEST_RECENT_HOURS", default=24),
+        resolution: int = INGEST_SETTINGS.get("INGEST_RECENT_RESOLUTION", default=900),
+        readonly: bool = False,
+        clock: t.Callable[[], float] = time.time,
+    ) -> None:
+        self.path: Path = Path(path)
+        self.readonly: bool = readonly
+        self.clock: t.Callable[[], float] = clock
+
+        if not readonly and not self.path.exists():
+            slots: int = max(int(hours) * 3600 // int(resolution), 1)
+            self._create(int(max_locations), slots, int(resolution))
+
+        header: np.void = np.fromfile(self.path, dtype=HEADER_DTYPE, count=1)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"'{self.path}' is not a recent observations buffer.")
+        if header["record_size"] != RECORD_DTYPE.itemsize:
+            raise ValueError(
+                f"'{self.path}' has [{header['record_size']}] byte records, expected [{RECORD_DTYPE.itemsize}]. Delete it to recreate it."
+            )
+
+        self.max_locations: int = int(header["max_locations"])
+        self.slots: int = int(header["slots"])
+        self.resolution: int = int(header["resolution"])
+
+        self._records: np.memmap = np.memmap(
+            self.path,
+            dtype=RECORD_DTYPE,
+            mode="r" if readonly else "r+",
+            offset=HEADER_SIZE,
+            shape=(self.max_locations, self.slots),
+        )
+        self._lock: threading.Lock = threading.Lock()
+        self._skipped: set[int] = set()
+
+    def _create(self, max_locations: int, slots: int, resolution: int) -> None:
+        """Write the header & size the file in a temporary file, then link it into place.
+
+        Description:
+            Linking fails if another writer created the file first, in which case theirs is used, so a
+            process never maps a file that is replaced underneath it.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        header: np.ndarray = np.zeros(1, dtype=HEADER_DTYPE)
+        header[0] = (MAGIC, VERSION, RECORD_DTYPE.itemsize, max_locations, slots, resolution)
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+                ## Sparse, blocks are allocated as locations are written
+                f.truncate(HEADER_SIZE + max_locations * slots * RECORD_DTYPE.itemsize)
+
+            os.link(tmp_path, self.path)
+            log.info(
+                f"Created recent observations buffer '{self.path}' ([{max_locations}] locations x [{slots}] slots)."
+            )
+        except FileExistsError:
+            log.debug(f"Recent observations buffer '{self.path}' was created by another process.")
+        finally:
+            os.unlink(tmp_path)
+
+    def __enter__(self) -> "RecentObservations":
+        return self
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if not self.readonly:
+            self._records.flush()
+        ## Release the mapping
+        self._records = None
+
+    def slot(self, last_updated_epoch: int) -> int:
+        return (int(last_updated_epoch) // self.resolution) % self.slots
+
+    def write(self, location_id: int, weather: CurrentWeatherIn) -> bool:
+        """Store an observation. Returns `False` if it was skipped.
+
+        Description:
+            Observations are skipped when the location ID does not fit the buffer, or when their slot already
+            holds the same or a newer observation.
+        """
+        if self.readonly:
+            raise PermissionError(f"'{self.path}' is open read-only.")
+
+        if not 0 <= location_id < self.max_locations:
+            if location_id not in self._skipped:
+                self._skipped.add(location_id)
+                log.warning(
+                    f"Location ID [{location_id}] does not fit recent observations buffer '{self.path}' ([{self.max_locations}] locations). Raise INGEST_RECENT_MAX_LOCATIONS & delete the file to recreate it."
+                )
+            metrics.inc_counter(
+                "weathersched_recent_skipped_total",
+                description="Observations not written to the recent observations buffer",
+                reason="location_id",
+            )
+            return False
+
+        record: np.void = observation_record(weather)
+        slot: int = self.slot(weather.last_updated_epoch)
+
+        with self._lock:
+            stored: np.void = self._records[location_id, slot]
+            if stored["last_updated_epoch"] >= weather.last_updated_epoch:
+                return False
+
+            ## Seqlock: odd while the record is written, so readers retry instead of reading a torn record
+            seq: int = int(stored["seq"])
+            self._records["seq"][location_id, slot] = seq + 1
+            record["seq"] = seq + 1
+            self._records[location_id, slot] = record
+            self._records["seq"][location_id, slot] = seq + 2
+
+        return True
+
+    def write_many(self, observations: t.Iterable[tuple[int, CurrentWeatherIn]]) -> int:
+        """Store `(location_id, observation)` pairs. Returns the number written."""
+        return sum(self.write(location_id, weather) for location_id, weather in observations)
+
+    def view(self, location_id: int) -> np.ndarray:
+        """Return a location's slots as a zero-copy view of the mapping, in slot (not time) order.
+
+        Description:
+            Empty slots have a `last_updated_epoch` of 0. Records may change (or be mid-write) while the view is
+            read, use `recent()` for a consistent copy.
+        """
+        return self._records[location_id]
+
+    def recent(self, location_id: int, hours: float | None = None) -> np.ndarray:
+        """Return a location's observations from the last `hours`, oldest first.
+
+        Description:
+            `hours` defaults to the buffer's window (`slots * resolution`). A slot is only overwritten when a
+            newer observation lands in it, so a location that stopped reporting keeps records older than the
+            window, & those are left out.
+
+        Returns:
+            (np.ndarray): A `RECORD_DTYPE` array, copied out of the mapping.
+
+        """
+        if not 0 <= location_id < self.max_locations:
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        row: np.ndarray = self._records[location_id]
+        for _ in range(READ_RETRIES):
+            seq_before: np.ndarray = row["seq"].copy()
+            records: np.ndarray = row.copy()
+            stable: np.ndarray = (seq_before == row["seq"]) & (seq_before % 2 == 0)
+            if stable.all():
+                break
+        records = records[stable]
+
+        window: float = hours * 3600 if hours is not None else self.slots * self.resolution
+        keep: np.ndarray = (records["last_updated_epoch"] > 0) & (
+            records["last_updated_epoch"] >= self.clock() - window
+        )
+        records = records[keep]
+
+        return records[np.argsort(records["last_updated_epoch"], kind="stable")]
+
+    def latest(self, location_id: int) -> np.void | None:
+        """Return a location's newest observation within the buffer's window, or `None`."""
+        records: np.ndarray = self.recent(location_id)
+
+        return records[-1] if len(records) else None
+
+
+_BUFFERS: dict[Path, RecentObservations] = {}
+_BUFFERS_LOCK: threading.Lock = threading.Lock()
+
+
+def recent_buffer_enabled() -> bool:
+    return bool(INGEST_SETTINGS.get("INGEST_RECENT_ENABLED", default=False))
+
+
+def get_recent_buffer(
+    path: str | Path = INGEST_SETTINGS.get(
+        "INGEST_RECENT_PATH", default=".spool/recent.bin"
+    ),
+) -> RecentObservations:
+    """Return the process-wide writable `RecentObservations` for `path`, opening it on first use."""
+    key: Path = Path(path).resolve()
+
+    with _BUFFERS_LOCK:
+        if key not in _BUFFERS:
+            _BUFFERS[key] = RecentObservations(path=key)
+
+        return _BUFFERS[key]
+
+
+def write_recent(observations: t.Iterable[tuple[int, CurrentWeatherIn]]) -> int:
+    """Write saved observations to the recent observations buffer, when it is enabled.
+
+    Description:
+        The buffer is a cache of the database, so a failed write is logged & counted, not raised, & never
+        fails the save.
+
+    Returns:
+        (int): Number of observations written.
+
+    """
+    if not recent_buffer_enabled():
+        return 0
+
+    try:
+        return get_recent_buffer().write_many(observations)
+    except Exception as exc:
+        log.warning(
+            f"({type(exc)}) Error writing recent observations buffer. Details: {exc}"
+        )
+        metrics.inc_counter(
+            "weathersched_recent_skipped_total",
+            description="Observations not written to the recent observations buffer",
+            reason="error",
+        )
+
+        return 0
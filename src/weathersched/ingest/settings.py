@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+from dynaconf import Dynaconf
+
+## Ingest settings loaded with dynaconf
+INGEST_SETTINGS: Dynaconf = Dynaconf(
+    environments=True,
+    env="ingest",
+    envvar_prefix="INGEST",
+    settings_files=["ingest/settings.toml", "ingest/.secrets.toml"],
+)
@@ -0,0 +1,293 @@
+"""Durable local queue for fetched payloads, in a SQLite database.
+
+Description:
+    Appending to the spool is a local, fsync'd write, so collection keeps its pace when the main database
+    is slow or down for maintenance. Payloads stay in the spool until a `SpoolDrainer` has saved them &
+    acknowledged them, so a crash or outage between fetch & save loses nothing.
+
+    The spool file is opened in WAL mode, so collector threads (or processes) can append while a drainer
+    reads.
+
+"""
+
+from __future__ import annotations
+
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from .settings import INGEST_SETTINGS
+
+## Payload kinds, & the persist function the drainer saves them with
+CURRENT_WEATHER: str = "current"
+FORECAST: str = "forecast"
+
+_SCHEMA: list[str] = [
+    """CREATE TABLE IF NOT EXISTS spool (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        kind TEXT NOT NULL,
+        payload TEXT NOT NULL,
+        created_epoch INTEGER NOT NULL,
+        available_epoch INTEGER NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        dead INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_spool_ready ON spool (dead, kind, available_epoch, id)",
+]
+
+
+@dataclass(frozen=True)
+class SpooledPayload:
+    id: int
+    kind: str
+    payload: dict
+    created_epoch: int
+    attempts: int
+
+
+class Spool(AbstractContextManager):
+    """Append-only queue of JSON payloads, drained in insertion order.
+
+    Usage:
+        with Spool(".spool/ingest.sqlite3") as spool:
+            spool.append("current", {"location": ..., "weather": ...})
+
+            records = spool.claim("current", limit=500)
+            ## ... save records ...
+            spool.ack([record.id for record in records])
+
+    Params:
+        path (str | Path): Path to the spool database. Parent directories are created.
+        max_attempts (int): Failed saves before a payload becomes a dead letter.
+        clock (Callable[[], float]): Returns the current epoch, `time.time` by default.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = INGEST_SETTINGS.get(
+            "INGEST_SPOOL_PATH", default=".spool/ingest.sqlite3"
+        ),
+        max_attempts: int = INGEST_SETTINGS.get("INGEST_SPOOL_MAX_ATTEMPTS", default=5),
+        clock: t.Callable[[], float] = time.time,
+    ) -> None:
+        self.path: Path = Path(path)
+        self.max_attempts: int = int(max_attempts)
+        self.clock: t.Callable[[], float] = clock
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        ## Autocommit mode, transactions are opened explicitly
+        self._conn: sqlite3.Connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._lock: threading.Lock = threading.Lock()
+
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            ## Every append is on disk before it returns
+            self._conn.execute("PRAGMA synchronous=FULL")
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+
+    def __exit__(self, exc_type, exc_val, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.depth()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def append(self, kind: str, payload: dict) -> int:
+        """Spool a payload. Returns its spool ID."""
+        return self.append_many(kind, [payload])[0]
+
+    def append_many(self, kind: str, payloads: t.Iterable[dict]) -> list[int]:
+        """Spool payloads in one transaction. Returns their spool IDs."""
+        now: int = int(self.clock())
+        ids: list[int] = []
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for payload in payloads:
+                    cursor: sqlite3.Cursor = self._conn.execute(
+                        "INSERT INTO spool (kind, payload, created_epoch, available_epoch) VALUES (?, ?, ?, ?)",
+                        (kind, json.dumps(payload, separators=(",", ":")), now, now),
+                    )
+                    ids.append(cursor.lastrowid)
+                self._conn.execute("COMMIT")
+            except Exception as exc:
+                msg = f"({type(exc)}) Error appending to ingest spool '{self.path}'. Details: {exc}"
+                log.error(msg)
+
+                self._conn.execute("ROLLBACK")
+
+                raise exc
+
+        return ids
+
+    def claim(self, kind: str, limit: int = 500) -> list[SpooledPayload]:
+        """Return up to `limit` of the oldest payloads of `kind` that are ready to be saved.
+
+        Description:
+            Payloads are not removed until `ack()`ed, so one drainer per spool should claim at a time.
+
+        """
+        with self._lock:
+            rows: list[tuple] = self._conn.execute(
+                "SELECT id, kind, payload, created_epoch, attempts FROM spool "
+                "WHERE dead = 0 AND kind = ? AND available_epoch <= ? ORDER BY id LIMIT ?",
+                (kind, int(self.clock()), int(limit)),
+            ).fetchall()
+
+        return [
+            SpooledPayload(
+                id=row[0],
+                kind=row[1],
+                payload=json.loads(row[2]),
+                created_epoch=row[3],
+                attempts=row[4],
+            )
+            for row in rows
+        ]
+
+    def ack(self, ids: t.Iterable[int]) -> int:
+        """Remove saved payloads from the spool."""
+        ids = [(spool_id,) for spool_id in ids]
+
+        with self._lock:
+            self._conn.executemany("DELETE FROM spool WHERE id = ?", ids)
+
+        return len(ids)
+
+    def retry(
+        self,
+        ids: t.Iterable[int],
+        delay: float = 0,
+        error: str | None = None,
+        count_attempt: bool = True,
+    ) -> int:
+        """Make payloads available again after `delay` seconds.
+
+        Params:
+            ids (Iterable[int]): Spool IDs.
+            delay (float): Seconds before the payloads can be claimed again.
+            error (str | None): Error to record on the payloads.
+            count_attempt (bool): Count this as a failed attempt. Payloads that reach `max_attempts` become
+                dead letters & are no longer claimed. Pass `False` for outages, i.e. the database being down.
+
+        Returns:
+            (int): Number of payloads that became dead letters.
+
+        """
+        available_epoch: int = int(self.clock() + delay)
+        increment: int = 1 if count_attempt else 0
+
+        dead: int = 0
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for spool_id in ids:
+                    ## SET expressions see the row's values from before the update
+                    cursor: sqlite3.Cursor = self._conn.execute(
+                        "UPDATE spool SET available_epoch = ?, attempts = attempts + ?, last_error = ?, "
+                        "dead = (attempts + ? >= ?) WHERE id = ? RETURNING dead",
+                        (
+                            available_epoch,
+                            increment,
+                            error,
+                            increment,
+                            self.max_attempts,
+                            spool_id,
+                        ),
+                    )
+                    dead += sum(row[0] for row in cursor.fetchall())
+                self._conn.execute("COMMIT")
+            except Exception as exc:
+                msg = f"({type(exc)}) Error retrying payloads in ingest spool '{self.path}'. Details: {exc}"
+                log.error(msg)
+
+                self._conn.execute("ROLLBACK")
+
+                raise exc
+
+        if dead:
+            log.warning(
+                f"[{dead}] payload(s) in ingest spool '{self.path}' failed {self.max_attempts} time(s) & were moved to dead letters."
+            )
+
+        return dead
+
+    def depth(self, kind: str | None = None) -> int:
+        """Return the number of payloads waiting to be saved, excluding dead letters."""
+        query: str = "SELECT COUNT(*) FROM spool WHERE dead = 0"
+        params: tuple = ()
+        if kind is not None:
+            query += " AND kind = ?"
+            params = (kind,)
+
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()[0]
+
+    def dead_letters(self, kind: str | None = None) -> list[SpooledPayload]:
+        """Return payloads that failed `max_attempts` times, for inspection."""
+        query: str = "SELECT id, kind, payload, created_epoch, attempts FROM spool WHERE dead = 1"
+        params: tuple = ()
+        if kind is not None:
+            query += " AND kind = ?"
+            params = (kind,)
+
+        with self._lock:
+            rows: list[tuple] = self._conn.execute(query + " ORDER BY id", params).fetchall()
+
+        return [
+            SpooledPayload(
+                id=row[0],
+                kind=row[1],
+                payload=json.loads(row[2]),
+                created_epoch=row[3],
+                attempts=row[4],
+            )
+            for row in rows
+        ]
+
+    def requeue_dead(self, kind: str | None = None) -> int:
+        """Give dead letters a fresh set of attempts, i.e. after fixing the cause."""
+        query: str = "UPDATE spool SET dead = 0, attempts = 0, available_epoch = ? WHERE dead = 1"
+        params: tuple = (int(self.clock()),)
+        if kind is not None:
+            query += " AND kind = ?"
+            params += (kind,)
+
+        with self._lock:
+            return self._conn.execute(query, params).rowcount
+
+
+_SPOOLS: dict[Path, Spool] = {}
+_SPOOLS_LOCK: threading.Lock = threading.Lock()
+
+
+def get_spool(
+    path: str | Path = INGEST_SETTINGS.get(
+        "INGEST_SPOOL_PATH", default=".spool/ingest.sqlite3"
+    ),
+) -> Spool:
+    """Return the process-wide `Spool` for `path`, opening it on first use."""
+    key: Path = Path(path).resolve()
+
+    with _SPOOLS_LOCK:
+        if key not in _SPOOLS:
+            _SPOOLS[key] = Spool(path=key)
+
+        return _SPOOLS[key]
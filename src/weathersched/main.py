@@ -4,11 +4,14 @@ import logging
 
 log = logging.getLogger(__name__)
 
-from weathersched.core import db, http_lib, setup
+from weathersched import analytics
+from weathersched.core import db, http_lib, metrics, profiling, setup
+from weathersched.core.depends import db_depends
 from weathersched.core.setup import LOGGING_SETTINGS
 from weathersched.domain import location, weather
 from weathersched.remote_apis import weatherapi_client
 
+@profiling.profiled(name="main")
 def main():
     log.info("Start weathersched")
 
@@ -19,6 +22,15 @@ def main():
     weather_forecast = weatherapi_client.client.get_weather_forecast()
     log.info(f"Weather forecast: {weather_forecast}")
 
+    session_pool = db_depends.get_session_pool()
+    with session_pool() as session:
+        weather.rollups.refresh_current_weather_rollups(session=session)
+        analytics.score_forecasts(session=session)
+
+    if metrics.get_registry().enabled:
+        metrics_file = metrics.write_metrics_file()
+        log.info(f"Wrote metrics to file: {metrics_file}")
+
 
 if __name__ == "__main__":
     setup.setup_logging(level=LOGGING_SETTINGS.get("LOG_LEVEL", default="INFO"))
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from . import current, forecast
+from . import current, forecast, history
 from .__methods import save_current_weather, save_forecast, save_location
 from .current import get_current_weather
-from .forecast import get_weather_forecast
+from .forecast import get_weather_forecast, stream_weather_forecast
+from .history import get_weather_future, get_weather_history
@@ -36,6 +36,12 @@ from weathersched.domain.weather.forecast import (
     ForecastJSONOut,
     ForecastJSONRepository,
 )
+from weathersched.domain.weather.weather_alerts import (
+    WeatherAlertIn,
+    WeatherAlertRepository,
+    WeatherAlertsIn,
+)
+from weathersched.ingest import changes, recent
 
 from . import requests
 from ..settings import weatherapi_settings
@@ -207,7 +213,8 @@ def save_current_weather(
             raise exc
 
         existing_model: CurrentWeatherModel | None = repo.get_by_last_updated_epoch(
-            last_updated_epoch=current_weather_schema.last_updated_epoch
+            location_id=location_db_schema.id,
+            last_updated_epoch=current_weather_schema.last_updated_epoch,
         )
 
         if existing_model:
@@ -227,11 +234,18 @@ def save_current_weather(
             air_quality_dict: dict = air_quality_schema.model_dump()
 
             try:
+                ## Committed with the observation by create_with_related()
+                if changes.change_feed_enabled():
+                    changes.record_changes(
+                        session, [(location_db_schema.id, current_weather_schema)]
+                    )
+
                 db_model: CurrentWeatherModel = repo.create_with_related(
                     weather_data=weather_dict,
                     condition_data=condition_dict,
                     air_quality_data=air_quality_dict,
                 )
+                recent.write_recent([(location_db_schema.id, current_weather_schema)])
             except Exception as exc:
                 msg = f"({type(exc)}) Error adding current weather to database. Details: {exc}"
                 log.error(msg)
@@ -299,3 +313,37 @@ def save_forecast(
         log.error(msg)
 
         raise exc
+
+
+def save_alerts(alerts: WeatherAlertsIn, location_id: int) -> int:
+    """Save the alerts from a forecast response, skipping alerts that are already stored.
+
+    Params:
+        alerts (WeatherAlertsIn): The response's alerts.
+        location_id (int): ID of the location the forecast was requested for.
+
+    Returns:
+        (int): Number of new alerts saved.
+
+    """
+    rows: list[dict] = [alert.to_row(location_id=location_id) for alert in alerts.alert]
+
+    if not rows:
+        return 0
+
+    session_pool = get_session_pool()
+
+    with session_pool() as session:
+        repo = WeatherAlertRepository(session=session)
+
+        try:
+            inserted: int = repo.bulk_upsert(rows)
+        except Exception as exc:
+            msg = f"({type(exc)}) Error saving weather alerts. Details: {exc}"
+            log.error(msg)
+
+            raise exc
+
+    log.info(f"Saved [{inserted}] new weather alert(s) of [{len(rows)}] in response.")
+
+    return inserted
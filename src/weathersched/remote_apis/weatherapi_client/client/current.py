@@ -5,7 +5,7 @@ import time
 
 log = logging.getLogger(__name__)
 
-from weathersched.core import http_lib
+from weathersched.core import http_lib, metrics
 from weathersched.domain.location import LocationIn, LocationOut
 from weathersched.domain.schemas import APIResponseCurrentWeather
 from weathersched.domain.weather.current import (
@@ -16,6 +16,12 @@ from weathersched.domain.weather.current import (
     CurrentWeatherIn,
     CurrentWeatherOut,
 )
+from weathersched.ingest import (
+    CURRENT_WEATHER,
+    INGEST_SETTINGS,
+    current_weather_payload,
+    get_spool,
+)
 from weathersched.remote_apis.weatherapi_client.settings import weatherapi_settings
 
 from . import requests
@@ -34,6 +40,9 @@ def get_current_weather(
     retry_sleep: int = 5,
     retry_stagger: int = 3,
     save_to_db: bool = True,
+    transport: httpx.BaseTransport | None = None,
+    use_spool: bool = INGEST_SETTINGS.get("INGEST_SPOOL_ENABLED", default=False),
+    spool_fallback: bool = INGEST_SETTINGS.get("INGEST_SPOOL_FALLBACK", default=True),
 ) -> APIResponseCurrentWeather | None:
     current_weather_request: httpx.Request = requests.return_current_weather_request(
         api_key=api_key, location=location, include_aqi=include_aqi, headers=headers
@@ -41,7 +50,9 @@ def get_current_weather(
 
     log.info(f"Requesting current weather for location: {location}")
 
-    with http_lib.get_http_controller(use_cache=use_cache) as http:
+    with http_lib.get_http_controller(
+        use_cache=use_cache, transport=transport
+    ) as http, metrics.time_stage("fetch", endpoint="current"):
         try:
             res: httpx.Response = http.client.send(current_weather_request)
         except httpx.ReadTimeout as timeout:
@@ -82,39 +93,81 @@ def get_current_weather(
         log.info("Success requesting current weather")
         decoded = http_lib.decode_response(response=res)
     elif res.status_code in http_lib.constants.ALL_ERROR_CODES:
+        metrics.inc_counter(
+            "weathersched_weatherapi_errors_total",
+            description="Unsuccessful WeatherAPI responses.",
+            endpoint="current",
+            status=res.status_code,
+        )
         log.warning(f"Error: [{res.status_code}: {res.reason_phrase}]: {res.text}")
 
         return None
     else:
+        metrics.inc_counter(
+            "weathersched_weatherapi_errors_total",
+            description="Unsuccessful WeatherAPI responses.",
+            endpoint="current",
+            status=res.status_code,
+        )
         log.error(
             f"Unhandled error code: [{res.status_code}: {res.reason_phrase}]: {res.text}"
         )
 
         return None
 
-    location: LocationIn = LocationIn.model_validate(decoded["location"])
-    # log.debug(f"Location: {location}")
-    current_weather: CurrentWeatherIn = CurrentWeatherIn.model_validate(
-        decoded["current"]
-    )
-    # log.debug(f"Weather: {current_weather}")
+    with metrics.time_stage("validate", endpoint="current"):
+        location: LocationIn = LocationIn.model_validate(decoded["location"])
+        # log.debug(f"Location: {location}")
+        current_weather: CurrentWeatherIn = CurrentWeatherIn.model_validate(
+            decoded["current"]
+        )
+        # log.debug(f"Weather: {current_weather}")
 
-    api_response: APIResponseCurrentWeather = APIResponseCurrentWeather(
-        location=location, weather=current_weather
-    )
+        api_response: APIResponseCurrentWeather = APIResponseCurrentWeather(
+            location=location, weather=current_weather
+        )
     # log.debug(f"API response: {api_response}")
 
-    if save_to_db:
+    if save_to_db and use_spool:
+        ## Saved to the database by a SpoolDrainer
+        log.info("Spooling current weather")
+        get_spool().append(
+            CURRENT_WEATHER,
+            current_weather_payload(api_response.location, api_response.weather),
+        )
+    elif save_to_db:
         log.info("Saving current weather to database")
         try:
-            current_weather_out: CurrentWeatherOut | None = save_current_weather(
-                current_weather_schema=api_response.weather,
-                location_schema=api_response.location,
-            )
+            with metrics.time_stage("persist", endpoint="current"):
+                current_weather_out: CurrentWeatherOut | None = save_current_weather(
+                    current_weather_schema=api_response.weather,
+                    location_schema=api_response.location,
+                )
         except Exception as exc:
             msg = f"({type(exc)}) Error saving current weather response. Details: {exc}"
             log.error(msg)
 
+            metrics.inc_counter(
+                "weathersched_persist_errors_total",
+                description="Responses that could not be saved to the database.",
+                endpoint="current",
+            )
+
+            if spool_fallback:
+                try:
+                    get_spool().append(
+                        CURRENT_WEATHER,
+                        current_weather_payload(
+                            api_response.location, api_response.weather
+                        ),
+                    )
+                    log.warning(
+                        "Spooled current weather response, it will be saved when a SpoolDrainer next runs."
+                    )
+                except Exception as spool_exc:
+                    msg = f"({type(spool_exc)}) Error spooling current weather response. Details: {spool_exc}"
+                    log.error(msg)
+
     log.info(
         f"Success requesting current weather for location '{location}' from WeatherAPI"
     )
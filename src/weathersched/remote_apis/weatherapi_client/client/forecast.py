@@ -2,10 +2,11 @@ from __future__ import annotations
 
 import logging
 import time
+import typing as t
 
 log = logging.getLogger(__name__)
 
-from weathersched.core import http_lib
+from weathersched.core import http_lib, metrics
 from weathersched.domain.location import LocationIn, LocationOut
 from weathersched.domain.schemas import APIResponseForecastWeather
 from weathersched.domain.weather.forecast import ForecastJSONIn, ForecastJSONOut
@@ -15,10 +16,11 @@ from weathersched.domain.weather.weather_alerts import (
     WeatherAlertsIn,
     WeatherAlertsOut,
 )
+from weathersched.ingest import FORECAST, INGEST_SETTINGS, forecast_payload, get_spool
 from weathersched.remote_apis.weatherapi_client.settings import weatherapi_settings
 
 from . import requests
-from .__methods import save_forecast, save_location
+from .__methods import save_alerts, save_forecast, save_location
 
 import httpx
 
@@ -35,6 +37,9 @@ def get_weather_forecast(
     retry_sleep: int = 5,
     retry_stagger: int = 3,
     save_to_db: bool = True,
+    transport: httpx.BaseTransport | None = None,
+    use_spool: bool = INGEST_SETTINGS.get("INGEST_SPOOL_ENABLED", default=False),
+    spool_fallback: bool = INGEST_SETTINGS.get("INGEST_SPOOL_FALLBACK", default=True),
 ):
     if days > 10:
         log.warning(
@@ -47,12 +52,15 @@ def get_weather_forecast(
         api_key=api_key,
         location=location,
         include_aqi=include_aqi,
+        include_alerts=include_alerts,
         headers=headers,
     )
 
     log.info(f"Requesting weather forecast for location: {location}")
 
-    with http_lib.get_http_controller(use_cache=use_cache) as http:
+    with http_lib.get_http_controller(
+        use_cache=use_cache, transport=transport
+    ) as http, metrics.time_stage("fetch", endpoint="forecast"):
         try:
             res: httpx.Response = http.client.send(weather_forecast_request)
         except httpx.ReadTimeout as timeout:
@@ -93,10 +101,22 @@ def get_weather_forecast(
         log.info("Success requesting weather forecast")
         decoded = http_lib.decode_response(response=res)
     elif res.status_code in http_lib.constants.ALL_ERROR_CODES:
+        metrics.inc_counter(
+            "weathersched_weatherapi_errors_total",
+            description="Unsuccessful WeatherAPI responses.",
+            endpoint="forecast",
+            status=res.status_code,
+        )
         log.warning(f"Error: [{res.status_code}: {res.reason_phrase}]: {res.text}")
 
         return None
     else:
+        metrics.inc_counter(
+            "weathersched_weatherapi_errors_total",
+            description="Unsuccessful WeatherAPI responses.",
+            endpoint="forecast",
+            status=res.status_code,
+        )
         log.error(
             f"Unhandled error code: [{res.status_code}: {res.reason_phrase}]: {res.text}"
         )
@@ -105,24 +125,142 @@ def get_weather_forecast(
 
     # log.debug(f"Decoded: {decoded}")
 
-    location_schema: LocationIn = LocationIn.model_validate(decoded["location"])
-    forecast_schema = ForecastJSONIn(forecast_json=decoded)
+    with metrics.time_stage("validate", endpoint="forecast"):
+        location_schema: LocationIn = LocationIn.model_validate(decoded["location"])
+        forecast_schema = ForecastJSONIn(forecast_json=decoded)
+        alerts_schema: WeatherAlertsIn | None = (
+            WeatherAlertsIn.model_validate(decoded["alerts"])
+            if decoded.get("alerts")
+            else None
+        )
 
-    api_response = APIResponseForecastWeather(
-        forecast=forecast_schema, location=location_schema
-    )
+        api_response = APIResponseForecastWeather(
+            forecast=forecast_schema, location=location_schema, alerts=alerts_schema
+        )
 
-    if save_to_db:
+    if save_to_db and use_spool:
+        ## Saved to the database by a SpoolDrainer
+        log.info("Spooling weather forecast")
+        get_spool().append(
+            FORECAST,
+            forecast_payload(location_schema, forecast_schema.forecast_json, alerts_schema),
+        )
+    elif save_to_db:
         log.info("Saving forecast to database")
 
         try:
-            db_forecast: ForecastJSONOut = save_forecast(forecast_schema)
+            with metrics.time_stage("persist", endpoint="forecast"):
+                db_location: LocationOut = save_location(location=location_schema)
+                db_forecast: ForecastJSONOut = save_forecast(
+                    forecast_schema.model_copy(update={"location_id": db_location.id})
+                )
+
+                if alerts_schema and alerts_schema.alert:
+                    save_alerts(alerts=alerts_schema, location_id=db_location.id)
 
             return db_forecast
         except Exception as exc:
             msg = f"({type(exc)}) Error saving forecast to database. Details: {exc}"
             log.error(msg)
 
-            raise exc
+            metrics.inc_counter(
+                "weathersched_persist_errors_total",
+                description="Responses that could not be saved to the database.",
+                endpoint="forecast",
+            )
+
+            if not spool_fallback:
+                raise exc
+
+            try:
+                get_spool().append(
+                    FORECAST,
+                    forecast_payload(
+                        location_schema, forecast_schema.forecast_json, alerts_schema
+                    ),
+                )
+                log.warning(
+                    "Spooled weather forecast response, it will be saved when a SpoolDrainer next runs."
+                )
+            except Exception as spool_exc:
+                msg = f"({type(spool_exc)}) Error spooling weather forecast response. Details: {spool_exc}"
+                log.error(msg)
+
+                raise exc
 
     return api_response
+
+
+## ijson prefixes of the items stream_weather_forecast() can yield
+FORECAST_STREAM_PREFIXES: dict[str, str] = {
+    "day": "forecast.forecastday.item",
+    "hour": "forecast.forecastday.item.hour.item",
+    "alert": "alerts.alert.item",
+}
+
+
+def stream_weather_forecast(
+    location: str = weatherapi_settings.location,
+    days: int = 1,
+    api_key: str = weatherapi_settings.api_key,
+    item: str = "day",
+    include_aqi: bool = True,
+    include_alerts: bool = False,
+    headers: dict | None = None,
+    chunk_size: int = 65_536,
+    transport: httpx.BaseTransport | None = None,
+) -> t.Generator[dict, None, None]:
+    """Request a weather forecast & yield its days, hours or alerts as the response arrives.
+
+    Description:
+        Unlike `get_weather_forecast()`, the response is never held in memory in full & nothing is saved
+        to the database, so large (10 day) forecasts can be processed with flat memory use. Parsing
+        overlaps the download when the optional `ijson` package is installed.
+
+    Usage:
+        for hour in stream_weather_forecast(location="London", days=10, item="hour"):
+            ...
+
+    Params:
+        location (str): The location to request a forecast for.
+        days (int): (default: 1) Number of forecast days, up to 10.
+        api_key (str): WeatherAPI API key.
+        item (str): (default: "day") What to yield: "day" for each `forecastday`, "hour" for each
+            hour of every day, or "alert" for each weather alert.
+        include_aqi (bool): (default: True) Include air quality data in the forecast.
+        include_alerts (bool): (default: False) Include weather alerts in the response.
+        headers (dict | None): Optional request headers.
+        chunk_size (int): (default: 65536) Number of bytes read from the response at a time.
+        transport (httpx.BaseTransport | None): Optional base transport for the HTTP client.
+
+    """
+    if item not in FORECAST_STREAM_PREFIXES:
+        raise ValueError(
+            f"Invalid item: {item}. Must be one of {list(FORECAST_STREAM_PREFIXES.keys())}"
+        )
+
+    if days > 10:
+        log.warning(
+            f"WeatherAPI only allows 10-day forecasts. {days} is too many, setting to 10."
+        )
+        days: int = 10
+
+    weather_forecast_request: httpx.Request = requests.return_weather_forecast_request(
+        days=days,
+        api_key=api_key,
+        location=location,
+        include_aqi=include_aqi,
+        include_alerts=include_alerts or item == "alert",
+        headers=headers,
+    )
+
+    log.info(f"Streaming weather forecast {item}s for location: {location}")
+
+    ## Streamed responses bypass the cache, hishel would buffer the whole body to store it
+    with http_lib.get_http_controller(use_cache=False, transport=transport) as http:
+        yield from http_lib.stream_json_items(
+            http.client,
+            weather_forecast_request,
+            prefix=FORECAST_STREAM_PREFIXES[item],
+            chunk_size=chunk_size,
+        )
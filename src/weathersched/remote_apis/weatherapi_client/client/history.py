@@ -0,0 +1,130 @@
+"""Request past (`history.json`) & far-future (`future.json`) weather.
+
+Description:
+    Both endpoints return a forecast-shaped response, a `location` & a `forecast.forecastday` list with
+    24 hours per day. Nothing is saved here, backfills decide how to store the hours (see
+    `weathersched.collector.backfill`).
+
+"""
+
+from __future__ import annotations
+
+import logging
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import http_lib, metrics
+from weathersched.remote_apis.weatherapi_client.settings import weatherapi_settings
+
+from . import requests
+
+import httpx
+
+def _send(
+    request: httpx.Request,
+    endpoint: str,
+    use_cache: bool = False,
+    transport: httpx.BaseTransport | None = None,
+) -> dict | None:
+    with http_lib.get_http_controller(
+        use_cache=use_cache, transport=transport
+    ) as http, metrics.time_stage("fetch", endpoint=endpoint):
+        res: httpx.Response = http.client.send(request)
+
+    log.debug(f"Response: [{res.status_code}: {res.reason_phrase}]")
+
+    if res.status_code in http_lib.constants.SUCCESS_CODES:
+        return http_lib.decode_response(response=res)
+
+    metrics.inc_counter(
+        "weathersched_weatherapi_errors_total",
+        description="Unsuccessful WeatherAPI responses.",
+        endpoint=endpoint,
+        status=res.status_code,
+    )
+    if res.status_code in http_lib.constants.ALL_ERROR_CODES:
+        log.warning(f"Error: [{res.status_code}: {res.reason_phrase}]: {res.text}")
+    else:
+        log.error(
+            f"Unhandled error code: [{res.status_code}: {res.reason_phrase}]: {res.text}"
+        )
+
+    return None
+
+
+def get_weather_history(
+    location: str = weatherapi_settings.location,
+    date: str | None = None,
+    api_key: str = weatherapi_settings.api_key,
+    end_date: str | None = None,
+    include_aqi: bool = False,
+    headers: dict | None = None,
+    use_cache: bool = False,
+    transport: httpx.BaseTransport | None = None,
+) -> dict | None:
+    """Request a location's weather for a past date, or range of dates.
+
+    Params:
+        location (str): The location to request weather history for.
+        date (str): First date, as `yyyy-MM-dd`.
+        api_key (str): WeatherAPI API key.
+        end_date (str | None): Optional last date, as `yyyy-MM-dd`. Ranges are limited to 30 days.
+        include_aqi (bool): (default: False) Include air quality data, where the plan allows it.
+        headers (dict | None): Optional request headers.
+        use_cache (bool): (default: False) Cache the response.
+        transport (httpx.BaseTransport | None): Optional base transport for the HTTP client.
+
+    Returns:
+        (dict | None): The decoded response, or `None` if WeatherAPI returned an error.
+
+    """
+    if not date:
+        raise ValueError("Missing a date to request weather history for.")
+
+    request: httpx.Request = requests.return_weather_history_request(
+        api_key=api_key,
+        location=location,
+        date=date,
+        end_date=end_date,
+        include_aqi=include_aqi,
+        headers=headers,
+    )
+
+    log.info(f"Requesting weather history for location: {location} ({date})")
+
+    return _send(request, endpoint="history", use_cache=use_cache, transport=transport)
+
+
+def get_weather_future(
+    location: str = weatherapi_settings.location,
+    date: str | None = None,
+    api_key: str = weatherapi_settings.api_key,
+    headers: dict | None = None,
+    use_cache: bool = False,
+    transport: httpx.BaseTransport | None = None,
+) -> dict | None:
+    """Request a location's predicted weather for a date 14-300 days ahead.
+
+    Params:
+        location (str): The location to request future weather for.
+        date (str): The date, as `yyyy-MM-dd`.
+        api_key (str): WeatherAPI API key.
+        headers (dict | None): Optional request headers.
+        use_cache (bool): (default: False) Cache the response.
+        transport (httpx.BaseTransport | None): Optional base transport for the HTTP client.
+
+    Returns:
+        (dict | None): The decoded response, or `None` if WeatherAPI returned an error.
+
+    """
+    if not date:
+        raise ValueError("Missing a date to request future weather for.")
+
+    request: httpx.Request = requests.return_weather_future_request(
+        api_key=api_key, location=location, date=date, headers=headers
+    )
+
+    log.info(f"Requesting future weather for location: {location} ({date})")
+
+    return _send(request, endpoint="future", use_cache=use_cache, transport=transport)
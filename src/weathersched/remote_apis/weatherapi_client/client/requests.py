@@ -48,3 +48,45 @@ def return_weather_forecast_request(
     req: httpx.Request = http_lib.build_request(url=url, params=params, headers=headers)
 
     return req
+
+
+def return_weather_history_request(
+    api_key: str,
+    location: str,
+    date: str,
+    end_date: str | None = None,
+    include_aqi: bool = False,
+    headers: dict | None = None,
+) -> httpx.Request:
+    """Return an httpx.Request object for the weather history of a date (yyyy-MM-dd), or a date range."""
+    url: str = f"{WEATHERAPI_BASE_URL}/history.json"
+    params: dict = {
+        "key": api_key,
+        "q": location,
+        "dt": date,
+        "aqi": f"{'yes' if include_aqi else 'no'}",
+    }
+    if end_date:
+        params["end_dt"] = end_date
+
+    log.debug(f"Building WeatherAPI weather history request")
+    req: httpx.Request = http_lib.build_request(url=url, params=params, headers=headers)
+
+    return req
+
+
+def return_weather_future_request(
+    api_key: str, location: str, date: str, headers: dict | None = None
+) -> httpx.Request:
+    """Return an httpx.Request object for the future weather of a date (yyyy-MM-dd), 14-300 days ahead."""
+    url: str = f"{WEATHERAPI_BASE_URL}/future.json"
+    params: dict = {
+        "key": api_key,
+        "q": location,
+        "dt": date,
+    }
+
+    log.debug(f"Building WeatherAPI future weather request")
+    req: httpx.Request = http_lib.build_request(url=url, params=params, headers=headers)
+
+    return req
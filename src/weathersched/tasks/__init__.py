@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from . import app, collect, settings
+from .app import (
+    CURRENT_QUEUE,
+    FORECAST_QUEUE,
+    PERSIST_QUEUE,
+    celery_app,
+    create_celery_app,
+)
+from .collect import (
+    collect_current_weather,
+    collect_weather_forecast,
+    fetch_current,
+    fetch_forecast,
+    persist_current,
+    persist_forecasts,
+    set_transport,
+)
+from .settings import CELERY_SETTINGS
+
+## `celery -A weathersched.tasks` looks for `app`/`celery`
+celery = celery_app
@@ -0,0 +1,215 @@
+"""Celery tasks that fetch weather & batch-persist the results.
+
+Description:
+    Fetch tasks only request & validate, & return a compact JSON payload. Persisting is left to a chord
+    callback that saves a whole group's payloads in one transaction, so workers on the `weather.current` &
+    `weather.forecast` queues never hold database connections, & the database sees one write per batch
+    instead of one per location.
+
+    `collect_current_weather()` & `collect_weather_forecast()` build that chord for a list of locations.
+
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import typing as t
+
+log = logging.getLogger(__name__)
+
+from weathersched.core import http_lib
+from weathersched.core.depends.db_depends import get_session_pool
+from weathersched.domain.schemas import (
+    APIResponseCurrentWeather,
+    APIResponseForecastWeather,
+)
+from weathersched.ingest import persist
+from weathersched.remote_apis.weatherapi_client import client
+from weathersched.remote_apis.weatherapi_client.settings import weatherapi_settings
+
+from .app import celery_app
+
+from celery import Task, chord, signals
+import httpx
+
+## Transport shared by every task in a worker process, so fetches reuse one connection pool
+_transport: httpx.BaseTransport | None = None
+_transport_lock: threading.Lock = threading.Lock()
+
+
+def set_transport(transport: httpx.BaseTransport | None) -> None:
+    """Set the HTTP transport fetch tasks use, i.e. a mock transport in tests."""
+    global _transport
+    _transport = transport
+
+
+def get_transport() -> httpx.BaseTransport:
+    """Return this process's shared transport, creating it on first use.
+
+    Description:
+        Created lazily instead of at worker startup, so prefork children each open their own connection
+        pool instead of inheriting the parent's sockets.
+
+    """
+    global _transport
+
+    with _transport_lock:
+        if _transport is None:
+            _transport = http_lib.SharedTransport(http_lib.build_http_transport())
+
+        return _transport
+
+
+@signals.worker_process_shutdown.connect
+@signals.worker_shutdown.connect
+def _close_transport(**kwargs) -> None:
+    if isinstance(_transport, http_lib.SharedTransport):
+        _transport.shutdown()
+
+    set_transport(None)
+
+
+def _retry_or_skip(task: Task, exc: Exception, location: str) -> None:
+    """Retry a fetch that failed with a transport error, with exponential backoff.
+
+    Description:
+        Once retries run out, or on any other error, the error is logged & the fetch returns `None`. An
+        exception would fail the chord, & the callback would not persist the rest of the batch.
+
+    """
+    if (
+        isinstance(exc, httpx.TransportError)
+        and task.request.retries < task.max_retries
+    ):
+        raise task.retry(exc=exc, countdown=2**task.request.retries)
+
+    msg = f"({type(exc)}) Error fetching '{location}' in task '{task.name}', skipping it in this batch. Details: {exc}"
+    log.error(msg)
+
+    return None
+
+
+@celery_app.task(name="weathersched.fetch_current", bind=True, max_retries=3)
+def fetch_current(
+    self: Task, location: str, include_aqi: bool = True, api_key: str | None = None
+) -> dict | None:
+    """Request a location's current weather. Returns a `{"location", "weather"}` payload, or `None` on error.
+
+    `api_key` defaults to the worker's `WEATHERAPI_API_KEY` setting, so keys stay out of the broker.
+    """
+    try:
+        response: APIResponseCurrentWeather | None = client.get_current_weather(
+            location=location,
+            api_key=api_key or weatherapi_settings.api_key,
+            include_aqi=include_aqi,
+            retry=False,
+            save_to_db=False,
+            transport=get_transport(),
+        )
+    except Exception as exc:
+        return _retry_or_skip(self, exc, location)
+
+    if response is None:
+        return None
+
+    return persist.current_weather_payload(response.location, response.weather)
+
+
+@celery_app.task(name="weathersched.fetch_forecast", bind=True, max_retries=3)
+def fetch_forecast(
+    self: Task,
+    location: str,
+    days: int = 1,
+    include_aqi: bool = True,
+    include_alerts: bool = True,
+    api_key: str | None = None,
+) -> dict | None:
+    """Request a location's forecast. Returns a `{"location", "forecast_json", "alerts"}` payload, or `None`."""
+    try:
+        response: APIResponseForecastWeather | None = client.get_weather_forecast(
+            location=location,
+            api_key=api_key or weatherapi_settings.api_key,
+            days=days,
+            include_aqi=include_aqi,
+            include_alerts=include_alerts,
+            retry=False,
+            save_to_db=False,
+            transport=get_transport(),
+        )
+    except Exception as exc:
+        return _retry_or_skip(self, exc, location)
+
+    if response is None:
+        return None
+
+    return persist.forecast_payload(
+        response.location, response.forecast.forecast_json, response.alerts
+    )
+
+
+@celery_app.task(name="weathersched.persist_current")
+def persist_current(payloads: list[dict | None]) -> int:
+    """Chord callback: save a group's current weather payloads in one transaction."""
+    session_pool = get_session_pool()
+
+    with session_pool() as session:
+        return persist.persist_current_weather(session, payloads)
+
+
+@celery_app.task(name="weathersched.persist_forecasts")
+def persist_forecasts(payloads: list[dict | None]) -> int:
+    """Chord callback: save a group's forecast payloads in one transaction."""
+    session_pool = get_session_pool()
+
+    with session_pool() as session:
+        return persist.persist_forecasts(session, payloads)
+
+
+def _batches(locations: t.Sequence[str], batch_size: int) -> t.Iterator[t.Sequence[str]]:
+    for start in range(0, len(locations), batch_size):
+        yield locations[start : start + batch_size]
+
+
+def collect_current_weather(
+    locations: t.Iterable[str], batch_size: int = 100, **fetch_kwargs
+) -> list:
+    """Fan current weather fetches out across workers, saving each batch with one `persist_current` callback.
+
+    Params:
+        locations (Iterable[str]): WeatherAPI location queries.
+        batch_size (int): (default: 100) Locations per chord, i.e. per database transaction.
+        **fetch_kwargs: Passed to each `fetch_current` task, i.e. `include_aqi`.
+
+    Returns:
+        (list[AsyncResult]): Result of each batch's callback, the number of observations saved.
+
+    """
+    return [
+        chord(fetch_current.s(location, **fetch_kwargs) for location in batch)(
+            persist_current.s()
+        )
+        for batch in _batches(list(locations), batch_size)
+    ]
+
+
+def collect_weather_forecast(
+    locations: t.Iterable[str], batch_size: int = 50, **fetch_kwargs
+) -> list:
+    """Fan forecast fetches out across workers, saving each batch with one `persist_forecasts` callback.
+
+    Params:
+        locations (Iterable[str]): WeatherAPI location queries.
+        batch_size (int): (default: 50) Locations per chord, i.e. per database transaction.
+        **fetch_kwargs: Passed to each `fetch_forecast` task, i.e. `days`, `include_alerts`.
+
+    Returns:
+        (list[AsyncResult]): Result of each batch's callback, the number of forecasts saved.
+
+    """
+    return [
+        chord(fetch_forecast.s(location, **fetch_kwargs) for location in batch)(
+            persist_forecasts.s()
+        )
+        for batch in _batches(list(locations), batch_size)
+    ]
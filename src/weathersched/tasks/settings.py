@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from dynaconf import Dynaconf
+
+## Celery settings loaded with dynaconf. The broker password may also live in the [celery] section
+#  of config/db/.secrets.toml, see config/db/.secrets.example.toml.
+CELERY_SETTINGS: Dynaconf = Dynaconf(
+    environments=True,
+    env="celery",
+    envvar_prefix="CELERY",
+    settings_files=[
+        "celery/settings.toml",
+        "celery/.secrets.toml",
+        "db/.secrets.toml",
+    ],
+)
@@ -0,0 +1,52 @@
+"""Request rate of the query API, with & without its response cache, on SQLite."""
+
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("aiosqlite")
+
+from weathersched.api import (
+    TTLCache,
+    create_app,
+    get_async_engine,
+    get_async_session_pool,
+)
+
+from factories import DAY_START, current_weather_model, location_model
+from fastapi.testclient import TestClient
+import sqlalchemy.orm as so
+
+REQUESTS: int = 200
+
+
+@pytest.mark.parametrize("cache_ttl", [0, 60])
+@pytest.mark.parametrize("path", ["current", "history"])
+def test_bench_api_requests(
+    benchmark, record_rate, db_session: so.Session, cache_ttl: int, path: str
+):
+    location = location_model(db_session, "London")
+    db_session.add_all(
+        current_weather_model(location.id, DAY_START + i * 900) for i in range(96)
+    )
+    db_session.commit()
+
+    engine = get_async_engine(db_session.get_bind().url)
+    app = create_app(
+        session_pool=get_async_session_pool(engine), cache=TTLCache(ttl=cache_ttl)
+    )
+    url: str = f"/locations/{location.id}/{path}"
+    params: dict = (
+        {"start": DAY_START, "end": DAY_START + 86400} if path == "history" else {}
+    )
+
+    with TestClient(app) as client:
+
+        def _requests() -> None:
+            for _ in range(REQUESTS):
+                assert client.get(url, params=params).status_code == 200
+
+        benchmark(_requests)
+
+    record_rate("requests", REQUESTS)
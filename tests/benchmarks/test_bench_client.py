@@ -0,0 +1,81 @@
+"""Per-call latency of the WeatherAPI client functions against the local fake API."""
+
+from __future__ import annotations
+
+from weathersched.core import http_lib
+from weathersched.remote_apis.weatherapi_client import client
+
+from fake_weatherapi import FakeWeatherAPI, load_fixture
+import httpx
+import pytest
+
+def test_bench_current_weather_call(benchmark, fake_weatherapi: FakeWeatherAPI):
+    transport: httpx.MockTransport = fake_weatherapi.transport()
+
+    result = benchmark(
+        client.get_current_weather,
+        location="London",
+        api_key="fake",
+        save_to_db=False,
+        transport=transport,
+    )
+
+    assert result is not None
+    assert result.location.name == "London"
+
+
+@pytest.mark.parametrize("days", [1, 10])
+def test_bench_forecast_call(benchmark, fake_weatherapi: FakeWeatherAPI, days: int):
+    transport: httpx.MockTransport = fake_weatherapi.transport()
+
+    result = benchmark(
+        client.get_weather_forecast,
+        location="London",
+        days=days,
+        api_key="fake",
+        save_to_db=False,
+        transport=transport,
+    )
+
+    assert result is not None
+    assert len(result.forecast.forecast_json["forecast"]["forecastday"]) == days
+
+
+def test_bench_stream_forecast_hours(benchmark, fake_weatherapi: FakeWeatherAPI):
+    transport: httpx.MockTransport = fake_weatherapi.transport()
+
+    def _stream() -> int:
+        return sum(
+            1
+            for _ in client.stream_weather_forecast(
+                location="London",
+                days=10,
+                api_key="fake",
+                item="hour",
+                transport=transport,
+            )
+        )
+
+    assert benchmark(_stream) == 240
+
+
+def test_bench_decode_forecast_response(benchmark):
+    response: httpx.Response = httpx.Response(200, json=load_fixture("forecast.json"))
+
+    decoded: dict = benchmark(http_lib.decode_response, response=response)
+
+    assert decoded["location"]["name"] == "London"
+
+
+def test_current_weather_error_returns_none(fake_weatherapi: FakeWeatherAPI):
+    fake_weatherapi.error_rate = 1.0
+
+    result = client.get_current_weather(
+        location="London",
+        api_key="fake",
+        save_to_db=False,
+        transport=fake_weatherapi.transport(),
+    )
+
+    assert result is None
+    assert fake_weatherapi.errors == 1
@@ -0,0 +1,52 @@
+"""Database ingest rate of already-validated current weather responses on SQLite."""
+
+from __future__ import annotations
+
+from weathersched.domain.schemas import APIResponseCurrentWeather
+from weathersched.domain.weather.current import CurrentWeatherModel
+from weathersched.remote_apis.weatherapi_client.client import save_current_weather
+
+from fake_weatherapi import FakeWeatherAPI, location_queries
+import httpx
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+def _validated_responses(count: int) -> list[APIResponseCurrentWeather]:
+    """Build `count` responses for distinct locations, without saving them."""
+    from weathersched.remote_apis.weatherapi_client import client
+
+    fake: FakeWeatherAPI = FakeWeatherAPI()
+    transport: httpx.MockTransport = fake.transport()
+
+    return [
+        client.get_current_weather(
+            location=location, api_key="fake", save_to_db=False, transport=transport
+        )
+        for location in location_queries(count)
+    ]
+
+
+def _ingest(responses: list[APIResponseCurrentWeather]) -> None:
+    for response in responses:
+        save_current_weather(
+            current_weather_schema=response.weather,
+            location_schema=response.location,
+        )
+
+
+@pytest.mark.parametrize("row_count", [1, 100, 1000])
+def test_bench_ingest_current_weather(
+    benchmark, record_rate, clean_db: sa.Engine, row_count: int
+):
+    responses: list[APIResponseCurrentWeather] = _validated_responses(row_count)
+
+    benchmark.pedantic(_ingest, args=(responses,), rounds=1, iterations=1)
+
+    record_rate("rows", row_count)
+
+    with so.Session(clean_db) as session:
+        stored: int = session.scalar(
+            sa.select(sa.func.count()).select_from(CurrentWeatherModel)
+        )
+    assert stored == row_count
@@ -0,0 +1,58 @@
+"""End-to-end sweep throughput: request, decode, validate & persist for many locations."""
+
+from __future__ import annotations
+
+from weathersched.collector import sweep_current_weather
+from weathersched.domain.weather.current import CurrentWeatherModel
+
+from fake_weatherapi import FakeWeatherAPI, location_queries
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+@pytest.mark.parametrize("location_count", [1, 100, 1000])
+def test_bench_sweep_current_weather(
+    benchmark, record_rate, clean_db: sa.Engine, location_count: int
+):
+    fake: FakeWeatherAPI = FakeWeatherAPI()
+    locations: list[str] = location_queries(location_count)
+
+    results: dict = benchmark.pedantic(
+        sweep_current_weather,
+        kwargs={
+            "locations": locations,
+            "api_key": "fake",
+            "transport": fake.transport(),
+        },
+        rounds=1,
+        iterations=1,
+    )
+
+    record_rate("locations", location_count)
+
+    assert all(result is not None for result in results.values())
+    with so.Session(clean_db) as session:
+        stored: int = session.scalar(
+            sa.select(sa.func.count()).select_from(CurrentWeatherModel)
+        )
+    assert stored == location_count
+
+
+@pytest.mark.parametrize("location_count", [1, 100])
+def test_bench_sweep_current_weather_no_db(
+    benchmark, record_rate, location_count: int
+):
+    fake: FakeWeatherAPI = FakeWeatherAPI()
+    locations: list[str] = location_queries(location_count)
+
+    results: dict = benchmark(
+        sweep_current_weather,
+        locations=locations,
+        api_key="fake",
+        save_to_db=False,
+        transport=fake.transport(),
+    )
+
+    record_rate("locations", location_count)
+
+    assert len(results) == location_count
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+import tempfile
+
+## Point the database settings at a throwaway SQLite database. This must happen before
+#  weathersched is imported, because the database engine is built from settings at import time.
+TEST_DB_DIR: Path = Path(tempfile.mkdtemp(prefix="weathersched-tests-"))
+os.environ.update(
+    {
+        "DB_DB_TYPE": "sqlite",
+        "DB_DB_DRIVERNAME": "sqlite+pysqlite",
+        "DB_DB_USERNAME": "",
+        "DB_DB_HOST": "",
+        "DB_DB_PORT": "",
+        "DB_DB_DATABASE": str(TEST_DB_DIR / "weathersched.sqlite3"),
+        "DB_DB_ECHO": "false",
+        ## SQLite has a single writer, IDs commit in order
+        "DB_DB_ROLLUP_SETTLE_SECONDS": "0",
+    }
+)
+
+from weathersched.core import db
+from weathersched.core.depends import db_depends
+import weathersched.domain  # noqa: F401 - register models on Base.metadata
+
+from fake_weatherapi import FakeWeatherAPI
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+@pytest.fixture(scope="session")
+def db_engine() -> sa.Engine:
+    """The engine the weathersched persistence functions use by default, with tables created."""
+    engine: sa.Engine = db_depends.get_session_pool().kw["bind"]
+    db.create_base_metadata(base=db.Base, engine=engine)
+
+    return engine
+
+
+@pytest.fixture
+def clean_db(db_engine: sa.Engine) -> sa.Engine:
+    """Empty every table before the test runs."""
+    with db_engine.begin() as conn:
+        for table in reversed(db.Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+
+    return db_engine
+
+
+@pytest.fixture
+def db_session(clean_db: sa.Engine) -> so.Session:
+    session_pool: so.sessionmaker[so.Session] = db.get_session_pool(engine=clean_db)
+
+    with session_pool() as session:
+        yield session
+
+
+@pytest.fixture
+def record_rate(benchmark):
+    """Return a function that adds a `<name>_per_second` rate to the benchmark's results.
+
+    The rate is skipped when benchmarks are disabled, i.e. with `--benchmark-disable`.
+    """
+
+    def _record_rate(name: str, count: int) -> None:
+        benchmark.extra_info[name] = count
+
+        if getattr(benchmark, "stats", None) is not None:
+            benchmark.extra_info[f"{name}_per_second"] = (
+                count / benchmark.stats.stats.mean
+            )
+
+    return _record_rate
+
+
+@pytest.fixture
+def fake_weatherapi() -> FakeWeatherAPI:
+    return FakeWeatherAPI()
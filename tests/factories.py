@@ -0,0 +1,61 @@
+"""Build database models with placeholder values for tests."""
+
+from __future__ import annotations
+
+from weathersched.domain.location import LocationModel
+from weathersched.domain.weather.current import (
+    CurrentWeatherConditionModel,
+    CurrentWeatherModel,
+)
+
+import sqlalchemy.orm as so
+
+## 2024-11-01 00:00:00 UTC
+DAY_START: int = 1730419200
+
+
+def location_model(
+    session: so.Session, name: str = "London", lat: float = 51.52, lon: float = -0.11
+) -> LocationModel:
+    """Create & commit a location."""
+    location = LocationModel(
+        name=name,
+        region="",
+        country="United Kingdom",
+        lat=lat,
+        lon=lon,
+        tz_id="Europe/London",
+        localtime_epoch=DAY_START,
+        localtime="2024-11-01 00:00",
+    )
+    session.add(location)
+    session.commit()
+
+    return location
+
+
+def current_weather_model(
+    location_id: int, epoch: int, condition_code: int = 1000, **overrides
+) -> CurrentWeatherModel:
+    """Return an unsaved observation with a condition, with every measurement set to 0 unless overridden."""
+    fields: dict = {
+        name: 0
+        for name in CurrentWeatherModel.__table__.columns.keys()
+        if name not in ("id", "location_id", "last_updated", "wind_dir")
+    }
+    fields.update(
+        {
+            "location_id": location_id,
+            "last_updated_epoch": epoch,
+            "last_updated": "",
+            "wind_dir": "N",
+        }
+    )
+    fields.update(overrides)
+
+    weather = CurrentWeatherModel(**fields)
+    weather.condition = CurrentWeatherConditionModel(
+        text="", icon="", code=condition_code
+    )
+
+    return weather
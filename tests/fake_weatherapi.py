@@ -0,0 +1,227 @@
+"""A local stand-in for the WeatherAPI HTTP API.
+
+Description:
+    `FakeWeatherAPI` serves the recorded `current.json` & `forecast.json` payloads in
+    `tests/fixtures/weatherapi/` (also as `history.json` & `future.json` days) through an `httpx.MockTransport`, so the WeatherAPI client
+    functions can be exercised & benchmarked without network access or an API key.
+
+    Latency, HTTP errors & read timeouts can be injected to measure how the client behaves
+    when the remote is slow or unreliable.
+
+Usage:
+    fake = FakeWeatherAPI(latency=0.05, error_rate=0.01)
+    client.get_current_weather(location="London", api_key="fake", transport=fake.transport())
+
+"""
+
+from __future__ import annotations
+
+import copy
+import datetime as dt
+import json
+from pathlib import Path
+import random
+import threading
+import time
+import typing as t
+
+import httpx
+
+FIXTURES_DIR: Path = Path(__file__).parent / "fixtures" / "weatherapi"
+
+
+def load_fixture(name: str) -> dict:
+    """Load a recorded WeatherAPI payload from the fixtures directory."""
+    with open(FIXTURES_DIR / name, "r") as f:
+        return json.load(f)
+
+
+class FakeWeatherAPI:
+    """Serve recorded WeatherAPI payloads with configurable latency & errors.
+
+    Params:
+        latency (float): (default: 0.0) Seconds to sleep before each response.
+        error_rate (float): (default: 0.0) Fraction of requests, 0-1, answered with `error_status`.
+        error_status (int): (default: 500) HTTP status code for injected errors.
+        timeout_rate (float): (default: 0.0) Fraction of requests, 0-1, that raise `httpx.ReadTimeout`.
+        advance_epoch (bool): (default: True) Give every response a new `last_updated_epoch`, so each
+            response is stored as a new observation.
+        seed (int): (default: 0) Seed for the error injection random number generator.
+    """
+
+    ## Seconds between simulated WeatherAPI updates
+    UPDATE_INTERVAL: int = 900
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        timeout_rate: float = 0.0,
+        advance_epoch: bool = True,
+        seed: int = 0,
+    ) -> None:
+        self.latency: float = latency
+        self.error_rate: float = error_rate
+        self.error_status: int = error_status
+        self.timeout_rate: float = timeout_rate
+        self.advance_epoch: bool = advance_epoch
+
+        self.calls: int = 0
+        self.errors: int = 0
+
+        self._rng: random.Random = random.Random(seed)
+        self._lock: threading.Lock = threading.Lock()
+
+        self._current: dict = load_fixture("current.json")
+        self._forecast: dict = load_fixture("forecast.json")
+
+    def transport(self) -> httpx.MockTransport:
+        """Return an httpx transport that routes requests to this fake API."""
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            call: int = self.calls
+            self.calls += 1
+            roll: float = self._rng.random()
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if roll < self.timeout_rate:
+            with self._lock:
+                self.errors += 1
+            raise httpx.ReadTimeout("Injected read timeout", request=request)
+
+        if roll < self.timeout_rate + self.error_rate:
+            with self._lock:
+                self.errors += 1
+            return self._error(self.error_status, 9999, "Injected error.")
+
+        if not request.url.params.get("key"):
+            return self._error(401, 1002, "API key is invalid or not provided.")
+
+        query: str | None = request.url.params.get("q")
+        if not query:
+            return self._error(400, 1003, "Parameter q is missing.")
+
+        match request.url.path.rsplit("/", 1)[-1]:
+            case "current.json":
+                payload: dict = self._render_current(query=query, call=call)
+            case "forecast.json":
+                payload: dict = self._render_forecast(
+                    query=query,
+                    call=call,
+                    days=int(request.url.params.get("days", 1)),
+                    alerts=request.url.params.get("alerts") == "yes",
+                )
+            case "history.json" | "future.json":
+                if not request.url.params.get("dt"):
+                    return self._error(400, 1011, "Parameter dt is missing.")
+
+                payload: dict = self._render_history(
+                    query=query,
+                    date=request.url.params["dt"],
+                    end_date=request.url.params.get("end_dt"),
+                )
+            case _:
+                return self._error(400, 1005, "API request url is invalid.")
+
+        return httpx.Response(200, json=payload)
+
+    def _error(self, status_code: int, code: int, message: str) -> httpx.Response:
+        return httpx.Response(
+            status_code, json={"error": {"code": code, "message": message}}
+        )
+
+    def _location(self, query: str) -> dict:
+        location: dict = dict(self._current["location"])
+
+        try:
+            lat, lon = (float(part) for part in query.split(","))
+            location.update({"name": f"{lat:.2f},{lon:.2f}", "lat": lat, "lon": lon})
+        except ValueError:
+            location["name"] = query
+
+        return location
+
+    def _epoch_offset(self, call: int) -> int:
+        return call * self.UPDATE_INTERVAL if self.advance_epoch else 0
+
+    def _render_current(self, query: str, call: int) -> dict:
+        offset: int = self._epoch_offset(call)
+        current: dict = dict(self._current["current"])
+        current["last_updated_epoch"] += offset
+
+        location: dict = self._location(query)
+        location["localtime_epoch"] += offset
+
+        return {"location": location, "current": current}
+
+    def _render_forecast(self, query: str, call: int, days: int, alerts: bool) -> dict:
+        offset: int = self._epoch_offset(call)
+        payload: dict = copy.deepcopy(self._forecast)
+
+        payload["location"] = self._location(query)
+        payload["location"]["localtime_epoch"] += offset
+        payload["current"]["last_updated_epoch"] += offset
+
+        ## Repeat the recorded day to build multi-day forecasts
+        recorded_day: dict = payload["forecast"]["forecastday"][0]
+        forecast_days: list[dict] = []
+        for day in range(max(1, min(days, 10))):
+            forecast_day: dict = copy.deepcopy(recorded_day)
+            day_offset: int = offset + day * 86400
+            forecast_day["date_epoch"] += day_offset
+            for hour in forecast_day["hour"]:
+                hour["time_epoch"] += day_offset
+            forecast_days.append(forecast_day)
+        payload["forecast"]["forecastday"] = forecast_days
+
+        if not alerts:
+            payload["alerts"] = {"alert": []}
+
+        return payload
+
+    def _render_history(self, query: str, date: str, end_date: str | None) -> dict:
+        """Render the recorded day as each date from `date` to `end_date`.
+
+        Epochs depend only on the date, so re-requesting a date returns the same observations.
+        """
+        payload: dict = copy.deepcopy(self._forecast)
+        payload["location"] = self._location(query)
+        payload.pop("current", None)
+        payload.pop("alerts", None)
+
+        recorded_day: dict = payload["forecast"]["forecastday"][0]
+        recorded_date: dt.date = dt.date.fromisoformat(recorded_day["date"])
+        first: dt.date = dt.date.fromisoformat(date)
+        last: dt.date = dt.date.fromisoformat(end_date) if end_date else first
+
+        forecast_days: list[dict] = []
+        for day in range((last - first).days + 1):
+            day_date: dt.date = first + dt.timedelta(days=day)
+            day_offset: int = (day_date - recorded_date).days * 86400
+
+            forecast_day: dict = copy.deepcopy(recorded_day)
+            forecast_day["date"] = day_date.isoformat()
+            forecast_day["date_epoch"] += day_offset
+            for hour in forecast_day["hour"]:
+                hour["time_epoch"] += day_offset
+                hour["time"] = f"{day_date.isoformat()} {hour['time'].split(' ', 1)[1]}"
+            forecast_days.append(forecast_day)
+        payload["forecast"]["forecastday"] = forecast_days
+
+        return payload
+
+
+def location_queries(count: int) -> list[str]:
+    """Return `count` distinct `lat,lon` location queries spread across the globe."""
+    queries: list[str] = []
+    for i in range(count):
+        lat: float = -60 + (i * 7.3) % 120
+        lon: float = -180 + (i * 13.7) % 360
+        queries.append(f"{lat:.2f},{lon:.2f}")
+
+    return queries
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from weathersched import analytics
+from weathersched.domain.weather.forecast import ForecastJSONModel
+
+from factories import DAY_START, current_weather_model, location_model
+from fake_weatherapi import load_fixture
+import numpy as np
+import pytest
+import sqlalchemy.orm as so
+
+def test_moving_average_does_not_cross_groups():
+    values = np.array([1.0, 2.0, 3.0, 10.0, np.nan, 30.0])
+    groups = np.array([1, 1, 1, 2, 2, 2])
+
+    result = analytics.moving_average(values, window=2, groups=groups)
+
+    np.testing.assert_allclose(result, [1.0, 1.5, 2.5, 10.0, 10.0, 30.0])
+
+
+def test_anomaly_zscores_per_group():
+    values = np.array([1.0, 2.0, 3.0, 5.0, 5.0])
+    groups = np.array([1, 1, 1, 2, 2])
+
+    scores = analytics.anomaly_zscores(values, groups=groups)
+
+    np.testing.assert_allclose(scores[:3], [-1.224745, 0.0, 1.224745], rtol=1e-5)
+    ## No spread in group 2
+    assert np.isnan(scores[3:]).all()
+
+
+def test_dewpoint_and_heat_index():
+    np.testing.assert_allclose(
+        analytics.dewpoint_c(np.array([20.0, 30.0]), np.array([100.0, 50.0])),
+        [20.0, 18.44],
+        atol=0.05,
+    )
+    ## NWS heat index table: 90F & 70% RH -> 106F
+    assert analytics.heat_index_c(np.array([32.22]), np.array([70.0]))[0] == pytest.approx(
+        (106 - 32) * 5 / 9, abs=0.5
+    )
+
+
+def test_align_nearest_respects_groups_and_tolerance():
+    matches = analytics.align_nearest(
+        target_groups=np.array([1, 1, 2, 3]),
+        target_epochs=np.array([100, 5000, 100, 100]),
+        source_groups=np.array([1, 1, 2]),
+        source_epochs=np.array([0, 150, 4000]),
+        tolerance=1800,
+    )
+
+    np.testing.assert_array_equal(matches, [1, -1, -1, -1])
+
+
+def test_forecast_vs_actual(db_session: so.Session):
+    location = location_model(db_session)
+    forecast: dict = load_fixture("forecast.json")
+    issued_epoch: int = forecast["current"]["last_updated_epoch"]
+
+    db_session.add(ForecastJSONModel(forecast_json=forecast))
+    db_session.add_all(
+        [
+            current_weather_model(location.id, issued_epoch + 3600 + 600, temp_c=15.0),
+            current_weather_model(location.id, issued_epoch + 7200 - 300, temp_c=13.0),
+        ]
+    )
+    db_session.commit()
+
+    observations = analytics.load_observations(db_session, fields=["temp_c"])
+    forecast_hours = analytics.load_forecast_hours(db_session, fields=["temp_c"])
+    assert len(forecast_hours) == 24
+
+    comparison = analytics.compare_forecast_to_observations(
+        forecast_hours, observations, tolerance=1800
+    )
+    np.testing.assert_array_equal(comparison.lead_hours, [1, 2])
+
+    summary = analytics.error_by_lead(comparison.errors("temp_c"), comparison.lead_hours)
+    np.testing.assert_allclose(summary["bias"], [14.0 - 15.0, 13.9 - 13.0])
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import datetime as dt
+
+import pytest
+
+## The API is an optional extra
+pytest.importorskip("fastapi")
+pytest.importorskip("aiosqlite")
+
+from weathersched.api import (
+    TTLCache,
+    create_app,
+    get_async_engine,
+    get_async_session_pool,
+)
+from weathersched.domain.weather.forecast import ForecastJSONModel
+from weathersched.domain.weather.observation_changes import ObservationChangeModel
+
+from factories import DAY_START, current_weather_model, location_model
+from fake_weatherapi import load_fixture
+from fastapi.testclient import TestClient
+import sqlalchemy.orm as so
+
+@pytest.fixture
+def api(db_session: so.Session):
+    engine = get_async_engine(db_session.get_bind().url)
+    app = create_app(
+        session_pool=get_async_session_pool(engine), cache=TTLCache(ttl=60)
+    )
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def london(db_session: so.Session):
+    location = location_model(db_session, "London")
+    db_session.add_all(
+        current_weather_model(location.id, DAY_START + i * 900, temp_c=i)
+        for i in range(8)
+    )
+    db_session.commit()
+
+    return location
+
+
+def test_current_weather_is_latest_observation(api: TestClient, london):
+    res = api.get(f"/locations/{london.id}/current")
+
+    assert res.status_code == 200
+    assert res.json()["last_updated_epoch"] == DAY_START + 7 * 900
+    assert res.json()["condition"]["code"] == 1000
+    assert res.json()["air_quality"] is None
+
+    assert api.get("/locations/999/current").status_code == 404
+
+
+def test_responses_are_cached_with_etags(
+    api: TestClient, london, db_session: so.Session
+):
+    first = api.get(f"/locations/{london.id}/current")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "public, max-age=60"
+
+    ## Served from the cache until the TTL expires, so the new observation is not seen yet
+    db_session.add(current_weather_model(london.id, DAY_START + 8 * 900))
+    db_session.commit()
+    assert api.get(f"/locations/{london.id}/current").json() == first.json()
+
+    not_modified = api.get(
+        f"/locations/{london.id}/current", headers={"If-None-Match": etag}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    api.app.state.cache.clear()
+    assert (
+        api.get(f"/locations/{london.id}/current").json()["last_updated_epoch"]
+        == DAY_START + 8 * 900
+    )
+
+
+def test_history_range(api: TestClient, london):
+    res = api.get(
+        f"/locations/{london.id}/history",
+        params={"start": DAY_START + 900, "end": DAY_START + 3 * 900},
+    )
+
+    assert [row["temp_c"] for row in res.json()] == [1, 2, 3]
+    assert "etag" in res.headers
+
+
+def test_long_history_ranges_are_streamed(api: TestClient, london):
+    res = api.get(
+        f"/locations/{london.id}/history",
+        params={"start": DAY_START - 365 * 86400, "end": DAY_START + 86400},
+    )
+
+    assert res.status_code == 200
+    assert "etag" not in res.headers
+    assert [row["last_updated_epoch"] for row in res.json()] == [
+        DAY_START + i * 900 for i in range(8)
+    ]
+
+
+def test_failed_renders_do_not_keep_locks(api: TestClient):
+    for location_id in range(1000, 1010):
+        assert api.get(f"/locations/{location_id}/forecast").status_code == 404
+
+    assert api.app.state.cache._locks == {}
+
+
+def test_forecast_and_alerts(api: TestClient, db_session: so.Session):
+    forecast_json = load_fixture("forecast.json")
+    location = location_model(db_session, forecast_json["location"]["name"])
+    paris = location_model(db_session, "Paris", lat=48.87, lon=2.33)
+    db_session.add(ForecastJSONModel(forecast_json=forecast_json, location_id=location.id))
+    ## Many newer forecasts for another location don't hide it
+    db_session.add_all(
+        ForecastJSONModel(forecast_json=dict(forecast_json, n=i), location_id=paris.id)
+        for i in range(300)
+    )
+    db_session.commit()
+
+    res = api.get(f"/locations/{location.id}/forecast")
+    assert res.status_code == 200
+    assert res.json()["forecast"] == forecast_json["forecast"]
+
+    assert api.get(f"/locations/{location.id}/alerts").json() == []
+
+
+def test_locations(api: TestClient, london):
+    res = api.get("/locations")
+
+    assert [location["name"] for location in res.json()] == ["London"]
+    assert api.get(f"/locations/{london.id}").json()["lat"] == 51.52
+
+
+def test_change_feed_is_paged_by_sequence_id(
+    api: TestClient, london, db_session: so.Session
+):
+    db_session.add_all(
+        ObservationChangeModel(
+            location_id=london.id,
+            last_updated_epoch=DAY_START + i * 900,
+            changes={"temp_c": {"from": i - 1, "to": i}},
+            snapshot={"temp_c": i},
+            created_at=dt.datetime.now(tz=dt.timezone.utc),
+        )
+        for i in range(3)
+    )
+    db_session.commit()
+
+    first_page = api.get("/changes", params={"limit": 2}).json()
+    assert [entry["snapshot"]["temp_c"] for entry in first_page] == [0, 1]
+
+    second_page = api.get("/changes", params={"since": first_page[-1]["id"]}).json()
+    assert [entry["snapshot"]["temp_c"] for entry in second_page] == [2]
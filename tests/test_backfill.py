@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from weathersched.collector import backfill, run_backfill
+from weathersched.core import db, http_lib
+from weathersched.domain.backfill_checkpoint import BackfillCheckpointModel
+from weathersched.domain.weather.current import CurrentWeatherModel
+from weathersched.domain.weather.forecast import ForecastJSONModel
+
+from fake_weatherapi import FakeWeatherAPI
+import httpx
+import sqlalchemy as sa
+
+START: dt.date = dt.date(2024, 11, 1)
+END: dt.date = dt.date(2024, 11, 3)
+
+
+def _backfill(session_pool, fake: FakeWeatherAPI, locations: list[str], **kwargs):
+    return run_backfill(
+        locations,
+        start=START,
+        end=END,
+        session_pool=session_pool,
+        api_key="fake",
+        workers=4,
+        rate=0,
+        persist_every=2,
+        transport=fake.transport(),
+        **kwargs,
+    )
+
+
+def test_backfill_resumes_from_checkpoints(clean_db: sa.Engine):
+    session_pool = db.get_session_pool(engine=clean_db)
+    fake = FakeWeatherAPI(advance_epoch=False)
+
+    first = _backfill(session_pool, fake, ["London"])
+    assert (first.requested, first.fetched, first.failed) == (3, 3, 0)
+    assert first.observations == 3 * 24
+    assert fake.calls == 3
+
+    ## A restart only requests the dates that were not checkpointed
+    result = _backfill(session_pool, fake, ["London", "Paris"])
+    assert (result.requested, result.skipped, result.fetched) == (6, 3, 3)
+    assert fake.calls == 6
+
+    with session_pool() as session:
+        assert session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 6 * 24
+        assert (
+            session.scalar(sa.select(sa.func.count(BackfillCheckpointModel.id))) == 6
+        )
+
+        first_hour = session.scalar(
+            sa.select(sa.func.min(CurrentWeatherModel.last_updated_epoch))
+        )
+        assert first_hour == int(
+            dt.datetime(2024, 11, 1, tzinfo=dt.timezone.utc).timestamp()
+        )
+
+
+def test_backfill_retries_failed_dates(clean_db: sa.Engine):
+    session_pool = db.get_session_pool(engine=clean_db)
+    fake = FakeWeatherAPI(advance_epoch=False, error_rate=0.5, seed=3)
+
+    first = _backfill(session_pool, fake, ["London", "Paris"])
+    assert first.failed > 0
+    assert first.fetched + first.failed == 6
+
+    fake.error_rate = 0
+    second = _backfill(session_pool, fake, ["London", "Paris"])
+    assert second.skipped == first.fetched
+    assert second.fetched == first.failed
+
+
+def test_future_backfill_saves_forecasts(clean_db: sa.Engine):
+    session_pool = db.get_session_pool(engine=clean_db)
+    fake = FakeWeatherAPI()
+
+    result = _backfill(session_pool, fake, ["London"], endpoint=backfill.FUTURE)
+    assert result.fetched == 3
+
+    with session_pool() as session:
+        assert session.scalar(sa.select(sa.func.count(ForecastJSONModel.id))) == 3
+        assert session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 0
+
+
+def test_rate_limiter_spaces_requests():
+    now: list[float] = [0.0]
+
+    def sleep(seconds: float) -> None:
+        now[0] += seconds
+
+    limiter = http_lib.RateLimiter(rate=5, burst=2, clock=lambda: now[0], sleep=sleep)
+    for _ in range(12):
+        limiter.acquire()
+
+    ## 2 requests in the initial burst, then one every 0.2s
+    assert round(now[0], 6) == 2.0
+
+
+def test_rate_limited_transport_takes_a_token_per_request():
+    waits: list[float] = []
+    limiter = http_lib.RateLimiter(rate=1, burst=3, clock=lambda: 0.0, sleep=waits.append)
+    transport = http_lib.RateLimitedTransport(
+        httpx.MockTransport(lambda request: httpx.Response(204)), limiter
+    )
+
+    with httpx.Client(transport=transport) as client:
+        for _ in range(4):
+            assert client.get("https://example.com").status_code == 204
+
+    ## The 4th request waits for a token
+    assert waits == [1.0]
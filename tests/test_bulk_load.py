@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import csv
+
+from weathersched.domain.weather.current import (
+    CurrentWeatherAirQualityModel,
+    CurrentWeatherConditionModel,
+    CurrentWeatherIn,
+    CurrentWeatherModel,
+)
+from weathersched.ingest import bulk, bulk_load_current_weather, current_weather_row
+
+from factories import DAY_START, location_model
+from fake_weatherapi import load_fixture
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+import sqlalchemy.orm as so
+
+def history_rows(location_id: int, count: int, air_quality: bool = True):
+    current: dict = load_fixture("current.json")["current"]
+    if not air_quality:
+        current.pop("air_quality", None)
+
+    for i in range(count):
+        weather = CurrentWeatherIn.model_validate(
+            {**current, "last_updated_epoch": DAY_START + i * 900}
+        )
+        yield current_weather_row(weather, location_id=location_id)
+
+
+def test_bulk_load_skips_stored_observations(db_session: so.Session):
+    london = location_model(db_session, "London")
+    paris = location_model(db_session, "Paris", lat=48.87, lon=2.33)
+
+    ## Both locations share the same update epochs
+    rows = [*history_rows(london.id, 250), *history_rows(paris.id, 250)]
+    assert bulk_load_current_weather(db_session, rows, chunk_size=100) == 500
+    assert bulk_load_current_weather(db_session, rows, chunk_size=100) == 0
+
+    assert db_session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 500
+    assert (
+        db_session.scalar(sa.select(sa.func.count(CurrentWeatherConditionModel.id)))
+        == 500
+    )
+    assert (
+        db_session.scalar(sa.select(sa.func.count(CurrentWeatherAirQualityModel.id)))
+        == 500
+    )
+
+    weather = db_session.scalars(
+        sa.select(CurrentWeatherModel).where(CurrentWeatherModel.location_id == paris.id)
+    ).first()
+    assert weather.condition.text
+    assert weather.air_quality.weather_id == weather.id
+
+
+def test_copy_csv_matches_staging_table():
+    dialect = postgresql.psycopg2.dialect()
+    rows = list(history_rows(1, 3, air_quality=False))
+    rows[0]["wind_dir"] = ""
+
+    records = list(csv.reader(bulk.render_copy_csv(rows, dialect=dialect)))
+    columns: int = 2 + sum(
+        len(names)
+        for names in (
+            bulk.WEATHER_COLUMNS,
+            bulk.CONDITION_COLUMNS,
+            bulk.AIR_QUALITY_COLUMNS,
+        )
+    )
+
+    assert len(records) == 3
+    assert len(records[0]) == columns
+    assert "air_quality_gb_defra_index NUMERIC" in bulk.staging_table_ddl(dialect)
+    assert records[0][:2] == ["0", "f"]
+    assert records[0][-1] == bulk.COPY_NULL
+    assert "" in records[0]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from weathersched.domain.weather.current import CurrentWeatherIn
+from weathersched.domain.weather.observation_changes import ObservationChangeRepository
+from weathersched.ingest.changes import record_changes
+
+from factories import DAY_START, location_model
+from fake_weatherapi import load_fixture
+import sqlalchemy.orm as so
+
+THRESHOLDS: dict[str, float] = {"temp_c": 1.0, "condition_code": 0, "us_epa_index": 0}
+
+
+def observation(step: int, **overrides) -> CurrentWeatherIn:
+    current: dict = load_fixture("current.json")["current"]
+    current.update(last_updated_epoch=DAY_START + step * 900, **overrides)
+
+    return CurrentWeatherIn.model_validate(current)
+
+
+def test_changes_beyond_thresholds_are_recorded(db_session: so.Session):
+    london = location_model(db_session, "London")
+    first: CurrentWeatherIn = observation(0, temp_c=10.0)
+
+    ## First observation is a full snapshot
+    assert record_changes(db_session, [(london.id, first)], THRESHOLDS) == 1
+
+    ## 0.4C per update: nothing until the drift from the last recorded snapshot reaches 1C
+    drifts: list[int] = [
+        record_changes(
+            db_session, [(london.id, observation(i, temp_c=10.0 + 0.4 * i))], THRESHOLDS
+        )
+        for i in range(1, 4)
+    ]
+    assert drifts == [0, 0, 1]
+
+    rain: CurrentWeatherIn = observation(
+        4, temp_c=11.2, condition={**first.condition.model_dump(), "code": 1063}
+    )
+    assert record_changes(db_session, [(london.id, rain)], THRESHOLDS) == 1
+    db_session.commit()
+
+    entries = ObservationChangeRepository(db_session).since()
+    assert [entry.changes for entry in entries[1:]] == [
+        {"temp_c": {"from": 10.0, "to": 11.2}},
+        {"condition_code": {"from": first.condition.code, "to": 1063}},
+    ]
+    assert entries[0].changes["temp_c"] == {"from": None, "to": 10.0}
+    assert entries[-1].snapshot == {
+        "temp_c": 11.2,
+        "condition_code": 1063,
+        "us_epa_index": first.air_quality.us_epa_index,
+    }
+
+
+def test_out_of_order_observations_are_skipped(db_session: so.Session):
+    london = location_model(db_session, "London")
+
+    record_changes(db_session, [(london.id, observation(4, temp_c=10.0))], THRESHOLDS)
+    assert (
+        record_changes(db_session, [(london.id, observation(2, temp_c=20.0))], THRESHOLDS)
+        == 0
+    )
+
+
+def test_since_pages_by_sequence_id(db_session: so.Session):
+    london = location_model(db_session, "London")
+    paris = location_model(db_session, "Paris", lat=48.87, lon=2.33)
+
+    record_changes(
+        db_session,
+        [
+            (location.id, observation(i, temp_c=float(i * 5)))
+            for i in range(3)
+            for location in (london, paris)
+        ],
+        THRESHOLDS,
+    )
+    db_session.commit()
+
+    repo = ObservationChangeRepository(db_session)
+    first_page = repo.since(limit=4)
+    second_page = repo.since(first_page[-1].id, limit=4)
+
+    assert len(first_page) == 4
+    assert len(second_page) == 2
+    assert [entry.id for entry in first_page + second_page] == sorted(
+        entry.id for entry in first_page + second_page
+    )
+    assert {entry.location_id for entry in repo.since(location_ids=[paris.id])} == {
+        paris.id
+    }
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import struct
+
+from weathersched.core.db import compress_json, decompress_json
+from weathersched.core.db.types import (
+    load_zstd_dictionary,
+    train_zstd_dictionary,
+)
+from weathersched.domain.weather.forecast import (
+    ForecastJSONIn,
+    ForecastJSONModel,
+    ForecastJSONRepository,
+)
+
+from fake_weatherapi import load_fixture
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+def test_repository_round_trip_is_compressed(db_session: so.Session):
+    forecast: dict = load_fixture("forecast.json")
+
+    repo = ForecastJSONRepository(session=db_session)
+    saved: ForecastJSONModel = repo.create(
+        ForecastJSONModel(**ForecastJSONIn(forecast_json=forecast).model_dump())
+    )
+    db_session.expire_all()
+
+    assert repo.get(saved.id).forecast_json == forecast
+
+    stored: bytes = db_session.execute(
+        sa.text("SELECT forecast_json FROM weatherapi_forecast_json WHERE id = :id"),
+        {"id": saved.id},
+    ).scalar_one()
+    assert len(stored) < len(json.dumps(forecast)) / 4
+
+
+def test_legacy_uncompressed_values_are_readable():
+    value: dict = {"location": {"name": "London"}}
+
+    assert decompress_json(json.dumps(value)) == value
+    assert decompress_json(json.dumps(value).encode()) == value
+
+
+@pytest.mark.parametrize("codec", ["zlib", "zstd"])
+def test_codecs_round_trip(codec: str):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+
+    value: dict = load_fixture("forecast.json")
+
+    assert decompress_json(compress_json(value, codec=codec)) == value
+
+
+def test_zstd_dictionary_round_trip(tmp_path: Path):
+    pytest.importorskip("zstandard")
+
+    forecast: dict = load_fixture("forecast.json")
+    samples: list[dict] = []
+    for i in range(200):
+        sample: dict = json.loads(json.dumps(forecast))
+        sample["location"]["name"] = f"Location {i}"
+        sample["current"]["temp_c"] = i / 10
+        samples.append(sample)
+
+    dict_path: Path = train_zstd_dictionary(
+        samples, output_file=tmp_path / "forecast.dict", dict_size=16_384
+    )
+    compressed: bytes = compress_json(
+        forecast, codec="zstd", zstd_dict_path=str(dict_path)
+    )
+
+    assert decompress_json(compressed, zstd_dict_path=str(dict_path)) == forecast
+    with pytest.raises(ValueError):
+        decompress_json(compressed)
+
+
+def test_rows_written_with_an_older_dictionary_stay_readable(tmp_path: Path):
+    pytest.importorskip("zstandard")
+
+    forecast: dict = load_fixture("forecast.json")
+    dict_dir: Path = tmp_path / "zstd"
+
+    def train(name: str, offset: int) -> Path:
+        samples: list[dict] = []
+        for i in range(200):
+            sample: dict = json.loads(json.dumps(forecast))
+            sample["location"]["name"] = f"Location {offset + i}"
+            sample["current"]["condition"]["text"] = f"Condition {offset + i}"
+            samples.append(sample)
+
+        return train_zstd_dictionary(
+            samples, output_file=dict_dir / name, dict_size=16_384
+        )
+
+    old_dict: Path = train("forecast_json_2024-01-01.dict", offset=0)
+    old_value: bytes = compress_json(
+        forecast, codec="zstd", zstd_dict_path=str(old_dict)
+    )
+
+    new_dict: Path = train("forecast_json_2024-06-01.dict", offset=1000)
+    new_value: bytes = compress_json(
+        forecast, codec="zstd", zstd_dict_path=str(dict_dir)
+    )
+
+    old_id: int = load_zstd_dictionary(str(old_dict)).dict_id()
+    new_id: int = load_zstd_dictionary(str(new_dict)).dict_id()
+    assert old_id != new_id
+    ## New values are compressed with the newest dictionary
+    assert struct.unpack(">I", new_value[1:5]) == (new_id,)
+
+    for config in (str(dict_dir), [str(old_dict), str(new_dict)]):
+        assert decompress_json(old_value, zstd_dict_path=config) == forecast
+        assert decompress_json(new_value, zstd_dict_path=config) == forecast
+
+    with pytest.raises(ValueError):
+        decompress_json(old_value, zstd_dict_path=str(new_dict))
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import threading
+
+from weathersched.collector import (
+    HIGH_PRIORITY,
+    AdaptivePollingPolicy,
+    Dispatcher,
+    Job,
+    current_weather_job,
+)
+
+from factories import DAY_START
+from fake_weatherapi import FakeWeatherAPI
+
+class FakeClock:
+    def __init__(self, now: float = DAY_START) -> None:
+        self.now: float = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_due_jobs_run_by_priority():
+    clock = FakeClock()
+    dispatcher = Dispatcher(workers=1, clock=clock)
+    ran: list[str] = []
+
+    def record(name: str) -> None:
+        ran.append(name)
+
+    for name, priority, due in [
+        ("low", 10, DAY_START - 60),
+        ("vip", HIGH_PRIORITY, DAY_START),
+        ("later", HIGH_PRIORITY, DAY_START + 60),
+    ]:
+        dispatcher.submit(
+            Job(
+                name=name,
+                func=record,
+                kwargs={"name": name},
+                priority=priority,
+                due=due,
+            )
+        )
+
+    assert dispatcher.run_pending() == 2
+    assert ran == ["vip", "low"]
+    assert len(dispatcher) == 1
+
+
+def test_missed_deadlines_drop_or_reschedule():
+    clock = FakeClock()
+    dispatcher = Dispatcher(clock=clock)
+    ran: list[str] = []
+
+    def record(name: str) -> None:
+        ran.append(name)
+
+    dispatcher.submit(
+        Job(
+            name="once",
+            func=record,
+            kwargs={"name": "once"},
+            due=DAY_START - 120,
+            deadline=60,
+        )
+    )
+    dispatcher.submit(
+        Job(
+            name="every",
+            func=record,
+            kwargs={"name": "every"},
+            due=DAY_START - 1000,
+            deadline=120,
+            interval=300,
+        )
+    )
+
+    ## "every" skips to its next run that can still meet the deadline: DAY_START - 100
+    assert dispatcher.run_pending() == 1
+    assert ran == ["every"]
+    assert dispatcher.missed == 2
+    assert dispatcher.next_due() == DAY_START - 100 + 300
+
+
+def test_run_executes_on_workers_until_empty():
+    dispatcher = Dispatcher(workers=4, tick=0.01)
+    threads: set[str] = set()
+    lock = threading.Lock()
+
+    def work() -> None:
+        with lock:
+            threads.add(threading.current_thread().name)
+
+    for i in range(20):
+        dispatcher.submit(Job(name=f"job-{i}", func=work))
+
+    dispatcher.run(until_empty=True)
+
+    assert dispatcher.completed == 20
+    assert all(name.startswith("collector") for name in threads)
+
+
+def test_current_weather_job_follows_polling_policy():
+    fake = FakeWeatherAPI()
+    clock = FakeClock()
+    policy = AdaptivePollingPolicy(grace=60, default_interval=900)
+    dispatcher = Dispatcher(clock=clock)
+    policy.track("London", now=DAY_START)
+
+    job = dispatcher.submit(
+        current_weather_job(
+            "London",
+            policy=policy,
+            api_key="fake",
+            save_to_db=False,
+            transport=fake.transport(),
+        )
+    )
+
+    assert dispatcher.run_pending() == 1
+    assert fake.calls == 1
+    assert job.due == policy.states["London"].next_poll_epoch
+
+
+class CountingEvent(threading.Event):
+    """A stop event that counts dispatcher loop passes."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.checks: int = 0
+
+    def is_set(self) -> bool:
+        self.checks += 1
+        return super().is_set()
+
+
+def test_busy_workers_do_not_spin():
+    dispatcher = Dispatcher(workers=1, tick=1.0)
+    release = threading.Event()
+
+    for i in range(3):
+        dispatcher.submit(Job(name=f"slow-{i}", func=release.wait, kwargs={"timeout": 0.1}))
+
+    stop = CountingEvent()
+    dispatcher.run(stop=stop, until_empty=True)
+
+    assert dispatcher.completed == 3
+    ## Roughly one pass per finished job, not one per spin of the loop while the worker is busy
+    assert stop.checks < 20
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from weathersched.analytics import score_forecasts
+from weathersched.domain.weather.forecast import ForecastJSONModel
+from weathersched.domain.weather.forecast_scores import ForecastScoreRepository
+
+from factories import current_weather_model, location_model
+from fake_weatherapi import load_fixture
+import pytest
+import sqlalchemy.orm as so
+
+def test_only_closed_forecasts_are_scored(db_session: so.Session):
+    location = location_model(db_session)
+    forecast: dict = load_fixture("forecast.json")
+    hours: list[dict] = forecast["forecast"]["forecastday"][0]["hour"]
+    issued_epoch: int = forecast["current"]["last_updated_epoch"]
+
+    db_session.add(ForecastJSONModel(forecast_json=forecast))
+    ## Observations 1 degree warmer than forecast, for every hour after the forecast was issued
+    db_session.add_all(
+        [
+            current_weather_model(
+                location.id, hour["time_epoch"], temp_c=hour["temp_c"] + 1
+            )
+            for hour in hours
+            if issued_epoch < hour["time_epoch"] < hours[-1]["time_epoch"]
+        ]
+    )
+    db_session.commit()
+
+    ## The last forecast hour has not been observed yet
+    assert score_forecasts(session=db_session, fields=["temp_c"]) == 0
+
+    db_session.add(
+        current_weather_model(
+            location.id, hours[-1]["time_epoch"] + 1800, temp_c=hours[-1]["temp_c"] + 1
+        )
+    )
+    db_session.commit()
+
+    assert score_forecasts(session=db_session, fields=["temp_c"]) == 9
+    ## Already scored
+    assert score_forecasts(session=db_session, fields=["temp_c"]) == 0
+
+    scores = ForecastScoreRepository(db_session).get_for_location(location.id)
+    assert [score.lead_hours for score in scores] == list(range(1, 10))
+    assert all(score.bias == pytest.approx(-1) for score in scores)
+    assert all(score.rmse == pytest.approx(1) for score in scores)
+
+    summary = ForecastScoreRepository(db_session).summary_by_lead("temp_c")
+    assert summary[0]["mae"] == pytest.approx(1)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from weathersched.domain.location import LocationIn, LocationModel, LocationRepository
+
+from factories import DAY_START, location_model
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+def _location(name: str, country: str = "United Kingdom") -> LocationIn:
+    return LocationIn(
+        name=name,
+        region="",
+        country=country,
+        lat=51.52,
+        lon=-0.11,
+        tz_id="Europe/London",
+        localtime_epoch=DAY_START,
+        localtime="2024-11-01 00:00",
+    )
+
+
+@pytest.fixture
+def statements(db_session: so.Session) -> list[str]:
+    """Record the SQL statements executed on the test session's engine."""
+    executed: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany) -> None:
+        executed.append(statement)
+
+    engine: sa.Engine = db_session.get_bind()
+    sa.event.listen(engine, "before_cursor_execute", _record)
+    yield executed
+    sa.event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_get_by_country_and_state_matches_both(db_session: so.Session):
+    location_model(db_session, "London")
+    paris = location_model(db_session, "Paris", lat=48.87, lon=2.33)
+    paris.country = "France"
+    location_model(db_session, "Manchester", lat=53.48, lon=-2.24)
+    db_session.commit()
+
+    repo = LocationRepository(db_session)
+
+    assert repo.get_by_country_and_state("Manchester", "United Kingdom").name == (
+        "Manchester"
+    )
+    assert repo.get_by_country_and_state("Paris", "United Kingdom") is None
+
+
+def test_bulk_get_or_create_uses_two_statements(
+    db_session: so.Session, statements: list[str]
+):
+    existing_id: int = location_model(db_session, "Location 0").id
+    locations = [_location(f"Location {i}") for i in range(1000)]
+    repo = LocationRepository(db_session)
+
+    statements.clear()
+    ids = repo.bulk_get_or_create([*locations, locations[1]])
+
+    assert len(ids) == 1000
+    assert ids[("Location 0", "United Kingdom")] == existing_id
+    ## One lookup & one insert
+    assert [statement.split(None, 1)[0] for statement in statements] == [
+        "SELECT",
+        "INSERT",
+    ]
+
+    assert db_session.scalar(sa.select(sa.func.count(LocationModel.id))) == 1000
+    assert db_session.scalar(
+        sa.select(LocationModel.geohash).where(LocationModel.name == "Location 999")
+    )
+
+    ## Everything is stored now, so only the lookup runs
+    statements.clear()
+    assert repo.bulk_get_or_create(locations) == ids
+    assert len(statements) == 1
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from weathersched.collector import collapse_locations
+from weathersched.domain.location import (
+    LocationIndex,
+    LocationRepository,
+    geohash_encode,
+    haversine_km,
+)
+
+from factories import location_model
+import numpy as np
+import pytest
+import sqlalchemy.orm as so
+
+def test_geohash_encode():
+    ## Reference value from the original geohash.org implementation
+    assert geohash_encode(57.64911, 10.40744, precision=11) == "u4pruydqqvj"
+
+
+def test_location_index_matches_brute_force():
+    rng = np.random.default_rng(7)
+    lats = rng.uniform(-90, 90, 500)
+    lons = rng.uniform(-180, 180, 500)
+    index = LocationIndex(ids=range(500), lats=lats, lons=lons, leaf_size=8)
+
+    for lat, lon in [(51.5, -0.1), (-33.9, 151.2), (89.9, 179.9), (0.0, -179.99)]:
+        distances = haversine_km(lat, lon, lats, lons)
+        expected = np.argsort(distances)[:5].tolist()
+
+        result = index.nearest(lat, lon, k=5)
+
+        assert [id for id, _ in result] == expected
+        np.testing.assert_allclose(
+            [distance for _, distance in result], distances[expected], rtol=1e-6
+        )
+        assert sorted(id for id, _ in index.within(lat, lon, 2000)) == sorted(
+            np.flatnonzero(distances <= 2000).tolist()
+        )
+
+
+def test_repository_nearest(db_session: so.Session):
+    london = location_model(db_session, name="London", lat=51.52, lon=-0.11)
+    location_model(db_session, name="Paris", lat=48.87, lon=2.33)
+    repo = LocationRepository(db_session)
+
+    assert london.geohash == geohash_encode(51.52, -0.11)
+    assert repo.get_by_geohash_prefix(london.geohash[:4]) == [london]
+
+    (nearest, distance), *_ = repo.nearest(lat=51.5, lon=-0.12, k=2)
+    assert nearest.name == "London"
+    assert distance == pytest.approx(2.3, abs=0.1)
+    assert repo.nearest(lat=48.0, lon=2.0, max_distance_km=50) == []
+
+    ## The cached index picks up new locations
+    location_model(db_session, name="Luton", lat=51.88, lon=-0.42)
+    assert repo.nearest(lat=51.9, lon=-0.4)[0][0].name == "Luton"
+
+
+def test_collapse_locations():
+    groups = collapse_locations(
+        ["London", "51.52,-0.11", "48.85,2.35", "51.521,-0.112", "London"],
+        radius_km=1.0,
+    )
+
+    assert groups == {
+        "London": ["London"],
+        "51.52,-0.11": ["51.52,-0.11", "51.521,-0.112"],
+        "48.85,2.35": ["48.85,2.35"],
+    }
+    assert len(collapse_locations(["51.52,-0.11", "51.521,-0.112"], radius_km=0)) == 2
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from weathersched.core.db import Measurement, alter_measurement_storage
+from weathersched.core.db.measurement_storage import reflected_storage
+from weathersched.domain.weather.current import CurrentWeatherModel
+
+from factories import current_weather_model, location_model
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+def test_measurements_are_rounded_floats(db_session: so.Session):
+    location = location_model(db_session)
+    db_session.add(current_weather_model(location.id, 1730419200, temp_c=11.456))
+    db_session.commit()
+    db_session.expire_all()
+
+    weather: CurrentWeatherModel = db_session.scalars(
+        sa.select(CurrentWeatherModel)
+    ).one()
+
+    assert type(weather.temp_c) is float
+    assert weather.temp_c == 11.46
+
+
+@pytest.mark.parametrize(
+    "storage, type_name",
+    [("numeric", "NUMERIC(12, 2)"), ("float32", "REAL"), ("float64", "DOUBLE")],
+)
+def test_measurement_storage_types(storage: str, type_name: str):
+    column_type = Measurement(storage=storage).load_dialect_impl(
+        sa.create_engine("sqlite://").dialect
+    )
+
+    assert str(column_type) == type_name
+
+
+def test_unsupported_measurement_storage():
+    with pytest.raises(ValueError):
+        Measurement(storage="decimal128")
+
+
+def test_alter_measurement_storage(tmp_path):
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'storage.sqlite3'}")
+    metadata = sa.MetaData()
+    sa.Table(
+        "readings",
+        metadata,
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("temp_c", Measurement(storage="numeric")),
+        sa.Column("label", sa.String),
+    )
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(sa.text("INSERT INTO readings (temp_c, label) VALUES (11.46, 'a')"))
+
+    assert alter_measurement_storage(engine, storage="float64", metadata=metadata) == {
+        "readings": ["temp_c"]
+    }
+    ## Columns already in the target storage are left alone
+    assert alter_measurement_storage(engine, storage="float64", metadata=metadata) == {}
+
+    (column,) = [
+        c for c in sa.inspect(engine).get_columns("readings") if c["name"] == "temp_c"
+    ]
+    assert reflected_storage(column["type"]) == "float64"
+    with engine.connect() as conn:
+        assert conn.scalar(sa.text("SELECT temp_c FROM readings")) == 11.46
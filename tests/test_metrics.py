@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from weathersched.core import metrics
+from weathersched.domain.location import LocationModel, LocationRepository
+
+from factories import location_model
+import pytest
+import sqlalchemy.orm as so
+
+@pytest.fixture
+def registry() -> metrics.MetricsRegistry:
+    _registry = metrics.MetricsRegistry()
+    previous = metrics.set_registry(_registry)
+
+    yield _registry
+
+    metrics.set_registry(previous)
+
+
+def test_registry_returns_existing_instrument(registry: metrics.MetricsRegistry):
+    counter = registry.counter("requests_total")
+
+    assert registry.counter("requests_total") is counter
+    with pytest.raises(TypeError):
+        registry.gauge("requests_total")
+
+
+def test_noop_registry_records_nothing():
+    registry = metrics.NoopRegistry()
+
+    registry.counter("requests_total").inc(stage="fetch")
+    registry.histogram("duration_seconds").observe(0.1)
+
+    assert registry.counter("requests_total").value(stage="fetch") == 0
+    for instrument in registry.instruments():
+        assert instrument.samples() == []
+
+
+def test_counter_and_gauge_exposition(registry: metrics.MetricsRegistry):
+    counter = registry.counter("requests_total", description="Requests sent.")
+    counter.inc(endpoint="current")
+    counter.inc(2, endpoint="current")
+    counter.inc(endpoint='fore"cast')
+
+    gauge = registry.gauge("queue_depth")
+    gauge.set(5)
+    gauge.dec(2)
+
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+    lines = metrics.render_prometheus_text(registry).splitlines()
+
+    assert lines == [
+        "# TYPE queue_depth gauge",
+        "queue_depth 3",
+        "# HELP requests_total Requests sent.",
+        "# TYPE requests_total counter",
+        'requests_total{endpoint="current"} 3',
+        'requests_total{endpoint="fore\\"cast"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative(registry: metrics.MetricsRegistry):
+    histogram = registry.histogram("duration_seconds", buckets=(1.0, 0.1))
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, stage="decode")
+
+    assert histogram.buckets == (0.1, 1.0)
+    assert histogram.count(stage="decode") == 4
+    assert histogram.sum(stage="decode") == pytest.approx(3.65)
+
+    lines = metrics.render_prometheus_text(registry).splitlines()
+
+    assert lines[1:] == [
+        'duration_seconds_bucket{stage="decode",le="0.1"} 2',
+        'duration_seconds_bucket{stage="decode",le="1.0"} 3',
+        'duration_seconds_bucket{stage="decode",le="+Inf"} 4',
+        'duration_seconds_sum{stage="decode"} 3.65',
+        'duration_seconds_count{stage="decode"} 4',
+    ]
+
+
+def test_time_stage_observes_stage_histogram(registry: metrics.MetricsRegistry):
+    with metrics.time_stage("validate", endpoint="current"):
+        pass
+
+    histogram = registry.histogram(metrics.STAGE_HISTOGRAM_NAME)
+    assert histogram.count(stage="validate", endpoint="current") == 1
+
+
+def test_write_metrics_file(registry: metrics.MetricsRegistry, tmp_path):
+    registry.counter("requests_total").inc()
+
+    prom_file = metrics.write_metrics_file(
+        output_file=tmp_path / "metrics.prom", export_format="prometheus"
+    )
+    json_file = metrics.write_metrics_file(
+        output_file=tmp_path / "metrics.json", export_format="json"
+    )
+
+    assert "requests_total 1" in prom_file.read_text()
+    assert '"type": "counter"' in json_file.read_text()
+    with pytest.raises(ValueError):
+        metrics.write_metrics_file(output_file=tmp_path / "x", export_format="xml")
+
+
+def test_repository_operations_are_timed(
+    registry: metrics.MetricsRegistry, db_session: so.Session
+):
+    location = location_model(db_session)
+
+    repo = LocationRepository(db_session)
+    repo.update(location, {"region": "City of London"})
+    repo.get(location.id)
+
+    operations = registry.counter("weathersched_db_operations_total")
+    durations = registry.histogram("weathersched_db_operation_duration_seconds")
+
+    labels = {"operation": "update", "model": LocationModel.__name__}
+    assert operations.value(**labels) == 1
+    assert durations.count(**labels) == 1
+    assert operations.value(operation="get", model=LocationModel.__name__) == 1
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import time
+
+from weathersched.collector import HashRing, PartitionCoordinator
+from weathersched.domain.collector_lease import CollectorLeaseRepository
+
+from factories import DAY_START
+from fake_weatherapi import location_queries
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+class FakeClock:
+    def __init__(self, now: float = DAY_START) -> None:
+        self.now: float = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_hash_ring_balances_and_moves_few_keys():
+    locations = location_queries(2000)
+    before = HashRing(["a", "b", "c"], vnodes=128)
+    after = HashRing(["a", "b", "c", "d"], vnodes=128)
+
+    sizes = [len(keys) for keys in after.partition(locations).values()]
+    assert sum(sizes) == len(locations)
+    assert max(sizes) < 2 * min(sizes)
+
+    moved = [key for key in locations if before.node_for(key) != after.node_for(key)]
+    ## Only keys claimed by the new node move
+    assert all(after.node_for(key) == "d" for key in moved)
+    assert len(moved) < len(locations) / 3
+
+
+def test_coordinators_split_locations(clean_db: sa.Engine):
+    clock = FakeClock()
+    session_pool = so.sessionmaker(bind=clean_db)
+    locations = location_queries(200)
+    nodes = [
+        PartitionCoordinator(
+            session_pool,
+            node_id=node_id,
+            ttl=30,
+            heartbeat_interval=10,
+            clock=clock,
+            lease_clock=clock,
+        )
+        for node_id in ("a", "b")
+    ]
+
+    for node in nodes:
+        node.heartbeat()
+    ## Joining nodes settle for two heartbeat intervals before taking work
+    assert [node.assigned(locations) for node in nodes] == [[], []]
+
+    clock.now += 10
+    assert [node.assigned(locations) for node in nodes] == [[], []]
+
+    clock.now += 10
+    assigned = [node.assigned(locations) for node in nodes]
+    assert sorted(assigned[0] + assigned[1]) == sorted(locations)
+    assert not set(assigned[0]) & set(assigned[1])
+
+    ## "b" leaves cleanly, "a" takes over everything at its next heartbeat
+    nodes[1].release()
+    clock.now += 10
+    assert nodes[0].assigned(locations) == locations
+    assert nodes[1].assigned(locations) == []
+
+
+def test_joining_node_never_overlaps_peers(clean_db: sa.Engine):
+    clock = FakeClock()
+    session_pool = so.sessionmaker(bind=clean_db)
+    locations = location_queries(200)
+
+    def coordinator(node_id: str) -> PartitionCoordinator:
+        return PartitionCoordinator(
+            session_pool,
+            node_id=node_id,
+            ttl=30,
+            heartbeat_interval=10,
+            clock=clock,
+            lease_clock=clock,
+        )
+
+    a = coordinator("a")
+    a.heartbeat()
+    clock.now += 20
+    assert a.assigned(locations) == locations
+
+    ## "b" joins just after "a" heartbeats, so "a" only sees it up to an interval later
+    clock.now += 1
+    b = coordinator("b")
+    for step in range(30):
+        clock.now += 1
+        if step % 10 == 9:
+            a.heartbeat()
+        claimed = [set(node.assigned(locations)) for node in (a, b)]
+
+        assert not claimed[0] & claimed[1]
+
+    assert sorted(a.assigned(locations) + b.assigned(locations)) == sorted(locations)
+
+
+def test_heartbeats_in_the_background(clean_db: sa.Engine):
+    session_pool = so.sessionmaker(bind=clean_db)
+    epochs: list[int] = []
+
+    def lease_clock() -> float:
+        epochs.append(DAY_START + len(epochs))
+
+        return epochs[-1]
+
+    with PartitionCoordinator(
+        session_pool,
+        node_id="a",
+        ttl=2,
+        heartbeat_interval=1,
+        lease_clock=lease_clock,
+    ):
+        deadline: float = time.monotonic() + 5
+        while len(epochs) < 3 and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    ## Renewed without assigned() being called, & released on exit
+    assert len(epochs) >= 3
+    with session_pool() as session:
+        assert CollectorLeaseRepository(session).get_by_node_id("a") is None
+
+
+def test_leases_use_database_time(clean_db: sa.Engine):
+    session_pool = so.sessionmaker(bind=clean_db)
+    ## Local clocks far apart, as on hosts with clock skew
+    nodes = [
+        PartitionCoordinator(
+            session_pool,
+            node_id=node_id,
+            ttl=30,
+            heartbeat_interval=10,
+            clock=FakeClock(DAY_START + offset),
+        )
+        for node_id, offset in (("a", 0), ("b", 3600))
+    ]
+    for node in nodes:
+        node.heartbeat()
+
+    with session_pool() as session:
+        repo = CollectorLeaseRepository(session)
+        db_now = repo.database_now()
+        leases = repo.get_live(now=db_now)
+
+    assert abs(db_now - time.time()) < 5
+    assert [lease.node_id for lease in leases] == ["a", "b"]
+    assert abs(leases[0].expires_epoch - leases[1].expires_epoch) <= 1
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from weathersched.collector import AdaptivePollingPolicy, poll_due
+
+from factories import DAY_START, current_weather_model, location_model
+from fake_weatherapi import FakeWeatherAPI
+import sqlalchemy.orm as so
+
+CALM: dict[str, float] = {
+    "temp_c": 10.0,
+    "humidity": 80.0,
+    "wind_kph": 5.0,
+    "precip_mm": 0.0,
+    "pressure_mb": 1010.0,
+}
+
+
+def policy() -> AdaptivePollingPolicy:
+    return AdaptivePollingPolicy(
+        min_interval=300,
+        max_interval=3600,
+        default_interval=900,
+        grace=60,
+        retry_delay=120,
+        backoff=2.0,
+        stable_threshold=1.0,
+    )
+
+
+def test_polls_after_predicted_refresh_and_backs_off_when_stable():
+    polling = policy()
+    polling.track("London", now=DAY_START)
+    assert polling.due(now=DAY_START) == ["London"]
+
+    ## First refresh: poll just after the next expected refresh
+    assert polling.observe("London", DAY_START, CALM, now=DAY_START + 30) == DAY_START + 900 + 60
+
+    ## Same observation again: WeatherAPI has not refreshed, retry shortly
+    assert polling.observe("London", DAY_START, CALM, now=DAY_START + 960) == DAY_START + 960 + 120
+
+    ## Stable refreshes back off exponentially, up to max_interval
+    epoch: int = DAY_START + 900
+    next_polls: list[int] = []
+    for _ in range(4):
+        next_polls.append(polling.observe("London", epoch, CALM, now=epoch + 30) - epoch)
+        epoch = next_polls[-1] - 60 + epoch
+
+    assert next_polls == [1800 + 60, 3600 + 60, 3600 + 60, 3600 + 60]
+
+    ## A significant change snaps back to the refresh interval
+    stormy: dict[str, float] = {**CALM, "wind_kph": 40.0}
+    assert polling.observe("London", epoch, stormy, now=epoch + 30) == epoch + 900 + 60
+
+
+def test_failed_polls_are_retried():
+    polling = policy()
+    polling.track("London", now=DAY_START)
+
+    assert polling.mark_failed("London", now=DAY_START) == DAY_START + 120
+    assert polling.due(now=DAY_START + 119) == []
+    assert polling.seconds_until_due(now=DAY_START + 100) == 20
+
+
+def test_load_history_learns_refresh_interval(db_session: so.Session):
+    location = location_model(db_session)
+    db_session.add_all(
+        [
+            current_weather_model(location.id, DAY_START + i * 1800, temp_c=float(i * 2))
+            for i in range(6)
+        ]
+    )
+    db_session.commit()
+
+    polling = policy()
+    now: int = DAY_START + 5 * 1800 + 10
+
+    assert polling.load_history(db_session, now=now) == 1
+    state = polling.states["London"]
+    assert state.location_id == location.id
+    assert 1500 < state.update_interval <= 1800
+    assert state.stable_streak == 0
+    assert state.next_poll_epoch == DAY_START + 5 * 1800 + int(state.update_interval) + 60
+
+
+def test_poll_due_feeds_responses_back(clean_db):
+    fake = FakeWeatherAPI()
+    polling = policy()
+    polling.track("London", now=DAY_START)
+    polling.track("Paris", now=DAY_START + 10_000)
+
+    results = poll_due(
+        polling,
+        now=DAY_START,
+        api_key="fake",
+        save_to_db=False,
+        transport=fake.transport(),
+    )
+
+    assert list(results) == ["London"]
+    assert fake.calls == 1
+    assert polling.states["London"].last_updated_epoch is not None
+    assert polling.states["London"].next_poll_epoch > DAY_START
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from weathersched.core import profiling
+
+import pytest
+
+def _stems(output_dir: Path) -> list[str]:
+    return sorted({p.name.split(".", 1)[0] for p in output_dir.iterdir()})
+
+
+def test_profile_block_writes_capture(tmp_path: Path):
+    with profiling.profile_block(
+        name="sweep", enabled=True, output_dir=str(tmp_path), trace_memory=True
+    ):
+        sum(range(1000))
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert len(files) == 2
+    assert files[0].startswith("sweep_") and files[0].endswith(".prof")
+    assert files[1].endswith(".tracemalloc.txt")
+    assert "allocation sites" in (tmp_path / files[1]).read_text()
+
+
+def test_profiled_keeps_newest_captures(tmp_path: Path):
+    for i in range(3):
+        (tmp_path / f"main_2024-01-0{i + 1}_00-00-00-000000.prof").touch()
+    (tmp_path / "other_2024-01-01_00-00-00-000000.prof").touch()
+
+    @profiling.profiled(name="main")
+    def main() -> int:
+        return 42
+
+    with profiling.profile_block(
+        name="main",
+        enabled=True,
+        output_dir=str(tmp_path),
+        trace_memory=False,
+        backup_count=2,
+    ):
+        assert main() == 42
+
+    stems = _stems(tmp_path)
+    assert "other_2024-01-01_00-00-00-000000" in stems
+    assert "main_2024-01-03_00-00-00-000000" in stems
+    assert len([s for s in stems if s.startswith("main_")]) == 2
+
+
+def test_rotate_captures_removes_all_files_of_old_captures(tmp_path: Path):
+    for day in (1, 2, 3):
+        stem = f"sweep_2024-01-0{day}_00-00-00-000000"
+        (tmp_path / f"{stem}.prof").touch()
+        (tmp_path / f"{stem}.tracemalloc.txt").touch()
+
+    profiling.rotate_captures(output_dir=tmp_path, name="sweep", backup_count=1)
+
+    assert _stems(tmp_path) == ["sweep_2024-01-03_00-00-00-000000"]
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_rotate_captures_skips_names_sharing_a_prefix(tmp_path: Path):
+    for day in (1, 2):
+        (tmp_path / f"sweep_2024-01-0{day}_00-00-00-000000.prof").touch()
+        (tmp_path / f"sweep_current_2024-01-0{day}_00-00-00-000000.prof").touch()
+
+    profiling.rotate_captures(output_dir=tmp_path, name="sweep", backup_count=1)
+
+    assert _stems(tmp_path) == [
+        "sweep_2024-01-02_00-00-00-000000",
+        "sweep_current_2024-01-01_00-00-00-000000",
+        "sweep_current_2024-01-02_00-00-00-000000",
+    ]
+
+
+@pytest.mark.skipif(os.geteuid() == 0, reason="root can write to read-only dirs")
+def test_unwritable_capture_dir_runs_unprofiled(tmp_path: Path):
+    tmp_path.chmod(0o500)
+    try:
+        with profiling.profile_block(
+            name="main", enabled=True, output_dir=str(tmp_path / "captures")
+        ):
+            ran = True
+    finally:
+        tmp_path.chmod(0o700)
+
+    assert ran
+
+
+def test_capture_dir_that_is_a_file_runs_unprofiled(tmp_path: Path):
+    output_dir = tmp_path / "captures"
+    output_dir.touch()
+
+    with profiling.profile_block(name="main", enabled=True, output_dir=str(output_dir)):
+        ran = True
+
+    assert ran
+    ## The lock is released, so the next capture is profiled
+    with profiling.profile_block(name="main", enabled=True, output_dir=str(tmp_path)):
+        pass
+    assert any(p.suffix == ".prof" for p in tmp_path.iterdir())
+
+
+def test_exceptions_in_block_propagate(tmp_path: Path):
+    with pytest.raises(RuntimeError):
+        with profiling.profile_block(
+            name="main", enabled=True, output_dir=str(tmp_path), trace_memory=False
+        ):
+            raise RuntimeError("boom")
+
+    assert any(p.suffix == ".prof" for p in tmp_path.iterdir())
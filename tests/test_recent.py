@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+from weathersched.domain.weather.current import CurrentWeatherIn
+from weathersched.ingest import recent
+from weathersched.ingest.recent import RecentObservations
+
+from factories import DAY_START
+from fake_weatherapi import load_fixture
+import numpy as np
+
+def observation(step: int, **overrides) -> CurrentWeatherIn:
+    current: dict = load_fixture("current.json")["current"]
+    current.update(last_updated_epoch=DAY_START + step * 900, **overrides)
+
+    return CurrentWeatherIn.model_validate(current)
+
+
+def test_keeps_the_last_hours_per_location(tmp_path):
+    path = tmp_path / "recent.bin"
+
+    with RecentObservations(path, max_locations=8, hours=2, resolution=900) as buffer:
+        assert buffer.slots == 8
+        assert buffer.write_many(
+            (location_id, observation(i, temp_c=float(i)))
+            for i in range(12)
+            for location_id in (1, 2)
+        ) == 24
+
+        ## Same observation again, & one older than its slot's current observation
+        assert not buffer.write(1, observation(11))
+        assert not buffer.write(1, observation(3))
+
+        buffer.clock = lambda: DAY_START + 11 * 900
+        rows = buffer.recent(1)
+        assert rows["temp_c"].tolist() == [float(i) for i in range(4, 12)]
+        assert rows["condition_code"][0] == observation(0).condition.code
+
+        assert len(buffer.recent(2, hours=0.5)) == 3
+        assert len(buffer.recent(3)) == 0
+
+        ## A location that stopped reporting keeps its slots, but they age out of the window
+        buffer.clock = lambda: DAY_START + 11 * 900 + 3 * 3600
+        assert len(buffer.recent(1)) == 0
+        assert buffer.latest(1) is None
+
+        ## Location IDs beyond the buffer are skipped
+        assert not buffer.write(8, observation(0))
+
+
+def test_missing_air_quality(tmp_path):
+    weather: CurrentWeatherIn = observation(0)
+    weather.air_quality = None
+
+    with RecentObservations(
+        tmp_path / "recent.bin", max_locations=2, clock=lambda: DAY_START
+    ) as buffer:
+        buffer.write(1, weather)
+        latest = buffer.latest(1)
+
+    assert np.isnan(latest["pm2_5"])
+    assert latest["us_epa_index"] == -1
+
+
+def test_readers_see_writes_without_reopening(tmp_path):
+    path = tmp_path / "recent.bin"
+    writer = RecentObservations(path, max_locations=4, hours=1)
+    reader = RecentObservations(path, readonly=True, clock=lambda: DAY_START + 900)
+    assert reader.slots == 4
+
+    writer.write(1, observation(0, temp_c=5.5))
+    assert reader.latest(1)["temp_c"] == 5.5
+
+    writer.write(1, observation(1, temp_c=6.5))
+    script: str = (
+        "from weathersched.ingest.recent import RecentObservations;"
+        f"print(RecentObservations({str(path)!r}, readonly=True, clock=lambda: {DAY_START + 900}).latest(1)['temp_c'])"
+    )
+    output: str = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == "6.5"
+
+    reader.close()
+    writer.close()
+
+
+def test_write_recent_is_disabled_by_default(tmp_path, monkeypatch):
+    assert recent.write_recent([(1, observation(0))]) == 0
+
+    monkeypatch.setattr(recent, "recent_buffer_enabled", lambda: True)
+    monkeypatch.setattr(
+        recent,
+        "get_recent_buffer",
+        lambda: RecentObservations(tmp_path / "recent.bin", max_locations=2),
+    )
+    assert recent.write_recent([(1, observation(0)), (5, observation(0))]) == 1
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from weathersched.domain.weather.current import (
+    CurrentWeatherModel,
+    CurrentWeatherRepository,
+)
+from weathersched.domain.weather.forecast import (
+    ForecastJSONModel,
+    ForecastJSONRepository,
+)
+
+from factories import DAY_START, current_weather_model, location_model
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+@pytest.fixture
+def observations(db_session: so.Session) -> list[int]:
+    london = location_model(db_session, "London")
+    paris = location_model(db_session, "Paris", lat=48.87, lon=2.33)
+
+    ## Two locations share every epoch, so epochs are not unique
+    db_session.add_all(
+        current_weather_model(location.id, DAY_START + i * 900)
+        for i in range(125)
+        for location in (london, paris)
+    )
+    db_session.commit()
+
+    return list(
+        db_session.scalars(
+            sa.select(CurrentWeatherModel.id).order_by(CurrentWeatherModel.id)
+        )
+    )
+
+
+def test_iter_batches_pages_by_primary_key(db_session: so.Session, observations):
+    repo = CurrentWeatherRepository(db_session)
+
+    batches = list(repo.iter_batches(batch_size=100))
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert [weather.id for batch in batches for weather in batch] == observations
+
+    ## Resume after the last key of the first batch
+    resumed = list(repo.iter_batches(batch_size=100, after=batches[0][-1].id))
+    assert [weather.id for batch in resumed for weather in batch] == observations[100:]
+
+
+def test_iter_batches_breaks_ties_on_non_unique_order(
+    db_session: so.Session, observations
+):
+    repo = CurrentWeatherRepository(db_session)
+
+    ## Batches of 3 split pairs of observations that share an epoch
+    seen = [
+        (weather.last_updated_epoch, weather.id)
+        for batch in repo.iter_batches(
+            batch_size=3, order_by=CurrentWeatherModel.last_updated_epoch
+        )
+        for weather in batch
+    ]
+
+    assert len(seen) == len(observations)
+    assert seen == sorted(seen)
+
+    after = seen[100]
+    resumed = [
+        (weather.last_updated_epoch, weather.id)
+        for batch in repo.iter_batches(
+            batch_size=7, order_by=CurrentWeatherModel.last_updated_epoch, after=after
+        )
+        for weather in batch
+    ]
+    assert resumed == seen[101:]
+
+
+def test_iter_batches_filters(db_session: so.Session, observations):
+    repo = CurrentWeatherRepository(db_session)
+    location_id = repo.get(observations[0]).location_id
+
+    batches = list(
+        repo.iter_batches(
+            batch_size=50, where=CurrentWeatherModel.location_id == location_id
+        )
+    )
+
+    assert sum(len(batch) for batch in batches) == 125
+
+
+def test_iter_batches_rejects_nullable_order_by(db_session: so.Session, observations):
+    with pytest.raises(ValueError, match="nullable"):
+        next(
+            ForecastJSONRepository(db_session).iter_batches(
+                order_by=ForecastJSONModel.forecast_hash
+            )
+        )
+
+    ## Expressions can't be checked up front, a page ending on NULL raises instead of restarting
+    repo = CurrentWeatherRepository(db_session)
+    with pytest.raises(ValueError, match="NULL"):
+        list(
+            repo.iter_batches(
+                batch_size=2,
+                order_by=sa.func.nullif(CurrentWeatherModel.last_updated_epoch, DAY_START),
+            )
+        )
+
+
+def test_stream_yields_partitions(db_session: so.Session, observations):
+    repo = CurrentWeatherRepository(db_session)
+
+    batches = list(repo.stream(batch_size=100))
+    assert [len(batch) for batch in batches] == [100, 100, 50]
+    assert [weather.id for batch in batches for weather in batch] == observations
+
+
+def test_counts(db_session: so.Session, observations):
+    repo = CurrentWeatherRepository(db_session)
+
+    assert repo.count() == 250
+    ## Exact count until the table has statistics
+    assert repo.approx_count() == 250
+
+    db_session.execute(sa.text("ANALYZE"))
+    db_session.add(current_weather_model(repo.get(observations[0]).location_id, 0))
+    db_session.commit()
+
+    ## Statistics are as of the last ANALYZE
+    assert repo.approx_count() == 250
+    assert repo.count() == 251
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import datetime as dt
+import gzip
+import json
+from pathlib import Path
+
+from weathersched.core.db import RetentionPolicy, apply_retention, retention
+from weathersched.domain.weather.current import (
+    CurrentWeatherConditionModel,
+    CurrentWeatherModel,
+)
+
+from factories import current_weather_model, location_model
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+NOW: dt.datetime = dt.datetime(2024, 11, 1, tzinfo=dt.timezone.utc)
+
+
+def test_batched_delete_removes_dependents_and_archives(
+    db_session: so.Session, tmp_path: Path
+):
+    old_epoch: int = int((NOW - dt.timedelta(days=40)).timestamp())
+    new_epoch: int = int((NOW - dt.timedelta(days=1)).timestamp())
+
+    location = location_model(db_session)
+    db_session.add_all(
+        [current_weather_model(location.id, old_epoch + i) for i in range(5)]
+        + [current_weather_model(location.id, new_epoch)]
+    )
+    db_session.commit()
+
+    policy = RetentionPolicy(
+        table="weatherapi_current_weather",
+        days=30,
+        time_column="last_updated_epoch",
+        archive=True,
+        batch_size=2,
+    )
+    results: dict = apply_retention(
+        engine=db_session.get_bind(), policies=[policy], now=NOW, archive_dir=tmp_path
+    )
+
+    assert results == {"weatherapi_current_weather": 5}
+    assert db_session.scalar(
+        sa.select(sa.func.count()).select_from(CurrentWeatherModel)
+    ) == 1
+    assert db_session.scalar(
+        sa.select(sa.func.count()).select_from(CurrentWeatherConditionModel)
+    ) == 1
+
+    archived: list[dict] = []
+    for archive_file in (tmp_path / "weatherapi_current_weather").glob("*.jsonl.gz"):
+        with gzip.open(archive_file, "rt") as f:
+            archived.extend(json.loads(line) for line in f)
+    assert sorted(row["last_updated_epoch"] for row in archived) == [
+        old_epoch + i for i in range(5)
+    ]
+    assert list((tmp_path / "weatherapi_current_condition").glob("*.jsonl.gz"))
+
+
+def test_failed_batch_is_not_archived(db_session: so.Session, tmp_path: Path):
+    old_epoch: int = int((NOW - dt.timedelta(days=40)).timestamp())
+
+    location = location_model(db_session)
+    db_session.add_all(
+        [current_weather_model(location.id, old_epoch + i) for i in range(3)]
+    )
+    db_session.commit()
+
+    policy = RetentionPolicy(
+        table="weatherapi_current_weather",
+        days=30,
+        time_column="last_updated_epoch",
+        archive=True,
+    )
+    engine: sa.Engine = db_session.get_bind()
+
+    def fail_delete(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("DELETE FROM weatherapi_current_weather "):
+            raise RuntimeError("connection lost")
+
+    sa.event.listen(engine, "before_cursor_execute", fail_delete)
+    try:
+        with pytest.raises(Exception):
+            apply_retention(
+                engine=engine, policies=[policy], now=NOW, archive_dir=tmp_path
+            )
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", fail_delete)
+
+    assert not list(tmp_path.rglob("*.jsonl.gz"))
+
+    apply_retention(engine=engine, policies=[policy], now=NOW, archive_dir=tmp_path)
+
+    with gzip.open(
+        next((tmp_path / "weatherapi_current_weather").glob("*.jsonl.gz")), "rt"
+    ) as f:
+        assert len(f.readlines()) == 3
+
+
+def test_partitioned_index_statements():
+    indexes = [
+        {
+            "name": "ix_forecast_location",
+            "definition": "CREATE INDEX ix_forecast_location ON public.forecast USING btree (location_id)",
+            "is_unique": False,
+            "is_expression": False,
+            "columns": ["location_id"],
+            "constraint_type": None,
+            "constraint_definition": None,
+        },
+        {
+            "name": "uq_forecast_location_time",
+            "definition": "CREATE UNIQUE INDEX uq_forecast_location_time ON public.forecast USING btree (location_id, created_at)",
+            "is_unique": True,
+            "is_expression": False,
+            "columns": ["location_id", "created_at"],
+            "constraint_type": "u",
+            "constraint_definition": "UNIQUE (location_id, created_at)",
+        },
+    ]
+    foreign_keys = [
+        {
+            "name": "forecast_location_id_fkey",
+            "definition": "FOREIGN KEY (location_id) REFERENCES location(id)",
+        }
+    ]
+
+    assert retention.partitioned_index_statements(
+        "forecast", "created_at", indexes, foreign_keys
+    ) == [
+        "CREATE INDEX ix_forecast_location ON public.forecast USING btree (location_id)",
+        'ALTER TABLE "forecast" ADD CONSTRAINT "uq_forecast_location_time" UNIQUE (location_id, created_at)',
+        'ALTER TABLE "forecast" ADD CONSTRAINT "forecast_location_id_fkey" FOREIGN KEY (location_id) REFERENCES location(id)',
+    ]
+
+    ## A unique index without the partition key cannot be enforced across partitions
+    unique_hash = dict(indexes[1], name="uq_forecast_hash", columns=["forecast_hash"])
+    with pytest.raises(ValueError, match="uq_forecast_hash"):
+        retention.partitioned_index_statements("forecast", "created_at", [unique_hash])
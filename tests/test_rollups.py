@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import datetime as dt
+import time
+
+from weathersched.domain.location import LocationModel
+from weathersched.domain.watermark import WatermarkRepository
+from weathersched.domain.weather.current import CurrentWeatherModel
+from weathersched.domain.weather.rollups import (
+    CurrentWeatherDailyRollupRepository,
+    CurrentWeatherHourlyRollupRepository,
+    refresh_current_weather_rollups,
+)
+
+import pytest
+import sqlalchemy.orm as so
+
+## 2024-11-01 00:00:00 UTC
+DAY_START: int = 1730419200
+
+
+def _location(session: so.Session) -> LocationModel:
+    location = LocationModel(
+        name="London",
+        region="City of London, Greater London",
+        country="United Kingdom",
+        lat=51.52,
+        lon=-0.11,
+        tz_id="Europe/London",
+        localtime_epoch=DAY_START,
+        localtime="2024-11-01 00:00",
+    )
+    session.add(location)
+    session.commit()
+
+    return location
+
+
+def _observation(location_id: int, epoch: int, temp_c: float) -> CurrentWeatherModel:
+    fields: dict = {
+        name: 0
+        for name in CurrentWeatherModel.__table__.columns.keys()
+        if name not in ("id", "location_id", "last_updated", "wind_dir")
+    }
+    fields.update(
+        {
+            "location_id": location_id,
+            "last_updated_epoch": epoch,
+            "last_updated": "",
+            "wind_dir": "N",
+            "temp_c": temp_c,
+            "humidity": 50,
+            "wind_kph": 10,
+            "precip_mm": 0.5,
+        }
+    )
+
+    return CurrentWeatherModel(**fields)
+
+
+def test_rollups_are_incremental(db_session: so.Session):
+    location = _location(db_session)
+
+    db_session.add_all(
+        [
+            _observation(location.id, DAY_START + 0, 10),
+            _observation(location.id, DAY_START + 900, 12),
+            _observation(location.id, DAY_START + 3600, 20),
+        ]
+    )
+    db_session.commit()
+
+    assert refresh_current_weather_rollups(session=db_session) == 3
+    ## Nothing new since the watermark
+    assert refresh_current_weather_rollups(session=db_session) == 0
+
+    hourly = CurrentWeatherHourlyRollupRepository(db_session).get_range(location.id)
+    assert [bucket.bucket_start_epoch for bucket in hourly] == [
+        DAY_START,
+        DAY_START + 3600,
+    ]
+    assert hourly[0].sample_count == 2
+    assert hourly[0].temp_c_avg == pytest.approx(11)
+    assert hourly[0].precip_mm_sum == pytest.approx(1.0)
+
+    ## A late observation for the first hour is folded into the existing bucket
+    db_session.add(_observation(location.id, DAY_START + 1800, 5))
+    db_session.commit()
+
+    assert refresh_current_weather_rollups(session=db_session, batch_size=1) == 1
+
+    first_hour = CurrentWeatherHourlyRollupRepository(db_session).get_by_bucket(
+        location.id, DAY_START
+    )
+    assert first_hour.sample_count == 3
+    assert first_hour.temp_c_min == 5
+    assert first_hour.temp_c_max == 12
+
+    daily = CurrentWeatherDailyRollupRepository(db_session).get_range(
+        location.id, start_epoch=DAY_START, end_epoch=DAY_START + 86400
+    )
+    assert len(daily) == 1
+    assert daily[0].sample_count == 4
+    assert daily[0].temp_c_max == 20
+
+
+def test_rollups_wait_for_ids_to_settle(db_session: so.Session):
+    location = _location(db_session)
+    now = dt.datetime(2024, 11, 1, 12, tzinfo=dt.timezone.utc)
+
+    db_session.add(_observation(location.id, DAY_START, 10))
+    db_session.commit()
+
+    ## The first run only samples the max ID
+    assert refresh_current_weather_rollups(db_session, settle_seconds=60, now=now) == 0
+    assert (
+        refresh_current_weather_rollups(
+            db_session, settle_seconds=60, now=now + dt.timedelta(seconds=30)
+        )
+        == 0
+    )
+
+    db_session.add(_observation(location.id, DAY_START + 60, 12))
+    db_session.commit()
+
+    ## Only the settled sample is folded in, the new observation waits for the next run
+    now += dt.timedelta(seconds=61)
+    assert refresh_current_weather_rollups(db_session, settle_seconds=60, now=now) == 1
+
+    now += dt.timedelta(seconds=61)
+    assert refresh_current_weather_rollups(db_session, settle_seconds=60, now=now) == 1
+
+    hourly = CurrentWeatherHourlyRollupRepository(db_session).get_range(location.id)
+    assert hourly[0].sample_count == 2
+
+
+def test_watermark_timestamps_are_utc(
+    db_session: so.Session, monkeypatch: pytest.MonkeyPatch
+):
+    ## A local time zone far from UTC, so naive local timestamps would be hours off
+    monkeypatch.setenv("TZ", "Asia/Tokyo")
+    time.tzset()
+    try:
+        repo = WatermarkRepository(db_session)
+        for value in (1, 2):
+            before = dt.datetime.now(tz=dt.timezone.utc)
+            updated_at = repo.set_value("job", value).updated_at
+            if updated_at.tzinfo is None:
+                ## SQLite does not store the offset
+                updated_at = updated_at.replace(tzinfo=dt.timezone.utc)
+
+            assert abs(updated_at - before) < dt.timedelta(minutes=1)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+from pathlib import Path
+import sqlite3
+
+from weathersched import cli
+from weathersched.core.depends import db_depends
+from weathersched.domain.weather.current import CurrentWeatherModel
+from weathersched.domain.weather.forecast import ForecastJSONModel
+from weathersched.domain.weather.weather_alerts import WeatherAlertModel
+from weathersched.ingest import (
+    CURRENT_WEATHER,
+    FORECAST,
+    Spool,
+    SpoolDrainer,
+    current_weather_payload,
+    drainer,
+    forecast_payload,
+)
+from weathersched.remote_apis.weatherapi_client import client
+from weathersched.remote_apis.weatherapi_client.client import (
+    current as current_client,
+    forecast as forecast_client,
+)
+
+from fake_weatherapi import FakeWeatherAPI, location_queries
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+@pytest.fixture
+def spool(tmp_path: Path):
+    with Spool(tmp_path / "spool.sqlite3", max_attempts=2) as spool:
+        yield spool
+
+
+def spool_responses(spool: Spool, fake: FakeWeatherAPI, count: int) -> None:
+    for query in location_queries(count):
+        response = client.get_current_weather(
+            location=query, api_key="fake", save_to_db=False, transport=fake.transport()
+        )
+        spool.append(
+            CURRENT_WEATHER,
+            current_weather_payload(response.location, response.weather),
+        )
+
+
+def test_failed_payloads_become_dead_letters(spool: Spool):
+    spool.append_many(CURRENT_WEATHER, [{"n": 1}, {"n": 2}])
+
+    records = spool.claim(CURRENT_WEATHER)
+    assert [record.payload for record in records] == [{"n": 1}, {"n": 2}]
+
+    spool.ack([records[0].id])
+    assert spool.retry([records[1].id], error="bad") == 0
+    assert spool.retry([records[1].id], error="bad") == 1
+
+    assert len(spool) == 0
+    assert [record.payload for record in spool.dead_letters()] == [{"n": 2}]
+    assert spool.requeue_dead() == 1
+    assert len(spool) == 1
+
+
+def test_failed_retry_rolls_back(spool: Spool):
+    spool.append(CURRENT_WEATHER, {"n": 1})
+    spool_id: int = spool.claim(CURRENT_WEATHER)[0].id
+    spool._conn.execute(
+        "CREATE TRIGGER fail_retry BEFORE UPDATE ON spool WHEN NEW.last_error = 'fail' "
+        "BEGIN SELECT RAISE(ABORT, 'update failed'); END"
+    )
+
+    with pytest.raises(sqlite3.IntegrityError):
+        spool.retry([spool_id], error="fail")
+
+    ## The connection is not left inside the failed transaction
+    spool.append(CURRENT_WEATHER, {"n": 2})
+    assert spool.retry([spool_id], error="bad") == 0
+    assert len(spool) == 2
+
+
+def test_drainer_saves_spooled_observations_in_batches(
+    db_session: so.Session, spool: Spool, fake_weatherapi: FakeWeatherAPI
+):
+    spool_responses(spool, fake_weatherapi, 5)
+
+    drainer = SpoolDrainer(
+        session_pool=db_depends.get_session_pool(), spool=spool, batch_size=2
+    )
+
+    assert drainer.drain() == 5
+    assert len(spool) == 0
+    assert db_session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 5
+
+
+def test_drainer_keeps_payloads_while_database_is_down(
+    db_session: so.Session,
+    spool: Spool,
+    fake_weatherapi: FakeWeatherAPI,
+    tmp_path: Path,
+):
+    spool_responses(spool, fake_weatherapi, 3)
+    unreachable = db_depends.get_session_pool(
+        engine=sa.create_engine(f"sqlite:///{tmp_path / 'missing' / 'db.sqlite3'}")
+    )
+
+    drainer = SpoolDrainer(session_pool=unreachable, spool=spool, interval=1)
+    assert drainer.drain() == 0
+    assert drainer.drain() == 0
+    assert drainer.backoff == 2
+
+    ## Outages don't count against the payloads' attempts
+    assert len(spool) == 3
+    assert spool.dead_letters() == []
+
+    drainer.session_pool = db_depends.get_session_pool()
+    spool.clock = lambda: 2**40
+    assert drainer.drain() == 3
+    assert drainer.backoff == 0
+
+
+def test_get_current_weather_spools_instead_of_saving(
+    db_session: so.Session,
+    spool: Spool,
+    fake_weatherapi: FakeWeatherAPI,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    monkeypatch.setattr(current_client, "get_spool", lambda: spool)
+
+    client.get_current_weather(
+        location="London",
+        api_key="fake",
+        use_spool=True,
+        transport=fake_weatherapi.transport(),
+    )
+
+    assert db_session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 0
+    assert len(spool) == 1
+
+
+def test_get_current_weather_spools_when_saving_fails(
+    db_session: so.Session,
+    spool: Spool,
+    fake_weatherapi: FakeWeatherAPI,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def database_down(**kwargs):
+        raise sa.exc.OperationalError("INSERT", {}, Exception("database is down"))
+
+    monkeypatch.setattr(current_client, "get_spool", lambda: spool)
+    monkeypatch.setattr(current_client, "save_current_weather", database_down)
+
+    response = client.get_current_weather(
+        location="London", api_key="fake", transport=fake_weatherapi.transport()
+    )
+
+    assert response is not None
+    assert len(spool) == 1
+
+
+def test_replayed_forecast_batch_is_not_duplicated(
+    db_session: so.Session, spool: Spool, fake_weatherapi: FakeWeatherAPI
+):
+    response = client.get_weather_forecast(
+        location="London",
+        api_key="fake",
+        include_alerts=True,
+        save_to_db=False,
+        transport=fake_weatherapi.transport(),
+    )
+    payload = forecast_payload(
+        response.location, response.forecast.forecast_json, response.alerts
+    )
+
+    ## The same payload spooled twice, like a batch saved again after a crash before it was acknowledged
+    spool.append_many(FORECAST, [payload, payload])
+    assert SpoolDrainer(session_pool=db_depends.get_session_pool(), spool=spool).drain() == 2
+
+    spool.append(FORECAST, payload)
+    assert SpoolDrainer(session_pool=db_depends.get_session_pool(), spool=spool).drain() == 1
+
+    assert db_session.scalar(sa.select(sa.func.count(ForecastJSONModel.id))) == 1
+    assert db_session.scalar(sa.select(sa.func.count(WeatherAlertModel.id))) == 1
+
+
+def test_get_weather_forecast_spools_when_saving_fails(
+    db_session: so.Session,
+    spool: Spool,
+    fake_weatherapi: FakeWeatherAPI,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    def database_down(*args, **kwargs):
+        raise sa.exc.OperationalError("INSERT", {}, Exception("database is down"))
+
+    monkeypatch.setattr(forecast_client, "get_spool", lambda: spool)
+    monkeypatch.setattr(forecast_client, "save_forecast", database_down)
+
+    response = client.get_weather_forecast(
+        location="London", api_key="fake", transport=fake_weatherapi.transport()
+    )
+
+    assert response is not None
+    assert spool.depth(FORECAST) == 1
+
+    assert SpoolDrainer(session_pool=db_depends.get_session_pool(), spool=spool).drain() == 1
+    assert db_session.scalar(sa.select(sa.func.count(ForecastJSONModel.id))) == 1
+
+
+def test_drain_command_once(
+    db_session: so.Session,
+    spool: Spool,
+    fake_weatherapi: FakeWeatherAPI,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    spool_responses(spool, fake_weatherapi, 3)
+    monkeypatch.setattr(drainer, "get_spool", lambda: spool)
+
+    args = cli.build_parser().parse_args(["drain", "--once"])
+
+    assert cli.run_drain_command(args) == 0
+    assert len(spool) == 0
+    assert db_session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 3
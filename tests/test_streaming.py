@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from weathersched.core import http_lib
+from weathersched.remote_apis.weatherapi_client import client
+
+from fake_weatherapi import FakeWeatherAPI
+import httpx
+import pytest
+
+@pytest.mark.parametrize("use_ijson", [True, False])
+def test_stream_json_items(fake_weatherapi: FakeWeatherAPI, use_ijson: bool):
+    if use_ijson:
+        pytest.importorskip("ijson")
+
+    request = client.requests.return_weather_forecast_request(
+        api_key="fake", location="London", days=3
+    )
+
+    with http_lib.get_http_controller(
+        use_cache=False, transport=fake_weatherapi.transport()
+    ) as http:
+        hours = list(
+            http_lib.stream_json_items(
+                http.client,
+                request,
+                prefix="forecast.forecastday.item.hour.item",
+                chunk_size=512,
+                use_ijson=use_ijson,
+            )
+        )
+
+    assert len(hours) == 72
+    assert isinstance(hours[0]["temp_c"], float)
+    assert hours[24]["time_epoch"] == hours[0]["time_epoch"] + 86400
+
+
+def test_stream_weather_forecast_days_and_errors(fake_weatherapi: FakeWeatherAPI):
+    days = list(
+        client.stream_weather_forecast(
+            location="London",
+            api_key="fake",
+            days=10,
+            transport=fake_weatherapi.transport(),
+        )
+    )
+    assert len(days) == 10
+
+    with pytest.raises(httpx.HTTPStatusError):
+        list(
+            client.stream_weather_forecast(
+                location="London", api_key="", transport=fake_weatherapi.transport()
+            )
+        )
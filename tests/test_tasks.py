@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from weathersched.domain.location import LocationModel
+from weathersched.domain.weather.current import CurrentWeatherModel
+from weathersched.domain.weather.forecast import ForecastJSONModel
+from weathersched.domain.weather.weather_alerts import WeatherAlertModel
+from weathersched.tasks import (
+    CURRENT_QUEUE,
+    PERSIST_QUEUE,
+    celery_app,
+    collect_current_weather,
+    collect_weather_forecast,
+    create_celery_app,
+    fetch_current,
+    persist_current,
+    set_transport,
+)
+
+from fake_weatherapi import FakeWeatherAPI, location_queries
+import httpx
+import pytest
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+@pytest.fixture
+def eager_tasks(fake_weatherapi: FakeWeatherAPI):
+    previous: dict = {
+        key: celery_app.conf[key]
+        for key in (
+            "broker_url",
+            "result_backend",
+            "task_always_eager",
+            "task_eager_propagates",
+        )
+    }
+    celery_app.conf.update(
+        broker_url="memory://",
+        result_backend="cache+memory://",
+        task_always_eager=True,
+    )
+    set_transport(fake_weatherapi.transport())
+
+    yield fake_weatherapi
+
+    set_transport(None)
+    celery_app.conf.update(previous)
+
+
+def test_tasks_are_routed_by_job_type():
+    assert celery_app.amqp.router.route({}, fetch_current.name)["queue"].name == (
+        CURRENT_QUEUE
+    )
+    assert celery_app.amqp.router.route({}, persist_current.name)["queue"].name == (
+        PERSIST_QUEUE
+    )
+
+
+def test_fetch_current_returns_compact_payload(eager_tasks: FakeWeatherAPI):
+    payload = fetch_current.delay("London", api_key="fake").get()
+
+    assert set(payload) == {"location", "weather"}
+    assert payload["location"]["name"] == "London"
+
+
+def test_collect_current_weather_persists_each_batch(
+    db_session: so.Session, eager_tasks: FakeWeatherAPI
+):
+    queries = location_queries(5)
+
+    results = collect_current_weather(queries, batch_size=2, api_key="fake")
+
+    assert [result.get() for result in results] == [2, 2, 1]
+    assert eager_tasks.calls == 5
+    assert db_session.scalar(sa.select(sa.func.count(LocationModel.id))) == 5
+    assert db_session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 5
+
+
+def test_collect_weather_forecast_persists_alerts_once(
+    db_session: so.Session, eager_tasks: FakeWeatherAPI
+):
+    results = collect_weather_forecast(
+        ["London", "London"], include_alerts=True, api_key="fake"
+    )
+
+    assert [result.get() for result in results] == [2]
+    assert db_session.scalar(sa.select(sa.func.count(ForecastJSONModel.id))) == 2
+    assert db_session.scalar(sa.select(sa.func.count(LocationModel.id))) == 1
+    assert set(db_session.scalars(sa.select(ForecastJSONModel.location_id))) == {
+        db_session.scalar(sa.select(LocationModel.id))
+    }
+    assert db_session.scalar(sa.select(sa.func.count(WeatherAlertModel.id))) == 1
+
+
+def test_failed_fetch_does_not_drop_the_batch(
+    db_session: so.Session, eager_tasks: FakeWeatherAPI
+):
+    queries = location_queries(3)
+    attempts: list[str] = []
+
+    def handle(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("q") == queries[1]:
+            attempts.append(queries[1])
+            raise httpx.ConnectError("Connection refused", request=request)
+
+        return eager_tasks.handle(request)
+
+    set_transport(httpx.MockTransport(handle))
+    ## Run eager retries, like a worker would, instead of raising celery.exceptions.Retry
+    celery_app.conf.task_eager_propagates = False
+
+    results = collect_current_weather(queries, api_key="fake")
+
+    assert [result.get() for result in results] == [2]
+    ## The first attempt & every retry
+    assert len(attempts) == fetch_current.max_retries + 1
+    assert db_session.scalar(sa.select(sa.func.count(CurrentWeatherModel.id))) == 2
+
+
+def test_configured_result_backend_starts_on_a_fresh_checkout(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.chdir(tmp_path)
+
+    app = create_celery_app(broker_url="memory://")
+    app.backend.store_result("task-id", 2, "SUCCESS")
+
+    assert app.backend.get_task_meta("task-id")["result"] == 2
+    assert (tmp_path / ".celery" / "results.sqlite3").exists()
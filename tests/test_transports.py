@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import socket
+
+from weathersched.core import http_lib
+from weathersched.core.http_lib import transports
+
+import httpx
+
+def test_parse_socket_options_by_name():
+    assert transports.parse_socket_options(
+        [["SOL_SOCKET", "SO_KEEPALIVE", 1], ["SOL_SOCKET", "SO_NOT_AN_OPTION", 1]]
+    ) == [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    assert transports.parse_socket_options([]) is None
+
+
+def test_http2_falls_back_without_h2(monkeypatch):
+    monkeypatch.setattr(transports, "h2_available", lambda: False)
+
+    transport = http_lib.build_http_transport(http2=True, retries=2)
+
+    assert isinstance(transport, httpx.HTTPTransport)
+    assert transport._pool._http2 is False
+    assert transport._pool._retries == 2
+
+
+class _RecordingTransport(httpx.MockTransport):
+    def __init__(self) -> None:
+        super().__init__(lambda request: httpx.Response(200))
+        self.closed: int = 0
+
+    def close(self) -> None:
+        self.closed += 1
+
+
+def test_shared_transport_survives_client_close():
+    recording = _RecordingTransport()
+
+    with http_lib.shared_transport(transport=recording) as transport:
+        for _ in range(3):
+            with http_lib.get_http_controller(
+                use_cache=False, transport=transport
+            ) as http:
+                assert http.client.get("https://example.com").status_code == 200
+
+        assert recording.closed == 0
+
+    assert recording.closed == 1
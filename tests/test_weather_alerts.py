@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import datetime as dt
+
+from weathersched.domain.location import LocationModel
+from weathersched.domain.weather.weather_alerts import (
+    WeatherAlertModel,
+    WeatherAlertRepository,
+)
+from weathersched.remote_apis.weatherapi_client import client
+
+from fake_weatherapi import FakeWeatherAPI
+import sqlalchemy as sa
+import sqlalchemy.orm as so
+
+def test_forecast_alerts_are_saved_once(
+    db_session: so.Session, fake_weatherapi: FakeWeatherAPI
+):
+    for _ in range(2):
+        client.get_weather_forecast(
+            location="London",
+            api_key="fake",
+            include_alerts=True,
+            transport=fake_weatherapi.transport(),
+        )
+
+    alerts = db_session.scalars(sa.select(WeatherAlertModel)).all()
+    assert len(alerts) == 1
+    assert alerts[0].description == "Dense fog is expected to form during the evening."
+
+    location_id: int = db_session.scalars(sa.select(LocationModel.id)).one()
+    repo = WeatherAlertRepository(db_session)
+
+    before_expiry = dt.datetime(2024, 11, 2, 9, tzinfo=dt.timezone.utc)
+    after_expiry = dt.datetime(2024, 11, 2, 11, tzinfo=dt.timezone.utc)
+    assert len(repo.get_active(location_id, now=before_expiry)) == 1
+    assert repo.get_active(location_id, now=after_expiry) == []
+
+
+def test_alerts_are_not_requested_when_disabled(
+    db_session: so.Session, fake_weatherapi: FakeWeatherAPI
+):
+    client.get_weather_forecast(
+        location="London",
+        api_key="fake",
+        include_alerts=False,
+        transport=fake_weatherapi.transport(),
+    )
+
+    assert db_session.scalars(sa.select(WeatherAlertModel)).all() == []